@@ -12,7 +12,7 @@ from typing import Dict, Any, Optional
 from fastapi import FastAPI, Request, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from prometheus_client import (
     Counter,
     Histogram,
@@ -23,6 +23,15 @@ from prometheus_client import (
 import httpx
 import redis.asyncio as redis
 
+from common.clients.response_cache import CachedResponse, ResponseCache
+from common.clients.upstream_proxy import (
+    ProxyRoute,
+    RouteTable,
+    UpstreamPool,
+    build_upstream_request,
+    has_body,
+    stream_response,
+)
 from common.config.settings import settings
 from common.middleware.auth import auth_middleware, require_auth
 from common.models.base import (
@@ -48,6 +57,16 @@ REQUEST_DURATION = Histogram(
     "api_gateway_request_duration_seconds", "Request duration", ["method", "endpoint"]
 )
 ACTIVE_REQUESTS = Gauge("api_gateway_active_requests", "Active requests", ["service"])
+CACHE_REQUESTS = Counter(
+    "api_gateway_cache_requests_total",
+    "Response cache lookups (hit, miss, revalidated, coalesced)",
+    ["route", "result"],
+)
+CACHE_INVALIDATIONS = Counter(
+    "api_gateway_cache_invalidations_total",
+    "Response cache invalidations after mutating requests",
+    ["route"],
+)
 
 # Service registry
 SERVICE_REGISTRY = {
@@ -226,6 +245,54 @@ SERVICE_REGISTRY = {
     },
 }
 
+# Default freshness for cached read-only routes when upstreams send no max-age
+CACHE_TTL_S = 30.0
+# Cache namespace of the composite /health/* dashboard endpoints; any
+# mutation through the gateway invalidates it along with its own prefix.
+COMPOSITE_CACHE_NAMESPACE = "/health"
+# Client validators are answered by the gateway cache, not forwarded.
+CONDITIONAL_HEADERS = ("if-none-match", "if-modified-since")
+
+# Public path prefix -> registry service; each prefix is proxied as-is
+# (``/nutrition/meals?day=1`` -> ``{nutrition url}/meals?day=1``).
+PROXY_ROUTES = RouteTable(
+    [
+        ProxyRoute("/ai-reasoning", "ai_reasoning_orchestrator"),
+        ProxyRoute("/graphql", "graphql_bff", cache_ttl_s=CACHE_TTL_S),
+        ProxyRoute("/ai-insights", "ai_insights"),
+        ProxyRoute("/medical-records", "medical_records"),
+        ProxyRoute("/nutrition", "nutrition"),
+        ProxyRoute("/device-data", "device_data", cache_ttl_s=CACHE_TTL_S),
+        ProxyRoute("/auth", "auth"),
+        ProxyRoute("/user-profile", "user_profile"),
+        ProxyRoute("/health-tracking", "health_tracking", cache_ttl_s=CACHE_TTL_S),
+        ProxyRoute("/voice-input", "voice_input"),
+        ProxyRoute("/medical-analysis", "medical_analysis"),
+        ProxyRoute("/health-analysis", "health_analysis"),
+        ProxyRoute("/consent-audit", "consent_audit"),
+        ProxyRoute("/knowledge-graph", "knowledge_graph"),
+        ProxyRoute("/doctor-collaboration", "doctor_collaboration"),
+        ProxyRoute("/genomics", "genomics"),
+        ProxyRoute("/analytics", "analytics"),
+        ProxyRoute("/ecommerce", "ecommerce"),
+        ProxyRoute("/explainability", "explainability"),
+    ]
+)
+
+# Long-lived HTTP/2-capable client per upstream, closed in the lifespan
+upstream_pool = UpstreamPool()
+
+# Per-user GET cache; gains a Redis tier once the lifespan connects
+response_cache = ResponseCache()
+
+
+def _upstream_client(service_name: str) -> httpx.AsyncClient:
+    service_config = SERVICE_REGISTRY[service_name]
+    return upstream_pool.client(
+        service_name, service_config["url"], service_config["timeout"].timeout
+    )
+
+
 # Rate limiting
 RATE_LIMIT_STORE = {}
 RATE_LIMIT_REQUESTS = settings.RATE_LIMIT_PER_MINUTE
@@ -249,6 +316,7 @@ async def lifespan(app: FastAPI):
         )
         await redis_client.ping()
         logger.info("Redis client initialized successfully")
+        response_cache.redis = redis_client
     except Exception as e:
         logger.warning(f"Failed to initialize Redis client: {e}")
         redis_client = None
@@ -260,6 +328,8 @@ async def lifespan(app: FastAPI):
 
     # Shutdown
     logger.info("Shutting down API Gateway...")
+    await upstream_pool.aclose()
+    response_cache.redis = None
     if redis_client:
         await redis_client.close()
 
@@ -351,29 +421,10 @@ app.add_middleware(RequestContextMiddleware)
 
 def get_service_from_path(path: str) -> Optional[str]:
     """Determine service from request path"""
-    if path.startswith("/auth"):
-        return "auth"
-    elif path.startswith("/user-profile"):
-        return "user_profile"
-    elif path.startswith("/health-tracking"):
-        return "health_tracking"
-    elif path.startswith("/ai-reasoning"):
-        return "ai_reasoning_orchestrator"
-    elif path.startswith("/graphql"):
-        return "graphql_bff"
-    elif path.startswith("/ai-insights"):
-        return "ai_insights"
-    elif path.startswith("/medical-records"):
-        return "medical_records"
-    elif path.startswith("/nutrition"):
-        return "nutrition"
-    elif path.startswith("/device-data"):
-        return "device_data"
-    elif path.startswith("/ecommerce"):
-        return "ecommerce"
-    elif path.startswith("/explainability"):
-        return "explainability"
-    elif path.startswith("/health"):  # Composite health endpoints
+    route = PROXY_ROUTES.match(path)
+    if route:
+        return route.service
+    if path.startswith("/health"):  # Composite health endpoints
         return "composite"
     return None
 
@@ -441,16 +492,15 @@ async def health_check_services():
 
     for service_name, service_config in SERVICE_REGISTRY.items():
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(
-                    f"{service_config['url']}{service_config['health_check']}"
+            response = await _upstream_client(service_name).get(
+                service_config["health_check"], timeout=5.0
+            )
+            if response.status_code == 200:
+                logger.info(f"Service {service_name} is healthy")
+            else:
+                logger.warning(
+                    f"Service {service_name} health check failed: {response.status_code}"
                 )
-                if response.status_code == 200:
-                    logger.info(f"Service {service_name} is healthy")
-                else:
-                    logger.warning(
-                        f"Service {service_name} health check failed: {response.status_code}"
-                    )
         except Exception as e:
             logger.error(f"Service {service_name} health check error: {e}")
 
@@ -488,37 +538,24 @@ async def forward_request(
     if user_agent:
         forward_headers["User-Agent"] = user_agent
 
-    # Build target URL
-    target_url = f"{service_config['url']}{path}"
+    method = method.upper()
+    if method not in ("GET", "POST", "PUT", "DELETE", "PATCH"):
+        raise ValueError(f"Unsupported HTTP method: {method}")
+    client = _upstream_client(service_name)
 
     # Apply resilience patterns
     async def make_request():
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            if method.upper() == "GET":
-                response = await client.get(target_url, headers=forward_headers)
-            elif method.upper() == "POST":
-                response = await client.post(
-                    target_url, json=data, headers=forward_headers
-                )
-            elif method.upper() == "PUT":
-                response = await client.put(
-                    target_url, json=data, headers=forward_headers
-                )
-            elif method.upper() == "DELETE":
-                response = await client.delete(target_url, headers=forward_headers)
-            elif method.upper() == "PATCH":
-                response = await client.patch(
-                    target_url, json=data, headers=forward_headers
-                )
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            return response
+        return await client.request(
+            method,
+            path,
+            json=data if method in ("POST", "PUT", "PATCH") else None,
+            headers=forward_headers,
+        )
 
     # Apply circuit breaker, retry, and timeout
     try:
         response = await service_config["circuit_breaker"].call(
-            service_config["retry"].call(service_config["timeout"].call(make_request))
+            service_config["retry"].call, service_config["timeout"].call, make_request
         )
         return response
     except Exception as e:
@@ -611,11 +648,10 @@ async def readiness_check():
     service_status = {}
     for service_name, service_config in SERVICE_REGISTRY.items():
         try:
-            async with httpx.AsyncClient(timeout=5.0) as client:
-                response = await client.get(
-                    f"{service_config['url']}{service_config['health_check']}"
-                )
-                service_status[service_name] = response.status_code == 200
+            response = await _upstream_client(service_name).get(
+                service_config["health_check"], timeout=5.0
+            )
+            service_status[service_name] = response.status_code == 200
         except:
             service_status[service_name] = False
 
@@ -637,6 +673,31 @@ async def metrics():
 
 
 # Composite health endpoints
+async def _composite_get(request: Request, service_name: str, path: str) -> Response:
+    """GET a composite upstream, through the response cache for identified callers"""
+
+    async def load(upstream_etag: Optional[str] = None) -> httpx.Response:
+        return await forward_request(
+            request=request,
+            service_name=service_name,
+            path=path,
+            method="GET",
+            headers={"If-None-Match": upstream_etag} if upstream_etag else None,
+        )
+
+    partition = response_cache.partition(request.headers.get("Authorization"))
+    if partition is None:
+        response = await load()
+        return JSONResponse(
+            content=response.json(),
+            status_code=response.status_code,
+            headers=dict(response.headers),
+        )
+    return await _load_cached(
+        request, COMPOSITE_CACHE_NAMESPACE, partition, load, CACHE_TTL_S
+    )
+
+
 @app.post("/health/analyze-symptoms")
 async def analyze_symptoms_composite(request: Request):
     """
@@ -721,17 +782,8 @@ async def daily_summary_composite(request: Request):
             )
 
         # Forward to AI Reasoning Orchestrator
-        response = await forward_request(
-            request=request,
-            service_name="ai_reasoning_orchestrator",
-            path="/api/v1/insights/daily-summary",
-            method="GET",
-        )
-
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
+        return await _composite_get(
+            request, "ai_reasoning_orchestrator", "/api/v1/insights/daily-summary"
         )
 
     except Exception as e:
@@ -864,17 +916,8 @@ async def unified_dashboard_composite(request: Request):
             )
 
         # Forward to GraphQL BFF
-        response = await forward_request(
-            request=request,
-            service_name="graphql_bff",
-            path="/api/v1/health/daily-summary",
-            method="GET",
-        )
-
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
+        return await _composite_get(
+            request, "graphql_bff", "/api/v1/health/daily-summary"
         )
 
     except Exception as e:
@@ -889,921 +932,130 @@ async def unified_dashboard_composite(request: Request):
         )
 
 
-# New service routes
-@app.api_route(
-    "/ai-reasoning/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def ai_reasoning_service_route(request: Request, path: str):
-    """Route requests to AI Reasoning Orchestrator service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="ai_reasoning_orchestrator",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to AI Reasoning Orchestrator: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/graphql/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def graphql_bff_service_route(request: Request, path: str):
-    """Route requests to GraphQL BFF service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="graphql_bff",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
+# Service routes: one streaming proxy handler per public prefix
+PROXY_METHODS = ["GET", "POST", "PUT", "DELETE", "PATCH"]
 
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to GraphQL BFF: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
 
+async def _send_upstream(
+    request: Request, route: ProxyRoute, upstream_request: httpx.Request
+) -> httpx.Response:
+    """Send with the service's circuit breaker, timeout and (when safe) retry"""
+    service_config = SERVICE_REGISTRY[route.service]
 
-@app.api_route(
-    "/ai-insights/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def ai_insights_service_route(request: Request, path: str):
-    """Route requests to AI Insights service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="ai_insights",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
+    async def send() -> httpx.Response:
+        return await _upstream_client(route.service).send(upstream_request, stream=True)
 
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
+    if has_body(request):
+        # A streamed body is consumed by the first attempt, so no retries.
+        return await service_config["circuit_breaker"].call(
+            service_config["timeout"].call, send
         )
+    return await service_config["circuit_breaker"].call(
+        service_config["retry"].call, service_config["timeout"].call, send
+    )
 
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to AI Insights service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
 
+async def _invalidate_cached(partition: str, namespace: str) -> None:
+    """Drop a user's cached GETs under a route prefix and the composites"""
+    await response_cache.invalidate(partition, [namespace, COMPOSITE_CACHE_NAMESPACE])
+    CACHE_INVALIDATIONS.labels(route=namespace).inc()
 
-@app.api_route(
-    "/medical-records/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def medical_records_service_route(request: Request, path: str):
-    """Route requests to Medical Records service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="medical_records",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
 
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
+async def _load_cached(
+    request: Request,
+    namespace: str,
+    partition: str,
+    loader,
+    default_ttl_s: float,
+) -> Response:
+    """Answer a GET from the response cache, loading through *loader* on a miss"""
+    key = response_cache.request_key(
+        "GET", request.url.path, request.url.query, request.headers
+    )
+    result, outcome = await response_cache.load(
+        partition,
+        namespace,
+        key,
+        loader,
+        default_ttl_s,
+        refresh="no-cache" in request.headers.get("cache-control", ""),
+    )
+    CACHE_REQUESTS.labels(route=namespace, result=outcome).inc()
+    if isinstance(result, CachedResponse):
+        return result.render(
+            request.headers.get("if-none-match"),
+            cache_status="HIT" if outcome in ("hit", "coalesced") else "MISS",
         )
+    return stream_response(result.upstream, result.head, result.chunks)
 
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Medical Records service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
 
+async def proxy_request(request: Request, route: ProxyRoute) -> Response:
+    """Stream *request* to the route's upstream and stream the answer back"""
+    client = _upstream_client(route.service)
+    raw_path = request.scope.get("raw_path")
+    upstream_path = route.upstream_path(
+        raw_path.decode("latin-1") if raw_path else request.url.path
+    )
+    request_id = getattr(request.state, "request_id", None)
+    request_headers = {"x-request-id": request_id} if request_id else {}
+    partition = response_cache.partition(request.headers.get("Authorization"))
 
-@app.api_route(
-    "/nutrition/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def nutrition_service_route(request: Request, path: str):
-    """Route requests to Nutrition service"""
     try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="nutrition",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
+        if request.method == "GET" and route.cache_ttl_s > 0 and partition:
+
+            async def load(upstream_etag: Optional[str]) -> httpx.Response:
+                headers = dict(request_headers)
+                if upstream_etag:
+                    headers["if-none-match"] = upstream_etag
+                upstream_request = build_upstream_request(
+                    client,
+                    request,
+                    upstream_path,
+                    extra_headers=headers,
+                    drop_headers=CONDITIONAL_HEADERS,
+                )
+                return await _send_upstream(request, route, upstream_request)
 
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
+            return await _load_cached(
+                request, route.prefix, partition, load, route.cache_ttl_s
+            )
 
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
+        upstream_request = build_upstream_request(
+            client, request, upstream_path, extra_headers=request_headers
         )
+        upstream = await _send_upstream(request, route, upstream_request)
     except Exception as e:
-        logger.error(f"Error routing to Nutrition service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/device-data/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def device_data_service_route(request: Request, path: str):
-    """Route requests to Device Data service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="device_data",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-
-    except CircuitBreakerException as e:
+        logger.error(f"Error routing to {route.service}: {e}")
         return JSONResponse(
             status_code=503,
             content=create_error_response(
                 error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Device Data service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
+                message=str(CircuitBreakerException(route.service)),
+                request_id=request_id,
             ).dict(),
         )
 
+    if request.method not in ("GET", "HEAD", "OPTIONS") and partition:
+        await _invalidate_cached(partition, route.prefix)
+    return stream_response(upstream)
 
-# Original service routes
-@app.api_route("/auth/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"])
-async def auth_service_route(request: Request, path: str):
-    """Route requests to auth service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="auth",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to auth service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
 
+def _register_proxy_route(route: ProxyRoute) -> None:
+    async def route_handler(request: Request, path: str) -> Response:
+        return await proxy_request(request, route)
 
-@app.api_route(
-    "/user-profile/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def user_profile_service_route(request: Request, path: str):
-    """Route requests to user profile service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="user_profile",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
+    route_handler.__doc__ = f"Route requests to {route.service} service"
+    app.add_api_route(
+        f"{route.prefix}/{{path:path}}",
+        route_handler,
+        methods=PROXY_METHODS,
+        name=f"{route.service}_service_route",
+        include_in_schema=False,
+    )
 
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
 
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to user profile service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/health-tracking/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def health_tracking_service_route(request: Request, path: str):
-    """Route requests to health tracking service"""
-    try:
-        # Get request body for POST/PUT/PATCH
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-
-        # Forward request
-        response = await forward_request(
-            request=request,
-            service_name="health_tracking",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-
-        # Return response
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to health tracking service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-# ============================================================
-# Additional Service Routes (voice-input, medical-analysis,
-# health-analysis, consent-audit, knowledge-graph,
-# doctor-collaboration, genomics, analytics)
-# ============================================================
-
-
-@app.api_route(
-    "/voice-input/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def voice_input_service_route(request: Request, path: str):
-    """Route requests to Voice Input service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="voice_input",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Voice Input service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/medical-analysis/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def medical_analysis_service_route(request: Request, path: str):
-    """Route requests to Medical Analysis service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="medical_analysis",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Medical Analysis service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/health-analysis/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def health_analysis_service_route(request: Request, path: str):
-    """Route requests to Health Analysis service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="health_analysis",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Health Analysis service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/consent-audit/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def consent_audit_service_route(request: Request, path: str):
-    """Route requests to Consent Audit service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="consent_audit",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Consent Audit service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/knowledge-graph/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def knowledge_graph_service_route(request: Request, path: str):
-    """Route requests to Knowledge Graph service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="knowledge_graph",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Knowledge Graph service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/doctor-collaboration/{path:path}",
-    methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
-)
-async def doctor_collaboration_service_route(request: Request, path: str):
-    """Route requests to Doctor Collaboration service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="doctor_collaboration",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Doctor Collaboration service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/genomics/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def genomics_service_route(request: Request, path: str):
-    """Route requests to Genomics service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="genomics",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Genomics service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/analytics/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def analytics_service_route(request: Request, path: str):
-    """Route requests to Analytics service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="analytics",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Analytics service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/ecommerce/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def ecommerce_service_route(request: Request, path: str):
-    """Route requests to Ecommerce service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="ecommerce",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Ecommerce service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-
-
-@app.api_route(
-    "/explainability/{path:path}", methods=["GET", "POST", "PUT", "DELETE", "PATCH"]
-)
-async def explainability_service_route(request: Request, path: str):
-    """Route requests to Explainability service"""
-    try:
-        data = None
-        if request.method in ["POST", "PUT", "PATCH"]:
-            try:
-                data = await request.json()
-            except:
-                pass
-        response = await forward_request(
-            request=request,
-            service_name="explainability",
-            path=f"/{path}",
-            method=request.method,
-            data=data,
-        )
-        return JSONResponse(
-            content=response.json(),
-            status_code=response.status_code,
-            headers=dict(response.headers),
-        )
-    except CircuitBreakerException as e:
-        return JSONResponse(
-            status_code=503,
-            content=create_error_response(
-                error_code=ErrorCode.CIRCUIT_BREAKER_OPEN,
-                message=str(e),
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
-    except Exception as e:
-        logger.error(f"Error routing to Explainability service: {e}")
-        return JSONResponse(
-            status_code=500,
-            content=create_error_response(
-                error_code=ErrorCode.INTERNAL_ERROR,
-                message="Internal server error",
-                request_id=getattr(request.state, "request_id", None),
-            ).dict(),
-        )
+for _route in PROXY_ROUTES:
+    _register_proxy_route(_route)
 
 
 @app.exception_handler(BaseServiceException)
@@ -190,11 +190,9 @@ async def sync_device_data(
         # Sync data from integration
         data_points = await integration_service.sync_device_data(device, start_date, end_date)
         
-        # Save data points to database
-        saved_points = []
-        for data_point in data_points:
-            # Convert to DataPointCreate format
-            point_data = DataPointCreate(
+        # Save data points to database in one bulk insert (re-synced readings are skipped)
+        points = [
+            DataPointCreate(
                 device_id=device_id,
                 data_type=data_point.data_type,
                 value=data_point.value,
@@ -206,9 +204,9 @@ async def sync_device_data(
                 data_metadata=data_point.data_metadata if hasattr(data_point, 'data_metadata') and data_point.data_metadata is not None else {},
                 tags=data_point.tags if data_point.tags is not None else []
             )
-            
-            saved_point = await data_service.create_data_point(user_id, point_data)
-            saved_points.append(saved_point)
+            for data_point in data_points
+        ]
+        saved = await data_service.bulk_create_data_points(user_id, device.id, points)
         
         # Update device status
         device.status = DeviceStatus.ACTIVE
@@ -216,12 +214,12 @@ async def sync_device_data(
         device.last_used_at = datetime.utcnow()
         await db.commit()
         
-        logger.info(f"Device {device_id} sync completed: {len(saved_points)} data points")
+        logger.info(f"Device {device_id} sync completed: {saved['created_count']} data points")
         return {
             "success": True,
             "message": "Device sync completed successfully",
             "device_id": device_id,
-            "data_points_synced": len(saved_points),
+            "data_points_synced": saved["created_count"],
             "start_date": start_date.isoformat(),
             "end_date": end_date.isoformat(),
             "sync_id": f"sync_{device_id}_{datetime.utcnow().timestamp()}"
@@ -724,10 +722,9 @@ async def bulk_sync_devices(
                 # Sync data from integration
                 data_points = await integration_service.sync_device_data(device, start_date, end_date)
                 
-                # Save data points to database
-                saved_points = []
-                for data_point in data_points:
-                    point_data = DataPointCreate(
+                # Save data points to database in one bulk insert
+                points = [
+                    DataPointCreate(
                         device_id=device_id,
                         data_type=data_point.data_type,
                         value=data_point.value,
@@ -736,12 +733,12 @@ async def bulk_sync_devices(
                         source=data_point.source,
                         quality=data_point.quality,
                         raw_value=data_point.raw_value,
-                        metadata=data_point.metadata,
-                        tags=data_point.tags
+                        data_metadata=data_point.data_metadata or {},
+                        tags=data_point.tags or []
                     )
-                    
-                    saved_point = await data_service.create_data_point(user_id, point_data)
-                    saved_points.append(saved_point)
+                    for data_point in data_points
+                ]
+                saved = await data_service.bulk_create_data_points(user_id, device.id, points)
                 
                 # Update device status
                 device.status = DeviceStatus.ACTIVE
@@ -749,13 +746,13 @@ async def bulk_sync_devices(
                 device.last_used_at = datetime.utcnow()
                 await db.commit()
                 
-                total_data_points += len(saved_points)
+                total_data_points += saved["created_count"]
                 results.append({
                     "device_id": device_id,
                     "device_name": device.name,
                     "device_type": device.device_type,
                     "status": "success",
-                    "data_points_synced": len(saved_points),
+                    "data_points_synced": saved["created_count"],
                     "error": None
                 })
                 
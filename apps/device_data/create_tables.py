@@ -19,8 +19,11 @@ from sqlalchemy import text
 from common.config.settings import get_settings
 from common.utils.logging import setup_logging
 
+from common.database.outbox import OutboxEvent
+
 from .models.device import Device
 from .models.data_point import DeviceDataPoint
+from .services.data_statistics import install_counters
 
 # Setup logging
 setup_logging()
@@ -115,6 +118,38 @@ async def create_device_data_tables():
             await conn.execute(text("CREATE INDEX IF NOT EXISTS idx_data_points_device_timestamp ON device_data.device_data_points(device_id, timestamp)"))
             await conn.execute(text("CREATE INDEX IF NOT EXISTS idx_data_points_type_timestamp ON device_data.device_data_points(data_type, timestamp)"))
             
+            # Syncs used to re-insert every reading: before the unique index
+            # exists, keep only the first stored copy of each reading
+            await conn.execute(text("""
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_indexes
+                        WHERE schemaname = 'device_data' AND indexname = 'uq_data_points_device_type_timestamp'
+                    ) THEN
+                        DELETE FROM device_data.device_data_points AS d
+                        USING (
+                            SELECT id, row_number() OVER (
+                                PARTITION BY device_id, data_type, timestamp ORDER BY created_at, id
+                            ) AS copy
+                            FROM device_data.device_data_points
+                        ) AS ranked
+                        WHERE d.id = ranked.id AND ranked.copy > 1;
+                    END IF;
+                END
+                $$
+            """))
+            await conn.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS uq_data_points_device_type_timestamp ON device_data.device_data_points(device_id, data_type, timestamp)"))
+            
+            # Create data_point_counters with its triggers and backfill
+            await install_counters(conn)
+            
+            # Create event_outbox (and its partial indexes) from the model:
+            # data point writes stage their events there
+            await conn.run_sync(
+                lambda sync_conn: OutboxEvent.__table__.create(sync_conn, checkfirst=True)
+            )
+            
             # Create device_sync_logs table for tracking sync operations
             await conn.execute(text("""
                 CREATE TABLE IF NOT EXISTS device_data.device_sync_logs (
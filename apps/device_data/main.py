@@ -37,6 +37,14 @@ from apps.device_data.services.event_consumer import (
     stop_event_consumer,
 )
 from apps.device_data.services.event_producer import get_event_producer
+from common.clients.kafka_publisher import close_kafka_publishers
+from common.database.outbox import (
+    get_outbox_relay,
+    start_outbox_relay,
+    stop_outbox_relays,
+)
+
+OUTBOX_CLIENT_ID = "device-data-outbox"
 
 # Configure logging
 setup_logging()
@@ -66,6 +74,12 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to start Kafka event consumer: {e}")
 
+    # Start the outbox relay that publishes staged events to Kafka
+    try:
+        start_outbox_relay(OUTBOX_CLIENT_ID, settings.KAFKA_BOOTSTRAP_SERVERS)
+    except Exception as e:
+        logger.error(f"❌ Failed to start outbox relay: {e}")
+
     # Health check
     logger.info("✅ Device Data Service is healthy and ready to serve requests")
 
@@ -89,6 +103,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"❌ Failed to stop Kafka event consumer: {e}")
 
+    # Stop the outbox relay; undelivered events stay in the outbox
+    try:
+        await stop_outbox_relays()
+        close_kafka_publishers()
+        logger.info("✅ Outbox relay stopped")
+    except Exception as e:
+        logger.error(f"❌ Failed to stop outbox relay: {e}")
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -369,9 +391,11 @@ async def get_kafka_producer_status():
     try:
         producer = await get_event_producer()
         metrics = producer.get_metrics()
+        relay = get_outbox_relay(OUTBOX_CLIENT_ID)
         return {
             "status": "success",
             "producer_metrics": metrics,
+            "outbox": relay.stats() if relay else None,
             "timestamp": datetime.utcnow().isoformat(),
         }
     except Exception as e:
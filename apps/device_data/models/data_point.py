@@ -9,7 +9,7 @@ from enum import Enum
 from uuid import UUID, uuid4
 from decimal import Decimal
 
-from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Integer, Enum as SQLEnum, Numeric, Index
+from sqlalchemy import Column, String, DateTime, Boolean, Text, JSON, Integer, BigInteger, Enum as SQLEnum, Numeric, Index
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
 from pydantic import BaseModel, Field, validator
@@ -233,6 +233,8 @@ class DeviceDataPoint(Base):
         Index('idx_device_data_type_timestamp', 'data_type', 'timestamp'),
         Index('idx_device_data_quality', 'quality'),
         Index('idx_device_data_anomaly', 'is_anomaly'),
+        # One reading per device, metric and instant; bulk inserts skip repeats
+        Index('uq_data_points_device_type_timestamp', 'device_id', 'data_type', 'timestamp', unique=True),
         {"schema": "device_data"}
     )
     
@@ -278,6 +280,28 @@ class DeviceDataPoint(Base):
         return f"<DeviceDataPoint(id={self.id}, type='{self.data_type}', value={self.value}, timestamp='{self.timestamp}')>"
 
 
+class DataPointCounter(Base):
+    """
+    Running totals of a user's data points per device, type, quality and source.
+    
+    Maintained by statement-level triggers on device_data_points (see
+    data_statistics.install_counters), so statistics never need to scan the
+    history.
+    """
+    __tablename__ = "data_point_counters"
+    __table_args__ = ({"schema": "device_data"},)
+    
+    user_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    device_id: Mapped[UUID] = mapped_column(PGUUID(as_uuid=True), primary_key=True)
+    data_type: Mapped[DataType] = mapped_column(SQLEnum(DataType, native_enum=False), primary_key=True)
+    quality: Mapped[DataQuality] = mapped_column(SQLEnum(DataQuality, native_enum=False), primary_key=True)
+    source: Mapped[DataSource] = mapped_column(SQLEnum(DataSource, native_enum=False), primary_key=True)
+    n: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    anomalies: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    first_ts: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    last_ts: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+
+
 # Pydantic Models for API
 class DataPointBase(BaseModel):
     """Base data point model for API requests/responses"""
@@ -428,6 +452,7 @@ class DataPointStatistics(BaseModel):
     anomaly_points: int
     data_types: Dict[str, int] = Field(..., description="Count by data type")
     quality_distribution: Dict[str, int] = Field(..., description="Count by quality level")
+    source_distribution: Dict[str, int] = Field(default_factory=dict, description="Count by data source")
     date_range: Dict[str, datetime] = Field(..., description="Start and end dates")
     device_count: int = Field(..., description="Number of devices with data")
     
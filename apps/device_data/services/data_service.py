@@ -6,7 +6,8 @@ Handles device data point management and analytics.
 import asyncio
 import logging
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple, Union
+from types import SimpleNamespace
+from typing import List, Optional, Dict, Any, Sequence, Tuple, Union
 from uuid import UUID
 from decimal import Decimal
 
@@ -20,9 +21,12 @@ from common.services.base import BaseService
 from common.utils.logging import get_logger
 from common.utils.resilience import with_resilience
 
+from .bulk_ingest import insert_rows, prepare_rows
+from .data_statistics import compute_statistics
+from .event_producer import stage_raw_data_events
 from ..models.data_point import (
     DeviceDataPoint, DataType, DataQuality, DataSource,
-    DataPointCreate, DataPointUpdate, DataPointResponse, DataPointSummary,
+    DataPointBase, DataPointCreate, DataPointUpdate, DataPointResponse, DataPointSummary,
     DataPointBatch, DataPointQuery, DataPointAggregation, DataPointStatistics
 )
 
@@ -53,25 +57,31 @@ class DataService(BaseService):
         return DataPointUpdate
     
     async def create_data_point(self, user_id: UUID, data_point: DataPointCreate) -> DeviceDataPoint:
-        """Create a new data point"""
+        """Create a new data point; a reading already stored is a 409"""
         try:
             logger.info(f"Creating data point for user {user_id}: {data_point.data_type}")
             
             # Validate device ownership
             await self._validate_device_ownership(data_point.device_id, user_id)
             
-            # Create data point
-            db_data_point = DeviceDataPoint(
-                user_id=user_id,
-                **data_point.dict()
-            )
-            
-            # Set quality based on validation
-            db_data_point.quality = self._assess_data_quality(data_point)
+            # Same validation, quality rule and ON CONFLICT insert as batches
+            rows, errors, _ = prepare_rows(user_id, data_point.device_id, [data_point])
+            if errors:
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=errors[0]["error"]
+                )
+            if not await insert_rows(self.db, rows):
+                await self.db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="A data point for this device, data type and timestamp already exists"
+                )
             
-            self.db.add(db_data_point)
+            # Committed together with the data point; the outbox relay publishes it.
+            stage_raw_data_events(self.db, [SimpleNamespace(**rows[0])])
             await self.db.commit()
-            await self.db.refresh(db_data_point)
+            db_data_point = await self.db.get(DeviceDataPoint, rows[0]["id"])
             
             logger.info(f"Data point created successfully: {db_data_point.id}")
             return db_data_point
@@ -88,52 +98,45 @@ class DataService(BaseService):
     
     async def create_batch_data_points(self, user_id: UUID, batch: DataPointBatch) -> Dict[str, Any]:
         """Create multiple data points in a batch"""
+        logger.info(f"Creating batch data points for user {user_id}: {len(batch.data_points)} points")
+        result = await self.bulk_create_data_points(user_id, batch.device_id, batch.data_points)
+        logger.info(
+            f"Batch data points created: {result['created_count']} successful, "
+            f"{result['duplicate_count']} duplicates, {result['error_count']} errors"
+        )
+        return result
+    
+    async def bulk_create_data_points(
+        self, user_id: UUID, device_id: UUID, data_points: Sequence[DataPointBase]
+    ) -> Dict[str, Any]:
+        """
+        Insert many data points with multi-row INSERTs.
+        
+        Readings already stored for the same (device, data type, timestamp)
+        are skipped. The response carries ids and counts only.
+        """
         try:
-            logger.info(f"Creating batch data points for user {user_id}: {len(batch.data_points)} points")
-            
             # Validate device ownership
-            await self._validate_device_ownership(batch.device_id, user_id)
-            
-            created_points = []
-            errors = []
-            
-            for i, data_point in enumerate(batch.data_points):
-                try:
-                    db_data_point = DeviceDataPoint(
-                        user_id=user_id,
-                        device_id=batch.device_id,
-                        **data_point.dict()
-                    )
-                    
-                    # Set quality based on validation
-                    db_data_point.quality = self._assess_data_quality(data_point)
-                    
-                    self.db.add(db_data_point)
-                    created_points.append(db_data_point)
-                    
-                except Exception as e:
-                    errors.append({
-                        "index": i,
-                        "error": str(e),
-                        "data_point": data_point.dict()
-                    })
+            await self._validate_device_ownership(device_id, user_id)
             
-            await self.db.commit()
+            rows, errors, batch_duplicates = prepare_rows(user_id, device_id, data_points)
+            inserted_ids = await insert_rows(self.db, rows) if rows else []
             
-            # Refresh created points
-            for point in created_points:
-                await self.db.refresh(point)
+            if inserted_ids:
+                inserted = set(inserted_ids)
+                stage_raw_data_events(
+                    self.db, [SimpleNamespace(**row) for row in rows if row["id"] in inserted]
+                )
+            await self.db.commit()
             
-            result = {
-                "created_count": len(created_points),
+            return {
+                "created_count": len(inserted_ids),
+                "duplicate_count": batch_duplicates + len(rows) - len(inserted_ids),
                 "error_count": len(errors),
                 "errors": errors,
-                "data_points": [DataPointResponse.from_orm(point) for point in created_points]
+                "ids": inserted_ids
             }
             
-            logger.info(f"Batch data points created: {result['created_count']} successful, {result['error_count']} errors")
-            return result
-            
         except HTTPException:
             raise
         except Exception as e:
@@ -359,78 +362,7 @@ class DataService(BaseService):
                                 end_date: Optional[datetime] = None) -> DataPointStatistics:
         """Get comprehensive data statistics"""
         try:
-            # Build base conditions
-            conditions = [DeviceDataPoint.user_id == user_id]
-            
-            if start_date:
-                conditions.append(DeviceDataPoint.timestamp >= start_date)
-            if end_date:
-                conditions.append(DeviceDataPoint.timestamp <= end_date)
-            
-            # Get total points
-            total_query = select(func.count()).where(and_(*conditions))
-            result = await self.db.execute(total_query)
-            total_points = result.scalar()
-            
-            # Get valid points
-            valid_query = select(func.count()).where(
-                and_(*conditions, DeviceDataPoint.quality.in_([DataQuality.EXCELLENT, DataQuality.GOOD]))
-            )
-            result = await self.db.execute(valid_query)
-            valid_points = result.scalar()
-            
-            # Get anomaly points
-            anomaly_query = select(func.count()).where(
-                and_(*conditions, DeviceDataPoint.is_anomaly == True)
-            )
-            result = await self.db.execute(anomaly_query)
-            anomaly_points = result.scalar()
-            
-            # Get data types distribution
-            type_query = select(
-                DeviceDataPoint.data_type,
-                func.count(DeviceDataPoint.id)
-            ).where(and_(*conditions)).group_by(DeviceDataPoint.data_type)
-            
-            result = await self.db.execute(type_query)
-            data_types = {row.data_type: row.count for row in result}
-            
-            # Get quality distribution
-            quality_query = select(
-                DeviceDataPoint.quality,
-                func.count(DeviceDataPoint.id)
-            ).where(and_(*conditions)).group_by(DeviceDataPoint.quality)
-            
-            result = await self.db.execute(quality_query)
-            quality_distribution = {row.quality: row.count for row in result}
-            
-            # Get date range
-            date_query = select(
-                func.min(DeviceDataPoint.timestamp),
-                func.max(DeviceDataPoint.timestamp)
-            ).where(and_(*conditions))
-            
-            result = await self.db.execute(date_query)
-            row = result.first()
-            date_range = {
-                "start": row[0],
-                "end": row[1]
-            }
-            
-            # Get device count
-            device_query = select(func.count(func.distinct(DeviceDataPoint.device_id))).where(and_(*conditions))
-            result = await self.db.execute(device_query)
-            device_count = result.scalar()
-            
-            return DataPointStatistics(
-                total_points=total_points,
-                valid_points=valid_points,
-                anomaly_points=anomaly_points,
-                data_types=data_types,
-                quality_distribution=quality_distribution,
-                date_range=date_range,
-                device_count=device_count
-            )
+            return await compute_statistics(self.db, user_id, start_date, end_date)
             
         except Exception as e:
             logger.error(f"Error getting data statistics: {e}")
@@ -444,59 +376,26 @@ class DataService(BaseService):
         try:
             logger.info(f"Getting data summary for user {user_id}")
             
-            # Get total data points count
-            total_query = select(func.count(DeviceDataPoint.id)).where(
-                DeviceDataPoint.user_id == user_id
-            )
-            total_result = await self.db.execute(total_query)
-            total_records = total_result.scalar() or 0
-            
-            # Get data points by type
-            type_query = select(
-                DeviceDataPoint.data_type,
-                func.count(DeviceDataPoint.id).label('count')
-            ).where(
-                DeviceDataPoint.user_id == user_id
-            ).group_by(DeviceDataPoint.data_type)
-            
-            type_result = await self.db.execute(type_query)
-            data_by_type = {row.data_type: row.count for row in type_result}
-            
-            # Get data points by quality
-            quality_query = select(
-                DeviceDataPoint.quality,
-                func.count(DeviceDataPoint.id).label('count')
-            ).where(
-                DeviceDataPoint.user_id == user_id
-            ).group_by(DeviceDataPoint.quality)
-            
-            quality_result = await self.db.execute(quality_query)
-            data_by_quality = {row.quality: row.count for row in quality_result}
+            stats = await compute_statistics(self.db, user_id)
+            total_records = stats.total_points
+            data_by_type = stats.data_types
+            data_by_quality = stats.quality_distribution
+            anomaly_count = stats.anomaly_points
             
-            # Get latest data point
-            latest_query = select(DeviceDataPoint).where(
+            # Counter bounds only widen; read the newest surviving reading
+            latest_query = select(DeviceDataPoint.timestamp).where(
                 DeviceDataPoint.user_id == user_id
             ).order_by(desc(DeviceDataPoint.timestamp)).limit(1)
             
             latest_result = await self.db.execute(latest_query)
-            latest_data_point = latest_result.scalar_one_or_none()
-            
-            # Get anomaly count
-            anomaly_query = select(func.count(DeviceDataPoint.id)).where(
-                and_(
-                    DeviceDataPoint.user_id == user_id,
-                    DeviceDataPoint.is_anomaly == True
-                )
-            )
-            anomaly_result = await self.db.execute(anomaly_query)
-            anomaly_count = anomaly_result.scalar() or 0
+            latest_timestamp = latest_result.scalar_one_or_none()
             
             summary = {
                 "total_records": total_records,
                 "data_by_type": data_by_type,
                 "data_by_quality": data_by_quality,
                 "anomaly_count": anomaly_count,
-                "latest_data_point": latest_data_point.timestamp.isoformat() if latest_data_point else None,
+                "latest_data_point": latest_timestamp.isoformat() if latest_timestamp else None,
                 "data_types_count": len(data_by_type),
                 "quality_distribution": {
                     quality: count for quality, count in data_by_quality.items()
@@ -782,14 +681,6 @@ class DataService(BaseService):
                 detail="Device not found or not owned by user"
             )
     
-    def _assess_data_quality(self, data_point: DataPointCreate) -> DataQuality:
-        """Assess data quality based on various factors"""
-        # Simple quality assessment logic
-        if data_point.raw_value:
-            return DataQuality.GOOD
-        else:
-            return DataQuality.FAIR
-    
     async def _calculate_anomaly_score(self, data_point: DeviceDataPoint, all_points: List[DeviceDataPoint]) -> float:
         """Calculate anomaly score for a data point"""
         # Simple statistical anomaly detection
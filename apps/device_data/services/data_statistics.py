@@ -0,0 +1,288 @@
+"""
+Device data statistics.
+
+``get_data_statistics`` used to run seven queries (total, valid, anomalies,
+per type, per quality, date range, devices), each scanning the user's whole
+history.  Statistics now come from one of two places:
+
+  * ``data_point_counters`` — running totals per (user, device, data type,
+    quality, source), maintained by statement-level triggers on
+    ``device_data_points`` (installed by ``install_counters()``, which every
+    provisioning path calls).  A user has at most a few dozen counter rows,
+    so the all-time dashboard numbers cost the same however long the
+    history is.
+  * ``single_scan_query`` — for an explicit date range, one aggregate pass
+    with ``GROUPING SETS`` and ``FILTER`` clauses that yields the totals and
+    every distribution at once.
+
+If the counters table is unavailable the all-time view falls back to the
+single scan.  Counter first/last timestamps only ever widen, so after
+deletes the date range can be wider than the remaining data.
+"""
+
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional
+from uuid import UUID
+
+from sqlalchemy import and_, func, select, text, tuple_
+
+from common.utils.logging import get_logger
+
+from ..models.data_point import (
+    DataPointCounter,
+    DataPointStatistics,
+    DataQuality,
+    DeviceDataPoint,
+)
+
+logger = get_logger(__name__)
+
+VALID_QUALITIES = (DataQuality.EXCELLENT, DataQuality.GOOD)
+
+_COUNTER_KEY = "user_id, device_id, data_type, quality, source"
+_COUNTER_GROUPS = """
+    SELECT user_id, device_id, data_type::text AS data_type,
+           COALESCE(quality::text, 'UNKNOWN') AS quality,
+           COALESCE(source::text, 'DEVICE_SYNC') AS source,
+           count(*) AS n, count(*) FILTER (WHERE is_anomaly) AS anomalies,
+           min(timestamp) AS first_ts, max(timestamp) AS last_ts
+    FROM {rows} GROUP BY 1, 2, 3, 4, 5
+"""
+
+# Counter rows are always locked in key order, so concurrent statements
+# touching several of the same rows cannot deadlock.
+COUNTER_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS device_data.data_point_counters (
+        user_id UUID NOT NULL,
+        device_id UUID NOT NULL,
+        data_type VARCHAR(50) NOT NULL,
+        quality VARCHAR(20) NOT NULL,
+        source VARCHAR(50) NOT NULL,
+        n BIGINT NOT NULL DEFAULT 0,
+        anomalies BIGINT NOT NULL DEFAULT 0,
+        first_ts TIMESTAMP,
+        last_ts TIMESTAMP,
+        PRIMARY KEY (user_id, device_id, data_type, quality, source)
+    )
+    """,
+    f"""
+    CREATE OR REPLACE FUNCTION device_data.maintain_data_point_counters() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM 1 FROM device_data.data_point_counters AS c
+            WHERE ({_COUNTER_KEY}) IN (
+                SELECT user_id, device_id, data_type::text,
+                       COALESCE(quality::text, 'UNKNOWN'), COALESCE(source::text, 'DEVICE_SYNC')
+                FROM old_rows
+            )
+            ORDER BY {_COUNTER_KEY}
+            FOR UPDATE;
+            UPDATE device_data.data_point_counters AS c
+            SET n = c.n - d.n, anomalies = c.anomalies - d.anomalies
+            FROM ({_COUNTER_GROUPS.format(rows="old_rows")}) AS d
+            WHERE c.user_id = d.user_id AND c.device_id = d.device_id
+              AND c.data_type = d.data_type AND c.quality = d.quality AND c.source = d.source;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO device_data.data_point_counters AS c
+                ({_COUNTER_KEY}, n, anomalies, first_ts, last_ts)
+            SELECT * FROM ({_COUNTER_GROUPS.format(rows="new_rows")}) AS g
+            ORDER BY 1, 2, 3, 4, 5
+            ON CONFLICT ({_COUNTER_KEY}) DO UPDATE
+            SET n = c.n + EXCLUDED.n,
+                anomalies = c.anomalies + EXCLUDED.anomalies,
+                first_ts = LEAST(c.first_ts, EXCLUDED.first_ts),
+                last_ts = GREATEST(c.last_ts, EXCLUDED.last_ts);
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            DELETE FROM device_data.data_point_counters
+            WHERE n <= 0 AND user_id IN (SELECT DISTINCT user_id FROM old_rows);
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Hold writers off while triggers are (re)created and counters backfilled
+    "LOCK TABLE device_data.device_data_points IN SHARE ROW EXCLUSIVE MODE",
+    *(
+        statement
+        for op, referencing in (
+            ("insert", "NEW TABLE AS new_rows"),
+            ("update", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+            ("delete", "OLD TABLE AS old_rows"),
+        )
+        for statement in (
+            f"DROP TRIGGER IF EXISTS trg_data_point_counters_{op} ON device_data.device_data_points",
+            f"""
+            CREATE TRIGGER trg_data_point_counters_{op}
+            AFTER {op.upper()} ON device_data.device_data_points
+            REFERENCING {referencing}
+            FOR EACH STATEMENT EXECUTE FUNCTION device_data.maintain_data_point_counters()
+            """,
+        )
+    ),
+    # Backfill from existing data the first time (or after a table was
+    # created without its triggers)
+    f"""
+    INSERT INTO device_data.data_point_counters
+        ({_COUNTER_KEY}, n, anomalies, first_ts, last_ts)
+    SELECT * FROM ({_COUNTER_GROUPS.format(rows="device_data.device_data_points")}) AS g
+    WHERE NOT EXISTS (SELECT 1 FROM device_data.data_point_counters)
+    """,
+)
+
+
+async def install_counters(conn: Any) -> None:
+    """Create ``data_point_counters``, its triggers and backfill, on *conn*.
+
+    Shared by ``create_tables.py`` and ``scripts/create_all_tables.py``; a
+    counters table without its triggers would read as all zeros.
+    """
+    for statement in COUNTER_DDL:
+        await conn.execute(text(statement))
+
+
+def _label(value: Any) -> str:
+    return value.value if isinstance(value, Enum) else str(value)
+
+
+def _date_range(
+    first: Optional[datetime], last: Optional[datetime]
+) -> Dict[str, datetime]:
+    return (
+        {"start": first, "end": last} if first is not None and last is not None else {}
+    )
+
+
+def single_scan_query(
+    user_id: UUID,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+):
+    """All statistics for a time window in one pass over the user's rows."""
+    dp = DeviceDataPoint
+    conditions = [dp.user_id == user_id]
+    if start_date:
+        conditions.append(dp.timestamp >= start_date)
+    if end_date:
+        conditions.append(dp.timestamp <= end_date)
+    return (
+        select(
+            dp.data_type,
+            dp.quality,
+            dp.source,
+            func.grouping(dp.data_type).label("g_type"),
+            func.grouping(dp.quality).label("g_quality"),
+            func.grouping(dp.source).label("g_source"),
+            func.count().label("n"),
+            func.count().filter(dp.quality.in_(VALID_QUALITIES)).label("valid"),
+            func.count().filter(dp.is_anomaly.is_(True)).label("anomalies"),
+            func.min(dp.timestamp).label("first_ts"),
+            func.max(dp.timestamp).label("last_ts"),
+            func.count(func.distinct(dp.device_id)).label("devices"),
+        )
+        .where(and_(*conditions))
+        .group_by(
+            func.grouping_sets(
+                tuple_(), tuple_(dp.data_type), tuple_(dp.quality), tuple_(dp.source)
+            )
+        )
+    )
+
+
+def fold_grouping_rows(rows: Iterable[Any]) -> DataPointStatistics:
+    """Turn the grouping-set rows of ``single_scan_query`` into statistics."""
+    total = {
+        "n": 0,
+        "valid": 0,
+        "anomalies": 0,
+        "devices": 0,
+        "first_ts": None,
+        "last_ts": None,
+    }
+    data_types: Dict[str, int] = {}
+    qualities: Dict[str, int] = {}
+    sources: Dict[str, int] = {}
+    for row in rows:
+        if row.g_type and row.g_quality and row.g_source:
+            total = {k: getattr(row, k) for k in total}
+        elif not row.g_type:
+            data_types[_label(row.data_type)] = row.n
+        elif not row.g_quality:
+            qualities[_label(row.quality)] = row.n
+        elif not row.g_source:
+            sources[_label(row.source)] = row.n
+    return DataPointStatistics(
+        total_points=total["n"] or 0,
+        valid_points=total["valid"] or 0,
+        anomaly_points=total["anomalies"] or 0,
+        data_types=data_types,
+        quality_distribution=qualities,
+        source_distribution=sources,
+        date_range=_date_range(total["first_ts"], total["last_ts"]),
+        device_count=total["devices"] or 0,
+    )
+
+
+def counters_query(user_id: UUID):
+    return select(DataPointCounter).where(
+        DataPointCounter.user_id == user_id, DataPointCounter.n > 0
+    )
+
+
+def fold_counter_rows(counters: Iterable[DataPointCounter]) -> DataPointStatistics:
+    """Sum a user's counter rows into statistics."""
+    total = valid = anomalies = 0
+    data_types: Dict[str, int] = {}
+    qualities: Dict[str, int] = {}
+    sources: Dict[str, int] = {}
+    devices = set()
+    first: Optional[datetime] = None
+    last: Optional[datetime] = None
+    for c in counters:
+        total += c.n
+        anomalies += c.anomalies
+        if c.quality in VALID_QUALITIES:
+            valid += c.n
+        for bucket, key in (
+            (data_types, c.data_type),
+            (qualities, c.quality),
+            (sources, c.source),
+        ):
+            label = _label(key)
+            bucket[label] = bucket.get(label, 0) + c.n
+        devices.add(c.device_id)
+        if c.first_ts is not None and (first is None or c.first_ts < first):
+            first = c.first_ts
+        if c.last_ts is not None and (last is None or c.last_ts > last):
+            last = c.last_ts
+    return DataPointStatistics(
+        total_points=total,
+        valid_points=valid,
+        anomaly_points=anomalies,
+        data_types=data_types,
+        quality_distribution=qualities,
+        source_distribution=sources,
+        date_range=_date_range(first, last),
+        device_count=len(devices),
+    )
+
+
+async def compute_statistics(
+    session: Any,
+    user_id: UUID,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+) -> DataPointStatistics:
+    """Counters for the all-time view, one aggregate scan for a window."""
+    if start_date is None and end_date is None:
+        try:
+            async with session.begin_nested():
+                result = await session.execute(counters_query(user_id))
+                return fold_counter_rows(result.scalars().all())
+        except Exception as e:
+            logger.warning(f"Data point counters unavailable, scanning instead: {e}")
+    result = await session.execute(single_scan_query(user_id, start_date, end_date))
+    return fold_grouping_rows(result.all())
@@ -1,15 +1,26 @@
 """
 Event Consumer Service
 Handles consuming device data events from Kafka for real-time processing.
+
+Each topic is drained by a ``BatchConsumer`` (``common/clients/kafka_consumer.py``):
+messages arrive in batches, are grouped by device key and handed to the
+handlers group by group, and offsets are committed once per batch.  Groups
+that keep failing are republished to ``<topic>-dlq``; if that is not
+possible they are redelivered instead of committed.
 """
 
 import json
 import asyncio
 from datetime import datetime
 from typing import Dict, Any, Optional, Callable, List
-from confluent_kafka import Consumer, KafkaError, KafkaException
-from confluent_kafka.cimpl import Message
+from confluent_kafka import Consumer
 
+from common.clients.kafka_consumer import (
+    BatchConsumer,
+    consumer_config,
+    dead_letter_handler,
+)
+from common.clients.kafka_publisher import get_kafka_publisher
 from common.config.settings import get_settings
 from common.utils.logging import get_logger
 
@@ -35,26 +46,17 @@ class DeviceDataEventConsumer:
             "sync_events": "sync-events"
         }
         self.message_handlers = {}
+        self.batch_handlers = {}
+        self.batch_consumers: Dict[str, BatchConsumer] = {}
         self._initialize_consumers()
     
     def _initialize_consumers(self):
         """Initialize Kafka consumers for each topic"""
         try:
             for topic_name, topic in self.topics.items():
-                consumer_config = {
-                    'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
-                    'group.id': f'device-data-consumer-{topic_name}',
-                    'auto.offset.reset': 'latest',
-                    'enable.auto.commit': True,
-                    'auto.commit.interval.ms': 1000,
-                    'session.timeout.ms': 30000,
-                    'heartbeat.interval.ms': 3000,
-                    'max.poll.interval.ms': 300000,
-                    'fetch.min.bytes': 1,
-                    'fetch.max.wait.ms': 1000
-                }
-                
-                consumer = Consumer(consumer_config)
+                consumer = Consumer(
+                    consumer_config(f'device-data-consumer-{topic_name}', settings.KAFKA_BOOTSTRAP_SERVERS)
+                )
                 consumer.subscribe([topic])
                 self.consumers[topic_name] = consumer
                 logger.info(f"✅ Kafka consumer initialized for topic: {topic}")
@@ -72,6 +74,21 @@ class DeviceDataEventConsumer:
         self.message_handlers[topic] = handler
         logger.info(f"✅ Registered handler for topic: {topic}")
     
+    def register_batch_handler(self, topic: str, handler: Callable[[List[Dict[str, Any]]], Any]):
+        """
+        Register a handler that receives a whole group of messages at once.
+        
+        Groups hold one device's events from a consumed batch, in order, so
+        the handler can write them in a single statement. Exceptions are
+        retried by the runtime.
+        
+        Args:
+            topic: Topic name
+            handler: Async function taking the list of events
+        """
+        self.batch_handlers[topic] = handler
+        logger.info(f"✅ Registered batch handler for topic: {topic}")
+    
     async def start_consuming(self):
         """Start consuming messages from all topics"""
         if self.running:
@@ -81,11 +98,24 @@ class DeviceDataEventConsumer:
         self.running = True
         logger.info("🚀 Starting Kafka consumers...")
         
-        # Start consumer tasks for each topic
+        dead_letters = get_kafka_publisher(
+            "device-data-dlq", settings.KAFKA_BOOTSTRAP_SERVERS
+        )
+        on_failure = (
+            dead_letter_handler(dead_letters) if dead_letters is not None else None
+        )
+
+        # Start a batch consumer for each topic
         tasks = []
         for topic_name, consumer in self.consumers.items():
-            task = asyncio.create_task(self._consume_topic(topic_name, consumer))
-            tasks.append(task)
+            runner = BatchConsumer(
+                consumer,
+                self._group_handler(topic_name),
+                name=f"device-data-{topic_name}",
+                on_failure=on_failure,
+            )
+            self.batch_consumers[topic_name] = runner
+            tasks.append(asyncio.create_task(runner.run()))
         
         try:
             # Wait for all consumer tasks
@@ -95,72 +125,46 @@ class DeviceDataEventConsumer:
         finally:
             self.running = False
     
-    async def _consume_topic(self, topic_name: str, consumer: Consumer):
-        """Consume messages from a specific topic"""
-        logger.info(f"📡 Starting consumer for topic: {topic_name}")
+    def _group_handler(self, topic_name: str):
+        async def handle(topic: str, key: Optional[str], events: List[Dict[str, Any]]):
+            await self._handle_group(topic_name, events)
+        return handle
+    
+    async def _handle_group(self, topic_name: str, events: List[Dict[str, Any]]):
+        """Handle one device's events from a consumed batch"""
+        logger.debug(f"📨 Received {len(events)} event(s) from {topic_name}")
         
-        try:
-            while self.running:
-                try:
-                    # Poll for messages with timeout
-                    msg = consumer.poll(timeout=1.0)
-                    
-                    if msg is None:
-                        continue
-                    
-                    if msg.error():
-                        if msg.error().code() == KafkaError._PARTITION_EOF:
-                            logger.debug(f"Reached end of partition for {topic_name}")
-                        else:
-                            logger.error(f"❌ Consumer error: {msg.error()}")
-                        continue
-                    
-                    # Parse message
-                    try:
-                        event_data = json.loads(msg.value().decode('utf-8'))
-                        event_type = event_data.get("event_type")
-                        timestamp = event_data.get("timestamp")
-                        
-                        logger.debug(f"📨 Received {event_type} event from {topic_name} at {timestamp}")
-                        
-                        # Handle message
-                        await self._handle_message(topic_name, event_data)
-                        
-                        # Commit offset
-                        consumer.commit(msg)
-                        
-                    except json.JSONDecodeError as e:
-                        logger.error(f"❌ Failed to parse message from {topic_name}: {e}")
-                    except Exception as e:
-                        logger.error(f"❌ Error processing message from {topic_name}: {e}")
-                        # Continue processing other messages
-                        
-                except KafkaException as e:
-                    logger.error(f"❌ Kafka error in {topic_name}: {e}")
-                    if not self.running:
-                        break
-                        
-        except Exception as e:
-            logger.error(f"❌ Error consuming from topic {topic_name}: {e}")
-        finally:
-            consumer.close()
-            logger.info(f"🛑 Stopped consumer for topic: {topic_name}")
+        batch_handler = self.batch_handlers.get(topic_name)
+        if batch_handler:
+            if asyncio.iscoroutinefunction(batch_handler):
+                await batch_handler(events)
+            else:
+                batch_handler(events)
+        elif topic_name == "raw_data" and topic_name not in self.message_handlers:
+            await self._handle_raw_data_batch(events)
+        else:
+            # Errors propagate so the batch consumer can rewind or dead-letter
+            for event_data in events:
+                await self._dispatch_message(topic_name, event_data)
+    
+    async def _dispatch_message(self, topic: str, event_data: Dict[str, Any]):
+        """Route a message to its registered or default handler"""
+        # Get registered handler for this topic
+        handler = self.message_handlers.get(topic)
+        if handler:
+            # Call handler function
+            if asyncio.iscoroutinefunction(handler):
+                await handler(event_data)
+            else:
+                handler(event_data)
+        else:
+            # Default handling based on event type
+            await self._default_message_handler(topic, event_data)
     
     async def _handle_message(self, topic: str, event_data: Dict[str, Any]):
-        """Handle a message from a specific topic"""
+        """Handle a single message from a specific topic, logging any error"""
         try:
-            # Get registered handler for this topic
-            handler = self.message_handlers.get(topic)
-            if handler:
-                # Call handler function
-                if asyncio.iscoroutinefunction(handler):
-                    await handler(event_data)
-                else:
-                    handler(event_data)
-            else:
-                # Default handling based on event type
-                await self._default_message_handler(topic, event_data)
-                
+            await self._dispatch_message(topic, event_data)
         except Exception as e:
             logger.error(f"❌ Error in message handler for topic {topic}: {e}")
     
@@ -204,6 +208,22 @@ class DeviceDataEventConsumer:
         # For now, just log the event
         logger.debug(f"Raw data event processed: {event_data}")
     
+    async def _handle_raw_data_batch(self, events: List[Dict[str, Any]]):
+        """Handle a group of raw data events from one device"""
+        if len(events) == 1:
+            await self._handle_raw_data(events[0])
+            return
+        
+        device_id = events[0].get("device_id")
+        data_types = sorted({str(e.get("data_type")) for e in events})
+        
+        logger.info(f"📊 Processing {len(events)} raw readings ({', '.join(data_types)}) from device {device_id}")
+        
+        # Here you would typically validate the readings and store them with
+        # one bulk insert rather than one write per event.
+        
+        logger.debug(f"Raw data batch processed: {len(events)} events")
+    
     async def _handle_processed_data(self, event_data: Dict[str, Any]):
         """Handle processed data events"""
         device_id = event_data.get("device_id")
@@ -338,35 +358,26 @@ class DeviceDataEventConsumer:
                 logger.error(f"❌ No consumer found for topic: {topic}")
                 return []
             
-            messages = []
-            start_time = datetime.utcnow()
-            timeout_seconds = timeout_ms / 1000.0
+            loop = asyncio.get_running_loop()
+            batch = await loop.run_in_executor(
+                None, consumer.consume, max_messages, timeout_ms / 1000.0
+            )
             
-            while len(messages) < max_messages:
-                # Check timeout
-                elapsed = (datetime.utcnow() - start_time).total_seconds()
-                if elapsed >= timeout_seconds:
-                    break
-                
-                # Poll for message
-                remaining_timeout = timeout_seconds - elapsed
-                msg = consumer.poll(timeout=remaining_timeout)
-                
-                if msg is None:
-                    break
-                
+            messages = []
+            for msg in batch:
                 if msg.error():
                     logger.error(f"❌ Consumer error: {msg.error()}")
                     continue
                 
                 # Parse message
                 try:
-                    event_data = json.loads(msg.value().decode('utf-8'))
-                    messages.append(event_data)
-                    consumer.commit(msg)
+                    messages.append(json.loads(msg.value().decode('utf-8')))
                 except json.JSONDecodeError as e:
                     logger.error(f"❌ Failed to parse message: {e}")
-                    continue
+            
+            # One commit for the whole batch
+            if batch:
+                consumer.commit(asynchronous=False)
             
             return messages
             
@@ -381,7 +392,12 @@ class DeviceDataEventConsumer:
         
         for topic_name, consumer in self.consumers.items():
             try:
-                consumer.close()
+                runner = self.batch_consumers.get(topic_name)
+                if runner and runner.running:
+                    # Closes the consumer once the batch in progress is committed
+                    runner.stop()
+                else:
+                    consumer.close()
                 logger.info(f"✅ Consumer for {topic_name} stopped")
             except Exception as e:
                 logger.error(f"❌ Error stopping consumer for {topic_name}: {e}")
@@ -400,9 +416,11 @@ class DeviceDataEventConsumer:
             try:
                 # Get consumer statistics
                 stats = consumer.get_stats()
+                runner = self.batch_consumers.get(topic_name)
                 status["consumers"][topic_name] = {
                     "topic": self.topics[topic_name],
-                    "has_handler": topic_name in self.message_handlers,
+                    "has_handler": topic_name in self.message_handlers or topic_name in self.batch_handlers,
+                    "batching": runner.stats() if runner else None,
                     "stats": stats
                 }
             except Exception as e:
@@ -13,6 +13,7 @@ from confluent_kafka.admin import AdminClient, NewTopic
 from confluent_kafka.cimpl import KafkaError
 
 from common.config.settings import get_settings
+from common.database.outbox import enqueue_event
 from common.utils.logging import get_logger
 from ..models.data_point import DeviceDataPoint
 from ..models.device import Device
@@ -21,6 +22,38 @@ logger = get_logger(__name__)
 settings = get_settings()
 
 
+RAW_DATA_TOPIC = "device-data-raw"
+
+
+def raw_data_event(data_point: DeviceDataPoint) -> Dict[str, Any]:
+    """Event body announcing a newly stored data point."""
+    return {
+        "event_type": "raw_data_received",
+        "timestamp": datetime.utcnow().isoformat(),
+        "data_point_id": str(data_point.id),
+        "user_id": str(data_point.user_id),
+        "device_id": str(data_point.device_id),
+        "data_type": data_point.data_type,
+        "value": data_point.value,
+        "unit": data_point.unit,
+        "quality": data_point.quality,
+        "metadata": data_point.data_metadata
+    }
+
+
+def stage_raw_data_events(session, data_points: List[DeviceDataPoint]) -> None:
+    """
+    Write raw-data events to the outbox in *session*'s transaction.
+
+    The outbox relay publishes them after the caller commits, keyed by
+    user_id so each user's readings stay in order.
+    """
+    for data_point in data_points:
+        enqueue_event(
+            session, RAW_DATA_TOPIC, raw_data_event(data_point), key=str(data_point.user_id)
+        )
+
+
 class DeviceDataEventProducer:
     """
     Kafka producer for device data events.
@@ -30,7 +63,7 @@ class DeviceDataEventProducer:
     def __init__(self):
         self.producer = None
         self.topics = {
-            "raw_data": "device-data-raw",
+            "raw_data": RAW_DATA_TOPIC,
             "processed_data": "device-data-processed", 
             "anomalies": "device-anomalies",
             "calibration_events": "calibration-events",
@@ -87,17 +120,7 @@ class DeviceDataEventProducer:
         
         start_time = time.time()
         try:
-            event = {
-                "event_type": "raw_data_received",
-                "timestamp": datetime.utcnow().isoformat(),
-                "data_point_id": str(data_point.id),
-                "device_id": str(data_point.device_id),
-                "data_type": data_point.data_type,
-                "value": data_point.value,
-                "unit": data_point.unit,
-                "quality": data_point.quality,
-                "metadata": data_point.metadata
-            }
+            event = raw_data_event(data_point)
             
             logger.debug(f"📤 Publishing raw data event: device_id={data_point.device_id}, data_type={data_point.data_type}, value={data_point.value}")
             
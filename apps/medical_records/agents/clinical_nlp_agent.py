@@ -459,10 +459,9 @@ class ClinicalNLPAgent(BaseMedicalAgent):
             summary = self.med_palm.summarize_clinical_text(text, document_type)
             
             if document and not use_provided_content:
-                # Update document with NLP results
-                await self._update_document_nlp_results(db, document, entities, summary)
-                # Publish NLP event to Kafka
-                await self._publish_nlp_event(document, entities, summary)
+                # Update document with NLP results; the event commits with them
+                event = self._nlp_event(document, entities, summary)
+                await self._update_document_nlp_results(db, document, entities, summary, event)
             
             # Generate insights and recommendations
             insights = self._generate_insights(entities, summary)
@@ -502,8 +501,8 @@ class ClinicalNLPAgent(BaseMedicalAgent):
             self.logger.error(f"Error fetching document: {e}")
             return None
     
-    async def _update_document_nlp_results(self, db: AsyncSession, document: DocumentDB, entities: List[MedicalEntity], summary: ClinicalSummary):
-        """Update document with NLP processing results."""
+    async def _update_document_nlp_results(self, db: AsyncSession, document: DocumentDB, entities: List[MedicalEntity], summary: ClinicalSummary, event: Optional[Dict[str, Any]] = None):
+        """Update document with NLP processing results and stage its event in the same transaction."""
         try:
             # Update document metadata with NLP results
             if not document.document_document_metadata:
@@ -518,32 +517,29 @@ class ClinicalNLPAgent(BaseMedicalAgent):
                 "entity_types": list(set(entity.entity_type.value for entity in entities))
             })
             
+            if event:
+                self.event_producer.stage_event(db, "nlp_events", event, key=event["document_id"])
+            
             await db.commit()
+            if event:
+                self.logger.info(f"📤 Staged NLP event for {document.id}")
             
         except Exception as e:
             self.logger.error(f"Error updating document NLP results: {e}")
             await db.rollback()
     
-    async def _publish_nlp_event(self, document: DocumentDB, entities: List[MedicalEntity], summary: ClinicalSummary):
-        """Publish NLP processing event to Kafka."""
-        try:
-            event = {
-                "event_type": "clinical_nlp_completed",
-                "timestamp": datetime.utcnow().isoformat(),
-                "document_id": str(document.id),
-                "patient_id": str(document.patient_id),
-                "document_type": document.document_type.value,
-                "entities": [self._entity_to_dict(entity) for entity in entities],
-                "summary": self._summary_to_dict(summary),
-                "entity_count": len(entities),
-                "source": "ClinicalNLPAgent"
-            }
-            
-            await self.event_producer.publish_nlp_event(event)
-            self.logger.info(f"📤 Published NLP event for {document.id}")
-            
-        except Exception as e:
-            self.logger.error(f"Error publishing NLP event: {e}")
+    def _nlp_event(self, document: DocumentDB, entities: List[MedicalEntity], summary: ClinicalSummary) -> Dict[str, Any]:
+        return {
+            "event_type": "clinical_nlp_completed",
+            "timestamp": datetime.utcnow().isoformat(),
+            "document_id": str(document.id),
+            "patient_id": str(document.patient_id),
+            "document_type": document.document_type.value,
+            "entities": [self._entity_to_dict(entity) for entity in entities],
+            "summary": self._summary_to_dict(summary),
+            "entity_count": len(entities),
+            "source": "ClinicalNLPAgent"
+        }
     
     def _entity_to_dict(self, entity: MedicalEntity) -> Dict[str, Any]:
         """Convert MedicalEntity to dictionary."""
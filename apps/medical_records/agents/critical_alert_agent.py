@@ -177,9 +177,8 @@ class CriticalAlertAgent(BaseMedicalAgent):
             # Update alert statuses
             await self._update_alert_statuses(unique_alerts, db)
             
-            # Publish alert events
-            for alert in unique_alerts:
-                await self._publish_alert_event(alert)
+            # Stage alert events; they commit with the status updates above
+            await self._stage_alert_events(unique_alerts, db)
             
             # Generate monitoring summary
             monitoring_summary = self._generate_monitoring_summary(
@@ -841,32 +840,39 @@ class CriticalAlertAgent(BaseMedicalAgent):
         except Exception as e:
             self.logger.error(f"Error updating alert statuses: {e}")
     
-    async def _publish_alert_event(self, alert: CriticalAlert):
-        """Publish alert event to Kafka."""
+    async def _stage_alert_events(self, alerts: List[CriticalAlert], db: AsyncSession):
+        """Stage one outbox event per alert and commit them together."""
+        if not alerts:
+            return
         try:
-            event = {
-                "event_type": "critical_alert_generated",
-                "timestamp": datetime.utcnow().isoformat(),
-                "alert_id": alert.alert_id,
-                "patient_id": str(alert.patient_id),
-                "alert_type": alert.alert_type.value,
-                "severity": alert.severity.value,
-                "title": alert.title,
-                "description": alert.description,
-                "recommended_action": alert.recommended_action,
-                "escalation_path": alert.escalation_path,
-                "time_to_escalation_minutes": alert.time_to_escalation_minutes,
-                "created_at": alert.created_at.isoformat(),
-                "expires_at": alert.expires_at.isoformat() if alert.expires_at else None,
-                "status": alert.status.value,
-                "source": "CriticalAlertAgent"
-            }
-            
-            await self.event_producer.publish_critical_alert_event(event)
-            self.logger.info(f"🚨 Published critical alert event: {alert.alert_id}")
+            for alert in alerts:
+                event = self._alert_event(alert)
+                self.event_producer.stage_event(db, "critical_alert_events", event, key=event["patient_id"])
+            await db.commit()
+            self.logger.info(f"🚨 Staged {len(alerts)} critical alert event(s)")
             
         except Exception as e:
-            self.logger.error(f"Error publishing alert event: {e}")
+            self.logger.error(f"Error staging alert events: {e}")
+            await db.rollback()
+    
+    def _alert_event(self, alert: CriticalAlert) -> Dict[str, Any]:
+        return {
+            "event_type": "critical_alert_generated",
+            "timestamp": datetime.utcnow().isoformat(),
+            "alert_id": alert.alert_id,
+            "patient_id": str(alert.patient_id),
+            "alert_type": alert.alert_type.value,
+            "severity": alert.severity.value,
+            "title": alert.title,
+            "description": alert.description,
+            "recommended_action": alert.recommended_action,
+            "escalation_path": alert.escalation_path,
+            "time_to_escalation_minutes": alert.time_to_escalation_minutes,
+            "created_at": alert.created_at.isoformat(),
+            "expires_at": alert.expires_at.isoformat() if alert.expires_at else None,
+            "status": alert.status.value,
+            "source": "CriticalAlertAgent"
+        }
     
     def _generate_monitoring_summary(self, patient_id: str, lab_results: List["LabResultDB"], 
                                    imaging_reports: List["ImagingReportDB"], 
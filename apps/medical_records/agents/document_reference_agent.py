@@ -126,13 +126,11 @@ class DocumentReferenceAgent(BaseMedicalAgent):
             # Determine routing
             routing_info = await self._determine_routing(document, tags, urgency_score, use_provided_content, document_type)
             
-            # Update document with tags and metadata (only if document exists in DB)
+            # Update document with tags and metadata (only if document exists in DB);
+            # the document event is committed with it through the outbox
             if document and not use_provided_content:
-                await self._update_document_metadata(db, document, tags, urgency_score, routing_info)
-            
-            # Publish event to Kafka (only if document exists in DB)
-            if document and not use_provided_content:
-                await self._publish_document_event(document, tags, urgency_score, routing_info)
+                event = self._document_event(document, tags, urgency_score, routing_info)
+                await self._update_document_metadata(db, document, tags, urgency_score, routing_info, event)
             
             # Generate insights and recommendations
             insights = self._generate_insights(document, tags, urgency_score, use_provided_content, document_type)
@@ -303,8 +301,8 @@ class DocumentReferenceAgent(BaseMedicalAgent):
         
         return routing
     
-    async def _update_document_metadata(self, db: AsyncSession, document: DocumentDB, tags: List[str], urgency_score: Dict[str, Any], routing_info: Dict[str, Any]):
-        """Update document with processing metadata."""
+    async def _update_document_metadata(self, db: AsyncSession, document: DocumentDB, tags: List[str], urgency_score: Dict[str, Any], routing_info: Dict[str, Any], event: Optional[Dict[str, Any]] = None):
+        """Update document with processing metadata and stage its event in the same transaction."""
         try:
             # Update document tags
             if not document.tags:
@@ -327,29 +325,29 @@ class DocumentReferenceAgent(BaseMedicalAgent):
             # Update processing status
             document.processing_status = ProcessingStatus.COMPLETED
             
+            if event:
+                self.event_producer.stage_event(db, "document_events", event, key=event["patient_id"])
+            
             await db.commit()
+            if event:
+                self.logger.info(f"📤 Staged document event for {event['document_id']}")
             
         except Exception as e:
             self.logger.error(f"Error updating document metadata: {e}")
             await db.rollback()
     
-    async def _publish_document_event(self, document: 'DocumentDB', tags: list, urgency_score: dict, routing_info: dict, use_provided_content: bool = False, document_type: str = None):
-        try:
-            event = {
-                "event_type": "document_processed",
-                "timestamp": datetime.utcnow().isoformat(),
-                "document_id": str(document.id) if document else None,
-                "patient_id": str(document.patient_id) if document else None,
-                "document_type": document.document_type.value if document and hasattr(document.document_type, 'value') else (document_type if use_provided_content else None),
-                "tags": tags,
-                "urgency_score": urgency_score,
-                "routing_info": routing_info,
-                "source": "DocumentReferenceAgent"
-            }
-            await self.event_producer.publish_document_event(event)
-            self.logger.info(f"\ud83d\udce4 Published document event for {event['document_id']}")
-        except Exception as e:
-            self.logger.error(f"Error publishing document event: {e}")
+    def _document_event(self, document: 'DocumentDB', tags: list, urgency_score: dict, routing_info: dict, use_provided_content: bool = False, document_type: str = None) -> Dict[str, Any]:
+        return {
+            "event_type": "document_processed",
+            "timestamp": datetime.utcnow().isoformat(),
+            "document_id": str(document.id) if document else None,
+            "patient_id": str(document.patient_id) if document else None,
+            "document_type": document.document_type.value if document and hasattr(document.document_type, 'value') else (document_type if use_provided_content else None),
+            "tags": tags,
+            "urgency_score": urgency_score,
+            "routing_info": routing_info,
+            "source": "DocumentReferenceAgent"
+        }
     
     def _determine_category(self, tags: List[str]) -> str:
         """Determine document category from tags."""
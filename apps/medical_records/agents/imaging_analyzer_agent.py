@@ -242,8 +242,8 @@ class ImagingAnalyzerAgent(BaseMedicalAgent):
             if report_id:
                 await self._update_imaging_report_analysis(db, report_id, analysis)
             
-            # Publish analysis event to Kafka
-            await self._publish_imaging_analysis_event(analysis)
+            # Stage the analysis event; it commits with the update above
+            await self._stage_imaging_analysis_event(db, analysis)
             
             # Generate insights
             insights = self._generate_insights(analysis)
@@ -721,8 +721,8 @@ class ImagingAnalyzerAgent(BaseMedicalAgent):
         except Exception as e:
             self.logger.error(f"Error updating imaging report analysis: {e}")
     
-    async def _publish_imaging_analysis_event(self, analysis: ImagingAnalysis):
-        """Publish imaging analysis event to Kafka."""
+    async def _stage_imaging_analysis_event(self, db: AsyncSession, analysis: ImagingAnalysis):
+        """Stage the imaging analysis event in the outbox and commit."""
         try:
             event = {
                 "event_type": "imaging_analysis_completed",
@@ -739,11 +739,13 @@ class ImagingAnalyzerAgent(BaseMedicalAgent):
                 "source": "ImagingAnalyzerAgent"
             }
             
-            await self.event_producer.publish_imaging_report_event(event)
-            self.logger.info(f"📤 Published imaging analysis event for patient {analysis.patient_id}")
+            self.event_producer.stage_event(db, "imaging_analysis_events", event, key=event["patient_id"])
+            await db.commit()
+            self.logger.info(f"📤 Staged imaging analysis event for patient {analysis.patient_id}")
             
         except Exception as e:
-            self.logger.error(f"Error publishing imaging analysis event: {e}")
+            self.logger.error(f"Error staging imaging analysis event: {e}")
+            await db.rollback()
     
     def _finding_to_dict(self, finding: ImagingFinding) -> Dict[str, Any]:
         """Convert ImagingFinding to dictionary."""
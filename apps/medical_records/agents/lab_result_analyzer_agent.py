@@ -215,8 +215,8 @@ class LabResultAnalyzerAgent(BaseMedicalAgent):
             if lab_result_id:
                 await self._update_lab_result_analysis(db, lab_result_id, analysis)
             
-            # Publish analysis event to Kafka
-            await self._publish_lab_analysis_event(analysis)
+            # Stage the analysis event; it commits with the update above
+            await self._stage_lab_analysis_event(db, analysis)
             
             # Generate insights
             insights = self._generate_insights(analysis)
@@ -661,8 +661,8 @@ class LabResultAnalyzerAgent(BaseMedicalAgent):
         except Exception as e:
             self.logger.error(f"Error updating lab result analysis: {e}")
     
-    async def _publish_lab_analysis_event(self, analysis: LabAnalysis):
-        """Publish lab analysis event to Kafka."""
+    async def _stage_lab_analysis_event(self, db: AsyncSession, analysis: LabAnalysis):
+        """Stage the lab analysis event in the outbox and commit."""
         try:
             event = {
                 "event_type": "lab_analysis_completed",
@@ -678,11 +678,13 @@ class LabResultAnalyzerAgent(BaseMedicalAgent):
                 "source": "LabResultAnalyzerAgent"
             }
             
-            await self.event_producer.publish_lab_result_event(event)
-            self.logger.info(f"📤 Published lab analysis event for patient {analysis.patient_id}")
+            self.event_producer.stage_event(db, "lab_events", event, key=event["patient_id"])
+            await db.commit()
+            self.logger.info(f"📤 Staged lab analysis event for patient {analysis.patient_id}")
             
         except Exception as e:
-            self.logger.error(f"Error publishing lab analysis event: {e}")
+            self.logger.error(f"Error staging lab analysis event: {e}")
+            await db.rollback()
     
     def _trend_to_dict(self, trend: "LabTrend") -> Dict[str, Any]:
         """Convert LabTrend to dictionary."""
@@ -25,6 +25,7 @@ from apps.medical_records.models.lab_results_db import LabResultDB
 from apps.medical_records.models.documents import DocumentDB, DocumentProcessingLogDB
 from apps.medical_records.models.imaging import ImagingStudyDB, MedicalImageDB, DICOMSeriesDB, DICOMInstanceDB
 from apps.medical_records.models.clinical_reports import ClinicalReportDB, ReportVersionDB, ReportTemplateDB, ReportCategoryDB, ReportAuditLogDB
+from common.database.outbox import OutboxEvent  # agents stage their events here
 
 
 logger = get_logger(__name__)
@@ -31,11 +31,14 @@ from common.middleware.rate_limiter import RateLimitingMiddleware
 from common.middleware.security import SecurityMiddleware
 from common.database.connection import get_db
 from common.middleware.prometheus_metrics import setup_prometheus_metrics
+from common.clients.kafka_publisher import close_kafka_publishers
+from common.database.outbox import start_outbox_relay, stop_outbox_relays
 from apps.medical_records.api import lab_results, documents, imaging
 from apps.medical_records.services import service_integration
 from apps.medical_records.api import clinical_reports, agents, epic_fhir
 from apps.medical_records.models import *
 from apps.medical_records.agents import advanced_ai_models
+from apps.medical_records.utils.event_streaming import OUTBOX_CLIENT_ID
 
 # Get settings and logger
 settings = get_settings()
@@ -57,6 +60,7 @@ async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     logger.info("🚀 Starting Medical Records Service...")
     app.state.ai_model_manager = advanced_ai_models.AIModelManager()
+    start_outbox_relay(OUTBOX_CLIENT_ID, settings.KAFKA_BOOTSTRAP_SERVERS)
     logger.info("✅ Medical Records Service started successfully")
     yield
     # After yield, schedule model loading in the background
@@ -66,6 +70,8 @@ async def lifespan(app: FastAPI):
     logger.info("🚀 Model loading scheduled in background")
     # Shutdown
     logger.info("🛑 Shutting down Medical Records Service...")
+    await stop_outbox_relays()
+    close_kafka_publishers()
     engine.dispose()
     logger.info("✅ Medical Records Service shutdown complete")
 
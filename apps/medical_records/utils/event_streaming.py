@@ -1,27 +1,40 @@
 """
 Event Streaming Utilities for Medical Records
 Handles Kafka event publishing for medical records processing.
+
+Events are handed to the shared ``AsyncKafkaPublisher`` (see
+``common/clients/kafka_publisher.py``): publishing returns as soon as the
+event is queued, librdkafka batches and compresses it in the background,
+and the producer is flushed only on shutdown.  Pass
+``wait_for_delivery=True`` to wait for the broker's acknowledgement.
 """
 
-import json
 import asyncio
 from datetime import datetime
 from typing import Dict, Any, List, Optional
-from confluent_kafka import Producer
-from confluent_kafka.cimpl import KafkaError
 
+from common.clients.kafka_publisher import (
+    AsyncKafkaPublisher,
+    PublishError,
+    PublishQueueFull,
+    close_kafka_publishers,
+    get_kafka_publisher,
+)
 from common.config.settings import get_settings
+from common.database.outbox import enqueue_event
 from common.utils.logging import get_logger
 
 logger = get_logger(__name__)
 settings = get_settings()
 
+CLIENT_ID = "medical-records-producer"
+OUTBOX_CLIENT_ID = "medical-records-outbox"
+
 
 class MedicalRecordsEventProducer:
     """Kafka producer for medical records events."""
-    
-    def __init__(self):
-        self.producer = None
+
+    def __init__(self, publisher: Optional[AsyncKafkaPublisher] = None):
         self.topics = {
             "document_events": "medical-records-documents",
             "nlp_events": "medical-records-nlp",
@@ -33,7 +46,7 @@ class MedicalRecordsEventProducer:
             "imaging_analysis_events": "medical-records-imaging-analysis",
             "critical_alert_events": "medical-records-critical-alerts"
         }
-        
+
         # Metrics tracking
         self.metrics = {
             "total_events_published": 0,
@@ -42,544 +55,273 @@ class MedicalRecordsEventProducer:
             "last_publish_time": None,
             "startup_time": datetime.utcnow()
         }
-        
-        self._initialize_producer()
-    
-    def _initialize_producer(self):
-        """Initialize Kafka producer."""
-        try:
-            logger.info(f"🔧 Initializing Kafka producer for medical records with bootstrap servers: {settings.KAFKA_BOOTSTRAP_SERVERS}")
-            
-            # Create producer configuration
-            producer_config = {
-                'bootstrap.servers': settings.KAFKA_BOOTSTRAP_SERVERS,
-                'client.id': 'medical-records-producer',
-                'acks': 'all',
-                'retries': 3,
-                'max.in.flight.requests.per.connection': 1,
-                'enable.idempotence': True,
-                'compression.type': 'snappy',
-                'batch.size': 16384,
-                'linger.ms': 10
-            }
-            
-            self.producer = Producer(producer_config)
-            logger.info("✅ Medical Records Kafka producer initialized successfully")
-        except Exception as e:
-            logger.error(f"❌ Failed to initialize medical records Kafka producer: {e}")
-            self.producer = None
-    
-    async def publish_document_event(self, event: Dict[str, Any]) -> bool:
-        """
-        Publish document processing event to Kafka.
-        
-        Args:
-            event: Document event data
-            
-        Returns:
-            bool: True if published successfully, False otherwise
-        """
+
+        # Every agent builds its own producer object; they share one publisher.
+        self.producer = publisher or get_kafka_publisher(
+            CLIENT_ID, settings.KAFKA_BOOTSTRAP_SERVERS
+        )
+
+    def _record_delivery(self, topic: str, count: int = 1):
+        def done(future: "asyncio.Future") -> None:
+            if future.cancelled() or future.exception() is not None:
+                self.metrics["failed_events"] += count
+                return
+            self.metrics["total_events_published"] += count
+            if topic in self.metrics["events_by_topic"]:
+                self.metrics["events_by_topic"][topic] += count
+            self.metrics["last_publish_time"] = datetime.utcnow()
+
+        return done
+
+    async def _publish(
+        self,
+        topic_name: str,
+        event: Dict[str, Any],
+        key: str,
+        label: str,
+        wait_for_delivery: bool,
+    ) -> bool:
+        """Queue *event* on *topic_name*; optionally wait for the broker ack."""
         if not self.producer:
             logger.error("❌ Kafka producer not initialized")
             return False
-        
+
+        topic = self.topics[topic_name]
         try:
             # Add timestamp if not present
             if "timestamp" not in event:
                 event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use document_id as key for partitioning
-            document_id = event.get("document_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["document_events"],
-                key=document_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["document_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published document event: {event.get('event_type', 'unknown')} for document {document_id}")
+
+            delivery = await self.producer.send(topic, event, key=key)
+            delivery.add_done_callback(self._record_delivery(topic))
+            if wait_for_delivery:
+                await delivery
+
+            logger.info(f"✅ Published {label}: {event.get('event_type', 'unknown')} for {key}")
             return True
-            
-        except KafkaError as e:
+
+        except PublishQueueFull as e:
             self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing document event: {e}")
+            logger.error(f"❌ Kafka outbox full publishing {label}: {e}")
+            return False
+        except PublishError as e:
+            logger.error(f"❌ Kafka error publishing {label}: {e}")
             return False
         except Exception as e:
             self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing document event: {e}")
+            logger.error(f"❌ Error publishing {label}: {e}")
             return False
-    
-    async def publish_nlp_event(self, event: Dict[str, Any]) -> bool:
+
+    def stage_event(self, session, topic_name: str, event: Dict[str, Any], key: str) -> None:
+        """
+        Write *event* to the outbox in *session*'s transaction.
+
+        Use this instead of ``publish_*`` when the event describes a DB
+        change: it is published by the outbox relay only once the caller
+        commits, and never if the transaction rolls back.
+
+        Args:
+            session: Session holding the data change
+            topic_name: Key into ``self.topics``
+            event: Event data
+            key: Partition key (patient id)
+        """
+        if "timestamp" not in event:
+            event["timestamp"] = datetime.utcnow().isoformat()
+        enqueue_event(session, self.topics[topic_name], event, key=key)
+
+    async def publish_document_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
+        """
+        Publish document processing event to Kafka.
+
+        Args:
+            event: Document event data
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
+        Returns:
+            bool: True if queued (or delivered, when waiting), False otherwise
+        """
+        # Use document_id as key for partitioning
+        document_id = event.get("document_id", "unknown")
+        return await self._publish(
+            "document_events", event, f"{document_id}", "document event", wait_for_delivery
+        )
+
+    async def publish_nlp_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish NLP processing event to Kafka.
-        
+
         Args:
             event: NLP event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use document_id as key for partitioning
-            document_id = event.get("document_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["nlp_events"],
-                key=document_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["nlp_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published NLP event: {event.get('event_type', 'unknown')} for document {document_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing NLP event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing NLP event: {e}")
-            return False
-    
-    async def publish_lab_result_event(self, event: Dict[str, Any]) -> bool:
+        document_id = event.get("document_id", "unknown")
+        return await self._publish(
+            "nlp_events", event, f"{document_id}", "NLP event", wait_for_delivery
+        )
+
+    async def publish_lab_result_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish lab result event to Kafka.
-        
+
         Args:
             event: Lab result event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["lab_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["lab_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published lab result event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing lab result event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing lab result event: {e}")
-            return False
-    
-    async def publish_imaging_event(self, event: Dict[str, Any]) -> bool:
+        # Use patient_id as key for partitioning
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "lab_events", event, f"{patient_id}", "lab result event", wait_for_delivery
+        )
+
+    async def publish_imaging_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish imaging event to Kafka.
-        
+
         Args:
             event: Imaging event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["imaging_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["imaging_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published imaging event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing imaging event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing imaging event: {e}")
-            return False
-    
-    async def publish_clinical_report_event(self, event: Dict[str, Any]) -> bool:
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "imaging_events", event, f"{patient_id}", "imaging event", wait_for_delivery
+        )
+
+    async def publish_clinical_report_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish clinical report event to Kafka.
-        
+
         Args:
             event: Clinical report event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["clinical_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["clinical_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published clinical report event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing clinical report event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing clinical report event: {e}")
-            return False
-    
-    async def publish_ehr_integration_event(self, event: Dict[str, Any]) -> bool:
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "clinical_events", event, f"{patient_id}", "clinical report event", wait_for_delivery
+        )
+
+    async def publish_ehr_integration_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish EHR integration event to Kafka.
-        
+
         Args:
             event: EHR integration event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use system_name as key for partitioning
-            system_name = event.get("system_name", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["ehr_events"],
-                key=system_name.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["ehr_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published EHR integration event: {event.get('event_type', 'unknown')} for system {system_name}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing EHR integration event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing EHR integration event: {e}")
-            return False
-    
-    async def publish_lab_analysis_event(self, event: Dict[str, Any]) -> bool:
+        # Use system_name as key for partitioning
+        system_name = event.get("system_name", "unknown")
+        return await self._publish(
+            "ehr_events", event, f"{system_name}", "EHR integration event", wait_for_delivery
+        )
+
+    async def publish_lab_analysis_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish lab analysis event to Kafka.
-        
+
         Args:
             event: Lab analysis event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["lab_analysis_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["lab_analysis_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published lab analysis event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing lab analysis event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing lab analysis event: {e}")
-            return False
-    
-    async def publish_imaging_analysis_event(self, event: Dict[str, Any]) -> bool:
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "lab_analysis_events", event, f"{patient_id}", "lab analysis event", wait_for_delivery
+        )
+
+    async def publish_imaging_analysis_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish imaging analysis event to Kafka.
-        
+
         Args:
             event: Imaging analysis event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["imaging_analysis_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["imaging_analysis_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published imaging analysis event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing imaging analysis event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing imaging analysis event: {e}")
-            return False
-    
-    async def publish_critical_alert_event(self, event: Dict[str, Any]) -> bool:
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "imaging_analysis_events", event, f"{patient_id}", "imaging analysis event", wait_for_delivery
+        )
+
+    async def publish_critical_alert_event(
+        self, event: Dict[str, Any], wait_for_delivery: bool = False
+    ) -> bool:
         """
         Publish critical alert event to Kafka.
-        
+
         Args:
             event: Critical alert event data
-            
+            wait_for_delivery: Wait for the broker to acknowledge the event
+
         Returns:
-            bool: True if published successfully, False otherwise
+            bool: True if queued (or delivered, when waiting), False otherwise
         """
-        if not self.producer:
-            logger.error("❌ Kafka producer not initialized")
-            return False
-        
-        try:
-            # Add timestamp if not present
-            if "timestamp" not in event:
-                event["timestamp"] = datetime.utcnow().isoformat()
-            
-            # Serialize the event
-            event_json = json.dumps(event, default=str)
-            
-            # Use patient_id as key for partitioning
-            patient_id = event.get("patient_id", "unknown")
-            
-            self.producer.produce(
-                topic=self.topics["critical_alert_events"],
-                key=patient_id.encode('utf-8'),
-                value=event_json.encode('utf-8'),
-                callback=self._delivery_report
-            )
-            
-            # Flush to ensure delivery
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += 1
-            self.metrics["events_by_topic"][self.topics["critical_alert_events"]] += 1
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"🚨 Published critical alert event: {event.get('event_type', 'unknown')} for patient {patient_id}")
-            return True
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Kafka error publishing critical alert event: {e}")
-            return False
-        except Exception as e:
-            self.metrics["failed_events"] += 1
-            logger.error(f"❌ Error publishing critical alert event: {e}")
-            return False
-    
-    def _delivery_report(self, err, msg):
-        """Delivery report callback for Kafka producer."""
-        if err is not None:
-            logger.error(f"❌ Message delivery failed: {err}")
-            self.metrics["failed_events"] += 1
-        else:
-            logger.debug(f"✅ Message delivered to {msg.topic()} [{msg.partition()}] at offset {msg.offset()}")
-    
-    async def publish_batch_events(self, events: List[Dict[str, Any]], topic: str) -> bool:
+        patient_id = event.get("patient_id", "unknown")
+        return await self._publish(
+            "critical_alert_events", event, f"{patient_id}", "critical alert event", wait_for_delivery
+        )
+
+    async def publish_batch_events(
+        self, events: List[Dict[str, Any]], topic: str, wait_for_delivery: bool = True
+    ) -> bool:
         """
         Publish a batch of events to a specific topic.
-        
+
         Args:
             events: List of event dictionaries
             topic: Kafka topic name
-            
+            wait_for_delivery: Wait until the broker acknowledged every event
+
         Returns:
-            bool: True if all events published successfully, False otherwise
+            bool: True if all events were queued (and delivered, when waiting)
         """
         if not self.producer:
             logger.error("❌ Kafka producer not initialized")
             return False
-        
-        delivery_results = {"success": 0, "fail": 0}
-        
-        def delivery_callback(err, msg):
-            if err is not None:
-                logger.error(f"❌ Message delivery failed: {err}")
-                delivery_results["fail"] += 1
-            else:
-                logger.debug(f"✅ Message delivered to {msg.topic()} [{msg.partition()}] at offset {msg.offset()}")
-                delivery_results["success"] += 1
-        
+
         try:
             logger.info(f"📦 Publishing batch of {len(events)} events to topic: {topic}")
-            
+
+            deliveries = []
             for event in events:
                 # Add timestamp if not present
                 if "timestamp" not in event:
                     event["timestamp"] = datetime.utcnow().isoformat()
-                
-                event_json = json.dumps(event, default=str)
-                
+
                 # Determine key based on event type
                 key = None
                 if "document_id" in event:
@@ -588,43 +330,39 @@ class MedicalRecordsEventProducer:
                     key = event["patient_id"]
                 elif "system_name" in event:
                     key = event["system_name"]
-                
-                self.producer.produce(
-                    topic,
-                    key=key.encode("utf-8") if key else None,
-                    value=event_json.encode("utf-8"),
-                    callback=delivery_callback
+
+                delivery = await self.producer.send(
+                    topic, event, key=f"{key}" if key else None
                 )
-            
-            self.producer.flush(timeout=10)
-            
-            # Update metrics
-            self.metrics["total_events_published"] += len(events)
-            if topic in self.metrics["events_by_topic"]:
-                self.metrics["events_by_topic"][topic] += len(events)
-            self.metrics["last_publish_time"] = datetime.utcnow()
-            
-            logger.info(f"✅ Published {len(events)} events to topic {topic}")
-            
+                delivery.add_done_callback(self._record_delivery(topic))
+                deliveries.append(delivery)
+
+            if not wait_for_delivery:
+                return True
+
+            results = await asyncio.gather(*deliveries, return_exceptions=True)
+            failed = sum(1 for r in results if isinstance(r, BaseException))
+            logger.info(f"✅ Published {len(events) - failed} of {len(events)} events to topic {topic}")
+
             # Success if all events delivered
-            return delivery_results["fail"] == 0
-            
-        except KafkaError as e:
-            self.metrics["failed_events"] += len(events)
-            logger.error(f"❌ Kafka error publishing batch events: {e}")
+            return failed == 0
+
+        except PublishQueueFull as e:
+            self.metrics["failed_events"] += len(events) - len(deliveries)
+            logger.error(f"❌ Kafka outbox full publishing batch events: {e}")
             return False
         except Exception as e:
             self.metrics["failed_events"] += len(events)
             logger.error(f"❌ Error publishing batch events: {e}")
             return False
-    
+
     def get_metrics(self) -> Dict[str, Any]:
         """Get producer metrics."""
         uptime = (datetime.utcnow() - self.metrics["startup_time"]).total_seconds()
         success_rate = 0
         if self.metrics["total_events_published"] + self.metrics["failed_events"] > 0:
             success_rate = self.metrics["total_events_published"] / (self.metrics["total_events_published"] + self.metrics["failed_events"]) * 100
-        
+
         return {
             "producer_status": "connected" if self.producer else "disconnected",
             "uptime_seconds": uptime,
@@ -633,11 +371,10 @@ class MedicalRecordsEventProducer:
             "success_rate_percent": round(success_rate, 2),
             "events_by_topic": self.metrics["events_by_topic"],
             "last_publish_time": self.metrics["last_publish_time"].isoformat() if self.metrics["last_publish_time"] else None,
-            "startup_time": self.metrics["startup_time"].isoformat()
+            "startup_time": self.metrics["startup_time"].isoformat(),
+            "publisher": self.producer.stats() if self.producer else None,
         }
-    
+
     def close(self):
-        """Close the Kafka producer."""
-        if self.producer:
-            self.producer.close()
-            logger.info("✅ Medical Records Kafka producer closed") 
\ No newline at end of file
+        """Close the Kafka producer (flushes the shared publisher)."""
+        close_kafka_publishers()
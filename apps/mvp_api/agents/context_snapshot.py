@@ -0,0 +1,544 @@
+"""
+User Context Snapshots for AI Agents
+
+Every agent chat message needs the user's health profile (conditions,
+medications, symptoms, labs, meals, goals, care plans, adherence, check-ins,
+insights, supplements, wearable data and metric summaries).  Fetching those
+one table at a time put ~13 sequential PostgREST round trips in front of
+every LLM call.
+
+``get_context_snapshot`` fetches all sources concurrently, each bounded by
+its own timeout, and keeps the assembled snapshot per user for a short TTL.
+Concurrent requests for the same user share one build.  Writes made through
+the shared usage_gate helpers to any contributing table drop that user's
+snapshot; writers that bypass those helpers are bounded by the TTL, or can
+call ``invalidate_context_snapshot`` themselves.
+
+Sources read through ``_supabase_get_strict``, so a PostgREST error,
+non-200 answer or client timeout fails the source instead of looking like
+an empty table.  A source that fails or times out is left out of the
+snapshot, and a snapshot with missing sources is returned but not cached.
+
+Tuning via environment variables:
+
+    AGENT_CONTEXT_TTL_S               snapshot lifetime (default 60)
+    AGENT_CONTEXT_SOURCE_TIMEOUT_S    per-source fetch budget (default 2.5)
+    AGENT_CONTEXT_MAX_USERS           cached snapshots kept (default 5000)
+"""
+
+import asyncio
+import copy
+import json
+import os
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
+
+from common.utils.logging import get_logger
+from ..dependencies.usage_gate import _supabase_get_strict, on_supabase_write
+
+logger = get_logger(__name__)
+
+CONTEXT_TTL_S = float(os.environ.get("AGENT_CONTEXT_TTL_S", "60"))
+SOURCE_TIMEOUT_S = float(os.environ.get("AGENT_CONTEXT_SOURCE_TIMEOUT_S", "2.5"))
+CONTEXT_MAX_USERS = int(os.environ.get("AGENT_CONTEXT_MAX_USERS", "5000"))
+
+ContextFragment = Dict[str, Any]
+
+
+class ContextSource(NamedTuple):
+    """One slice of the user context and the tables it is read from."""
+
+    name: str
+    tables: Tuple[str, ...]
+    fetch: Callable[[str], Awaitable[ContextFragment]]
+
+
+# ---------------------------------------------------------------------------
+# Concurrent fetching
+# ---------------------------------------------------------------------------
+
+
+async def gather_sources(
+    calls: Mapping[str, Callable[[], Awaitable[Any]]],
+    timeout: Optional[float] = None,
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Run every call in *calls* concurrently, each with its own *timeout*.
+
+    Returns ``(results, failed)``: results of the calls that completed, keyed
+    like *calls*, and the names of those that raised or timed out.
+    """
+    budget = SOURCE_TIMEOUT_S if timeout is None else timeout
+    names = list(calls)
+    outcomes = await asyncio.gather(
+        *(asyncio.wait_for(calls[name](), budget) for name in names),
+        return_exceptions=True,
+    )
+    results: Dict[str, Any] = {}
+    failed: List[str] = []
+    for name, outcome in zip(names, outcomes):
+        if isinstance(outcome, asyncio.TimeoutError):
+            logger.warning(f"Context source {name} timed out after {budget}s")
+            failed.append(name)
+        elif isinstance(outcome, BaseException):
+            logger.warning(f"Context source {name} failed: {outcome}")
+            failed.append(name)
+        else:
+            results[name] = outcome
+    return results, failed
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+
+
+def _name_from_token(current_user: Optional[Dict[str, Any]]) -> Optional[str]:
+    if not current_user:
+        return None
+    payload = current_user.get("token_payload") or {}
+    meta = payload.get("user_metadata") or {}
+    return meta.get("full_name") or meta.get("name") or meta.get("display_name")
+
+
+def _name_from_email(current_user: Optional[Dict[str, Any]]) -> Optional[str]:
+    email = (current_user or {}).get("email") or ""
+    if not email:
+        return None
+    local = email.split("@")[0]
+    # Strip trailing ".demo" / ".test" suffixes for cleaner names
+    local = local.replace(".demo", "").replace(".test", "")
+    return " ".join(p.capitalize() for p in local.replace("_", ".").split("."))
+
+
+async def _fetch_profile_name(user_id: str) -> ContextFragment:
+    profiles = await _supabase_get_strict("profiles", f"id=eq.{user_id}&limit=1")
+    if not profiles:
+        return {}
+    p = profiles[0]
+    name = (
+        p.get("full_name")
+        or p.get("name")
+        or (f"{p.get('first_name', '')} {p.get('last_name', '')}".strip() or None)
+    )
+    return {"profile_name": name} if name else {}
+
+
+async def _fetch_conditions(user_id: str) -> ContextFragment:
+    conditions = await _supabase_get_strict(
+        "health_conditions", f"user_id=eq.{user_id}&is_current=eq.true&limit=10"
+    )
+    if not conditions:
+        return {}
+    return {"health_conditions": [c["condition_name"] for c in conditions]}
+
+
+async def _fetch_medications(user_id: str) -> ContextFragment:
+    medications = await _supabase_get_strict(
+        "medications", f"user_id=eq.{user_id}&is_active=eq.true&limit=10"
+    )
+    if not medications:
+        return {}
+    return {
+        "medications": [
+            {
+                "name": m.get("medication_name"),
+                "dose": m.get("dosage"),
+                "frequency": m.get("frequency"),
+            }
+            for m in medications
+            if m.get("medication_name")
+        ]
+    }
+
+
+async def _fetch_symptoms(user_id: str) -> ContextFragment:
+    symptoms = await _supabase_get_strict(
+        "symptom_journal",
+        f"user_id=eq.{user_id}&order=symptom_date.desc&limit=10",
+    )
+    if not symptoms:
+        return {}
+    return {
+        "recent_symptoms": [
+            {
+                "name": s.get("symptom_name"),
+                "severity": s.get("severity"),
+                "date": (s.get("symptom_date") or "")[:10],
+                "notes": s.get("notes"),
+            }
+            for s in symptoms
+            if s.get("symptom_name")
+        ]
+    }
+
+
+async def _fetch_labs(user_id: str) -> ContextFragment:
+    labs = await _supabase_get_strict(
+        "lab_results",
+        f"user_id=eq.{user_id}&order=test_date.desc&limit=10"
+        f"&select=test_type,test_date,lab_name,biomarkers,ai_summary",
+    )
+    if not labs:
+        return {}
+    lab_entries = []
+    for l in labs:
+        biomarkers = l.get("biomarkers") or []
+        # biomarkers may be stored as a JSON string — parse it
+        if isinstance(biomarkers, str):
+            try:
+                biomarkers = json.loads(biomarkers)
+            except (json.JSONDecodeError, TypeError):
+                biomarkers = []
+        if isinstance(biomarkers, list):
+            for b in biomarkers:
+                lab_entries.append(
+                    {
+                        "test": l.get("test_type"),
+                        "biomarker": b.get("name"),
+                        "value": b.get("value"),
+                        "unit": b.get("unit"),
+                        "status": b.get("status", "unknown"),
+                        "date": (l.get("test_date") or "")[:10],
+                    }
+                )
+        if l.get("ai_summary"):
+            lab_entries.append(
+                {
+                    "test": l.get("test_type"),
+                    "ai_summary": l.get("ai_summary"),
+                    "date": (l.get("test_date") or "")[:10],
+                }
+            )
+    return {"lab_results": lab_entries}
+
+
+async def _fetch_meals(user_id: str) -> ContextFragment:
+    meals = await _supabase_get_strict(
+        "meal_logs",
+        f"user_id=eq.{user_id}&order=timestamp.desc&limit=7",
+    )
+    if not meals:
+        return {}
+    return {
+        "recent_meals": [
+            {
+                "meal": m.get("meal_name") or m.get("food_name"),
+                "calories": m.get("calories"),
+                "meal_type": m.get("meal_type"),
+                "date": (m.get("timestamp") or "")[:10],
+            }
+            for m in meals
+        ]
+    }
+
+
+async def _fetch_goals(user_id: str) -> ContextFragment:
+    goals = await _supabase_get_strict(
+        "user_goals",
+        f"user_id=eq.{user_id}&status=eq.active&order=created_at.desc&limit=10",
+    )
+    if not goals:
+        return {}
+    return {"user_goals": [g["goal_text"] for g in goals if g.get("goal_text")]}
+
+
+async def _fetch_care_plans(user_id: str) -> ContextFragment:
+    care_plans = await _supabase_get_strict(
+        "care_plans",
+        f"user_id=eq.{user_id}&status=eq.active&order=created_at.desc&limit=8",
+    )
+    if not care_plans:
+        return {}
+    return {
+        "care_plans": [
+            {
+                "title": p.get("title"),
+                "metric_type": p.get("metric_type"),
+                "target_value": p.get("target_value"),
+                "target_unit": p.get("target_unit"),
+                "target_date": p.get("target_date"),
+                "current_value": p.get("current_value"),
+                "source": p.get("source"),  # 'doctor' | 'self'
+            }
+            for p in care_plans
+            if p.get("title")
+        ]
+    }
+
+
+async def _fetch_adherence(user_id: str) -> ContextFragment:
+    thirty_ago = (date.today() - timedelta(days=30)).isoformat()
+    adherence_rows = await _supabase_get_strict(
+        "medication_adherence_log",
+        f"user_id=eq.{user_id}&scheduled_time=gte.{thirty_ago}&select=was_taken",
+    )
+    if not adherence_rows:
+        return {}
+    total = len(adherence_rows)
+    taken = sum(1 for r in adherence_rows if r.get("was_taken"))
+    return {"adherence_pct": round(taken / total * 100) if total else None}
+
+
+async def _fetch_checkins(user_id: str) -> ContextFragment:
+    checkins = await _supabase_get_strict(
+        "weekly_checkins",
+        f"user_id=eq.{user_id}&order=week_start.desc&select=week_start,energy_level,mood_rating,pain_level&limit=4",
+    )
+    fragment: ContextFragment = {}
+    if not checkins:
+        return fragment
+    for field, key in (
+        ("energy_level", "avg_energy"),
+        ("mood_rating", "avg_mood"),
+        ("pain_level", "avg_pain"),
+    ):
+        vals = [c.get(field) for c in checkins if c.get(field) is not None]
+        if vals:
+            fragment[key] = round(sum(vals) / len(vals), 1)
+    return fragment
+
+
+async def _fetch_insights(user_id: str) -> ContextFragment:
+    insights = await _supabase_get_strict(
+        "saved_insights",
+        f"user_id=eq.{user_id}&order=created_at.desc&select=title,summary,metric_key,week_bucket&limit=5",
+    )
+    if not insights:
+        return {}
+    return {
+        "recent_insights": [
+            {
+                "title": ins.get("title"),
+                "summary": ins.get("summary"),
+                "week": ins.get("week_bucket"),
+            }
+            for ins in insights
+            if ins.get("title")
+        ]
+    }
+
+
+async def _fetch_supplements(user_id: str) -> ContextFragment:
+    supplements = await _supabase_get_strict(
+        "supplements",
+        f"user_id=eq.{user_id}&is_active=eq.true&order=created_at.desc&limit=15",
+    )
+    if not supplements:
+        return {}
+    return {
+        "supplements": [
+            {
+                "name": s.get("supplement_name"),
+                "dosage": s.get("dosage"),
+                "frequency": s.get("frequency"),
+                "purpose": s.get("purpose"),
+            }
+            for s in supplements
+            if s.get("supplement_name")
+        ]
+    }
+
+
+async def _fetch_native_data(user_id: str) -> ContextFragment:
+    native_data = await _supabase_get_strict(
+        "native_health_data",
+        f"user_id=eq.{user_id}&order=date.desc&limit=70"
+        f"&select=source,metric_type,date,value_json",
+    )
+    if not native_data:
+        return {}
+    # Group by metric type, keeping the latest value of each
+    by_metric: dict = {}
+    for row in native_data:
+        mt = row.get("metric_type")
+        if mt and mt not in by_metric:
+            by_metric[mt] = {
+                "source": row.get("source"),
+                "latest_date": (row.get("date") or "")[:10],
+                "value": row.get("value_json"),
+            }
+    return {"wearable_health_data": by_metric}
+
+
+async def _fetch_summaries(user_id: str) -> ContextFragment:
+    summaries = await _supabase_get_strict(
+        "health_metric_summaries",
+        f"user_id=eq.{user_id}&select=metric_type,latest_value,latest_date,"
+        f"avg_7d,avg_30d,avg_90d,trend_7d,trend_30d,"
+        f"personal_baseline,is_anomalous,anomaly_severity,anomaly_detail",
+    )
+    if not summaries:
+        return {}
+    return {
+        "health_summaries": {
+            s["metric_type"]: {
+                "latest": s.get("latest_value"),
+                "date": s.get("latest_date"),
+                "avg_7d": s.get("avg_7d"),
+                "avg_30d": s.get("avg_30d"),
+                "avg_90d": s.get("avg_90d"),
+                "trend_7d": s.get("trend_7d"),
+                "trend_30d": s.get("trend_30d"),
+                "baseline": s.get("personal_baseline"),
+                "anomalous": s.get("is_anomalous"),
+                "anomaly": s.get("anomaly_detail"),
+            }
+            for s in summaries
+            if s.get("metric_type")
+        }
+    }
+
+
+# Order here is the key order of the assembled snapshot.
+CONTEXT_SOURCES: Tuple[ContextSource, ...] = (
+    ContextSource("profile", ("profiles",), _fetch_profile_name),
+    ContextSource("conditions", ("health_conditions",), _fetch_conditions),
+    ContextSource("medications", ("medications",), _fetch_medications),
+    ContextSource("symptoms", ("symptom_journal",), _fetch_symptoms),
+    ContextSource("labs", ("lab_results",), _fetch_labs),
+    ContextSource("meals", ("meal_logs",), _fetch_meals),
+    ContextSource("goals", ("user_goals",), _fetch_goals),
+    ContextSource("care_plans", ("care_plans",), _fetch_care_plans),
+    ContextSource("adherence", ("medication_adherence_log",), _fetch_adherence),
+    ContextSource("checkins", ("weekly_checkins",), _fetch_checkins),
+    ContextSource("insights", ("saved_insights",), _fetch_insights),
+    ContextSource("supplements", ("supplements",), _fetch_supplements),
+    ContextSource("native_data", ("native_health_data",), _fetch_native_data),
+    ContextSource("summaries", ("health_metric_summaries",), _fetch_summaries),
+)
+
+CONTRIBUTING_TABLES = frozenset(t for src in CONTEXT_SOURCES for t in src.tables)
+
+
+# ---------------------------------------------------------------------------
+# Snapshot cache
+# ---------------------------------------------------------------------------
+
+
+class _Build:  # pylint: disable=too-few-public-methods
+    """An in-flight snapshot build shared by concurrent callers."""
+
+    def __init__(self, task: "asyncio.Future[Tuple[ContextFragment, bool]]") -> None:
+        self.task = task
+        # Set when a contributing write lands mid-build; the result is then
+        # still returned to waiters but never cached.
+        self.stale = False
+
+
+# { user_id: (snapshot, monotonic expiry) }, least recently used first
+_snapshots: "OrderedDict[str, Tuple[ContextFragment, float]]" = OrderedDict()
+_builds: Dict[str, _Build] = {}
+
+
+def _cached_snapshot(user_id: str) -> Optional[ContextFragment]:
+    entry = _snapshots.get(user_id)
+    if entry is None:
+        return None
+    snapshot, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del _snapshots[user_id]
+        return None
+    _snapshots.move_to_end(user_id)
+    return snapshot
+
+
+def _remember_snapshot(user_id: str, snapshot: ContextFragment) -> None:
+    _snapshots[user_id] = (snapshot, time.monotonic() + CONTEXT_TTL_S)
+    _snapshots.move_to_end(user_id)
+    while len(_snapshots) > CONTEXT_MAX_USERS:
+        _snapshots.popitem(last=False)
+
+
+def invalidate_context_snapshot(user_id: Optional[str] = None) -> None:
+    """Drop the cached snapshot for *user_id* (or every user when omitted)."""
+    if user_id is None:
+        _snapshots.clear()
+        stale = list(_builds.values())
+        _builds.clear()
+    else:
+        _snapshots.pop(user_id, None)
+        build = _builds.pop(user_id, None)
+        stale = [build] if build else []
+    for build in stale:
+        build.stale = True
+
+
+def _on_write(table: str, user_id: Optional[str]) -> None:
+    if table in CONTRIBUTING_TABLES:
+        invalidate_context_snapshot(user_id)
+
+
+on_supabase_write(_on_write)
+
+
+async def _build_snapshot(user_id: str) -> Tuple[ContextFragment, bool]:
+    """Fetch every source concurrently; returns (fragments, complete)."""
+    results, failed = await gather_sources(
+        {s.name: (lambda s=s: s.fetch(user_id)) for s in CONTEXT_SOURCES}
+    )
+    snapshot: ContextFragment = {}
+    for source in CONTEXT_SOURCES:
+        snapshot.update(results.get(source.name) or {})
+    return snapshot, not failed
+
+
+async def _load_snapshot(user_id: str) -> ContextFragment:
+    cached = _cached_snapshot(user_id)
+    if cached is not None:
+        return cached
+
+    build = _builds.get(user_id)
+    if build is None:
+        build = _Build(asyncio.ensure_future(_build_snapshot(user_id)))
+        _builds[user_id] = build
+        build.task.add_done_callback(lambda _t, b=build: _finish_build(user_id, b))
+    # Shielded so a cancelled caller does not abort the build for the others.
+    snapshot, _complete = await asyncio.shield(build.task)
+    return snapshot
+
+
+def _finish_build(user_id: str, build: _Build) -> None:
+    if _builds.get(user_id) is build:
+        del _builds[user_id]
+    if build.task.cancelled() or build.task.exception() is not None:
+        return
+    snapshot, complete = build.task.result()
+    if complete and not build.stale:
+        _remember_snapshot(user_id, snapshot)
+
+
+async def get_context_snapshot(
+    user_id: str, current_user: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Return the user's health context for agent prompts.
+
+    The name is resolved from JWT metadata, then the profiles table, then
+    the email address; the profile row is fetched alongside the other
+    sources rather than ahead of them.  The returned dict is the caller's
+    own copy.
+    """
+    context: Dict[str, Any] = copy.deepcopy(await _load_snapshot(user_id))
+    profile_name = context.pop("profile_name", None)
+    name = (
+        _name_from_token(current_user) or profile_name or _name_from_email(current_user)
+    )
+    context = {
+        "user_name": name or "there",
+        "first_name": name.split()[0] if name else "there",
+        **context,
+    }
+    return context
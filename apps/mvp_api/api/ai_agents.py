@@ -7,19 +7,22 @@ that work together to provide personalized health insights.
 Phase 3 of Health Intelligence Features
 """
 
+import asyncio
 import json
 import os
 import re as _re
 import uuid as _uuid
-from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 
-import anthropic
 from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
+from common.ai.llm_gateway import get_llm_gateway, system_blocks
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
+from ..agents.context_snapshot import get_context_snapshot
 from ..dependencies.usage_gate import (
     RateLimit,
     UsageGate,
@@ -427,14 +430,20 @@ class Agent:
         self.temperature = agent_data.get("temperature", 0.7)
         self.max_tokens = agent_data.get("max_tokens", 1000)
 
-    async def generate_response(
+    # Returned when the Anthropic call fails before producing any text.
+    error_reply = "I apologize, but I'm experiencing technical difficulties."
+
+    async def _build_request(
         self,
         user_message: str,
         context: Dict[str, Any],
         conversation_history: List[Dict],
         user_id: str | None = None,
-    ) -> str:
-        """Generate AI response using Anthropic Claude."""
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
+        """
+        Prepare one turn: ``(reply, {})`` when the turn is answered without
+        the LLM, otherwise ``(None, kwargs)`` for ``client.messages``.
+        """
         api_key = _get_anthropic_key()
         if not api_key:
             logger.info(
@@ -443,17 +452,20 @@ class Agent:
             return (
                 f"I'm {self.agent_name}, your {self.agent_description}. "
                 "I'm here to help! (Anthropic API key not configured on the server. Set ANTHROPIC_API_KEY in your deployment environment, e.g. Render → Environment.)"
-            )
+            ), {}
 
         # Topic guard — reject off-topic messages without an LLM call
         if _is_off_topic(user_message):
             logger.info(
                 "Topic guard blocked off-topic message (agent=%s)", self.agent_type
             )
-            return _OFFTOPIC_REFUSAL
+            return _OFFTOPIC_REFUSAL, {}
 
-        # Build system prompt — Anthropic takes system as a top-level string, not a message role
+        # Build system prompt — Anthropic takes system as a top-level string, not a message role.
+        # The agent persona is the same for every user and carries the prompt-cache
+        # breakpoint; the per-user profile follows it.
         system_prompt = self.system_prompt
+        user_prompt = ""
         first_name = context.get("first_name", "the user") if context else "the user"
         if context:
             context_summary = self._build_context_summary(context)
@@ -485,9 +497,9 @@ class Agent:
                 except Exception:
                     pass
 
-                system_prompt = (
-                    f"{system_prompt}{privacy_preamble}"
-                    f"\n\nUser Health Profile:\n{context_summary}"
+                system_prompt = f"{system_prompt}{privacy_preamble}"
+                user_prompt = (
+                    f"User Health Profile:\n{context_summary}"
                     f"{personalization}"
                     f"{loop_ctx}"
                 )
@@ -499,22 +511,69 @@ class Agent:
                 messages.append({"role": msg["role"], "content": msg["content"]})
         messages.append({"role": "user", "content": user_message})
 
-        # Call Anthropic Messages API (PHI context — zero-retention intent)
+        # Anthropic Messages API parameters (PHI context — zero-retention intent)
+        return None, {
+            "model": self.model,
+            "system": system_blocks(system_prompt, user_prompt),
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "metadata": {"user_id": f"vitalix-{hash(user_message) % 10**8}"},
+        }
+
+    async def generate_response(
+        self,
+        user_message: str,
+        context: Dict[str, Any],
+        conversation_history: List[Dict],
+        user_id: str | None = None,
+    ) -> str:
+        """Generate AI response using Anthropic Claude."""
+        reply, params = await self._build_request(
+            user_message, context, conversation_history, user_id
+        )
+        if reply is not None:
+            return reply
         try:
-            client = anthropic.AsyncAnthropic(api_key=api_key)
-            result = await client.messages.create(
-                model=self.model,
-                system=system_prompt,
-                messages=messages,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                metadata={"user_id": f"vitalix-{hash(user_message) % 10**8}"},
-            )
+            result = await get_llm_gateway().create("ai_chat", **params)
             return result.content[0].text
 
         except Exception as exc:
-            logger.error(f"Error calling Anthropic: {exc}")
-            return "I apologize, but I'm experiencing technical difficulties."
+            logger.error(f"Error calling Anthropic ({self.agent_type}): {exc}")
+            return self.error_reply
+
+    async def stream_response(
+        self,
+        user_message: str,
+        context: Dict[str, Any],
+        conversation_history: List[Dict],
+        user_id: str | None = None,
+    ) -> AsyncIterator[str]:
+        """
+        Yield the response text as Anthropic streams it.
+
+        A failure before the first chunk yields the apology instead; one
+        after text was already yielded is re-raised, since the reply is
+        truncated and must not pass for a complete one.
+        """
+        reply, params = await self._build_request(
+            user_message, context, conversation_history, user_id
+        )
+        if reply is not None:
+            yield reply
+            return
+        emitted = False
+        try:
+            async with get_llm_gateway().stream("ai_chat", **params) as stream:
+                async for text in stream.text_stream:
+                    emitted = True
+                    yield text
+
+        except Exception as exc:
+            logger.error(f"Error streaming from Anthropic ({self.agent_type}): {exc}")
+            if emitted:
+                raise
+            yield self.error_reply
 
     def _build_context_summary(self, context: Dict[str, Any]) -> str:
         """Build a rich context summary for the agent, covering all available health data."""
@@ -837,26 +896,6 @@ def _last_assistant_was_onboarding(history: List[Dict[str, Any]]) -> bool:
     return False
 
 
-async def _call_anthropic_messages(
-    system: str,
-    messages: List[Dict[str, str]],
-    model: str,
-    temperature: float,
-    max_tokens: int,
-) -> str:
-    """Make a single Anthropic Messages API call and return the text content."""
-    client = anthropic.AsyncAnthropic(api_key=_get_anthropic_key())
-    result = await client.messages.create(
-        model=model,
-        system=system,
-        messages=messages,
-        temperature=temperature,
-        max_tokens=max_tokens,
-        metadata={"user_id": "vitalix-anonymous"},
-    )
-    return result.content[0].text
-
-
 def _fmt_pref_value(v: Any) -> str:
     """Format a single preference value for prompt injection."""
     if isinstance(v, list):
@@ -917,8 +956,8 @@ async def _extract_prefs_from_message(
         return None
     extraction_prompt = _PREFERENCE_EXTRACTION_PROMPT.format(user_message=user_message)
     try:
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "nutrition_prefs",
             model="claude-haiku-4-5-20251001",
             messages=[{"role": "user", "content": extraction_prompt}],
             temperature=0.1,
@@ -940,26 +979,28 @@ class NutritionAnalystAgent(Agent):
     If the user is replying to an onboarding question, parses and saves their prefs.
     """
 
-    async def generate_response(
+    error_reply = "I'm experiencing technical difficulties. Please try again shortly."
+
+    async def _build_request(
         self,
         user_message: str,
         context: Dict[str, Any],
         conversation_history: List[Dict],
         user_id: Optional[str] = None,
-    ) -> str:
+    ) -> Tuple[Optional[str], Dict[str, Any]]:
         if not _get_anthropic_key():
             logger.info("Nutrition Analyst skipped: ANTHROPIC_API_KEY not set")
             return (
                 f"I'm {self.agent_name}, your personalised nutritionist. "
                 "(Anthropic API key not configured. Set ANTHROPIC_API_KEY in your deployment environment.)"
-            )
+            ), {}
 
         # Topic guard — reject off-topic messages without an LLM call
         if _is_off_topic(user_message):
             logger.info(
                 "Topic guard blocked off-topic message (agent=nutrition_analyst)"
             )
-            return _OFFTOPIC_REFUSAL
+            return _OFFTOPIC_REFUSAL, {}
 
         # Load preferences, collecting them if this is the first turn
         prefs: Optional[Dict[str, Any]] = (
@@ -972,6 +1013,7 @@ class NutritionAnalystAgent(Agent):
 
         # Build system prompt with optional health context appended
         system_prompt = _build_nutrition_system_prompt(prefs)
+        user_prompt = ""
         first_name = context.get("first_name", "the user") if context else "the user"
         ctx_summary = self._build_context_summary(context) if context else ""
         if ctx_summary:
@@ -984,10 +1026,7 @@ class NutritionAnalystAgent(Agent):
                 f"(e.g. 'Based on your recent meals and health conditions, {first_name}...').\n"
                 f"4. Make every recommendation directly relevant to their personal profile."
             )
-            system_prompt = (
-                f"{system_prompt}\n\nUser Health Profile:\n{ctx_summary}"
-                f"{personalization}"
-            )
+            user_prompt = f"User Health Profile:\n{ctx_summary}{personalization}"
 
         # Build messages — only user/assistant roles (Anthropic requirement)
         messages: List[Dict[str, str]] = [
@@ -997,13 +1036,14 @@ class NutritionAnalystAgent(Agent):
         ]
         messages.append({"role": "user", "content": user_message})
 
-        try:
-            return await _call_anthropic_messages(
-                system_prompt, messages, self.model, self.temperature, self.max_tokens
-            )
-        except Exception as exc:
-            logger.error(f"NutritionAnalystAgent Anthropic error: {exc}")
-            return "I'm experiencing technical difficulties. Please try again shortly."
+        return None, {
+            "model": self.model,
+            "system": system_blocks(system_prompt, user_prompt),
+            "messages": messages,
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "metadata": {"user_id": "vitalix-anonymous"},
+        }
 
 
 class AgentOrchestrator:
@@ -1085,271 +1125,7 @@ async def _get_user_context(
     user_id: str, current_user: Optional[Dict[str, Any]] = None
 ) -> Dict[str, Any]:
     """Gather comprehensive user context for agents including name, health data, and history."""
-    context: Dict[str, Any] = {}
-
-    # --- User name resolution (JWT metadata → profiles table → email fallback) ---
-    name: Optional[str] = None
-    if current_user:
-        payload = current_user.get("token_payload") or {}
-        meta = payload.get("user_metadata") or {}
-        name = meta.get("full_name") or meta.get("name") or meta.get("display_name")
-
-    if not name:
-        profiles = await _supabase_get("profiles", f"id=eq.{user_id}&limit=1")
-        if profiles:
-            p = profiles[0]
-            name = (
-                p.get("full_name")
-                or p.get("name")
-                or (
-                    f"{p.get('first_name', '')} {p.get('last_name', '')}".strip()
-                    or None
-                )
-            )
-
-    if not name:
-        email = (current_user or {}).get("email") or ""
-        if email:
-            local = email.split("@")[0]
-            # Strip trailing ".demo" / ".test" suffixes for cleaner names
-            local = local.replace(".demo", "").replace(".test", "")
-            name = " ".join(p.capitalize() for p in local.replace("_", ".").split("."))
-
-    context["user_name"] = name or "there"
-    context["first_name"] = (name or "").split()[0] if name else "there"
-
-    # --- Health conditions ---
-    conditions = await _supabase_get(
-        "health_conditions", f"user_id=eq.{user_id}&is_current=eq.true&limit=10"
-    )
-    if conditions:
-        context["health_conditions"] = [c["condition_name"] for c in conditions]
-
-    # --- Current medications ---
-    medications = await _supabase_get(
-        "medications", f"user_id=eq.{user_id}&is_active=eq.true&limit=10"
-    )
-    if medications:
-        context["medications"] = [
-            {
-                "name": m.get("medication_name"),
-                "dose": m.get("dosage"),
-                "frequency": m.get("frequency"),
-            }
-            for m in medications
-            if m.get("medication_name")
-        ]
-
-    # --- Recent symptoms (last 10, with severity and notes) ---
-    symptoms = await _supabase_get(
-        "symptom_journal",
-        f"user_id=eq.{user_id}&order=symptom_date.desc&limit=10",
-    )
-    if symptoms:
-        context["recent_symptoms"] = [
-            {
-                "name": s.get("symptom_name"),
-                "severity": s.get("severity"),
-                "date": (s.get("symptom_date") or "")[:10],
-                "notes": s.get("notes"),
-            }
-            for s in symptoms
-            if s.get("symptom_name")
-        ]
-
-    # --- Lab results (most recent 10) ---
-    labs = await _supabase_get(
-        "lab_results",
-        f"user_id=eq.{user_id}&order=test_date.desc&limit=10"
-        f"&select=test_type,test_date,lab_name,biomarkers,ai_summary",
-    )
-    if labs:
-        lab_entries = []
-        for l in labs:
-            biomarkers = l.get("biomarkers") or []
-            # biomarkers may be stored as a JSON string — parse it
-            if isinstance(biomarkers, str):
-                try:
-                    biomarkers = json.loads(biomarkers)
-                except (json.JSONDecodeError, TypeError):
-                    biomarkers = []
-            if isinstance(biomarkers, list):
-                for b in biomarkers:
-                    lab_entries.append(
-                        {
-                            "test": l.get("test_type"),
-                            "biomarker": b.get("name"),
-                            "value": b.get("value"),
-                            "unit": b.get("unit"),
-                            "status": b.get("status", "unknown"),
-                            "date": (l.get("test_date") or "")[:10],
-                        }
-                    )
-            if l.get("ai_summary"):
-                lab_entries.append(
-                    {
-                        "test": l.get("test_type"),
-                        "ai_summary": l.get("ai_summary"),
-                        "date": (l.get("test_date") or "")[:10],
-                    }
-                )
-        context["lab_results"] = lab_entries
-
-    # --- Recent meal logs (last 7) ---
-    meals = await _supabase_get(
-        "meal_logs",
-        f"user_id=eq.{user_id}&order=timestamp.desc&limit=7",
-    )
-    if meals:
-        context["recent_meals"] = [
-            {
-                "meal": m.get("meal_name") or m.get("food_name"),
-                "calories": m.get("calories"),
-                "meal_type": m.get("meal_type"),
-                "date": (m.get("timestamp") or "")[:10],
-            }
-            for m in meals
-        ]
-
-    # --- Active user goals ---
-    goals = await _supabase_get(
-        "user_goals",
-        f"user_id=eq.{user_id}&status=eq.active&order=created_at.desc&limit=10",
-    )
-    if goals:
-        context["user_goals"] = [g["goal_text"] for g in goals if g.get("goal_text")]
-
-    # --- Active care plans (treatment targets set by doctor or self) ---
-    care_plans = await _supabase_get(
-        "care_plans",
-        f"user_id=eq.{user_id}&status=eq.active&order=created_at.desc&limit=8",
-    )
-    if care_plans:
-        context["care_plans"] = [
-            {
-                "title": p.get("title"),
-                "metric_type": p.get("metric_type"),
-                "target_value": p.get("target_value"),
-                "target_unit": p.get("target_unit"),
-                "target_date": p.get("target_date"),
-                "current_value": p.get("current_value"),
-                "source": p.get("source"),  # 'doctor' | 'self'
-            }
-            for p in care_plans
-            if p.get("title")
-        ]
-
-    # --- Medication adherence rate (last 30 days) ---
-    thirty_ago = (date.today() - timedelta(days=30)).isoformat()
-    adherence_rows = await _supabase_get(
-        "medication_adherence_log",
-        f"user_id=eq.{user_id}&scheduled_time=gte.{thirty_ago}&select=was_taken",
-    )
-    if adherence_rows:
-        total = len(adherence_rows)
-        taken = sum(1 for r in adherence_rows if r.get("was_taken"))
-        context["adherence_pct"] = round(taken / total * 100) if total else None
-
-    # --- Weekly wellbeing trend (energy + mood from check-ins) ---
-    checkins = await _supabase_get(
-        "weekly_checkins",
-        f"user_id=eq.{user_id}&order=week_start.desc&select=week_start,energy_level,mood_rating,pain_level&limit=4",
-    )
-    if checkins:
-        energy_vals = [
-            c.get("energy_level") for c in checkins if c.get("energy_level") is not None
-        ]
-        mood_vals = [
-            c.get("mood_rating") for c in checkins if c.get("mood_rating") is not None
-        ]
-        pain_vals = [
-            c.get("pain_level") for c in checkins if c.get("pain_level") is not None
-        ]
-        if energy_vals:
-            context["avg_energy"] = round(sum(energy_vals) / len(energy_vals), 1)
-        if mood_vals:
-            context["avg_mood"] = round(sum(mood_vals) / len(mood_vals), 1)
-        if pain_vals:
-            context["avg_pain"] = round(sum(pain_vals) / len(pain_vals), 1)
-
-    # --- Recent AI insights (resurfaced findings) ---
-    insights = await _supabase_get(
-        "saved_insights",
-        f"user_id=eq.{user_id}&order=created_at.desc&select=title,summary,metric_key,week_bucket&limit=5",
-    )
-    if insights:
-        context["recent_insights"] = [
-            {
-                "title": ins.get("title"),
-                "summary": ins.get("summary"),
-                "week": ins.get("week_bucket"),
-            }
-            for ins in insights
-            if ins.get("title")
-        ]
-
-    # --- Supplements (active) ---
-    supplements = await _supabase_get(
-        "supplements",
-        f"user_id=eq.{user_id}&is_active=eq.true&order=created_at.desc&limit=15",
-    )
-    if supplements:
-        context["supplements"] = [
-            {
-                "name": s.get("supplement_name"),
-                "dosage": s.get("dosage"),
-                "frequency": s.get("frequency"),
-                "purpose": s.get("purpose"),
-            }
-            for s in supplements
-            if s.get("supplement_name")
-        ]
-
-    # --- Native health data (recent 7 days from HealthKit/Health Connect/wearables) ---
-    native_data = await _supabase_get(
-        "native_health_data",
-        f"user_id=eq.{user_id}&order=date.desc&limit=70"
-        f"&select=source,metric_type,date,value_json",
-    )
-    if native_data:
-        # Group by metric type, show latest + recent values
-        by_metric: dict = {}
-        for row in native_data:
-            mt = row.get("metric_type")
-            if mt and mt not in by_metric:
-                by_metric[mt] = {
-                    "source": row.get("source"),
-                    "latest_date": (row.get("date") or "")[:10],
-                    "value": row.get("value_json"),
-                }
-        context["wearable_health_data"] = by_metric
-
-    # --- Health metric summaries (pre-computed averages + anomalies) ---
-    summaries = await _supabase_get(
-        "health_metric_summaries",
-        f"user_id=eq.{user_id}&select=metric_type,latest_value,latest_date,"
-        f"avg_7d,avg_30d,avg_90d,trend_7d,trend_30d,"
-        f"personal_baseline,is_anomalous,anomaly_severity,anomaly_detail",
-    )
-    if summaries:
-        context["health_summaries"] = {
-            s["metric_type"]: {
-                "latest": s.get("latest_value"),
-                "date": s.get("latest_date"),
-                "avg_7d": s.get("avg_7d"),
-                "avg_30d": s.get("avg_30d"),
-                "avg_90d": s.get("avg_90d"),
-                "trend_7d": s.get("trend_7d"),
-                "trend_30d": s.get("trend_30d"),
-                "baseline": s.get("personal_baseline"),
-                "anomalous": s.get("is_anomalous"),
-                "anomaly": s.get("anomaly_detail"),
-            }
-            for s in summaries
-            if s.get("metric_type")
-        }
-
-    return context
+    return await get_context_snapshot(user_id, current_user)
 
 
 def _parse_messages(raw: Any) -> List[Dict[str, Any]]:
@@ -1490,15 +1266,22 @@ async def list_agents(current_user: dict = Depends(get_current_user)):
     ]
 
 
-@router.post("/chat", response_model=Conversation)
-async def send_message(
-    request: SendMessageRequest,
-    _rl: None = Depends(RateLimit("ai_chat", max_per_minute=20)),
-    current_user: dict = Depends(UsageGate("ai_agents")),
-):
-    """Send message to AI agent and get response."""
-    user_id = current_user["id"]
+def _sse_event(event: str, data: Any) -> str:
+    """Encode one Server-Sent Events frame with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
 
+
+# Disable proxy buffering so each frame reaches the client as it is written.
+_SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+async def _prepare_chat_turn(
+    request: SendMessageRequest, user_id: str
+) -> Tuple["Agent", str, List[Dict[str, Any]]]:
+    """Pick the agent, open or reuse the conversation, and record the user message.
+
+    Returns (agent, conversation_id, prior messages including this one).
+    """
     # Ensure agents are loaded
     if not orchestrator.agents:
         await orchestrator.load_agents()
@@ -1547,10 +1330,13 @@ async def send_message(
         conv_data = conv_rows[0] if conv_rows else {"messages": []}
         messages = _parse_messages(conv_data.get("messages"))
 
-    # Get user context (includes name resolution and all health data)
-    context = await _get_user_context(user_id, current_user)
+    return agent, conversation_id, messages
+
 
-    # HIPAA audit: log that PHI was accessed for AI query
+async def _log_agent_phi_access(
+    user_id: str, agent: "Agent", context: Dict[str, Any]
+) -> None:
+    """HIPAA audit: log that PHI was accessed for AI query."""
     from common.utils.audit import log_phi_access
 
     await log_phi_access(
@@ -1561,6 +1347,26 @@ async def send_message(
         agent_type=agent.agent_type,
     )
 
+
+@router.post("/chat", response_model=Conversation)
+async def send_message(
+    request: SendMessageRequest,
+    _rl: None = Depends(RateLimit("ai_chat", max_per_minute=20)),
+    current_user: dict = Depends(UsageGate("ai_agents")),
+):
+    """Send message to AI agent and get response."""
+    user_id = current_user["id"]
+
+    # Start assembling the user's context now so it overlaps with routing and
+    # conversation bookkeeping below.
+    context_task = asyncio.ensure_future(_get_user_context(user_id, current_user))
+
+    agent, conversation_id, messages = await _prepare_chat_turn(request, user_id)
+
+    # Get user context (includes name resolution and all health data)
+    context = await context_task
+    await _log_agent_phi_access(user_id, agent, context)
+
     # Generate agent response — pass user_id for all agents (loop context, preferences)
     response_content = await agent.generate_response(
         request.message, context, messages, user_id=user_id
@@ -1575,6 +1381,73 @@ async def send_message(
     return await get_conversation(conversation_id, current_user)
 
 
+@router.post("/chat/stream")
+async def stream_message(
+    request: SendMessageRequest,
+    _rl: None = Depends(RateLimit("ai_chat", max_per_minute=20)),
+    current_user: dict = Depends(UsageGate("ai_agents")),
+):
+    """
+    Send message to AI agent and stream the reply as Server-Sent Events.
+
+    Events: ``conversation`` (ids, sent first), ``delta`` (``{"text": ...}``
+    per chunk) and ``done`` (the persisted assistant message).  The reply is
+    saved once the stream completes; a client that disconnects early, or a
+    stream that breaks off mid-reply (reported as an ``error`` event), leaves
+    only the user's message in the conversation.
+    """
+    user_id = current_user["id"]
+    context_task = asyncio.ensure_future(_get_user_context(user_id, current_user))
+    agent, conversation_id, messages = await _prepare_chat_turn(request, user_id)
+    context = await context_task
+    await _log_agent_phi_access(user_id, agent, context)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse_event(
+            "conversation",
+            {
+                "conversation_id": conversation_id,
+                "agent_id": agent.id,
+                "agent_type": agent.agent_type,
+                "agent_name": agent.agent_name,
+            },
+        )
+        chunks: List[str] = []
+        try:
+            async for text in agent.stream_response(
+                request.message, context, messages, user_id=user_id
+            ):
+                chunks.append(text)
+                yield _sse_event("delta", {"text": text})
+        except Exception:
+            # Already logged by the agent; the partial reply is not saved.
+            yield _sse_event("error", {"detail": agent.error_reply, "truncated": True})
+            return
+
+        content = "".join(chunks)
+        try:
+            await _add_message(conversation_id, user_id, "assistant", content, agent.id)
+        except HTTPException as exc:
+            yield _sse_event("error", {"detail": exc.detail})
+            return
+        yield _sse_event(
+            "done",
+            {
+                "conversation_id": conversation_id,
+                "message": {
+                    "role": "assistant",
+                    "content": content,
+                    "agent_id": agent.id,
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                },
+            },
+        )
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
+
+
 @router.get("/conversations", response_model=List[Conversation])
 async def list_conversations(current_user: dict = Depends(get_current_user)):
     """List user's agent conversations."""
@@ -1861,21 +1734,30 @@ class ConsultResponse(BaseModel):
     synthesis: str
 
 
-@router.post("/consult", response_model=ConsultResponse)
-async def multi_agent_consult(
-    body: ConsultRequest,
-    current_user: dict = Depends(get_current_user),
-):
-    """
-    Multi-agent consultation: primary agent frames a question, consulting
-    agents each provide their specialist perspective, then primary synthesizes.
+_CONSULT_MAX_TOKENS = 300
+_SYNTHESIS_MAX_TOKENS = 500
+_SYNTHESIS_FALLBACK = (
+    "Unable to synthesize perspectives. Please review individual specialist responses."
+)
 
-    Use case: PCOS patient with anxiety → Endocrinologist consults Behavioral Health.
-    """
+
+class _Consultation(NamedTuple):
+    """Resolved agents and prompt context for one multi-agent consult."""
+
+    primary: Dict[str, Any]
+    consultants: List[Dict[str, Any]]
+    question: str
+    context_str: str
+    model: str
+
+
+async def _prepare_consultation(
+    body: ConsultRequest, current_user: dict
+) -> _Consultation:
+    """Validate the consult request and build its shared prompt context."""
     from ..agents.specialist_configs import SPECIALIST_AGENTS
 
-    api_key = _get_anthropic_key()
-    if not api_key:
+    if not _get_anthropic_key():
         raise HTTPException(status_code=503, detail="AI service unavailable")
 
     # Resolve agents
@@ -1896,75 +1778,58 @@ async def multi_agent_consult(
             status_code=400, detail="No valid consulting agents specified"
         )
 
-    # Build user context string
+    # Shared snapshot; typically already warm from the user's chat session.
+    snapshot = await get_context_snapshot(current_user["id"], current_user)
+
+    # Build user context string (client-supplied fields win over the snapshot)
     context_str = ""
-    if body.user_context:
-        ctx = body.user_context
-        parts = []
-        if ctx.get("conditions"):
-            parts.append(f"Health conditions: {', '.join(ctx['conditions'])}")
-        if ctx.get("active_experiment"):
-            parts.append(f"Active experiment: {ctx['active_experiment']}")
-        if ctx.get("proven_patterns"):
-            parts.append(f"Proven effective: {', '.join(ctx['proven_patterns'])}")
-        if ctx.get("current_metrics"):
-            metrics = ctx["current_metrics"]
-            parts.append(
-                f"Current metrics: {', '.join(f'{k}={v}' for k, v in metrics.items() if v is not None)}"
-            )
-        if parts:
-            context_str = "\n\nUser Context:\n" + "\n".join(f"- {p}" for p in parts)
+    ctx = body.user_context or {}
+    parts = []
+    conditions = ctx.get("conditions") or snapshot.get("health_conditions")
+    if conditions:
+        parts.append(f"Health conditions: {', '.join(conditions)}")
+    medications = [m["name"] for m in snapshot.get("medications") or []]
+    if medications:
+        parts.append(f"Current medications: {', '.join(medications)}")
+    if ctx.get("active_experiment"):
+        parts.append(f"Active experiment: {ctx['active_experiment']}")
+    if ctx.get("proven_patterns"):
+        parts.append(f"Proven effective: {', '.join(ctx['proven_patterns'])}")
+    if ctx.get("current_metrics"):
+        metrics = ctx["current_metrics"]
+        parts.append(
+            f"Current metrics: {', '.join(f'{k}={v}' for k, v in metrics.items() if v is not None)}"
+        )
+    if parts:
+        context_str = "\n\nUser Context:\n" + "\n".join(f"- {p}" for p in parts)
+
+    return _Consultation(
+        primary=primary,
+        consultants=consultants,
+        question=body.question,
+        context_str=context_str,
+        model=os.environ.get("ANTHROPIC_MODEL", _DEFAULT_MODEL),
+    )
 
-    client = anthropic.Anthropic(api_key=api_key)
-    model = os.environ.get("ANTHROPIC_MODEL", _DEFAULT_MODEL)
 
-    # Step 1: Get perspective from each consulting agent
-    perspectives: List[AgentPerspective] = []
-    for consultant in consultants:
-        try:
-            consult_prompt = f"""You are a {consultant['specialty']} specialist. A {primary['specialty']} specialist is asking for your perspective on a patient question.
+def _consult_prompt(consult: _Consultation, consultant: Dict[str, Any]) -> str:
+    primary = consult.primary
+    return f"""You are a {consultant['specialty']} specialist. A {primary['specialty']} specialist is asking for your perspective on a patient question.
 
-Question from {primary['agent_name']}: {body.question}
-{context_str}
+Question from {primary['agent_name']}: {consult.question}
+{consult.context_str}
 
 Provide your specialist perspective in 2-3 sentences. Focus on what's relevant to your domain. Be specific and actionable."""
 
-            resp = client.messages.create(
-                model=model,
-                max_tokens=300,
-                messages=[{"role": "user", "content": consult_prompt}],
-            )
-            text = resp.content[0].text.strip()
-            perspectives.append(
-                AgentPerspective(
-                    agent_type=consultant["agent_type"],
-                    agent_name=consultant["agent_name"],
-                    specialty=consultant["specialty"],
-                    response=text,
-                )
-            )
-        except Exception as exc:
-            logger.warning(
-                "Consultation with %s failed: %s", consultant["agent_type"], exc
-            )
-            perspectives.append(
-                AgentPerspective(
-                    agent_type=consultant["agent_type"],
-                    agent_name=consultant["agent_name"],
-                    specialty=consultant["specialty"],
-                    response=f"[Consultation unavailable: {consultant['agent_name']}]",
-                )
-            )
 
-    # Step 2: Primary agent synthesizes all perspectives
+def _synthesis_prompt(
+    consult: _Consultation, perspectives: List[AgentPerspective]
+) -> str:
     perspective_text = "\n\n".join(
         f"**{p.agent_name} ({p.specialty}):** {p.response}" for p in perspectives
     )
-
-    synthesis_prompt = f"""{primary['system_prompt']}
-
-A patient asked: {body.question}
-{context_str}
+    return f"""A patient asked: {consult.question}
+{consult.context_str}
 
 You consulted with the following specialists:
 
@@ -1972,26 +1837,188 @@ You consulted with the following specialists:
 
 Synthesize these perspectives into a unified recommendation. Address the patient directly. Include the key insight from each specialist where relevant. Keep it to 3-5 sentences. Be specific and actionable."""
 
+
+def _perspective(consultant: Dict[str, Any], response: str) -> AgentPerspective:
+    return AgentPerspective(
+        agent_type=consultant["agent_type"],
+        agent_name=consultant["agent_name"],
+        specialty=consultant["specialty"],
+        response=response,
+    )
+
+
+def _unavailable(consultant: Dict[str, Any]) -> str:
+    return f"[Consultation unavailable: {consultant['agent_name']}]"
+
+
+@router.post("/consult", response_model=ConsultResponse)
+async def multi_agent_consult(
+    body: ConsultRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Multi-agent consultation: primary agent frames a question, consulting
+    agents each provide their specialist perspective, then primary synthesizes.
+
+    Use case: PCOS patient with anxiety → Endocrinologist consults Behavioral Health.
+    """
+    consult = await _prepare_consultation(body, current_user)
+    gateway = get_llm_gateway()
+
+    # Step 1: Get perspective from each consulting agent, concurrently
+    async def ask(consultant: Dict[str, Any]) -> AgentPerspective:
+        try:
+            resp = await gateway.create(
+                "ai_consult",
+                model=consult.model,
+                max_tokens=_CONSULT_MAX_TOKENS,
+                messages=[
+                    {"role": "user", "content": _consult_prompt(consult, consultant)}
+                ],
+            )
+            return _perspective(consultant, resp.content[0].text.strip())
+        except Exception as exc:
+            logger.warning(
+                "Consultation with %s failed: %s", consultant["agent_type"], exc
+            )
+            return _perspective(consultant, _unavailable(consultant))
+
+    perspectives: List[AgentPerspective] = list(
+        await asyncio.gather(*(ask(c) for c in consult.consultants))
+    )
+
+    # Step 2: Primary agent synthesizes all perspectives
     try:
-        synth_resp = client.messages.create(
-            model=model,
-            max_tokens=500,
-            messages=[{"role": "user", "content": synthesis_prompt}],
+        synth_resp = await gateway.create(
+            "ai_consult",
+            model=consult.model,
+            max_tokens=_SYNTHESIS_MAX_TOKENS,
+            system=system_blocks(consult.primary["system_prompt"]),
+            messages=[
+                {"role": "user", "content": _synthesis_prompt(consult, perspectives)}
+            ],
         )
         synthesis = synth_resp.content[0].text.strip()
-        primary_response = synthesis
     except Exception as exc:
         logger.warning("Synthesis failed: %s", exc)
-        synthesis = "Unable to synthesize perspectives. Please review individual specialist responses."
-        primary_response = synthesis
+        synthesis = _SYNTHESIS_FALLBACK
 
     return ConsultResponse(
-        primary_response=primary_response,
+        primary_response=synthesis,
         perspectives=perspectives,
         synthesis=synthesis,
     )
 
 
+@router.post("/consult/stream")
+async def stream_multi_agent_consult(
+    body: ConsultRequest,
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Multi-agent consultation streamed as Server-Sent Events.
+
+    Consultants run concurrently; their chunks arrive interleaved as
+    ``perspective_delta`` events (tagged with ``agent_type``) and each ends
+    with a ``perspective`` event.  The synthesis then streams as
+    ``synthesis_delta`` events, and ``done`` carries the full ConsultResponse.
+
+    A consultant whose stream breaks off ends with a ``perspective`` event
+    marked ``truncated`` whose response is the unavailable notice; its partial
+    text is not passed to the synthesis.  A broken synthesis is reported as an
+    ``error`` event and ``done`` carries the synthesis fallback.
+    """
+    consult = await _prepare_consultation(body, current_user)
+    gateway = get_llm_gateway()
+
+    async def stream_text(
+        prompt: str, max_tokens: int, **params: Any
+    ) -> AsyncIterator[str]:
+        async with gateway.stream(
+            "ai_consult",
+            model=consult.model,
+            max_tokens=max_tokens,
+            messages=[{"role": "user", "content": prompt}],
+            **params,
+        ) as stream:
+            async for text in stream.text_stream:
+                yield text
+
+    async def events() -> AsyncIterator[str]:
+        # Consultant tasks push (event, payload) frames; None marks one finished.
+        queue: "asyncio.Queue[Optional[Tuple[str, Dict[str, Any]]]]" = asyncio.Queue()
+        results: Dict[str, AgentPerspective] = {}
+
+        async def ask(consultant: Dict[str, Any]) -> None:
+            agent_type = consultant["agent_type"]
+            chunks: List[str] = []
+            truncated = False
+            try:
+                async for text in stream_text(
+                    _consult_prompt(consult, consultant), _CONSULT_MAX_TOKENS
+                ):
+                    chunks.append(text)
+                    await queue.put(
+                        ("perspective_delta", {"agent_type": agent_type, "text": text})
+                    )
+                response = "".join(chunks).strip()
+            except Exception as exc:
+                logger.warning("Consultation with %s failed: %s", agent_type, exc)
+                # A cut-off perspective could mislead the synthesis; drop it.
+                response = _unavailable(consultant)
+                truncated = True
+            results[agent_type] = _perspective(consultant, response)
+            payload = results[agent_type].model_dump()
+            if truncated:
+                payload["truncated"] = True
+            await queue.put(("perspective", payload))
+            await queue.put(None)
+
+        tasks = [asyncio.ensure_future(ask(c)) for c in consult.consultants]
+        try:
+            pending = len(tasks)
+            while pending:
+                item = await queue.get()
+                if item is None:
+                    pending -= 1
+                    continue
+                yield _sse_event(*item)
+        finally:
+            # Client went away mid-stream: stop the remaining consultants.
+            for task in tasks:
+                task.cancel()
+
+        # Keep the requested consultant order for the synthesis prompt.
+        perspectives = [results[c["agent_type"]] for c in consult.consultants]
+        chunks: List[str] = []
+        try:
+            async for text in stream_text(
+                _synthesis_prompt(consult, perspectives),
+                _SYNTHESIS_MAX_TOKENS,
+                system=system_blocks(consult.primary["system_prompt"]),
+            ):
+                chunks.append(text)
+                yield _sse_event("synthesis_delta", {"text": text})
+            synthesis = "".join(chunks).strip()
+        except Exception as exc:
+            logger.warning("Synthesis failed: %s", exc)
+            synthesis = _SYNTHESIS_FALLBACK
+            yield _sse_event("error", {"detail": synthesis, "truncated": True})
+
+        yield _sse_event(
+            "done",
+            ConsultResponse(
+                primary_response=synthesis,
+                perspectives=perspectives,
+                synthesis=synthesis,
+            ).model_dump(),
+        )
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers=_SSE_HEADERS
+    )
+
+
 # ============================================================================
 # LOOP-AWARE CONTEXT — inject experiment/efficacy data into agent conversations
 # ============================================================================
@@ -22,6 +22,8 @@ from pydantic import BaseModel
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 
+from ..dependencies.usage_gate import supabase_read_cache
+
 logger = get_logger(__name__)
 
 router = APIRouter()
@@ -183,8 +185,11 @@ async def batch_fetch(
         elif resource in _FETCHERS:
             coros.append(_FETCHERS[resource](current_user))
 
-    # Run all fetches in parallel; capture exceptions per-resource
-    raw_results = await asyncio.gather(*coros, return_exceptions=True)
+    # Run all fetches in parallel; capture exceptions per-resource.
+    # Resources re-read the same tables (subscriptions, native_health_data,
+    # health_metrics_normalized, ...) — share those reads across the batch.
+    with supabase_read_cache():
+        raw_results = await asyncio.gather(*coros, return_exceptions=True)
 
     result_map: Dict[str, Any] = {}
     errors: Dict[str, str] = {}
@@ -17,6 +17,7 @@ from pydantic import BaseModel
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
+    forget_user_tier,
     get_user_tier,
     get_usage_summary,
     _supabase_get,
@@ -150,6 +151,8 @@ async def _upsert_subscription(  # pylint: disable=too-many-arguments
         await _supabase_upsert("subscriptions", body)
         logger.info(f"POST new subscription for user {user_id}")
 
+    forget_user_tier(user_id)
+
 
 # --- Endpoints ---
 
@@ -365,6 +368,7 @@ async def force_activate_pro(
                 )
             result = await resp.json() if resp.status == 200 else None
 
+    forget_user_tier(user_id)
     logger.info(f"Force-activated {tier} subscription for user {user_id}: {result}")
 
     return {
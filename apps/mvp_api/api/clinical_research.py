@@ -1210,13 +1210,13 @@ Rules:
 
 async def _call_claude(prompt: str, max_tokens: int = 2000) -> str:
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "{}"
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "clinical_research",
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
@@ -18,23 +18,49 @@ Engine considerations:
 
 # pylint: disable=too-many-locals,too-many-branches,too-many-statements,broad-except,line-too-long,invalid-name
 
-import math
+import asyncio
 import os
+import time
 import uuid
+from bisect import bisect_left
+from collections import OrderedDict
 from datetime import date, datetime, timedelta, timezone
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import aiohttp
+import numpy as np
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 
+from common.ai.llm_gateway import get_llm_gateway, json_reply
 from common.middleware.auth import get_current_user
+from common.metrics.correlation_matrix import (
+    complete_rows,
+    daily_matrix,
+    lagged_pair_stats,
+)
+from common.metrics.daily_store import DailyMetricStore, get_daily_store_cache
+from common.metrics.granger import granger_batch
 from common.metrics.normalizer import SOURCE_PRIORITY as _SOURCE_PRIORITY
+from common.metrics.pair_moments import PairMoments
 from common.utils.logging import get_logger
+from common.utils.process_pool import run_in_process
 from ..dependencies.usage_gate import (
     UsageGate,
     _supabase_get,
     _supabase_upsert,
+    on_supabase_write,
 )
 
 logger = get_logger(__name__)
@@ -51,10 +77,25 @@ ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = os.environ.get("CORRELATION_AI_MODEL", "claude-sonnet-4-6")
 
 CACHE_TTL_HOURS = 6
+# Incremental refresh: a worker keeps each user's last window in memory and,
+# on the next computation, re-fetches only the days since then plus this many
+# trailing days (late wearable syncs, edits to yesterday's log).  Writes that
+# can reach further back (Oura sync, health-data ingest, meal logs) drop the
+# user's state via forget_correlation_state(); a full re-fetch also happens
+# every FULL_RECOMPUTE_HOURS for anything written outside this process.
+INCREMENTAL_REFETCH_DAYS = 2
+FULL_RECOMPUTE_HOURS = 24
+CORRELATION_STATE_MAX_USERS = int(os.environ.get("CORRELATION_STATE_MAX_USERS", "256"))
 MIN_OVERLAPPING_DAYS = 5
 # Advanced Correlation Engine: multi-lag analysis (1-14 days), Granger up to 14 lags
 MAX_LAG_DAYS = 14
-GRANGER_MAX_LAG = 14
+
+# Causal graph: Granger tests run on the CPU process pool, in chunks of pairs,
+# and stop after CAUSAL_GRAPH_CPU_BUDGET_S — untested pairs keep correlation-only
+# evidence and the graph is flagged ``truncated``.
+CAUSAL_GRAPH_MAX_PAIRS = 20
+CAUSAL_GRAPH_CHUNK_SIZE = 5
+CAUSAL_GRAPH_CPU_BUDGET_S = float(os.environ.get("CAUSAL_GRAPH_CPU_BUDGET_S", "5.0"))
 
 # Relaxed thresholds for condition-specific pairs
 CONDITION_MIN_R = 0.3
@@ -311,6 +352,7 @@ class CausalGraph(BaseModel):
     confidence_threshold: float
     data_sources_used: List[str] = []
     days_with_data: int = 0  # actual days analyzed (useful when days=0 / all-history)
+    truncated: bool = False  # Granger tests cut short by the CPU budget
 
 
 # ---------------------------------------------------------------------------
@@ -452,215 +494,6 @@ CORRELATION_PAIRS: List[Tuple[str, str, str, int]] = [
 ]
 
 
-# ---------------------------------------------------------------------------
-# Pure-Python Pearson correlation
-# ---------------------------------------------------------------------------
-
-
-def _pearson_r(x: List[float], y: List[float]) -> Tuple[float, float]:
-    """
-    Compute Pearson correlation coefficient and approximate p-value.
-    Pure Python — no numpy/scipy dependency.
-    """
-    n = len(x)
-    if n < MIN_OVERLAPPING_DAYS:
-        return 0.0, 1.0
-
-    mean_x = sum(x) / n
-    mean_y = sum(y) / n
-
-    cov = sum((xi - mean_x) * (yi - mean_y) for xi, yi in zip(x, y))
-    std_x = math.sqrt(sum((xi - mean_x) ** 2 for xi in x))
-    std_y = math.sqrt(sum((yi - mean_y) ** 2 for yi in y))
-
-    if std_x == 0 or std_y == 0:
-        return 0.0, 1.0
-
-    r = cov / (std_x * std_y)
-    r = max(-1.0, min(1.0, r))  # clamp floating-point drift
-
-    # t-statistic for significance
-    if abs(r) >= 1.0:
-        return r, 0.0
-    t_stat = r * math.sqrt((n - 2) / (1 - r * r))
-    p_value = _approx_two_tail_p(t_stat, n - 2)
-    return round(r, 4), round(p_value, 6)
-
-
-def _spearman_r(x: List[float], y: List[float]) -> Tuple[float, float]:
-    """
-    Compute Spearman rank correlation (non-linear / monotonic).
-    Pure Python — no numpy/scipy dependency.
-    """
-    n = len(x)
-    if n < MIN_OVERLAPPING_DAYS:
-        return 0.0, 1.0
-
-    def rank(vals: List[float]) -> List[float]:
-        order = sorted(range(n), key=lambda i: vals[i])
-        ranks = [0.0] * n
-        for r, i in enumerate(order, 1):
-            ranks[i] = float(r)
-        # Handle ties: assign average rank
-        i = 0
-        while i < n:
-            j = i
-            while j + 1 < n and vals[order[j]] == vals[order[j + 1]]:
-                j += 1
-            if j > i:
-                avg = (i + 1 + j + 1) / 2.0
-                for k in range(i, j + 1):
-                    ranks[order[k]] = avg
-            i = j + 1
-        return ranks
-
-    rx = rank(x)
-    ry = rank(y)
-    return _pearson_r(rx, ry)
-
-
-def _approx_two_tail_p(t: float, df: int) -> float:
-    """
-    Approximate two-tailed p-value for a t-distribution.
-    Uses a simple approximation adequate for df=3..20 (our typical range).
-    """
-    if df <= 0:
-        return 1.0
-    # Approximation: p ≈ 2 * (1 - Φ(|t| * √(df / (df + t²))))  for large df
-    # For small df, use the regularised incomplete beta function shortcut.
-    x = df / (df + t * t)
-    # Regularised incomplete beta I_x(df/2, 0.5) via a simple series expansion
-    a = df / 2.0
-    b = 0.5
-    p = _reg_incomplete_beta(x, a, b)
-    return max(0.0, min(1.0, p))
-
-
-def _reg_incomplete_beta(x: float, a: float, b: float, max_iter: int = 100) -> float:
-    """Regularised incomplete beta function I_x(a, b) via continued fraction."""
-    if x <= 0:
-        return 0.0
-    if x >= 1:
-        return 1.0
-
-    # Use the log-beta for the prefactor
-    lbeta = math.lgamma(a) + math.lgamma(b) - math.lgamma(a + b)
-    front = math.exp(a * math.log(x) + b * math.log(1 - x) - lbeta) / a
-
-    # Lentz continued fraction
-    f = 1.0
-    c = 1.0
-    d = 1.0 - (a + b) * x / (a + 1)
-    if abs(d) < 1e-30:
-        d = 1e-30
-    d = 1.0 / d
-    f = d
-
-    for m in range(1, max_iter + 1):
-        # even step
-        num = m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m))
-        d = 1.0 + num * d
-        if abs(d) < 1e-30:
-            d = 1e-30
-        d = 1.0 / d
-        c = 1.0 + num / c
-        if abs(c) < 1e-30:
-            c = 1e-30
-        f *= d * c
-
-        # odd step
-        num = -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))
-        d = 1.0 + num * d
-        if abs(d) < 1e-30:
-            d = 1e-30
-        d = 1.0 / d
-        c = 1.0 + num / c
-        if abs(c) < 1e-30:
-            c = 1e-30
-        delta = d * c
-        f *= delta
-
-        if abs(delta - 1.0) < 1e-8:
-            break
-
-    return front * f
-
-
-def _f_dist_p_value(f_stat: float, df1: int, df2: int) -> float:
-    """
-    Upper-tail p-value for the F-distribution: P(F > f_stat).
-    Uses the regularised incomplete beta identity:
-        p = 1 - I_{x}(df1/2, df2/2)  where x = df1*f / (df1*f + df2)
-    """
-    if f_stat <= 0 or df1 <= 0 or df2 <= 0:
-        return 1.0
-    x = (df1 * f_stat) / (df1 * f_stat + df2)
-    cdf = _reg_incomplete_beta(x, df1 / 2.0, df2 / 2.0)
-    return max(0.0, min(1.0, 1.0 - cdf))
-
-
-def _ols_rss(X_rows: List[List[float]], y: List[float]) -> Optional[float]:
-    """
-    Fit OLS via the normal equations  (X'X)⁻¹ X'y  using Gaussian elimination
-    with partial pivoting.  Returns residual sum of squares, or None if the
-    system is (near-)singular or there are too few observations.
-    Pure Python — no numpy / scipy dependency.
-    """
-    n = len(y)
-    if not X_rows or n == 0:
-        return None
-    k = len(X_rows[0])
-    if n < k + 2:
-        return None
-
-    # Build X'X (k×k) and X'y (k,)
-    XtX = [[0.0] * k for _ in range(k)]
-    Xty = [0.0] * k
-    for i in range(n):
-        xi = X_rows[i]
-        for a in range(k):
-            Xty[a] += xi[a] * y[i]
-            for b in range(a, k):
-                v = xi[a] * xi[b]
-                XtX[a][b] += v
-                if b != a:
-                    XtX[b][a] += v
-
-    # Solve (X'X) beta = X'y via Gauss-Jordan with partial pivoting
-    # Augmented matrix [XtX | Xty]
-    aug = [XtX[i][:] + [Xty[i]] for i in range(k)]
-
-    for col in range(k):
-        # Partial pivoting
-        max_row = max(range(col, k), key=lambda r: abs(aug[r][col]))
-        aug[col], aug[max_row] = aug[max_row], aug[col]
-        pivot = aug[col][col]
-        if abs(pivot) < 1e-12:
-            return None  # singular — can't fit model
-        # Normalise pivot row
-        inv_pivot = 1.0 / pivot
-        aug[col] = [v * inv_pivot for v in aug[col]]
-        # Eliminate column in all other rows
-        for row in range(k):
-            if row == col:
-                continue
-            factor = aug[row][col]
-            if abs(factor) < 1e-15:
-                continue
-            for j in range(col, k + 1):
-                aug[row][j] -= factor * aug[col][j]
-
-    beta = [aug[i][k] for i in range(k)]
-
-    # Compute RSS = Σ (y_i - ŷ_i)²
-    rss = 0.0
-    for i in range(n):
-        pred = sum(X_rows[i][j] * beta[j] for j in range(k))
-        resid = y[i] - pred
-        rss += resid * resid
-    return rss
-
-
 # ---------------------------------------------------------------------------
 # Data fetching helpers
 # ---------------------------------------------------------------------------
@@ -703,24 +536,35 @@ def _oura_to_canonical(oura_metrics: Dict[str, float]) -> Dict[str, float]:
     return canonical
 
 
-async def _build_health_daily(
+async def _build_health_store(
     user_id: str,
     fetch_days: int,
-    timeline: list,
-) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    timeline: Union[list, Callable[[], Awaitable[list]]],
+) -> Tuple[DailyMetricStore, List[str]]:
     """
-    Build the device-agnostic health_daily dict from all connected sources.
+    Build the device-agnostic health store from all connected sources.
 
     Data priority per date:
-    1. health_metrics_normalized (canonical names, all sources via Session 2+)
+    1. health_metrics_normalized (canonical names, all sources via Session 2+),
+       deduplicated per (date, metric) by SOURCE_PRIORITY
     2. Oura timeline data (remapped to canonical via _oura_to_canonical)
     3. native_health_data fallback for dates not yet in health_metrics_normalized
 
-    Returns (health_daily, display_source_names).
+    The result is cached per (user, window) in the shared DailyStoreCache;
+    callers get their own copy.  *timeline* may be a loader (see
+    ``_timeline_loader``), awaited only when the cache misses.  Returns
+    (store, display_source_names).
     """
     from datetime import date as _date
 
-    health_daily: Dict[str, Dict[str, float]] = {}
+    cache = get_daily_store_cache()
+    cached = cache.get((user_id, "health", fetch_days))
+    if cached is not None:
+        store, display_names = cached
+        return store, list(display_names)
+    if callable(timeline):
+        timeline = await timeline()
+
     sources_seen: Set[str] = set()
 
     # 1. Query health_metrics_normalized for canonical data from all devices
@@ -736,55 +580,45 @@ async def _build_health_daily(
     except Exception as exc:  # pylint: disable=broad-except
         logger.warning("Could not fetch health_metrics_normalized: %s", exc)
 
-    # Track best priority per (date, metric) to handle multi-source deduplication
-    _best_priority: Dict[Tuple[str, str], int] = {}
-
+    dates: List[str] = []
+    metrics: List[str] = []
+    values: List[float] = []
+    priorities: List[int] = []
     for row in norm_rows or []:
         date_str = str(row.get("date", ""))[:10]
         metric = row.get("canonical_metric", "")
         value = row.get("value")
-        source = row.get("source", "")
         if not date_str or not metric or value is None:
             continue
         try:
             val = float(value)
         except (TypeError, ValueError):
             continue
+        source = row.get("source", "")
+        dates.append(date_str)
+        metrics.append(metric)
+        values.append(val)
+        priorities.append(_SOURCE_PRIORITY.get(source, 0))
+        sources_seen.add(source)
 
-        src_prio = _SOURCE_PRIORITY.get(source, 0)
-        key = (date_str, metric)
-        if src_prio > _best_priority.get(key, -1):
-            health_daily.setdefault(date_str, {})[metric] = val
-            _best_priority[key] = src_prio
-            sources_seen.add(source)
-
-    normalized_dates = set(health_daily.keys())
+    store = DailyMetricStore.from_rows(dates, metrics, values, priorities)
+    normalized_dates = store.dates_with_data()
 
-    # 2. Oura timeline fallback for dates not yet in health_metrics_normalized
+    # 2. Oura timeline fallback — health_metrics_normalized takes priority; Oura fills gaps
     oura_raw = _extract_wearable_daily(timeline)
     if oura_raw:
         sources_seen.add("oura")
-        for date_str, oura_metrics in oura_raw.items():
-            canonical = _oura_to_canonical(oura_metrics)
-            if not canonical:
-                continue
-            day = health_daily.setdefault(date_str, {})
-            for metric, val in canonical.items():
-                # health_metrics_normalized takes priority; Oura fills gaps
-                if date_str not in normalized_dates or metric not in day:
-                    day[metric] = val
+        store.merge(
+            DailyMetricStore.from_daily(
+                {d: _oura_to_canonical(m) for d, m in oura_raw.items()}
+            )
+        )
 
     # 3. native_health_data fallback (for dates not yet normalized)
-    native_daily, native_source_names = await _fetch_native_health_data(
+    native_store, native_source_names = await _fetch_native_health_store(
         user_id, fetch_days
     )
-    for date_str, native_metrics in native_daily.items():
-        if date_str in normalized_dates:
-            continue  # Already covered by health_metrics_normalized
-        day = health_daily.setdefault(date_str, {})
-        for metric, val in native_metrics.items():
-            if metric not in day:
-                day[metric] = val
+    store.merge(native_store, skip_dates=normalized_dates)
     # Merge source names (already display-formatted)
     for name in native_source_names:
         # Reverse lookup from display name to source key for sources_seen
@@ -793,7 +627,35 @@ async def _build_health_daily(
     display_names = [
         _SOURCE_DISPLAY_NAMES.get(s, s.capitalize()) for s in sorted(sources_seen)
     ]
-    return health_daily, display_names
+    cache.put((user_id, "health", fetch_days), store, tuple(display_names))
+    return store, display_names
+
+
+def _timeline_loader(
+    current_user: dict, days: int, purpose: str
+) -> Callable[[], Awaitable[list]]:
+    """Deferred ``get_timeline`` call for ``_build_health_store``; [] on failure."""
+
+    async def load() -> list:
+        from .timeline import get_timeline
+
+        try:
+            return await get_timeline(days=days, current_user=current_user)
+        except Exception as exc:
+            logger.error("Failed to fetch timeline for %s: %s", purpose, exc)
+            return []
+
+    return load
+
+
+async def _build_health_daily(
+    user_id: str,
+    fetch_days: int,
+    timeline: list,
+) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """``_build_health_store`` as a ``{date: {metric: value}}`` dict."""
+    store, display_names = await _build_health_store(user_id, fetch_days, timeline)
+    return store.to_daily(), display_names
 
 
 async def _fetch_nutrition_daily(
@@ -967,13 +829,12 @@ def _extract_wearable_daily(timeline: list) -> Dict[str, Dict[str, float]]:
     return daily
 
 
-async def _fetch_native_health_data(
+async def _fetch_native_health_store(
     user_id: str, days: int
-) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+) -> Tuple[DailyMetricStore, List[str]]:
     """
     Query native_health_data for ALL connected device sources.
-    Returns (daily_dict, display_source_names).
-    daily_dict: {date_str: {internal_metric_key: value, ...}}
+    Returns (store, display_source_names) keyed by internal metric names.
 
     Merges data from Apple Health, Google Health, Whoop, Dexcom, Garmin, etc.
     Oura data already comes from the timeline endpoint; native data supplements it.
@@ -990,9 +851,11 @@ async def _fetch_native_health_data(
         )
     except Exception as exc:
         logger.warning("Could not fetch native_health_data: %s", exc)
-        return {}, []
+        return DailyMetricStore(), []
 
-    daily: Dict[str, Dict[str, float]] = {}
+    dates: List[str] = []
+    metrics: List[str] = []
+    values: List[float] = []
     sources_seen: set = set()
 
     for row in rows or []:
@@ -1020,26 +883,31 @@ async def _fetch_native_health_data(
         ):
             continue
 
-        if date_str not in daily:
-            daily[date_str] = {}
-
-        # Keep the higher non-zero value if multiple sources report the same metric
-        existing = daily[date_str].get(internal_key, 0.0)
-        if val > existing or existing == 0:
-            daily[date_str][internal_key] = val
-
+        dates.append(date_str)
+        metrics.append(internal_key)
+        values.append(val)
         sources_seen.add(source)
 
+    # Keep the higher value if multiple sources report the same metric
+    store = DailyMetricStore.from_rows(dates, metrics, values, priorities=values)
     display_names = [
         _SOURCE_DISPLAY_NAMES.get(s, s.capitalize()) for s in sorted(sources_seen)
     ]
-    return daily, display_names
+    return store, display_names
 
 
-async def _fetch_symptoms_daily(user_id: str, days: int) -> Dict[str, Dict[str, float]]:
+async def _fetch_native_health_data(
+    user_id: str, days: int
+) -> Tuple[Dict[str, Dict[str, float]], List[str]]:
+    """``_fetch_native_health_store`` as ``({date: {metric: value}}, display_source_names)``."""
+    store, display_names = await _fetch_native_health_store(user_id, days)
+    return store.to_daily(), display_names
+
+
+async def _fetch_symptoms_store(user_id: str, days: int) -> DailyMetricStore:
     """
     Fetch daily symptom averages from symptom_journal.
-    Returns {date_str: {"symptom_severity_avg": float, "symptom_count": float}}.
+    Returns a store with "symptom_severity_avg" and "symptom_count" columns.
     These are used as health *outcome* variables in correlation analysis.
     """
     from datetime import date as _date
@@ -1054,23 +922,35 @@ async def _fetch_symptoms_daily(user_id: str, days: int) -> Dict[str, Dict[str,
         )
     except Exception as exc:
         logger.warning("Could not fetch symptom_journal for correlations: %s", exc)
-        return {}
+        return DailyMetricStore()
 
-    # Aggregate by date: average severity + count
-    by_date: Dict[str, List[float]] = {}
+    dates: List[str] = []
+    severities: List[float] = []
     for row in rows or []:
         d = str(row.get("symptom_date", ""))[:10]
         sev = row.get("severity")
         if d and sev is not None:
-            by_date.setdefault(d, []).append(float(sev))
+            dates.append(d)
+            severities.append(float(sev))
+    if not dates:
+        return DailyMetricStore()
 
-    daily: Dict[str, Dict[str, float]] = {}
-    for d, sevs in by_date.items():
-        daily[d] = {
-            "symptom_severity_avg": round(sum(sevs) / len(sevs), 2),
-            "symptom_count": float(len(sevs)),
-        }
-    return daily
+    # Aggregate by date: average severity + count
+    day_keys, day_idx = np.unique(np.asarray(dates), return_inverse=True)
+    counts = np.bincount(day_idx).astype(np.float64)
+    totals = np.bincount(day_idx, weights=np.asarray(severities))
+    return DailyMetricStore(
+        day_keys.tolist(),
+        {
+            "symptom_severity_avg": [round(t / c, 2) for t, c in zip(totals, counts)],
+            "symptom_count": counts,
+        },
+    )
+
+
+async def _fetch_symptoms_daily(user_id: str, days: int) -> Dict[str, Dict[str, float]]:
+    """``_fetch_symptoms_store`` as ``{date_str: {"symptom_severity_avg": float, "symptom_count": float}}``."""
+    return (await _fetch_symptoms_store(user_id, days)).to_daily()
 
 
 async def _fetch_medications_supplements_context(
@@ -1153,14 +1033,15 @@ async def _fetch_medications_supplements_context(
     return adherence_daily, context_str, sources_used
 
 
-async def _fetch_lab_biomarkers_daily(
+async def _fetch_lab_biomarkers_store(
     user_id: str, days: int
-) -> Tuple[Dict[str, Dict[str, float]], str]:
+) -> Tuple[DailyMetricStore, str]:
     """
     Fetch lab results within the date window.
-    Returns (daily_dict, context_str).
-    - daily_dict: {test_date: {lab_glucose: 125.0, lab_hba1c: 6.8, ...}}
+    Returns (store, context_str).
+    - store: lab_* columns by test_date (e.g. lab_glucose, lab_hba1c).
       Only populated if >= 2 draws exist in the window (need variance for statistics).
+      When a biomarker appears twice on one date, the later row wins.
     - context_str: most-recent lab values formatted for the AI prompt.
     """
     import re as _re
@@ -1176,15 +1057,17 @@ async def _fetch_lab_biomarkers_daily(
         )
     except Exception as exc:
         logger.warning("Could not fetch lab_results: %s", exc)
-        return {}, ""
+        return DailyMetricStore(), ""
 
     if not rows:
-        return {}, ""
+        return DailyMetricStore(), ""
 
     def _slug(name: str) -> str:
         return "lab_" + _re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
 
-    daily: Dict[str, Dict[str, float]] = {}
+    dates: List[str] = []
+    metrics: List[str] = []
+    values: List[float] = []
     most_recent_date = ""
     most_recent_markers: List[str] = []
 
@@ -1193,41 +1076,55 @@ async def _fetch_lab_biomarkers_daily(
         biomarkers = row.get("biomarkers") or []
         if not date_str or not isinstance(biomarkers, list):
             continue
-        day_vals: Dict[str, float] = {}
+        row_has_values = False
         for bm in biomarkers:
             name = str(bm.get("name", "")).strip()
             val = bm.get("value")
             if not name or val is None:
                 continue
             try:
-                day_vals[_slug(name)] = float(val)
+                values.append(float(val))
             except (TypeError, ValueError):
                 continue
-        if day_vals:
-            daily[date_str] = day_vals
-            if date_str >= most_recent_date:
-                most_recent_date = date_str
-                most_recent_markers = [
-                    f"{bm.get('name', '')} {bm.get('value', '')} {bm.get('unit', '')}".strip()
-                    + (
-                        " ⚠"
-                        if str(bm.get("status", "")).lower()
-                        in ("high", "low", "abnormal", "critical")
-                        else ""
-                    )
-                    for bm in biomarkers
-                    if bm.get("name") and bm.get("value") is not None
-                ]
+            dates.append(date_str)
+            metrics.append(_slug(name))
+            row_has_values = True
+        if row_has_values and date_str >= most_recent_date:
+            most_recent_date = date_str
+            most_recent_markers = [
+                f"{bm.get('name', '')} {bm.get('value', '')} {bm.get('unit', '')}".strip()
+                + (
+                    " ⚠"
+                    if str(bm.get("status", "")).lower()
+                    in ("high", "low", "abnormal", "critical")
+                    else ""
+                )
+                for bm in biomarkers
+                if bm.get("name") and bm.get("value") is not None
+            ]
 
-    # Only expose daily dict for statistical use if we have >= 2 draws
-    stats_daily = daily if len(daily) >= 2 else {}
+    # Later rows win: priority = arrival order.
+    store = DailyMetricStore.from_rows(
+        dates, metrics, values, priorities=range(len(values))
+    )
 
     context_str = (
         f"Recent labs ({most_recent_date}): {', '.join(most_recent_markers[:8])}"
         if most_recent_markers and most_recent_date
         else ""
     )
-    return stats_daily, context_str
+    # Only expose the store for statistical use if we have >= 2 draws
+    if len(store.dates) < 2:
+        return DailyMetricStore(), context_str
+    return store, context_str
+
+
+async def _fetch_lab_biomarkers_daily(
+    user_id: str, days: int
+) -> Tuple[Dict[str, Dict[str, float]], str]:
+    """``_fetch_lab_biomarkers_store`` as ``({test_date: {lab_*: value}}, context_str)``."""
+    store, context_str = await _fetch_lab_biomarkers_store(user_id, days)
+    return store.to_daily(), context_str
 
 
 async def _fetch_conditions_context(user_id: str) -> str:
@@ -1326,492 +1223,509 @@ def _build_dynamic_native_pairs(
     return extra_pairs
 
 
-def _one_correlation(
-    nutr_metric: str,
-    oura_metric: str,
-    category: str,
-    lag: int,
-    all_dates: List[str],
-    nutrition_daily: Dict[str, Dict[str, float]],
-    health_daily: Dict[str, Dict[str, float]],
-    use_spearman: bool = False,
-    min_r: float = 0.4,
-    max_p: float = 0.10,
-) -> Optional[Dict[str, Any]]:
-    """Build aligned series and compute one correlation (Pearson or Spearman)."""
-    x_vals: List[float] = []
-    y_vals: List[float] = []
-    points: List[Dict[str, Any]] = []
-
-    for i, d in enumerate(all_dates):
-        if lag > 0 and i + lag >= len(all_dates):
-            continue
-        oura_date = all_dates[i + lag] if lag > 0 else d
-        nutr = nutrition_daily.get(d)
-        health = health_daily.get(oura_date)
-        if (
-            not nutr
-            or not health
-            or nutr_metric not in nutr
-            or oura_metric not in health
-        ):
-            continue
-        x, y = nutr[nutr_metric], health[oura_metric]
-        if x == 0 and nutr_metric not in ("last_meal_hour", "temperature_deviation"):
-            continue
-        if y == 0 and oura_metric not in ("temperature_deviation",):
-            continue
-        x_vals.append(x)
-        y_vals.append(y)
-        points.append(
-            {"date": oura_date, "a_value": round(x, 2), "b_value": round(y, 2)}
-        )
+# Zero means "not logged" for most metrics; these can legitimately be zero.
+_NUTRITION_ZERO_OK = ("last_meal_hour", "temperature_deviation")
+_HEALTH_ZERO_OK = ("temperature_deviation",)
 
-    if len(x_vals) < MIN_OVERLAPPING_DAYS:
-        return None
 
-    if use_spearman:
-        r, p = _spearman_r(x_vals, y_vals)
-        correlation_type = "spearman"
-    else:
-        r, p = _pearson_r(x_vals, y_vals)
-        correlation_type = "pearson"
+def _append_new(existing: List[str], seen: Set[str]) -> List[str]:
+    """*existing* followed by the not-yet-known names in *seen*, sorted."""
+    known = set(existing)
+    return list(existing) + sorted(seen - known)
 
-    if abs(r) < min_r or p >= max_p:
-        return None
 
-    abs_r = abs(r)
-    strength = "strong" if abs_r >= 0.7 else "moderate" if abs_r >= 0.5 else "weak"
-    direction = "positive" if r > 0 else "negative"
+def _unchanged_rows(
+    old_dates: List[str], old_m: np.ndarray, new_dates: List[str], new_m: np.ndarray
+) -> int:
+    """Length of the leading run of rows with the same date and identical values."""
+    k = 0
+    limit = min(len(old_dates), len(new_dates))
+    while k < limit and old_dates[k] == new_dates[k]:
+        k += 1
+    if k == 0:
+        return 0
+    cols = old_m.shape[1]
+    old_rows, new_rows = old_m[:k], new_m[:k, :cols]
+    same = ((old_rows == new_rows) | (np.isnan(old_rows) & np.isnan(new_rows))).all(
+        axis=1
+    )
+    return k if same.all() else int(np.argmin(same))
 
-    return {
-        "id": str(uuid.uuid4()),
-        "metric_a": nutr_metric,
-        "metric_a_label": METRIC_LABELS.get(nutr_metric, nutr_metric),
-        "metric_b": oura_metric,
-        "metric_b_label": METRIC_LABELS.get(oura_metric, oura_metric),
-        "correlation_coefficient": r,
-        "p_value": p,
-        "sample_size": len(x_vals),
-        "lag_days": lag,
-        "effect_description": "",
-        "category": category,
-        "strength": strength,
-        "direction": direction,
-        "data_points": points,
-        "correlation_type": correlation_type,
-        "is_estimated": nutr_metric in _ESTIMATED_METRICS
-        or oura_metric in _ESTIMATED_METRICS,
-    }
 
+class _CorrelationJob(NamedTuple):
+    """One metric pair to test across one or more lags.
 
-def _one_health_correlation(
-    metric_a: str,
-    metric_b: str,
-    category: str,
-    lag: int,
-    all_dates: List[str],
-    health_daily: Dict[str, Dict[str, float]],
-    use_spearman: bool = False,
-    min_r: float = 0.4,
-    max_p: float = 0.10,
-) -> Optional[Dict[str, Any]]:
-    """
-    Correlation between two health/wearable metrics (Track 1 — no nutrition needed).
-    Both metric_a and metric_b are looked up from health_daily.
+    track: "health" pairs two health_daily metrics over health-only dates
+    (Track 1); "nutrition" pairs a nutrition input with a health outcome over
+    the union of dates.  With override=False the winner only replaces an
+    earlier result for the same pair when stronger; with override=True the
+    search starts from the earlier result (relaxed-threshold passes).
     """
-    x_vals: List[float] = []
-    y_vals: List[float] = []
-    points: List[Dict[str, Any]] = []
 
-    for i, d in enumerate(all_dates):
-        if lag > 0 and i + lag >= len(all_dates):
-            continue
-        target_date = all_dates[i + lag] if lag > 0 else d
-        src = health_daily.get(d)
-        tgt = health_daily.get(target_date)
-        if not src or not tgt or metric_a not in src or metric_b not in tgt:
-            continue
-        x, y = src[metric_a], tgt[metric_b]
-        if x == 0 or y == 0:
-            continue
-        x_vals.append(x)
-        y_vals.append(y)
-        points.append(
-            {"date": target_date, "a_value": round(x, 2), "b_value": round(y, 2)}
-        )
+    track: str
+    metric_a: str
+    metric_b: str
+    category: str
+    lags: Tuple[int, ...]
+    min_r: float = 0.4
+    max_p: float = 0.10
+    override: bool = False
 
-    if len(x_vals) < MIN_OVERLAPPING_DAYS:
-        return None
 
-    if use_spearman:
-        r, p = _spearman_r(x_vals, y_vals)
-        correlation_type = "spearman"
-    else:
-        r, p = _pearson_r(x_vals, y_vals)
-        correlation_type = "pearson"
+class _CorrelationBatch:
+    """Date × variable matrices with every requested pair/lag evaluated up front.
 
-    if abs(r) < min_r or p >= max_p:
-        return None
+    Pearson statistics come from per-track ``PairMoments``.  Passing the
+    batch from the user's previous run as *previous* carries those sums
+    forward: only aligned rows touching dates that left, changed or joined
+    the window are re-accumulated (see ``_carry_moments``).
+    """
 
-    abs_r = abs(r)
-    strength = "strong" if abs_r >= 0.7 else "moderate" if abs_r >= 0.5 else "weak"
-    direction = "positive" if r > 0 else "negative"
+    _TRACKS = ("nutrition", "health")
+
+    def __init__(
+        self,
+        nutrition_daily: Dict[str, Dict[str, float]],
+        health: Union[DailyMetricStore, Dict[str, Dict[str, float]]],
+        previous: Optional["_CorrelationBatch"] = None,
+    ):
+        if not isinstance(health, DailyMetricStore):
+            health = DailyMetricStore.from_daily(health)
+        health_dates = health.dates_with_data()
+        self.dates = {
+            "nutrition": sorted(set(nutrition_daily.keys()) | set(health_dates)),
+            "health": health_dates,
+        }
+        # Column order is append-only across runs so carried moments stay valid.
+        nutr_vars = _append_new(
+            previous._vars[0] if previous else [],
+            {m for day in nutrition_daily.values() for m in day},
+        )
+        health_vars = _append_new(
+            previous._vars[1] if previous else [],
+            set(health.metrics_with_data()),
+        )
+        self._vars = (nutr_vars, health_vars)
+        self._cols_a = {
+            "nutrition": {m: j for j, m in enumerate(nutr_vars)},
+            "health": {m: j for j, m in enumerate(health_vars)},
+        }
+        self._cols_b = {
+            "nutrition": self._cols_a["health"],
+            "health": self._cols_a["health"],
+        }
+        health_only = health.matrix(
+            self.dates["health"], health_vars, zero_is_missing=True
+        )
+        self._matrices = {
+            "nutrition": (
+                daily_matrix(
+                    nutrition_daily,
+                    self.dates["nutrition"],
+                    nutr_vars,
+                    zero_is_missing=True,
+                    keep_zero=_NUTRITION_ZERO_OK,
+                ),
+                health.matrix(
+                    self.dates["nutrition"],
+                    health_vars,
+                    zero_is_missing=True,
+                    keep_zero=_HEALTH_ZERO_OK,
+                ),
+            ),
+            "health": (health_only, health_only),
+        }
+        self._moments: Dict[str, PairMoments] = {}
+        self._moment_keys: Dict[str, Dict[Tuple[str, str, int], int]] = {}
+        for track in self._TRACKS:
+            self._carry_moments(track, previous)
+        self._stats: Dict[
+            Tuple[str, str, str, int], Dict[str, Tuple[float, float, int]]
+        ] = {}
+
+    def _carry_moments(
+        self, track: str, previous: Optional["_CorrelationBatch"]
+    ) -> None:
+        """Slide the previous run's sums onto this run's window, or start empty."""
+        if previous is None or not self.dates[track]:
+            self._moments[track] = PairMoments()
+            self._moment_keys[track] = {}
+            return
+
+        old_dates, new_dates = previous.dates[track], self.dates[track]
+        old_a, old_b = previous._matrices[track]
+        new_a, new_b = self._matrices[track]
+        evicted = bisect_left(old_dates, new_dates[0])
+        kept = min(
+            _unchanged_rows(old_dates[evicted:], old_a[evicted:], new_dates, new_a),
+            _unchanged_rows(old_dates[evicted:], old_b[evicted:], new_dates, new_b),
+        )
+        moments = previous._moments[track].copy()
+        moments.slide(old_a, old_b, new_a, new_b, evicted, kept)
+        self._moments[track] = moments
+        self._moment_keys[track] = dict(previous._moment_keys[track])
+        logger.debug(
+            "Correlation moments (%s): %d day(s) evicted, %d kept, %d re-read",
+            track,
+            evicted,
+            kept,
+            len(new_dates) - kept,
+        )
 
-    return {
-        "id": str(uuid.uuid4()),
-        "metric_a": metric_a,
-        "metric_a_label": METRIC_LABELS.get(metric_a, metric_a),
-        "metric_b": metric_b,
-        "metric_b_label": METRIC_LABELS.get(metric_b, metric_b),
-        "correlation_coefficient": r,
-        "p_value": p,
-        "sample_size": len(x_vals),
-        "lag_days": lag,
-        "effect_description": "",
-        "category": category,
-        "strength": strength,
-        "direction": direction,
-        "data_points": points,
-        "correlation_type": correlation_type,
-        "is_estimated": metric_a in _ESTIMATED_METRICS
-        or metric_b in _ESTIMATED_METRICS,
-    }
+    def evaluate(self, jobs: List[_CorrelationJob]) -> None:
+        """Compute Pearson + Spearman for every (pair, lag) in *jobs* in one batch per track."""
+        for track in self._TRACKS:
+            keys = list(
+                dict.fromkeys(
+                    (job.metric_a, job.metric_b, lag)
+                    for job in jobs
+                    if job.track == track
+                    for lag in job.lags
+                    if job.metric_a in self._cols_a[track]
+                    and job.metric_b in self._cols_b[track]
+                )
+            )
+            if not keys:
+                continue
+            a, b = self._matrices[track]
+            cols_a = [self._cols_a[track][k[0]] for k in keys]
+            cols_b = [self._cols_b[track][k[1]] for k in keys]
+            lags = [k[2] for k in keys]
+
+            moments, index = self._moments[track], self._moment_keys[track]
+            missing = [i for i, k in enumerate(keys) if k not in index]
+            if missing:
+                for i in missing:
+                    index[keys[i]] = len(index)
+                moments.extend(
+                    a,
+                    b,
+                    [cols_a[i] for i in missing],
+                    [cols_b[i] for i in missing],
+                    [lags[i] for i in missing],
+                )
+            pearson = moments.stats(min_n=MIN_OVERLAPPING_DAYS)
+            # Ranks have no additive form — Spearman is re-ranked over the window.
+            spearman = lagged_pair_stats(
+                a,
+                b,
+                cols_a,
+                cols_b,
+                lags,
+                methods=("spearman",),
+                min_n=MIN_OVERLAPPING_DAYS,
+            )["spearman"]
+            for i, key in enumerate(keys):
+                m = index[key]
+                self._stats[(track,) + key] = {
+                    "pearson": (
+                        float(pearson.r[m]),
+                        float(pearson.p[m]),
+                        int(pearson.n[m]),
+                    ),
+                    "spearman": (
+                        float(spearman.r[i]),
+                        float(spearman.p[i]),
+                        int(spearman.n[i]),
+                    ),
+                }
 
+    def candidate(
+        self, job: _CorrelationJob, lag: int, use_spearman: bool
+    ) -> Optional[Dict[str, Any]]:
+        """Correlation dict for one pair/lag/method, or None if not significant."""
+        stats = self._stats.get((job.track, job.metric_a, job.metric_b, lag))
+        if stats is None:
+            return None
+        correlation_type = "spearman" if use_spearman else "pearson"
+        r, p, n = stats[correlation_type]
+        if n < MIN_OVERLAPPING_DAYS:
+            return None
+        if abs(r) >= 1.0:
+            p = 0.0
+        else:
+            r, p = round(r, 4), round(p, 6)
+
+        if abs(r) < job.min_r or p >= job.max_p:
+            return None
+
+        abs_r = abs(r)
+        strength = "strong" if abs_r >= 0.7 else "moderate" if abs_r >= 0.5 else "weak"
+        direction = "positive" if r > 0 else "negative"
 
-def _compute_correlations(
-    nutrition_daily: Dict[str, Dict[str, float]],
-    health_daily: Dict[str, Dict[str, float]],
-    condition_vars: Optional[List[str]] = None,
-    learned_priors: Optional[List[Dict[str, Any]]] = None,
-    dynamic_native_pairs: Optional[List[Tuple[str, str, str, int]]] = None,
-) -> List[Dict[str, Any]]:
-    """
-    Compute pairwise correlations (Pearson + Spearman for non-linear).
+        return {
+            "id": str(uuid.uuid4()),
+            "metric_a": job.metric_a,
+            "metric_a_label": METRIC_LABELS.get(job.metric_a, job.metric_a),
+            "metric_b": job.metric_b,
+            "metric_b_label": METRIC_LABELS.get(job.metric_b, job.metric_b),
+            "correlation_coefficient": r,
+            "p_value": p,
+            "sample_size": n,
+            "lag_days": lag,
+            "effect_description": "",
+            "category": job.category,
+            "strength": strength,
+            "direction": direction,
+            "data_points": self._data_points(job, lag),
+            "correlation_type": correlation_type,
+            "is_estimated": job.metric_a in _ESTIMATED_METRICS
+            or job.metric_b in _ESTIMATED_METRICS,
+        }
 
-    Six passes:
-      0) Health-self pairs (Track 1): wearable vs wearable — no nutrition needed
-      1) Fixed-lag pairs from CORRELATION_PAIRS  (standard thresholds)
-      2) Multi-lag analysis (1 to MAX_LAG_DAYS) for KEY_PAIRS_MULTILAG
-      3) Condition-specific pairs — relaxed thresholds for clinical relevance
-      4) Learned-prior pairs from N-of-1 intervention outcomes
-      5) Dynamic native device pairs (Dexcom, Whoop, symptom outcomes, etc.)
+    def _data_points(self, job: _CorrelationJob, lag: int) -> List[Dict[str, Any]]:
+        a, b = self._matrices[job.track]
+        col_a = self._cols_a[job.track][job.metric_a]
+        col_b = self._cols_b[job.track][job.metric_b]
+        dates = self.dates[job.track]
+        return [
+            {
+                "date": dates[i + lag],
+                "a_value": round(float(a[i, col_a]), 2),
+                "b_value": round(float(b[i + lag, col_b]), 2),
+            }
+            for i in complete_rows(a, b, col_a, col_b, lag)
+        ]
 
-    Returns list of significant correlation dicts sorted by |r| descending.
-    """
-    all_dates = sorted(set(nutrition_daily.keys()) | set(health_daily.keys()))
-    health_dates = sorted(health_daily.keys())  # Track 1 only needs health data
-    best_by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
 
-    # 0) Track 1: Health-self pairs — wearable vs wearable, no nutrition needed.
-    #    Per-pair overlap check: each pair independently needs ≥MIN_OVERLAPPING_DAYS
-    #    of days where both metrics are present. Users with 0 nutrition logs still
-    #    get patterns from their wearable data here.
+def _correlation_jobs(
+    n_dates: int,
+    condition_vars: Optional[List[str]],
+    learned_priors: Optional[List[Dict[str, Any]]],
+    dynamic_native_pairs: Optional[List[Tuple[str, str, str, int]]],
+) -> List[_CorrelationJob]:
+    """Every pair/lag the engine tests, in evaluation (and tie-break) order."""
+    jobs: List[_CorrelationJob] = []
+
+    # 0) Track 1: health-self pairs (wearable vs wearable, no nutrition needed)
     for metric_a, metric_b, category, lag in HEALTH_SELF_PAIRS:
-        best_c = None
-        for use_spearman in (False, True):
-            c = _one_health_correlation(
-                metric_a,
-                metric_b,
-                category,
-                lag,
-                health_dates,
-                health_daily,
-                use_spearman=use_spearman,
-            )
-            if c and (
-                best_c is None
-                or abs(c["correlation_coefficient"])
-                > abs(best_c["correlation_coefficient"])
-            ):
-                best_c = c
-        if best_c:
-            key = (metric_a, metric_b)
-            if key not in best_by_pair or abs(best_c["correlation_coefficient"]) > abs(
-                best_by_pair[key]["correlation_coefficient"]
-            ):
-                best_by_pair[key] = best_c
-
-    # 1) Fixed-lag pairs (Pearson + Spearman: keep stronger)
+        jobs.append(_CorrelationJob("health", metric_a, metric_b, category, (lag,)))
+
+    # 1) Fixed-lag pairs
     for nutr_metric, oura_metric, category, lag in CORRELATION_PAIRS:
-        best_c = None
-        for use_spearman in (False, True):
-            c = _one_correlation(
-                nutr_metric,
-                oura_metric,
-                category,
-                lag,
-                all_dates,
-                nutrition_daily,
-                health_daily,
-                use_spearman=use_spearman,
-            )
-            if c and (
-                best_c is None
-                or abs(c["correlation_coefficient"])
-                > abs(best_c["correlation_coefficient"])
-            ):
-                best_c = c
-        if best_c:
-            key = (nutr_metric, oura_metric)
-            if key not in best_by_pair or abs(best_c["correlation_coefficient"]) > abs(
-                best_by_pair[key]["correlation_coefficient"]
-            ):
-                best_by_pair[key] = best_c
+        jobs.append(
+            _CorrelationJob("nutrition", nutr_metric, oura_metric, category, (lag,))
+        )
 
     # 2) Multi-lag analysis (1 to MAX_LAG_DAYS) for key pairs
-    max_lag = min(MAX_LAG_DAYS, len(all_dates) - 2)
+    max_lag = min(MAX_LAG_DAYS, n_dates - 2)
     if max_lag >= 1:
         for nutr_metric, oura_metric, category in KEY_PAIRS_MULTILAG:
-            key = (nutr_metric, oura_metric)
-            best_r = 0.0
-            best_c = None
-            for lag in range(1, max_lag + 1):
-                for use_spearman in (False, True):
-                    c = _one_correlation(
-                        nutr_metric,
-                        oura_metric,
-                        category,
-                        lag,
-                        all_dates,
-                        nutrition_daily,
-                        health_daily,
-                        use_spearman=use_spearman,
-                    )
-                    if c and abs(c["correlation_coefficient"]) > best_r:
-                        best_r = abs(c["correlation_coefficient"])
-                        best_c = c
-            if best_c and (
-                key not in best_by_pair
-                or best_r > abs(best_by_pair[key]["correlation_coefficient"])
-            ):
-                best_by_pair[key] = best_c
-
-    # 3) Condition-specific pairs — relaxed thresholds so condition-relevant weak
-    #    signals surface even when they wouldn't pass the standard |r|>=0.4 gate.
+            jobs.append(
+                _CorrelationJob(
+                    "nutrition",
+                    nutr_metric,
+                    oura_metric,
+                    category,
+                    tuple(range(1, max_lag + 1)),
+                )
+            )
+
+    # 3) Condition-specific pairs — relaxed thresholds, lags 0-2
     if condition_vars:
         cond_nutr = [v for v in condition_vars if v in _NUTRITION_VARS]
         cond_oura = [v for v in condition_vars if v in _OURA_VARS]
         for nutr_metric in cond_nutr:
             for oura_metric in cond_oura:
-                key = (nutr_metric, oura_metric)
-                category = _infer_category(nutr_metric, oura_metric)
-                best_r = (
-                    abs(best_by_pair[key]["correlation_coefficient"])
-                    if key in best_by_pair
-                    else 0.0
+                jobs.append(
+                    _CorrelationJob(
+                        "nutrition",
+                        nutr_metric,
+                        oura_metric,
+                        _infer_category(nutr_metric, oura_metric),
+                        (0, 1, 2),
+                        min_r=CONDITION_MIN_R,
+                        max_p=CONDITION_MAX_P,
+                        override=True,
+                    )
                 )
-                best_c = best_by_pair.get(key)
-                # Test lags 0, 1, 2 with both Pearson and Spearman
-                for lag in (0, 1, 2):
-                    for use_spearman in (False, True):
-                        c = _one_correlation(
-                            nutr_metric,
-                            oura_metric,
-                            category,
-                            lag,
-                            all_dates,
-                            nutrition_daily,
-                            health_daily,
-                            use_spearman=use_spearman,
-                            min_r=CONDITION_MIN_R,
-                            max_p=CONDITION_MAX_P,
-                        )
-                        if c and abs(c["correlation_coefficient"]) > best_r:
-                            best_r = abs(c["correlation_coefficient"])
-                            best_c = c
-                if best_c:
-                    best_by_pair[key] = best_c
 
     # 4) Learned-prior pairs from N-of-1 intervention outcomes.
-    # Use even-more-relaxed thresholds (|r|>=0.25, p<0.20) since these are
+    # Even-more-relaxed thresholds (|r|>=0.25, p<0.20) since these are
     # metric pairs the user has personally validated as relevant.
     if learned_priors:
-        PRIOR_MIN_R = 0.25
-        PRIOR_MAX_P = 0.20
         for prior in learned_priors:
             nutr_metric = prior.get("nutrition_metric", "")
             oura_metric = prior.get("oura_metric", "")
             if not nutr_metric or not oura_metric:
                 continue
-            key = (nutr_metric, oura_metric)
-            category = _infer_category(nutr_metric, oura_metric)
-            best_r = (
-                abs(best_by_pair[key]["correlation_coefficient"])
-                if key in best_by_pair
-                else 0.0
+            jobs.append(
+                _CorrelationJob(
+                    "nutrition",
+                    nutr_metric,
+                    oura_metric,
+                    _infer_category(nutr_metric, oura_metric),
+                    (0, 1, 2),
+                    min_r=0.25,
+                    max_p=0.20,
+                    override=True,
+                )
             )
-            best_c = best_by_pair.get(key)
-            for lag in (0, 1, 2):
-                for use_spearman in (False, True):
-                    c = _one_correlation(
-                        nutr_metric,
-                        oura_metric,
-                        category,
-                        lag,
-                        all_dates,
-                        nutrition_daily,
-                        health_daily,
-                        use_spearman=use_spearman,
-                        min_r=PRIOR_MIN_R,
-                        max_p=PRIOR_MAX_P,
-                    )
-                    if c and abs(c["correlation_coefficient"]) > best_r:
-                        best_r = abs(c["correlation_coefficient"])
-                        best_c = c
-            if best_c:
-                best_by_pair[key] = best_c
 
     # 5) Dynamic native device / symptom pairs (Dexcom, Whoop, BP, symptom outcomes)
     if dynamic_native_pairs:
         for nutr_metric, health_metric, category, lag in dynamic_native_pairs:
-            key = (nutr_metric, health_metric)
-            best_r = (
-                abs(best_by_pair[key]["correlation_coefficient"])
-                if key in best_by_pair
-                else 0.0
-            )
-            best_c = best_by_pair.get(key)
-            for use_spearman in (False, True):
-                c = _one_correlation(
+            jobs.append(
+                _CorrelationJob(
+                    "nutrition",
                     nutr_metric,
                     health_metric,
                     category,
-                    lag,
-                    all_dates,
-                    nutrition_daily,
-                    health_daily,
-                    use_spearman=use_spearman,
+                    (lag,),
+                    override=True,
                 )
-                if c and abs(c["correlation_coefficient"]) > best_r:
-                    best_r = abs(c["correlation_coefficient"])
-                    best_c = c
-            if best_c:
-                best_by_pair[key] = best_c
-
-    results = list(best_by_pair.values())
-    results.sort(key=lambda c: abs(c["correlation_coefficient"]), reverse=True)
-    return results
-
+            )
 
-# ---------------------------------------------------------------------------
-# Advanced Statistics: Granger Causality & Causal Inference
-# ---------------------------------------------------------------------------
+    return jobs
 
 
-def _granger_causality_test(
-    x_series: List[float], y_series: List[float], max_lag: Optional[int] = None
-) -> Tuple[Optional[int], Optional[float]]:
-    """
-    Granger causality test: does X help predict Y beyond Y's own history?
-    Uses up to GRANGER_MAX_LAG (14) when enough data; otherwise min(14, n//3).
-    Returns (optimal_lag, p_value) if significant, else (None, None).
+def _compute_correlations(
+    nutrition_daily: Dict[str, Dict[str, float]],
+    health_daily: Union[DailyMetricStore, Dict[str, Dict[str, float]]],
+    condition_vars: Optional[List[str]] = None,
+    learned_priors: Optional[List[Dict[str, Any]]] = None,
+    dynamic_native_pairs: Optional[List[Tuple[str, str, str, int]]] = None,
+    batch: Optional[_CorrelationBatch] = None,
+) -> List[Dict[str, Any]]:
     """
-    n = len(x_series)
-    lag_limit = max_lag if max_lag is not None else min(GRANGER_MAX_LAG, max(1, n // 3))
-    if n < lag_limit + 5:
-        return (None, None)
-
-    best_lag = None
-    best_p = 1.0
-
-    for lag in range(1, lag_limit + 1):
-        # Build lagged features
-        # Unrestricted model: Y_t = α + β₁Y_{t-1} + ... + β_lag Y_{t-lag} + γ₁X_{t-1} + ... + γ_lag X_{t-lag}
-        # Restricted model: Y_t = α + β₁Y_{t-1} + ... + β_lag Y_{t-lag}
-
-        y_train = y_series[lag:]
-        n_train = len(y_train)
-
-        if n_train < lag + 3:
-            continue
-
-        # Compute RSS for unrestricted model (with X lags)
-        # For simplicity, use a partial correlation approach
-        # If adding X_lags significantly reduces RSS, X Granger-causes Y
-
-        # Restricted model: Y regressed on its own lags only
-        rss_restricted = _compute_ar_residuals(y_series, lag)
+    Compute pairwise correlations (Pearson + Spearman for non-linear).
 
-        # Unrestricted model: Y regressed on its lags + X lags
-        rss_unrestricted = _compute_ar_with_exog_residuals(y_series, x_series, lag)
+    Six passes:
+      0) Health-self pairs (Track 1): wearable vs wearable — no nutrition needed
+      1) Fixed-lag pairs from CORRELATION_PAIRS  (standard thresholds)
+      2) Multi-lag analysis (1 to MAX_LAG_DAYS) for KEY_PAIRS_MULTILAG
+      3) Condition-specific pairs — relaxed thresholds for clinical relevance
+      4) Learned-prior pairs from N-of-1 intervention outcomes
+      5) Dynamic native device pairs (Dexcom, Whoop, symptom outcomes, etc.)
 
-        if rss_unrestricted is None or rss_restricted is None:
-            continue
+    All pair/lag statistics are computed up front in batched array operations
+    (see common.metrics.correlation_matrix); the passes then only pick the
+    strongest significant result per metric pair.  *health_daily* may be the
+    ``DailyMetricStore`` itself, whose columns feed the matrices directly.
+    Pass *batch* (built over the same data) to reuse moments carried from an
+    earlier run.
 
-        if rss_restricted <= 0 or rss_unrestricted < 0:
-            continue
+    Returns list of significant correlation dicts sorted by |r| descending.
+    """
+    if batch is None:
+        batch = _CorrelationBatch(nutrition_daily, health_daily)
+    jobs = _correlation_jobs(
+        len(batch.dates["nutrition"]),
+        condition_vars,
+        learned_priors,
+        dynamic_native_pairs,
+    )
+    batch.evaluate(jobs)
 
-        # F-statistic: ((RSS_r - RSS_u) / lag) / (RSS_u / (n_train - 2*lag - 1))
-        # df1 = lag (number of X-lag restrictions being tested)
-        # df2 = n_train - 2*lag - 1 (residual df of unrestricted model)
-        df1 = lag
-        df2 = n_train - 2 * lag - 1
+    best_by_pair: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for job in jobs:
+        key = (job.metric_a, job.metric_b)
+        existing = best_by_pair.get(key)
+        if job.override and existing:
+            best_c: Optional[Dict[str, Any]] = existing
+            best_r = abs(existing["correlation_coefficient"])
+        else:
+            best_c = None
+            best_r = 0.0
 
-        if df2 <= 0:
-            continue
+        for lag in job.lags:
+            for use_spearman in (False, True):
+                c = batch.candidate(job, lag, use_spearman)
+                if c and abs(c["correlation_coefficient"]) > best_r:
+                    best_r = abs(c["correlation_coefficient"])
+                    best_c = c
 
-        rss_diff = rss_restricted - rss_unrestricted
-        if rss_diff <= 0:
-            # X lags did not reduce RSS — no causal evidence at this lag
+        if not best_c:
             continue
+        if (
+            job.override
+            or existing is None
+            or best_r > abs(existing["correlation_coefficient"])
+        ):
+            best_by_pair[key] = best_c
 
-        f_stat = (rss_diff / df1) / (rss_unrestricted / df2)
+    results = list(best_by_pair.values())
+    results.sort(key=lambda c: abs(c["correlation_coefficient"]), reverse=True)
+    return results
 
-        # Exact upper-tail p-value via F-distribution / regularised incomplete beta
-        p_exact = _f_dist_p_value(f_stat, df1, df2)
 
-        if p_exact < best_p:
-            best_p = p_exact
-            best_lag = lag
+# ---------------------------------------------------------------------------
+# Advanced Statistics: Granger Causality & Causal Inference
+# ---------------------------------------------------------------------------
 
-    if best_lag and best_p < 0.10:
-        return (best_lag, best_p)
 
-    return (None, None)
+def _causal_node_type(metric: str) -> str:
+    if metric in _NUTRITION_VARS:
+        return "nutrition"
+    if "symptom" in metric:
+        return "symptom"
+    if "adherence" in metric:
+        return "medication"
+    if metric.startswith("lab_"):
+        return "lab"
+    if metric in {
+        "blood_glucose",
+        "blood_pressure_systolic",
+        "blood_pressure_diastolic",
+        "body_temperature",
+    }:
+        return "medical"
+    if metric in {
+        "whoop_strain",
+        "whoop_recovery",
+        "garmin_stress",
+        "garmin_body_battery",
+    }:
+        return "wearable"
+    return "health"
 
 
-def _compute_ar_residuals(y_series: List[float], lag: int) -> Optional[float]:
-    """
-    RSS for the restricted AR(lag) model fitted via OLS:
-        Y_t = α + β₁ Y_{t-1} + … + β_lag Y_{t-lag}
-    Design matrix has an intercept column plus `lag` lagged-Y columns.
+async def _run_granger_tests(
+    series: List[Tuple[List[float], List[float]]],
+) -> Tuple[List[Optional[Tuple[Optional[int], Optional[float]]]], bool]:
     """
-    n = len(y_series)
-    y_train = y_series[lag:]
-    if len(y_train) < lag + 3:
-        return None
-
-    X_rows = [
-        [1.0] + [y_series[i - j] for j in range(1, lag + 1)] for i in range(lag, n)
-    ]
-    return _ols_rss(X_rows, y_train)
+    Run Granger tests for each (x, y) series pair on the CPU process pool.
 
-
-def _compute_ar_with_exog_residuals(
-    y_series: List[float], x_series: List[float], lag: int
-) -> Optional[float]:
-    """
-    RSS for the unrestricted ARX(lag) model fitted via OLS:
-        Y_t = α + β₁ Y_{t-1} + … + β_lag Y_{t-lag}
-                + γ₁ X_{t-1} + … + γ_lag X_{t-lag}
-    Design matrix: intercept + lag Y-lags + lag X-lags  (2*lag + 1 columns).
+    Pairs are split into chunks evaluated in parallel; each chunk stops
+    starting new pairs once the request's CPU budget is spent, and chunks still
+    running when the budget expires are abandoned.  Returns per-pair results
+    (None = not evaluated) and whether anything was cut short.
     """
-    n = len(y_series)
-    y_train = y_series[lag:]
-    if len(y_train) < 2 * lag + 3:
-        return None
+    results: List[Optional[Tuple[Optional[int], Optional[float]]]] = [None] * len(
+        series
+    )
+    if not series:
+        return results, False
 
-    X_rows = [
-        [1.0]
-        + [y_series[i - j] for j in range(1, lag + 1)]
-        + [x_series[i - j] for j in range(1, lag + 1)]
-        for i in range(lag, n)
+    deadline = time.time() + CAUSAL_GRAPH_CPU_BUDGET_S
+    chunks = [
+        (start, series[start : start + CAUSAL_GRAPH_CHUNK_SIZE])
+        for start in range(0, len(series), CAUSAL_GRAPH_CHUNK_SIZE)
     ]
-    return _ols_rss(X_rows, y_train)
+    tasks = {
+        asyncio.ensure_future(run_in_process(granger_batch, chunk, deadline)): start
+        for start, chunk in chunks
+    }
+    done, pending = await asyncio.wait(tasks, timeout=CAUSAL_GRAPH_CPU_BUDGET_S + 1.0)
+    for task in pending:
+        task.cancel()
+
+    truncated = bool(pending)
+    for task in done:
+        start = tasks[task]
+        try:
+            chunk_results = task.result()
+        except Exception as exc:
+            logger.warning("Granger chunk failed: %s", exc)
+            truncated = True
+            continue
+        results[start : start + len(chunk_results)] = chunk_results
+    if any(r is None for r in results):
+        truncated = True
+    return results, truncated
 
 
-def _compute_causal_graph(
+async def _compute_causal_graph(
     correlations: List[Dict[str, Any]],
     nutrition_daily: Dict[str, Dict[str, float]],
     health_daily: Dict[str, Dict[str, float]],
@@ -1819,53 +1733,33 @@ def _compute_causal_graph(
     """
     Build causal graph from correlations using Granger causality tests.
     Returns dict with nodes and edges for visualization.
+
+    The least-squares fits run off the event loop (see ``_run_granger_tests``);
+    if the CPU budget runs out, untested pairs are scored on correlation and
+    temporal precedence alone and ``truncated`` is set.
     """
     all_dates = sorted(set(nutrition_daily.keys()) | set(health_daily.keys()))
 
     nodes = {}
-    edges = []
+    candidates: List[Dict[str, Any]] = []
+    series: List[Tuple[List[float], List[float]]] = []
 
-    for corr in correlations[:20]:  # Limit to top 20 correlations
+    for corr in correlations[:CAUSAL_GRAPH_MAX_PAIRS]:
         metric_a = corr["metric_a"]
         metric_b = corr["metric_b"]
 
-        def _node_type(metric: str) -> str:
-            if metric in _NUTRITION_VARS:
-                return "nutrition"
-            if "symptom" in metric:
-                return "symptom"
-            if "adherence" in metric:
-                return "medication"
-            if metric.startswith("lab_"):
-                return "lab"
-            if metric in {
-                "blood_glucose",
-                "blood_pressure_systolic",
-                "blood_pressure_diastolic",
-                "body_temperature",
-            }:
-                return "medical"
-            if metric in {
-                "whoop_strain",
-                "whoop_recovery",
-                "garmin_stress",
-                "garmin_body_battery",
-            }:
-                return "wearable"
-            return "health"
-
         # Add nodes
         if metric_a not in nodes:
             nodes[metric_a] = {
                 "id": metric_a,
                 "label": corr["metric_a_label"],
-                "type": _node_type(metric_a),
+                "type": _causal_node_type(metric_a),
             }
         if metric_b not in nodes:
             nodes[metric_b] = {
                 "id": metric_b,
                 "label": corr["metric_b_label"],
-                "type": _node_type(metric_b),
+                "type": _causal_node_type(metric_b),
             }
 
         # Build time series for Granger test
@@ -1883,8 +1777,15 @@ def _compute_causal_graph(
         if len(x_vals) < 7:
             continue
 
-        # Test if nutrition Granger-causes Oura metric (multi-lag up to 14 when enough data)
-        optimal_lag, granger_p = _granger_causality_test(x_vals, y_vals)
+        candidates.append(corr)
+        series.append((x_vals, y_vals))
+
+    # Test if nutrition Granger-causes the outcome metric (multi-lag up to 14 when enough data)
+    granger_results, truncated = await _run_granger_tests(series)
+
+    edges = []
+    for corr, granger in zip(candidates, granger_results):
+        optimal_lag, granger_p = granger if granger is not None else (None, None)
 
         evidence = ["correlation"]
         if corr["lag_days"] > 0:
@@ -1905,9 +1806,9 @@ def _compute_causal_graph(
         if causality_score > 0.5:
             edges.append(
                 {
-                    "from_metric": metric_a,
+                    "from_metric": corr["metric_a"],
                     "from_label": corr["metric_a_label"],
-                    "to_metric": metric_b,
+                    "to_metric": corr["metric_b"],
                     "to_label": corr["metric_b_label"],
                     "causality_score": round(causality_score, 3),
                     "correlation": round(corr["correlation_coefficient"], 3),
@@ -1918,11 +1819,18 @@ def _compute_causal_graph(
                 }
             )
 
+    if truncated:
+        logger.info(
+            "Causal graph truncated: Granger budget of %.1fs exhausted",
+            CAUSAL_GRAPH_CPU_BUDGET_S,
+        )
+
     return {
         "nodes": list(nodes.values()),
         "edges": edges,
         "computed_at": datetime.now(timezone.utc).isoformat(),
         "confidence_threshold": 0.5,
+        "truncated": truncated,
     }
 
 
@@ -2009,48 +1917,19 @@ Important: Do not provide medical diagnoses. Frame everything as observed patter
 
     try:
         import json
-        import ssl
-        import certifi
-
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-        timeout = aiohttp.ClientTimeout(total=20)
-
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "content-type": "application/json",
-                },
-                json={
-                    "model": ANTHROPIC_MODEL,
-                    "max_tokens": 1024,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-            ) as resp:
-                if resp.status != 200:
-                    body = await resp.text()
-                    logger.warning(
-                        "Anthropic API returned %s: %s", resp.status, body[:200]
-                    )
-                    for c in correlations:
-                        c["effect_description"] = _fallback_description(c)
-                    return correlations, _fallback_summary(
-                        correlations,
-                        period_days,
-                        data_sources,
-                        user_context,
-                        oura_days=oura_days,
-                        nutrition_days=nutrition_days,
-                    )
-
-                result = await resp.json()
 
-        raw_text = result["content"][0]["text"]
+        # Same correlations and context give the same prompt; memoized so a
+        # repeated summary costs neither tokens nor latency.
+        result = await get_llm_gateway().create(
+            "correlations",
+            memoize=True,
+            memo_if=json_reply,
+            model=ANTHROPIC_MODEL,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=20,
+        )
+        raw_text = result.content[0].text
         # Strip markdown fences if present
         clean = raw_text.strip()
         if clean.startswith("```"):
@@ -2271,13 +2150,13 @@ async def _compute_glucose_meal_correlations(
     bearer: Optional[str],
     user_id: str,
     fetch_days: int,
-    health_daily: Dict[str, Dict[str, float]],
+    health_store: DailyMetricStore,
 ) -> List[Dict[str, Any]]:
     """
     Track B: per-meal postprandial correlations.
 
     Activates only when:
-    1. Glucose data is present in health_daily (daily aggregates or CGM), AND
+    1. Glucose data is present in health_store (daily aggregates or CGM), AND
     2. Meal logs with timestamps are available from the nutrition service.
 
     Two paths:
@@ -2290,11 +2169,7 @@ async def _compute_glucose_meal_correlations(
     from datetime import datetime as _dt
 
     # Guard: no glucose data at all → skip
-    has_glucose = any(
-        any(k in day_metrics for k in _GLUCOSE_DAILY_METRICS)
-        for day_metrics in health_daily.values()
-    )
-    if not has_glucose:
+    if not set(_GLUCOSE_DAILY_METRICS) & set(health_store.metrics_with_data()):
         return []
 
     # Fetch raw CGM readings (Track B path)
@@ -2381,70 +2256,239 @@ async def _compute_glucose_meal_correlations(
 # ---------------------------------------------------------------------------
 
 
-async def _compute_and_cache(
-    current_user: dict,
-    period_days: int,
-    bearer: Optional[str],
-) -> CorrelationResults:
-    """Fetch ALL available user data, compute correlations, generate AI summary, cache, return."""
-    from .timeline import get_timeline
+class _IncrementalState(NamedTuple):
+    """What a user's last run retained so the next one can fetch only new days.
 
-    user_id = current_user["id"]
+    The daily data excludes lab results (re-read in full each run — a new
+    draw can make the whole series eligible).  Track B results are reused
+    only while the re-fetched days bring no new meal or glucose data (see
+    ``_track_b_inputs_changed``).
+    """
 
-    # days=0 means "all history" — cap at 365 days to keep computation under 30s.
-    ALL_HISTORY = period_days == 0
-    fetch_days = 365 if ALL_HISTORY else period_days
+    nutrition_daily: Dict[str, Dict[str, float]]
+    health_store: DailyMetricStore
+    data_sources_used: List[str]
+    glucose_meal_correlations: List[Dict[str, Any]]
+    batch: _CorrelationBatch
+    fetched_on: date
+    full_at: datetime
+
+
+_correlation_state: "OrderedDict[Tuple[str, int], _IncrementalState]" = OrderedDict()
+
+
+def _get_incremental_state(
+    user_id: str, period_days: int
+) -> Optional[_IncrementalState]:
+    key = (user_id, period_days)
+    state = _correlation_state.get(key)
+    if state is None:
+        return None
+    if datetime.now(timezone.utc) - state.full_at > timedelta(
+        hours=FULL_RECOMPUTE_HOURS
+    ):
+        del _correlation_state[key]
+        return None
+    _correlation_state.move_to_end(key)
+    return state
 
-    # 1. Fetch Oura timeline data
-    try:
-        timeline = await get_timeline(days=fetch_days, current_user=current_user)
-    except Exception as exc:
-        logger.error("Failed to fetch timeline for correlations: %s", exc)
-        timeline = []
 
-    # 2. Build canonical health_daily from all connected devices
-    health_daily, device_sources = await _build_health_daily(
-        user_id, fetch_days, timeline
+def _remember_incremental_state(
+    user_id: str, period_days: int, state: _IncrementalState
+) -> None:
+    key = (user_id, period_days)
+    _correlation_state[key] = state
+    _correlation_state.move_to_end(key)
+    while len(_correlation_state) > CORRELATION_STATE_MAX_USERS:
+        _correlation_state.popitem(last=False)
+
+
+def forget_correlation_state(user_id: Optional[str] = None) -> None:
+    """Drop retained state for *user_id* (or every user when omitted).
+
+    The next computation then re-fetches the full window, so backfilled days
+    older than INCREMENTAL_REFETCH_DAYS are not missed.
+    """
+    if user_id is None:
+        _correlation_state.clear()
+        return
+    for key in [k for k in _correlation_state if k[0] == user_id]:
+        del _correlation_state[key]
+
+
+# Tables whose rows feed the per-day series kept in _IncrementalState
+_INCREMENTAL_TABLES = frozenset(
+    {"health_metrics_normalized", "native_health_data", "symptom_journal", "meal_logs"}
+)
+
+
+def _on_write(table: str, user_id: Optional[str]) -> None:
+    if table in _INCREMENTAL_TABLES:
+        forget_correlation_state(user_id)
+
+
+on_supabase_write(_on_write)
+
+
+def _track_b_inputs_changed(
+    state: _IncrementalState,
+    delta_nutrition: Dict[str, Dict[str, float]],
+    delta_health: DailyMetricStore,
+    fresh_start: str,
+) -> bool:
+    """Whether meals or glucose in the re-fetched days differ from the last run's."""
+    previous_nutrition = {
+        d: m for d, m in state.nutrition_daily.items() if d >= fresh_start
+    }
+    fresh_nutrition = {d: m for d, m in delta_nutrition.items() if d >= fresh_start}
+    if previous_nutrition != fresh_nutrition:
+        return True
+    glucose = sorted(_GLUCOSE_DAILY_METRICS)
+    previous = state.health_store.window(fresh_start)
+    fresh = delta_health.window(fresh_start)
+    dates = sorted(set(previous.dates) | set(fresh.dates))
+    return not np.array_equal(
+        previous.matrix(dates, glucose), fresh.matrix(dates, glucose), equal_nan=True
+    )
+
+
+def _merge_window(
+    retained: Dict[str, Dict[str, float]],
+    fresh: Dict[str, Dict[str, float]],
+    window_start: str,
+    fresh_start: str,
+) -> Dict[str, Dict[str, float]]:
+    """Retained days in [window_start, fresh_start) plus freshly fetched days from fresh_start on."""
+    merged = {
+        d: metrics for d, metrics in retained.items() if window_start <= d < fresh_start
+    }
+    merged.update({d: metrics for d, metrics in fresh.items() if d >= fresh_start})
+    return merged
+
+
+async def _fetch_daily_sources(
+    current_user: dict,
+    user_id: str,
+    days: int,
+    bearer: Optional[str],
+) -> Tuple[Dict[str, Dict[str, float]], DailyMetricStore, List[str], str]:
+    """
+    Fetch the day-granular sources over the last *days* days.
+
+    Returns (nutrition_daily, health_store, data_sources_used, meds_context);
+    health_store merges devices, symptoms and medication adherence.
+    """
+    # 1–2. Canonical health store from all connected devices; the Oura
+    # timeline is fetched only when the store is not cached.
+    health_store, device_sources = await _build_health_store(
+        user_id, days, _timeline_loader(current_user, days, "correlations")
     )
     data_sources_used: List[str] = list(
         dict.fromkeys(device_sources)
     )  # preserve order, dedupe
 
     # 3. Fetch nutrition data
-    nutrition_daily = await _fetch_nutrition_daily(bearer, fetch_days)
+    nutrition_daily = await _fetch_nutrition_daily(bearer, days)
     if nutrition_daily:
         data_sources_used.append("Nutrition Logs")
 
     # 4. Fetch symptom data and merge as health outcome metrics
-    symptoms_daily = await _fetch_symptoms_daily(user_id, fetch_days)
-    if symptoms_daily:
+    symptoms_store = await _fetch_symptoms_store(user_id, days)
+    if len(symptoms_store):
         data_sources_used.append("Symptom Journal")
-        for date_str, symp_metrics in symptoms_daily.items():
-            if date_str not in health_daily:
-                health_daily[date_str] = {}
-            health_daily[date_str].update(symp_metrics)
+        health_store.merge(symptoms_store, overwrite=True)
 
     # 4b. Fetch medications + supplements: adherence as daily variable + context for AI
     (
         adherence_daily,
         meds_context,
         med_sources,
-    ) = await _fetch_medications_supplements_context(user_id, fetch_days)
+    ) = await _fetch_medications_supplements_context(user_id, days)
     data_sources_used.extend(s for s in med_sources if s not in data_sources_used)
-    for date_str, adh_metrics in adherence_daily.items():
-        health_daily.setdefault(date_str, {}).update(adh_metrics)
+    health_store.merge(DailyMetricStore.from_daily(adherence_daily), overwrite=True)
+
+    return nutrition_daily, health_store, data_sources_used, meds_context
+
+
+async def _compute_and_cache(
+    current_user: dict,
+    period_days: int,
+    bearer: Optional[str],
+    full: bool = False,
+) -> CorrelationResults:
+    """
+    Fetch user data, compute correlations, generate AI summary, cache, return.
+
+    When this worker still holds the user's previous run (and *full* is not
+    set), only the days since that run — plus INCREMENTAL_REFETCH_DAYS of
+    overlap for late syncs — are fetched; everything older is reused and the
+    Pearson sums are slid rather than recomputed.
+    """
+    user_id = current_user["id"]
+
+    # days=0 means "all history" — cap at 365 days to keep computation under 30s.
+    ALL_HISTORY = period_days == 0
+    fetch_days = 365 if ALL_HISTORY else period_days
+
+    today = date.today()
+    state = None if full else _get_incremental_state(user_id, period_days)
+    delta_days = (
+        (today - state.fetched_on).days + INCREMENTAL_REFETCH_DAYS if state else 0
+    )
+    if state and delta_days >= fetch_days:
+        state = None
+
+    track_b_stale = True
+    if state:
+        # 1–4b. Only the trailing days; older days come from the previous run.
+        (
+            delta_nutrition,
+            delta_health,
+            delta_sources,
+            meds_context,
+        ) = await _fetch_daily_sources(current_user, user_id, delta_days, bearer)
+        window_start = (today - timedelta(days=fetch_days)).isoformat()
+        fresh_start = (today - timedelta(days=delta_days)).isoformat()
+        nutrition_daily = _merge_window(
+            state.nutrition_daily, delta_nutrition, window_start, fresh_start
+        )
+        base_health_store = state.health_store.window(window_start, fresh_start).merge(
+            delta_health.window(fresh_start)
+        )
+        base_sources = list(dict.fromkeys(state.data_sources_used + delta_sources))
+        track_b_stale = _track_b_inputs_changed(
+            state, delta_nutrition, delta_health, fresh_start
+        )
+        logger.info(
+            "Correlation refresh for %s: incremental (%d day(s) re-fetched)",
+            user_id,
+            delta_days,
+        )
+    else:
+        # 1–4b. Full window
+        (
+            nutrition_daily,
+            base_health_store,
+            base_sources,
+            meds_context,
+        ) = await _fetch_daily_sources(current_user, user_id, fetch_days, bearer)
+
+    health_store = base_health_store.copy()
+    data_sources_used = list(base_sources)
 
     # 4c. Fetch lab biomarkers: time-series for stats + context for AI
-    lab_daily, lab_context = await _fetch_lab_biomarkers_daily(user_id, fetch_days)
-    if lab_daily:
+    lab_store, lab_context = await _fetch_lab_biomarkers_store(user_id, fetch_days)
+    if len(lab_store):
         data_sources_used.append("Lab Results")
-        for date_str, lab_metrics in lab_daily.items():
-            health_daily.setdefault(date_str, {}).update(lab_metrics)
+        health_store.merge(lab_store, overwrite=True)
 
     # 4d. Track B: postprandial glucose-meal correlations (activates only when CGM data present)
-    glucose_meal_correlations = await _compute_glucose_meal_correlations(
-        bearer, user_id, fetch_days, health_daily
-    )
+    if state and not track_b_stale:
+        glucose_meal_correlations = state.glucose_meal_correlations
+    else:
+        glucose_meal_correlations = await _compute_glucose_meal_correlations(
+            bearer, user_id, fetch_days, health_store
+        )
     if glucose_meal_correlations:
         data_sources_used = list(
             dict.fromkeys(data_sources_used + ["CGM / Glucose Monitor"])
@@ -2454,10 +2498,11 @@ async def _compute_and_cache(
     conditions_context = await _fetch_conditions_context(user_id)
 
     # 5. Compute data quality
-    health_days = len(health_daily)
+    health_dates = set(health_store.dates_with_data())
+    health_days = len(health_dates)
     nutrition_days = len(nutrition_daily)
-    all_dates_union = set(health_daily.keys()) | set(nutrition_daily.keys())
-    overlap_dates = set(health_daily.keys()) & set(nutrition_daily.keys())
+    all_dates_union = health_dates | set(nutrition_daily.keys())
+    overlap_dates = health_dates & set(nutrition_daily.keys())
     overlap_count = len(overlap_dates)
     days_with_data = len(all_dates_union)
 
@@ -2567,9 +2612,7 @@ async def _compute_and_cache(
         learned_priors = []
 
     # 7. Build dynamic pairs for native device / symptom metrics
-    available_health_metrics: Set[str] = set()
-    for day_metrics in health_daily.values():
-        available_health_metrics.update(day_metrics.keys())
+    available_health_metrics = set(health_store.metrics_with_data())
     dynamic_native_pairs = _build_dynamic_native_pairs(available_health_metrics)
     if dynamic_native_pairs:
         logger.info(
@@ -2579,12 +2622,29 @@ async def _compute_and_cache(
         )
 
     # 8. Compute correlations (Track A) + merge Track B postprandial results
+    batch = _CorrelationBatch(
+        nutrition_daily, health_store, previous=state.batch if state else None
+    )
     raw_correlations = _compute_correlations(
         nutrition_daily,
-        health_daily,
+        health_store,
         condition_vars,
         learned_priors,
         dynamic_native_pairs,
+        batch=batch,
+    )
+    _remember_incremental_state(
+        user_id,
+        period_days,
+        _IncrementalState(
+            nutrition_daily=nutrition_daily,
+            health_store=base_health_store,
+            data_sources_used=base_sources,
+            glucose_meal_correlations=glucose_meal_correlations,
+            batch=batch,
+            fetched_on=today,
+            full_at=state.full_at if state else datetime.now(timezone.utc),
+        ),
     )
 
     # Merge Track B glucose-meal correlations (deduplicate by metric pair key)
@@ -2696,9 +2756,9 @@ async def refresh_correlations(
     days: int = Query(default=0, ge=0, le=99999),
     current_user: dict = Depends(UsageGate("correlations")),
 ):
-    """Force recompute correlations (ignores cache)."""
+    """Force recompute correlations (ignores cache and incremental state)."""
     bearer = request.headers.get("Authorization")
-    return await _compute_and_cache(current_user, days, bearer)
+    return await _compute_and_cache(current_user, days, bearer, full=True)
 
 
 @router.get("/detail/{correlation_id}")
@@ -2774,8 +2834,6 @@ async def get_causal_graph(
     Uses Granger causality testing to infer likely causal directions.
     Pro+ feature - advanced statistical analysis.
     """
-    from .timeline import get_timeline
-
     user_id = current_user["id"]
 
     # days=0 means "all history" — cap at 365 days to keep computation fast.
@@ -2787,42 +2845,33 @@ async def get_causal_graph(
     if auth_header.startswith("Bearer "):
         bearer = auth_header
 
-    # Fetch Oura timeline data
-    try:
-        timeline = await get_timeline(days=fetch_days, current_user=current_user)
-    except Exception as exc:
-        logger.error("Failed to fetch timeline for causal graph: %s", exc)
-        timeline = []
-
-    # Build canonical health_daily from all connected devices
-    health_daily, device_sources = await _build_health_daily(
-        user_id, fetch_days, timeline
+    # Build canonical health store from all connected devices (Oura timeline
+    # fetched only when the store is not cached)
+    health_store, device_sources = await _build_health_store(
+        user_id, fetch_days, _timeline_loader(current_user, fetch_days, "causal graph")
     )
     causal_sources: List[str] = list(
         dict.fromkeys(device_sources)
     )  # preserve order, dedupe
 
     # Merge symptom data as outcome variables
-    symptoms_daily = await _fetch_symptoms_daily(user_id, fetch_days)
-    if symptoms_daily:
+    symptoms_store = await _fetch_symptoms_store(user_id, fetch_days)
+    if len(symptoms_store):
         causal_sources.append("Symptom Journal")
-    for date_str, symp_metrics in symptoms_daily.items():
-        health_daily.setdefault(date_str, {}).update(symp_metrics)
+    health_store.merge(symptoms_store, overwrite=True)
 
     # Merge medication adherence as outcome variable + track source
     adherence_daily, _, med_src = await _fetch_medications_supplements_context(
         user_id, fetch_days
     )
     causal_sources.extend(s for s in med_src if s not in causal_sources)
-    for date_str, adh_metrics in adherence_daily.items():
-        health_daily.setdefault(date_str, {}).update(adh_metrics)
+    health_store.merge(DailyMetricStore.from_daily(adherence_daily), overwrite=True)
 
     # Merge lab biomarker draws (>= 2 draws required for statistical use)
-    lab_daily, _ = await _fetch_lab_biomarkers_daily(user_id, fetch_days)
-    if lab_daily:
+    lab_store, _ = await _fetch_lab_biomarkers_store(user_id, fetch_days)
+    if len(lab_store):
         causal_sources.append("Lab Results")
-    for date_str, lab_metrics in lab_daily.items():
-        health_daily.setdefault(date_str, {}).update(lab_metrics)
+    health_store.merge(lab_store, overwrite=True)
 
     # Fetch nutrition data
     nutrition_daily = await _fetch_nutrition_daily(bearer, fetch_days)
@@ -2830,7 +2879,9 @@ async def get_causal_graph(
         causal_sources.append("Nutrition Logs")
 
     # Actual days found (used in response so UI can show "All · Xd")
-    causal_days_with_data = len(set(health_daily.keys()) | set(nutrition_daily.keys()))
+    causal_days_with_data = len(
+        set(health_store.dates_with_data()) | set(nutrition_daily.keys())
+    )
 
     # Fetch condition variables so condition-specific pairs are included in the graph
     try:
@@ -2841,15 +2892,13 @@ async def get_causal_graph(
         condition_vars = []
 
     # Build dynamic native pairs
-    available_health_metrics: Set[str] = set()
-    for day_metrics in health_daily.values():
-        available_health_metrics.update(day_metrics.keys())
+    available_health_metrics = set(health_store.metrics_with_data())
     dynamic_native_pairs = _build_dynamic_native_pairs(available_health_metrics)
 
     # Compute correlations (with condition-aware + native device pairs)
     correlations = _compute_correlations(
         nutrition_daily,
-        health_daily,
+        health_store,
         condition_vars,
         dynamic_native_pairs=dynamic_native_pairs,
     )
@@ -2865,7 +2914,9 @@ async def get_causal_graph(
         )
 
     # Compute causal graph
-    graph_data = _compute_causal_graph(correlations, nutrition_daily, health_daily)
+    graph_data = await _compute_causal_graph(
+        correlations, nutrition_daily, health_store.to_daily()
+    )
 
     return CausalGraph(
         nodes=graph_data["nodes"],
@@ -2874,4 +2925,5 @@ async def get_causal_graph(
         confidence_threshold=graph_data["confidence_threshold"],
         data_sources_used=causal_sources,
         days_with_data=causal_days_with_data,
+        truncated=graph_data["truncated"],
     )
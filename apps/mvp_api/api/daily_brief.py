@@ -307,13 +307,13 @@ Write a 3-5 sentence conversational morning brief. Rules:
 
 async def _call_claude(prompt: str, max_tokens: int = 250) -> str:
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Good morning! Log your health data to receive a personalized daily brief."
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "daily_brief",
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
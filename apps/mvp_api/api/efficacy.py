@@ -7,15 +7,13 @@ Used by the recommendation ranker to surface high-confidence suggestions first.
 
 import json
 import os
-import ssl
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-import certifi
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import _supabase_get, _supabase_upsert
@@ -230,28 +228,15 @@ Results:
 Write in second person ("Your body responds well to..."). Focus on actionable takeaways."""
 
     try:
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-        timeout = aiohttp.ClientTimeout(total=12)
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": ANTHROPIC_MODEL,
-                    "max_tokens": 300,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    return result["content"][0]["text"].strip()
+        result = await get_llm_gateway().create(
+            "efficacy",
+            memoize=True,
+            model=ANTHROPIC_MODEL,
+            max_tokens=300,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=12,
+        )
+        return result.content[0].text.strip()
     except Exception as exc:
         logger.warning("Efficacy AI summary failed: %s", exc)
 
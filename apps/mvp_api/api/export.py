@@ -1,351 +1,76 @@
 """
 Data Export API — generates a full health history PDF, FHIR R4 bundle,
-and comprehensive JSON/CSV exports.
+and comprehensive JSON/NDJSON/CSV exports.
 Uses ReportLab (already in requirements.txt).
+The FHIR and health-data exports stream every row (see export_stream.py).
 """
 
 # pylint: disable=too-many-locals,too-many-branches,too-many-statements,broad-except,import-outside-toplevel,too-few-public-methods,invalid-name,line-too-long,too-many-lines,too-many-arguments,redefined-builtin,raise-missing-from
 
+import asyncio
 import csv
 import io
 import json
 import uuid as _uuid
 from datetime import datetime, timezone, timedelta
-from typing import List, Optional
+from typing import AsyncIterator, Callable, Dict, List, NamedTuple
+from urllib.parse import quote
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from fastapi.responses import Response
 
 from common.middleware.auth import get_current_user
+from common.pdf.health_export import render_health_export
+from common.pdf.render_service import render_pdf
 from common.utils.logging import get_logger
-from ..dependencies.usage_gate import _supabase_get
+from ..dependencies.usage_gate import (
+    SupabaseReadError,
+    _supabase_get,
+    _supabase_get_strict,
+)
+from .export_stream import ExportTable, PagedExport, download_response
 
 logger = get_logger(__name__)
 router = APIRouter()
 
 
-def _fmt_date(s: Optional[str]) -> str:
-    if not s:
-        return "—"
+async def _pdf_health_scores(current_user: dict) -> list:
+    """Last week's timeline, as plain dicts, if a wearable is connected."""
     try:
-        return datetime.fromisoformat(s.replace("Z", "+00:00")).strftime("%b %d, %Y")
-    except Exception:
-        return str(s)[:10]
-
-
-def _build_pdf(
-    user: dict,
-    profile: dict,
-    meds: list,
-    supplements: list,
-    lab_results: list,
-    symptoms: list,
-    insights: list,
-    health_scores: list,
-    adherence_stats: dict,
-) -> bytes:
-    """Build the full health history PDF and return bytes."""
-    try:
-        from reportlab.lib.pagesizes import letter
-        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-        from reportlab.lib.units import inch
-        from reportlab.lib import colors
-        from reportlab.platypus import (
-            SimpleDocTemplate,
-            Paragraph,
-            Spacer,
-            Table,
-            TableStyle,
-            HRFlowable,
-            PageBreak,
-        )
-        from reportlab.lib.enums import TA_LEFT, TA_CENTER
-    except ImportError:
-        raise RuntimeError("reportlab is not installed")
-
-    buf = io.BytesIO()
-    doc = SimpleDocTemplate(
-        buf,
-        pagesize=letter,
-        leftMargin=0.75 * inch,
-        rightMargin=0.75 * inch,
-        topMargin=0.75 * inch,
-        bottomMargin=0.75 * inch,
-    )
-
-    styles = getSampleStyleSheet()
-    TEAL = colors.HexColor("#00D4AA")
-    DARK = colors.HexColor("#1A2332")
-    MUTED = colors.HexColor("#526380")
-
-    title_style = ParagraphStyle(
-        "Title",
-        parent=styles["Title"],
-        fontSize=20,
-        textColor=DARK,
-        spaceAfter=4,
-    )
-    h2_style = ParagraphStyle(
-        "H2",
-        parent=styles["Heading2"],
-        fontSize=13,
-        textColor=TEAL,
-        spaceBefore=14,
-        spaceAfter=4,
-    )
-    h3_style = ParagraphStyle(
-        "H3",
-        parent=styles["Heading3"],
-        fontSize=11,
-        textColor=DARK,
-        spaceBefore=8,
-        spaceAfter=2,
-    )
-    body_style = ParagraphStyle(
-        "Body",
-        parent=styles["Normal"],
-        fontSize=9,
-        textColor=DARK,
-        leading=13,
-    )
-    muted_style = ParagraphStyle(
-        "Muted",
-        parent=styles["Normal"],
-        fontSize=8,
-        textColor=MUTED,
-        leading=11,
-    )
-
-    def hr():
-        return HRFlowable(
-            width="100%", thickness=0.5, color=colors.HexColor("#E2E8F0"), spaceAfter=6
-        )
+        from .timeline import get_timeline
 
-    def tbl(data, col_widths, bold_header=True):
-        t = Table(data, colWidths=col_widths)
-        style_cmds = [
-            ("FONTSIZE", (0, 0), (-1, -1), 8),
-            (
-                "ROWBACKGROUNDS",
-                (0, 0),
-                (-1, -1),
-                [colors.white, colors.HexColor("#F8FAFC")],
-            ),
-            ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#E2E8F0")),
-            ("VALIGN", (0, 0), (-1, -1), "TOP"),
-            ("LEFTPADDING", (0, 0), (-1, -1), 4),
-            ("RIGHTPADDING", (0, 0), (-1, -1), 4),
-            ("TOPPADDING", (0, 0), (-1, -1), 3),
-            ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+        mock_user = {
+            "id": current_user["id"],
+            "email": current_user.get("email", ""),
+            "user_type": "system",
+        }
+        timeline = await get_timeline(days=7, current_user=mock_user)
+        return [
+            e.model_dump() if hasattr(e, "model_dump") else e for e in timeline or []
         ]
-        if bold_header:
-            style_cmds += [
-                ("BACKGROUND", (0, 0), (-1, 0), TEAL),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
-                ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-            ]
-        t.setStyle(TableStyle(style_cmds))
-        return t
-
-    story = []
-    name = user.get("name", user.get("email", "Unknown"))
-    generated_at = datetime.now(timezone.utc).strftime("%B %d, %Y at %H:%M UTC")
-
-    # ── Cover / Header ────────────────────────────────────────────────────────
-    story.append(Paragraph("Personal Health Export", title_style))
-    story.append(Paragraph(f"Prepared for: <b>{name}</b>", body_style))
-    story.append(Paragraph(f"Generated: {generated_at}", muted_style))
-    story.append(Spacer(1, 10))
-    story.append(hr())
-
-    # ── Page 1: Profile & Active Treatments ──────────────────────────────────
-    story.append(Paragraph("Profile & Active Treatments", h2_style))
-
-    # Profile stats
-    dob = profile.get("date_of_birth", "")
-    age_str = ""
-    if dob:
-        try:
-            dob_dt = datetime.strptime(dob, "%Y-%m-%d")
-            age_str = f"{(datetime.now() - dob_dt).days // 365} yrs"
-        except Exception:
-            pass
+    except Exception:
+        return []
 
-    weight = profile.get("weight_kg")
-    height = profile.get("height_cm")
-    bmi_str = ""
-    if weight and height:
-        bmi = weight / ((height / 100) ** 2)
-        bmi_str = f"{bmi:.1f}"
 
-    profile_rows = [
-        ["Field", "Value"],
-        ["Name", name],
-        ["Date of Birth", _fmt_date(dob) + (f" ({age_str})" if age_str else "")],
-        [
-            "Biological Sex",
-            (profile.get("biological_sex") or "—").replace("_", " ").title(),
-        ],
-        ["Weight", f"{weight} kg" if weight else "—"],
-        ["Height", f"{height} cm" if height else "—"],
-        ["BMI", bmi_str or "—"],
-    ]
-    story.append(tbl(profile_rows, [2 * inch, 4 * inch]))
-    story.append(Spacer(1, 10))
-
-    # Active Medications
-    active_meds = [m for m in meds if m.get("is_active", True)]
-    if active_meds:
-        story.append(Paragraph("Active Medications", h3_style))
-        med_rows = [["Medication", "Dosage", "Frequency", "Since"]]
-        for m in active_meds:
-            med_rows.append(
-                [
-                    m.get("medication_name", "—"),
-                    m.get("dosage", "—"),
-                    m.get("frequency", "—"),
-                    _fmt_date(m.get("start_date")),
-                ]
-            )
-        story.append(tbl(med_rows, [2.2 * inch, 1.3 * inch, 1.5 * inch, 1.2 * inch]))
-        story.append(Spacer(1, 6))
-
-    # Active Supplements
-    active_supps = [s for s in supplements if s.get("is_active", True)]
-    if active_supps:
-        story.append(Paragraph("Active Supplements", h3_style))
-        supp_rows = [["Supplement", "Dosage", "Frequency"]]
-        for s in active_supps:
-            supp_rows.append(
-                [
-                    s.get("supplement_name", "—"),
-                    s.get("dosage", "—"),
-                    s.get("frequency", "—"),
-                ]
-            )
-        story.append(tbl(supp_rows, [2.5 * inch, 1.5 * inch, 2.2 * inch]))
-        story.append(Spacer(1, 6))
-
-    # Adherence summary
-    if adherence_stats.get("total_scheduled", 0) > 0:
-        rate = adherence_stats.get("adherence_rate", 0)
-        story.append(
-            Paragraph(
-                f"Medication Adherence (30 days): <b>{rate:.0f}%</b> "
-                f"({adherence_stats.get('total_taken', 0)}/{adherence_stats.get('total_scheduled', 0)} doses)",
-                body_style,
-            )
-        )
-        story.append(Spacer(1, 6))
-
-    story.append(PageBreak())
-
-    # ── Page 2: Lab Results ───────────────────────────────────────────────────
-    story.append(Paragraph("Lab Results (Last 12 Months)", h2_style))
-    if not lab_results:
-        story.append(Paragraph("No lab results recorded.", muted_style))
-    else:
-        cutoff = (datetime.now(timezone.utc) - timedelta(days=365)).date().isoformat()
-        recent_labs = [r for r in lab_results if (r.get("test_date") or "") >= cutoff]
-        if not recent_labs:
-            story.append(
-                Paragraph("No lab results in the past 12 months.", muted_style)
-            )
-        else:
-            for lab in recent_labs:
-                story.append(
-                    Paragraph(
-                        f"{lab.get('test_type', 'Lab Test')} — {_fmt_date(lab.get('test_date'))}",
-                        h3_style,
-                    )
-                )
-                biomarkers = lab.get("biomarkers", [])
-                if biomarkers:
-                    b_rows = [["Biomarker", "Value", "Unit", "Status"]]
-                    for b in biomarkers:
-                        status = b.get("status", "normal")
-                        b_rows.append(
-                            [
-                                b.get("biomarker_name", "—"),
-                                str(b.get("value", "—")),
-                                b.get("unit", "—"),
-                                status.upper()
-                                if status not in ("normal",)
-                                else status.title(),
-                            ]
-                        )
-                    story.append(
-                        tbl(b_rows, [2.5 * inch, 1 * inch, 1 * inch, 1.2 * inch])
-                    )
-                story.append(Spacer(1, 8))
-
-    story.append(PageBreak())
-
-    # ── Page 3: Symptom Timeline ──────────────────────────────────────────────
-    story.append(Paragraph("Symptom Timeline (Last 90 Days)", h2_style))
-    if not symptoms:
-        story.append(Paragraph("No symptoms logged.", muted_style))
-    else:
-        sym_rows = [["Date", "Type", "Severity", "Notes"]]
-        for sym in symptoms[:25]:
-            sym_rows.append(
-                [
-                    _fmt_date(sym.get("symptom_date")),
-                    str(sym.get("symptom_type", "—")).title(),
-                    f"{sym.get('severity', '—')}/10",
-                    (sym.get("notes") or "")[:60],
-                ]
-            )
-        story.append(tbl(sym_rows, [1.2 * inch, 1.3 * inch, 0.8 * inch, 2.9 * inch]))
-
-    story.append(PageBreak())
-
-    # ── Page 4: AI Insights ───────────────────────────────────────────────────
-    story.append(Paragraph("Recent AI Insights", h2_style))
-    if not insights:
-        story.append(Paragraph("No AI insights generated yet.", muted_style))
-    else:
-        for ins in insights[:5]:
-            story.append(Paragraph(ins.get("title", "Insight"), h3_style))
-            story.append(Paragraph(ins.get("summary", ""), body_style))
-            story.append(Paragraph(_fmt_date(ins.get("created_at")), muted_style))
-            story.append(Spacer(1, 6))
-
-    # ── Page 5: Health Scores ─────────────────────────────────────────────────
-    if health_scores:
-        story.append(PageBreak())
-        story.append(Paragraph("Health Scores (7-Day Averages)", h2_style))
-        score_rows = [["Date", "Sleep", "Activity", "Readiness", "Overall"]]
-        for day in health_scores[-7:]:
-            score_rows.append(
-                [
-                    _fmt_date(day.get("date")),
-                    str(
-                        day.get("sleep", {}).get("sleep_score", "—")
-                        if isinstance(day.get("sleep"), dict)
-                        else "—"
-                    ),
-                    str(
-                        day.get("activity", {}).get("activity_score", "—")
-                        if isinstance(day.get("activity"), dict)
-                        else "—"
-                    ),
-                    str(
-                        day.get("readiness", {}).get("readiness_score", "—")
-                        if isinstance(day.get("readiness"), dict)
-                        else "—"
-                    ),
-                    "—",
-                ]
-            )
-        story.append(
-            tbl(
-                score_rows, [1.3 * inch, 1.1 * inch, 1.1 * inch, 1.1 * inch, 1.1 * inch]
-            )
+async def _pdf_adherence_stats(user_id: str) -> dict:
+    """Medication adherence over the last 30 days."""
+    start_date = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+    adh_rows = (
+        await _supabase_get(
+            "medication_adherence_log",
+            f"user_id=eq.{user_id}&scheduled_time=gte.{start_date}&select=was_taken&limit=500",
         )
-
-    doc.build(story)
-    return buf.getvalue()
+        or []
+    )
+    if not adh_rows:
+        return {}
+    total = len(adh_rows)
+    taken = sum(1 for r in adh_rows if r.get("was_taken"))
+    return {
+        "total_scheduled": total,
+        "total_taken": taken,
+        "adherence_rate": round(taken / total * 100, 1) if total > 0 else 0,
+    }
 
 
 @router.get("/pdf")
@@ -355,111 +80,70 @@ async def export_health_pdf(
     """
     Generate and download a full health history PDF.
     Includes profile, treatments, lab results, symptoms, AI insights, and health scores.
+    The reads run concurrently; the layout is rendered in the PDF worker pool
+    and reused while the underlying data is unchanged.
     """
     user_id = current_user["id"]
+    cutoff_90d = (datetime.now(timezone.utc) - timedelta(days=90)).date().isoformat()
 
-    # Collect all data in parallel-ish (sequential is fine for PDF generation)
-    profile_rows = await _supabase_get(
-        "profiles",
-        f"id=eq.{user_id}&select=date_of_birth,biological_sex,weight_kg,height_cm&limit=1",
-    )
-    profile = (profile_rows or [{}])[0]
-
-    meds = (
-        await _supabase_get(
+    (
+        profile_rows,
+        meds,
+        supplements,
+        symptoms,
+        insights,
+        lab_results,
+        health_scores,
+        adherence_stats,
+    ) = await asyncio.gather(
+        _supabase_get(
+            "profiles",
+            f"id=eq.{user_id}&select=date_of_birth,biological_sex,weight_kg,height_cm&limit=1",
+        ),
+        _supabase_get(
             "medications",
             f"user_id=eq.{user_id}&select=*&order=created_at.desc",
-        )
-        or []
-    )
-
-    supplements = (
-        await _supabase_get(
+        ),
+        _supabase_get(
             "supplements",
             f"user_id=eq.{user_id}&select=*&order=created_at.desc",
-        )
-        or []
-    )
-
-    cutoff_90d = (datetime.now(timezone.utc) - timedelta(days=90)).date().isoformat()
-    symptoms = (
-        await _supabase_get(
+        ),
+        _supabase_get(
             "symptom_journal",
             f"user_id=eq.{user_id}&symptom_date=gte.{cutoff_90d}&select=*&order=symptom_date.desc&limit=25",
-        )
-        or []
-    )
-
-    insights = (
-        await _supabase_get(
+        ),
+        _supabase_get(
             "ai_insights",
             f"user_id=eq.{user_id}&select=*&order=created_at.desc&limit=5",
-        )
-        or []
-    )
-
-    lab_results = (
-        await _supabase_get(
+        ),
+        _supabase_get(
             "lab_results",
             f"user_id=eq.{user_id}&select=*&order=test_date.desc&limit=20",
-        )
-        or []
-    )
-
-    # Try to get health scores via timeline data if Oura connected
-    health_scores: list = []
-    try:
-        from .timeline import get_timeline
-
-        mock_user = {
-            "id": user_id,
-            "email": current_user.get("email", ""),
-            "user_type": "system",
-        }
-        timeline = await get_timeline(days=7, current_user=mock_user)
-        if timeline:
-            health_scores = timeline
-    except Exception:
-        pass
-
-    # Adherence stats (30 days)
-    adherence_stats: dict = {}
-    try:
-        start_date = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
-        adh_rows = (
-            await _supabase_get(
-                "medication_adherence_log",
-                f"user_id=eq.{user_id}&scheduled_time=gte.{start_date}&select=was_taken&limit=500",
-            )
-            or []
-        )
-        if adh_rows:
-            total = len(adh_rows)
-            taken = sum(1 for r in adh_rows if r.get("was_taken"))
-            adherence_stats = {
-                "total_scheduled": total,
-                "total_taken": taken,
-                "adherence_rate": round(taken / total * 100, 1) if total > 0 else 0,
-            }
-    except Exception:
-        pass
-
+        ),
+        _pdf_health_scores(current_user),
+        _pdf_adherence_stats(user_id),
+        return_exceptions=True,
+    )
+
+    def _ok(value, default):
+        return default if isinstance(value, BaseException) or not value else value
+
+    data = {
+        # Only what the cover page shows, so the cache key is the report data.
+        "user": {k: current_user[k] for k in ("name", "email") if k in current_user},
+        "profile": _ok(profile_rows, [{}])[0],
+        "meds": _ok(meds, []),
+        "supplements": _ok(supplements, []),
+        "lab_results": _ok(lab_results, []),
+        "symptoms": _ok(symptoms, []),
+        "insights": _ok(insights, []),
+        "health_scores": _ok(health_scores, []),
+        "adherence_stats": _ok(adherence_stats, {}),
+    }
     try:
-        pdf_bytes = _build_pdf(
-            user=current_user,
-            profile=profile,
-            meds=meds,
-            supplements=supplements,
-            lab_results=lab_results,
-            symptoms=symptoms,
-            insights=insights,
-            health_scores=health_scores,
-            adherence_stats=adherence_stats,
-        )
+        pdf_bytes = await render_pdf(render_health_export, data)
     except Exception as exc:
         logger.error(f"PDF generation failed for user {user_id}: {exc}")
-        from fastapi import HTTPException
-
         raise HTTPException(status_code=500, detail=f"PDF generation failed: {exc}")
 
     return Response(
@@ -469,28 +153,75 @@ async def export_health_pdf(
     )
 
 
-@router.get("/fhir")
-async def export_fhir(
-    current_user: dict = Depends(get_current_user),
-):
-    """
-    Export health data as a FHIR R4 Bundle (application/fhir+json).
-    Includes Condition, MedicationStatement, Observation (vitals/labs),
-    and DiagnosticReport resources.
-    """
-    user_id = current_user["id"]
-    now_iso = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
-    patient_ref = f"urn:uuid:{user_id}"
+# ============================================================================
+# STREAMING EXPORTS — every row, paged concurrently (see export_stream.py)
+# ============================================================================
 
-    entries: List[dict] = []
+_PROFILE_SELECT = "date_of_birth,biological_sex,weight_kg,height_cm"
 
-    # ── Patient resource ─────────────────────────────────────────────────────
-    profile_rows = await _supabase_get(
-        "profiles",
-        f"id=eq.{user_id}&select=date_of_birth,biological_sex,weight_kg,height_cm&limit=1",
-    )
-    profile = (profile_rows or [{}])[0]
 
+async def _export_profile(user_id: str) -> dict:
+    """The profile row, read before the response starts so an outage is a 502."""
+    try:
+        rows = await _supabase_get_strict(
+            "profiles", f"id=eq.{user_id}&select={_PROFILE_SELECT}&limit=1"
+        )
+    except SupabaseReadError as exc:
+        logger.error(f"Export profile read failed for user {user_id}: {exc}")
+        raise HTTPException(
+            status_code=502, detail="Health data temporarily unavailable"
+        )
+    return (rows or [{}])[0]
+
+
+# LOINC codes for common biomarkers
+_LOINC: dict = {
+    "glucose": "2345-7",
+    "hemoglobin": "718-7",
+    "hba1c": "4548-4",
+    "cholesterol": "2093-3",
+    "ldl": "13457-7",
+    "hdl": "2085-9",
+    "triglycerides": "2571-8",
+    "creatinine": "2160-0",
+    "egfr": "33914-3",
+    "sodium": "2951-2",
+    "potassium": "2823-3",
+    "calcium": "17861-6",
+    "alt": "1742-6",
+    "ast": "1920-8",
+    "tsh": "3016-3",
+    "vitamin_d": "1989-3",
+    "iron": "2498-4",
+    "ferritin": "2276-4",
+}
+
+_FHIR_TABLES = (
+    ExportTable(
+        "conditions",
+        "health_conditions",
+        "id,condition_name,severity,created_at",
+        "user_id=eq.{user_id}&is_active=eq.true",
+        "created_at",
+    ),
+    ExportTable(
+        "medications",
+        "medications",
+        "id,medication_name,dosage,frequency,start_date",
+        "user_id=eq.{user_id}&is_active=eq.true",
+        "start_date",
+    ),
+    ExportTable(
+        "lab_results",
+        "lab_results",
+        "*",
+        "user_id=eq.{user_id}&test_date=gte.{cutoff_date}",
+        "test_date",
+    ),
+)
+
+
+def _fhir_patient_entry(user_id: str, profile: dict) -> dict:
     gender_map = {
         "male": "male",
         "female": "female",
@@ -509,109 +240,88 @@ async def export_fhir(
     if profile.get("date_of_birth"):
         patient_resource["birthDate"] = profile["date_of_birth"][:10]
 
-    entries.append(
-        {
-            "fullUrl": patient_ref,
-            "resource": patient_resource,
-            "request": {"method": "PUT", "url": f"Patient/{user_id}"},
-        }
-    )
+    return {
+        "fullUrl": f"urn:uuid:{user_id}",
+        "resource": patient_resource,
+        "request": {"method": "PUT", "url": f"Patient/{user_id}"},
+    }
 
-    # ── Condition resources ───────────────────────────────────────────────────
-    conditions = (
-        await _supabase_get(
-            "health_conditions",
-            f"user_id=eq.{user_id}&is_active=eq.true&select=id,condition_name,severity,created_at",
-        )
-        or []
-    )
 
-    for cond in conditions:
-        severity_map = {
-            "mild": "255604002",
-            "moderate": "6736007",
-            "severe": "24484000",
-        }
-        sev_code = severity_map.get(
-            (cond.get("severity") or "moderate").lower(), "6736007"
-        )
-        condition_res = {
-            "resourceType": "Condition",
-            "id": str(cond.get("id", _uuid.uuid4())),
-            "clinicalStatus": {
-                "coding": [
-                    {
-                        "system": "http://terminology.hl7.org/CodeSystem/condition-clinical",
-                        "code": "active",
-                    }
-                ]
-            },
-            "subject": {"reference": patient_ref},
-            "code": {"text": cond.get("condition_name", "Unknown condition")},
-            "severity": {
-                "coding": [
-                    {
-                        "system": "http://snomed.info/sct",
-                        "code": sev_code,
-                        "display": (cond.get("severity") or "moderate").capitalize(),
-                    }
-                ]
-            },
-            "recordedDate": (cond.get("created_at") or now_iso)[:10],
-        }
-        entries.append(
-            {
-                "fullUrl": f"urn:uuid:{cond.get('id')}",
-                "resource": condition_res,
-                "request": {"method": "PUT", "url": f"Condition/{cond.get('id')}"},
-            }
-        )
-
-    # ── MedicationStatement resources ─────────────────────────────────────────
-    meds = (
-        await _supabase_get(
-            "medications",
-            f"user_id=eq.{user_id}&is_active=eq.true&select=id,medication_name,dosage,frequency,start_date",
-        )
-        or []
-    )
-
-    for med in meds:
-        med_id = str(med.get("id", _uuid.uuid4()))
-        med_res = {
-            "resourceType": "MedicationStatement",
-            "id": med_id,
-            "status": "active",
-            "subject": {"reference": patient_ref},
-            "medicationCodeableConcept": {
-                "text": med.get("medication_name", "Unknown medication")
-            },
-            "dosage": [
+def _fhir_condition_entry(cond: dict, patient_ref: str, now_iso: str) -> dict:
+    severity_map = {
+        "mild": "255604002",
+        "moderate": "6736007",
+        "severe": "24484000",
+    }
+    sev_code = severity_map.get((cond.get("severity") or "moderate").lower(), "6736007")
+    condition_res = {
+        "resourceType": "Condition",
+        "id": str(cond.get("id", _uuid.uuid4())),
+        "clinicalStatus": {
+            "coding": [
                 {
-                    "text": " ".join(
-                        filter(
-                            None,
-                            [
-                                med.get("dosage"),
-                                med.get("frequency"),
-                            ],
-                        )
-                    )
-                    or "as directed"
+                    "system": "http://terminology.hl7.org/CodeSystem/condition-clinical",
+                    "code": "active",
                 }
-            ],
-        }
-        if med.get("start_date"):
-            med_res["effectivePeriod"] = {"start": med["start_date"][:10]}
-        entries.append(
+            ]
+        },
+        "subject": {"reference": patient_ref},
+        "code": {"text": cond.get("condition_name", "Unknown condition")},
+        "severity": {
+            "coding": [
+                {
+                    "system": "http://snomed.info/sct",
+                    "code": sev_code,
+                    "display": (cond.get("severity") or "moderate").capitalize(),
+                }
+            ]
+        },
+        "recordedDate": (cond.get("created_at") or now_iso)[:10],
+    }
+    return {
+        "fullUrl": f"urn:uuid:{cond.get('id')}",
+        "resource": condition_res,
+        "request": {"method": "PUT", "url": f"Condition/{cond.get('id')}"},
+    }
+
+
+def _fhir_medication_entry(med: dict, patient_ref: str) -> dict:
+    med_id = str(med.get("id", _uuid.uuid4()))
+    med_res = {
+        "resourceType": "MedicationStatement",
+        "id": med_id,
+        "status": "active",
+        "subject": {"reference": patient_ref},
+        "medicationCodeableConcept": {
+            "text": med.get("medication_name", "Unknown medication")
+        },
+        "dosage": [
             {
-                "fullUrl": f"urn:uuid:{med_id}",
-                "resource": med_res,
-                "request": {"method": "PUT", "url": f"MedicationStatement/{med_id}"},
+                "text": " ".join(
+                    filter(
+                        None,
+                        [
+                            med.get("dosage"),
+                            med.get("frequency"),
+                        ],
+                    )
+                )
+                or "as directed"
             }
-        )
+        ],
+    }
+    if med.get("start_date"):
+        med_res["effectivePeriod"] = {"start": med["start_date"][:10]}
+    return {
+        "fullUrl": f"urn:uuid:{med_id}",
+        "resource": med_res,
+        "request": {"method": "PUT", "url": f"MedicationStatement/{med_id}"},
+    }
 
-    # ── Observation resources — weight + BMI from profile ────────────────────
+
+def _fhir_body_entries(profile: dict, patient_ref: str, now_iso: str) -> List[dict]:
+    """Weight and BMI Observations from the profile."""
+    entries: List[dict] = []
     weight = profile.get("weight_kg")
     height = profile.get("height_cm")
 
@@ -677,298 +387,264 @@ async def export_fhir(
                 "request": {"method": "POST", "url": "Observation"},
             }
         )
+    return entries
 
-    # ── DiagnosticReport + Observation resources — lab results ────────────────
-    cutoff_1yr = (datetime.now(timezone.utc) - timedelta(days=365)).date().isoformat()
-    lab_results = (
-        await _supabase_get(
-            "lab_results",
-            f"user_id=eq.{user_id}&test_date=gte.{cutoff_1yr}&select=*&order=test_date.desc&limit=20",
-        )
-        or []
-    )
 
-    # LOINC codes for common biomarkers
-    _LOINC: dict = {
-        "glucose": "2345-7",
-        "hemoglobin": "718-7",
-        "hba1c": "4548-4",
-        "cholesterol": "2093-3",
-        "ldl": "13457-7",
-        "hdl": "2085-9",
-        "triglycerides": "2571-8",
-        "creatinine": "2160-0",
-        "egfr": "33914-3",
-        "sodium": "2951-2",
-        "potassium": "2823-3",
-        "calcium": "17861-6",
-        "alt": "1742-6",
-        "ast": "1920-8",
-        "tsh": "3016-3",
-        "vitamin_d": "1989-3",
-        "iron": "2498-4",
-        "ferritin": "2276-4",
-    }
+def _fhir_lab_entries(lab: dict, patient_ref: str, now_iso: str) -> List[dict]:
+    """One Observation per biomarker plus the DiagnosticReport grouping them."""
+    entries: List[dict] = []
+    lab_id = str(lab.get("id", _uuid.uuid4()))
+    test_date = lab.get("test_date") or now_iso[:10]
+    obs_refs = []
 
-    for lab in lab_results:
-        lab_id = str(lab.get("id", _uuid.uuid4()))
-        test_date = lab.get("test_date") or now_iso[:10]
-        biomarkers = lab.get("biomarkers") or []
-        obs_refs = []
-
-        for b in biomarkers:
-            b_name = (b.get("biomarker_name") or "").lower().replace(" ", "_")
-            loinc = _LOINC.get(b_name)
-            obs_id = str(_uuid.uuid4())
-            obs_res: dict = {
-                "resourceType": "Observation",
-                "id": obs_id,
-                "status": "final",
-                "subject": {"reference": patient_ref},
-                "effectiveDateTime": f"{test_date}T00:00:00Z",
-                "valueQuantity": {
-                    "value": b.get("value"),
-                    "unit": b.get("unit", ""),
-                },
-                "code": {
-                    "text": b.get("biomarker_name", "Biomarker"),
-                },
-            }
-            if loinc:
-                obs_res["code"]["coding"] = [
-                    {
-                        "system": "http://loinc.org",
-                        "code": loinc,
-                        "display": b.get("biomarker_name"),
-                    }
-                ]
-            interp = b.get("status", "normal")
-            if interp in ("abnormal", "critical"):
-                obs_res["interpretation"] = [
-                    {
-                        "coding": [
-                            {
-                                "system": "http://terminology.hl7.org/CodeSystem/v3-ObservationInterpretation",
-                                "code": "A" if interp == "abnormal" else "LL",
-                                "display": interp.capitalize(),
-                            }
-                        ]
-                    }
-                ]
-            entries.append(
+    for b in lab.get("biomarkers") or []:
+        b_name = (b.get("biomarker_name") or "").lower().replace(" ", "_")
+        loinc = _LOINC.get(b_name)
+        obs_id = str(_uuid.uuid4())
+        obs_res: dict = {
+            "resourceType": "Observation",
+            "id": obs_id,
+            "status": "final",
+            "subject": {"reference": patient_ref},
+            "effectiveDateTime": f"{test_date}T00:00:00Z",
+            "valueQuantity": {
+                "value": b.get("value"),
+                "unit": b.get("unit", ""),
+            },
+            "code": {
+                "text": b.get("biomarker_name", "Biomarker"),
+            },
+        }
+        if loinc:
+            obs_res["code"]["coding"] = [
                 {
-                    "fullUrl": f"urn:uuid:{obs_id}",
-                    "resource": obs_res,
-                    "request": {"method": "POST", "url": "Observation"},
+                    "system": "http://loinc.org",
+                    "code": loinc,
+                    "display": b.get("biomarker_name"),
                 }
-            )
-            obs_refs.append({"reference": f"urn:uuid:{obs_id}"})
-
-        if obs_refs:
-            diag_res = {
-                "resourceType": "DiagnosticReport",
-                "id": lab_id,
-                "status": "final",
-                "code": {"text": lab.get("test_type", "Lab Test")},
-                "subject": {"reference": patient_ref},
-                "effectiveDateTime": f"{test_date}T00:00:00Z",
-                "result": obs_refs,
-            }
-            entries.append(
+            ]
+        interp = b.get("status", "normal")
+        if interp in ("abnormal", "critical"):
+            obs_res["interpretation"] = [
                 {
-                    "fullUrl": f"urn:uuid:{lab_id}",
-                    "resource": diag_res,
-                    "request": {"method": "POST", "url": f"DiagnosticReport/{lab_id}"},
+                    "coding": [
+                        {
+                            "system": "http://terminology.hl7.org/CodeSystem/v3-ObservationInterpretation",
+                            "code": "A" if interp == "abnormal" else "LL",
+                            "display": interp.capitalize(),
+                        }
+                    ]
                 }
-            )
-
-    # ── Build FHIR R4 Bundle ──────────────────────────────────────────────────
-    bundle = {
-        "resourceType": "Bundle",
-        "id": str(_uuid.uuid4()),
-        "meta": {"lastUpdated": now_iso},
-        "type": "collection",
-        "timestamp": now_iso,
-        "entry": entries,
-    }
+            ]
+        entries.append(
+            {
+                "fullUrl": f"urn:uuid:{obs_id}",
+                "resource": obs_res,
+                "request": {"method": "POST", "url": "Observation"},
+            }
+        )
+        obs_refs.append({"reference": f"urn:uuid:{obs_id}"})
 
-    return Response(
-        content=json.dumps(bundle, indent=2),
-        media_type="application/fhir+json",
-        headers={"Content-Disposition": "attachment; filename=health_fhir.json"},
-    )
+    if obs_refs:
+        diag_res = {
+            "resourceType": "DiagnosticReport",
+            "id": lab_id,
+            "status": "final",
+            "code": {"text": lab.get("test_type", "Lab Test")},
+            "subject": {"reference": patient_ref},
+            "effectiveDateTime": f"{test_date}T00:00:00Z",
+            "result": obs_refs,
+        }
+        entries.append(
+            {
+                "fullUrl": f"urn:uuid:{lab_id}",
+                "resource": diag_res,
+                "request": {"method": "POST", "url": f"DiagnosticReport/{lab_id}"},
+            }
+        )
+    return entries
 
 
-@router.get("/health-data")
-async def export_health_data(
-    format: str = Query(
-        default="json", regex="^(json|csv)$"
-    ),  # pylint: disable=redefined-builtin
-    days: int = Query(default=90, ge=1, le=365),
+@router.get("/fhir")
+async def export_fhir(
+    gzip: bool = Query(default=False),
     current_user: dict = Depends(get_current_user),
 ):
     """
-    Export comprehensive health data as JSON or CSV.
+    Export health data as a FHIR R4 Bundle (application/fhir+json).
+    Includes Condition, MedicationStatement, Observation (vitals/labs),
+    and DiagnosticReport resources.
 
-    format=json  →  application/json, nested structure with all health records
-    format=csv   →  text/csv, flat table (one row per event/measurement)
-    days         →  look-back window (default 90, max 365)
+    The Bundle is streamed entry by entry; gzip=true downloads it compressed.
     """
     user_id = current_user["id"]
-    cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-    cutoff_date = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
-
-    # ── Gather all data ───────────────────────────────────────────────────────
-    profile_rows = await _supabase_get(
-        "profiles",
-        f"id=eq.{user_id}&select=date_of_birth,biological_sex,weight_kg,height_cm&limit=1",
-    )
-    profile = (profile_rows or [{}])[0]
-
-    meds = (
-        await _supabase_get(
-            "medications",
-            f"user_id=eq.{user_id}&is_active=eq.true&select=medication_name,dosage,frequency,start_date&order=start_date.desc",
-        )
-        or []
-    )
-    supplements = (
-        await _supabase_get(
-            "supplements",
-            f"user_id=eq.{user_id}&is_active=eq.true&select=supplement_name,dosage,frequency&order=created_at.desc",
-        )
-        or []
-    )
-    conditions = (
-        await _supabase_get(
-            "health_conditions",
-            f"user_id=eq.{user_id}&is_active=eq.true&select=condition_name,severity,created_at",
-        )
-        or []
-    )
-    lab_results = (
-        await _supabase_get(
-            "lab_results",
-            f"user_id=eq.{user_id}&test_date=gte.{cutoff_date}&select=test_type,test_date,lab_name,biomarkers&order=test_date.desc&limit=50",
-        )
-        or []
-    )
-    symptoms = (
-        await _supabase_get(
-            "symptom_journal",
-            f"user_id=eq.{user_id}&symptom_date=gte.{cutoff_date}&select=symptom_date,symptom_type,severity,mood,notes&order=symptom_date.desc&limit=100",
-        )
-        or []
-    )
-    adherence_rows = (
-        await _supabase_get(
-            "medication_adherence_log",
-            f"user_id=eq.{user_id}&scheduled_time=gte.{cutoff}&select=scheduled_time,was_taken,medication_id&order=scheduled_time.desc&limit=500",
-        )
-        or []
-    )
-    sleep_rows = (
-        await _supabase_get(
-            "oura_sleep",
-            f"user_id=eq.{user_id}&date=gte.{cutoff_date}&select=date,sleep_score,total_sleep_duration,deep_sleep_duration,rem_sleep_duration,sleep_efficiency&order=date.desc&limit=120",
-        )
-        or []
-    )
-    activity_rows = (
-        await _supabase_get(
-            "oura_activity",
-            f"user_id=eq.{user_id}&date=gte.{cutoff_date}&select=date,activity_score,steps,calories_active&order=date.desc&limit=120",
-        )
-        or []
-    )
-    readiness_rows = (
-        await _supabase_get(
-            "oura_readiness",
-            f"user_id=eq.{user_id}&date=gte.{cutoff_date}&select=date,readiness_score,hrv_balance,resting_heart_rate&order=date.desc&limit=120",
-        )
-        or []
-    )
-
-    # ── JSON export ───────────────────────────────────────────────────────────
-    if format == "json":
-        payload = {
-            "exported_at": datetime.now(timezone.utc).isoformat(),
-            "days": days,
-            "profile": profile,
-            "medications": meds,
-            "supplements": supplements,
-            "health_conditions": conditions,
-            "lab_results": lab_results,
-            "symptoms": symptoms,
-            "medication_adherence": adherence_rows,
-            "sleep": sleep_rows,
-            "activity": activity_rows,
-            "readiness": readiness_rows,
-        }
-        return Response(
-            content=json.dumps(payload, indent=2, default=str),
-            media_type="application/json",
-            headers={
-                "Content-Disposition": f"attachment; filename=health_data_{cutoff_date}.json"
-            },
+    now_iso = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    patient_ref = f"urn:uuid:{user_id}"
+    cutoff_1yr = (datetime.now(timezone.utc) - timedelta(days=365)).date().isoformat()
+    profile = await _export_profile(user_id)
+
+    async def entries() -> AsyncIterator[dict]:
+        yield _fhir_patient_entry(user_id, profile)
+        async with PagedExport(
+            _FHIR_TABLES, {"user_id": user_id, "cutoff_date": cutoff_1yr}
+        ) as export:
+            async for page in export.pages("conditions"):
+                for cond in page:
+                    yield _fhir_condition_entry(cond, patient_ref, now_iso)
+            async for page in export.pages("medications"):
+                for med in page:
+                    yield _fhir_medication_entry(med, patient_ref)
+            for entry in _fhir_body_entries(profile, patient_ref, now_iso):
+                yield entry
+            async for page in export.pages("lab_results"):
+                for lab in page:
+                    for entry in _fhir_lab_entries(lab, patient_ref, now_iso):
+                        yield entry
+
+    async def bundle() -> AsyncIterator[str]:
+        header = json.dumps(
+            {
+                "resourceType": "Bundle",
+                "id": str(_uuid.uuid4()),
+                "meta": {"lastUpdated": now_iso},
+                "type": "collection",
+                "timestamp": now_iso,
+            }
         )
-
-    # ── CSV export ────────────────────────────────────────────────────────────
-    buf = io.StringIO()
-    writer = csv.writer(buf)
-
-    def _section(name: str) -> None:
-        writer.writerow([])
-        writer.writerow([f"### {name} ###"])
-
-    # Profile
-    _section("Profile")
-    writer.writerow(["date_of_birth", "biological_sex", "weight_kg", "height_cm"])
-    writer.writerow(
+        yield header[:-1] + ', "entry": [\n'
+        sep = ""
+        async for entry in entries():
+            yield sep + json.dumps(entry, default=str)
+            sep = ",\n"
+        yield "\n]}\n"
+
+    return download_response(
+        bundle(), "application/fhir+json", "health_fhir.json", gzip=gzip
+    )
+
+
+_HEALTH_DATA_TABLES = (
+    ExportTable(
+        "medications",
+        "medications",
+        "medication_name,dosage,frequency,start_date",
+        "user_id=eq.{user_id}&is_active=eq.true",
+        "start_date",
+    ),
+    ExportTable(
+        "supplements",
+        "supplements",
+        "supplement_name,dosage,frequency",
+        "user_id=eq.{user_id}&is_active=eq.true",
+        "created_at",
+    ),
+    ExportTable(
+        "health_conditions",
+        "health_conditions",
+        "condition_name,severity,created_at",
+        "user_id=eq.{user_id}&is_active=eq.true",
+        "created_at",
+    ),
+    ExportTable(
+        "lab_results",
+        "lab_results",
+        "test_type,test_date,lab_name,biomarkers",
+        "user_id=eq.{user_id}&test_date=gte.{cutoff_date}",
+        "test_date",
+    ),
+    ExportTable(
+        "symptoms",
+        "symptom_journal",
+        "symptom_date,symptom_type,severity,mood,notes",
+        "user_id=eq.{user_id}&symptom_date=gte.{cutoff_date}",
+        "symptom_date",
+    ),
+    ExportTable(
+        "medication_adherence",
+        "medication_adherence_log",
+        "scheduled_time,was_taken,medication_id",
+        "user_id=eq.{user_id}&scheduled_time=gte.{cutoff}",
+        "scheduled_time",
+    ),
+    ExportTable(
+        "sleep",
+        "oura_sleep",
+        "date,sleep_score,total_sleep_duration,deep_sleep_duration,rem_sleep_duration,sleep_efficiency",
+        "user_id=eq.{user_id}&date=gte.{cutoff_date}",
+        "date",
+    ),
+    ExportTable(
+        "activity",
+        "oura_activity",
+        "date,activity_score,steps,calories_active",
+        "user_id=eq.{user_id}&date=gte.{cutoff_date}",
+        "date",
+    ),
+    ExportTable(
+        "readiness",
+        "oura_readiness",
+        "date,readiness_score,hrv_balance,resting_heart_rate",
+        "user_id=eq.{user_id}&date=gte.{cutoff_date}",
+        "date",
+    ),
+)
+
+
+class _CsvSection(NamedTuple):
+    title: str
+    header: List[str]
+    rows: Callable[[dict], List[list]]
+
+
+def _lab_csv_rows(lab: dict) -> List[list]:
+    # Biomarkers flattened: one row per measurement
+    return [
         [
-            profile.get("date_of_birth", ""),
-            profile.get("biological_sex", ""),
-            profile.get("weight_kg", ""),
-            profile.get("height_cm", ""),
+            lab.get("test_date", ""),
+            lab.get("test_type", ""),
+            lab.get("lab_name", ""),
+            b.get("biomarker_name", ""),
+            b.get("value", ""),
+            b.get("unit", ""),
+            b.get("status", ""),
         ]
-    )
+        for b in lab.get("biomarkers") or []
+    ]
+
 
-    # Medications
-    _section("Medications (active)")
-    writer.writerow(["medication_name", "dosage", "frequency", "start_date"])
-    for m in meds:
-        writer.writerow(
+_CSV_SECTIONS: Dict[str, _CsvSection] = {
+    "medications": _CsvSection(
+        "Medications (active)",
+        ["medication_name", "dosage", "frequency", "start_date"],
+        lambda m: [
             [
                 m.get("medication_name", ""),
                 m.get("dosage", ""),
                 m.get("frequency", ""),
                 m.get("start_date", ""),
             ]
-        )
-
-    # Supplements
-    _section("Supplements (active)")
-    writer.writerow(["supplement_name", "dosage", "frequency"])
-    for s in supplements:
-        writer.writerow(
+        ],
+    ),
+    "supplements": _CsvSection(
+        "Supplements (active)",
+        ["supplement_name", "dosage", "frequency"],
+        lambda s: [
             [s.get("supplement_name", ""), s.get("dosage", ""), s.get("frequency", "")]
-        )
-
-    # Health conditions
-    _section("Health Conditions")
-    writer.writerow(["condition_name", "severity", "created_at"])
-    for c in conditions:
-        writer.writerow(
+        ],
+    ),
+    "health_conditions": _CsvSection(
+        "Health Conditions",
+        ["condition_name", "severity", "created_at"],
+        lambda c: [
             [
                 c.get("condition_name", ""),
                 c.get("severity", ""),
-                c.get("created_at", "")[:10],
+                (c.get("created_at") or "")[:10],
             ]
-        )
-
-    # Lab results (biomarkers flattened)
-    _section("Lab Results")
-    writer.writerow(
+        ],
+    ),
+    "lab_results": _CsvSection(
+        "Lab Results",
         [
             "test_date",
             "test_type",
@@ -977,27 +653,13 @@ async def export_health_data(
             "value",
             "unit",
             "status",
-        ]
-    )
-    for lab in lab_results:
-        for b in lab.get("biomarkers") or []:
-            writer.writerow(
-                [
-                    lab.get("test_date", ""),
-                    lab.get("test_type", ""),
-                    lab.get("lab_name", ""),
-                    b.get("biomarker_name", ""),
-                    b.get("value", ""),
-                    b.get("unit", ""),
-                    b.get("status", ""),
-                ]
-            )
-
-    # Symptoms
-    _section("Symptom Journal")
-    writer.writerow(["symptom_date", "symptom_type", "severity", "mood", "notes"])
-    for sym in symptoms:
-        writer.writerow(
+        ],
+        _lab_csv_rows,
+    ),
+    "symptoms": _CsvSection(
+        "Symptom Journal",
+        ["symptom_date", "symptom_type", "severity", "mood", "notes"],
+        lambda sym: [
             [
                 sym.get("symptom_date", ""),
                 sym.get("symptom_type", ""),
@@ -1005,17 +667,17 @@ async def export_health_data(
                 sym.get("mood", ""),
                 (sym.get("notes") or "").replace("\n", " "),
             ]
-        )
-
-    # Medication adherence
-    _section("Medication Adherence")
-    writer.writerow(["scheduled_time", "was_taken"])
-    for row in adherence_rows:
-        writer.writerow([row.get("scheduled_time", "")[:16], row.get("was_taken", "")])
-
-    # Sleep
-    _section("Sleep (Oura)")
-    writer.writerow(
+        ],
+    ),
+    "medication_adherence": _CsvSection(
+        "Medication Adherence",
+        ["scheduled_time", "was_taken"],
+        lambda row: [
+            [(row.get("scheduled_time") or "")[:16], row.get("was_taken", "")]
+        ],
+    ),
+    "sleep": _CsvSection(
+        "Sleep (Oura)",
         [
             "date",
             "sleep_score",
@@ -1023,10 +685,8 @@ async def export_health_data(
             "deep_sleep_min",
             "rem_sleep_min",
             "efficiency_pct",
-        ]
-    )
-    for row in sleep_rows:
-        writer.writerow(
+        ],
+        lambda row: [
             [
                 row.get("date", ""),
                 row.get("sleep_score", ""),
@@ -1035,39 +695,160 @@ async def export_health_data(
                 round((row.get("rem_sleep_duration") or 0) / 60, 1),
                 row.get("sleep_efficiency", ""),
             ]
-        )
-
-    # Activity
-    _section("Activity (Oura)")
-    writer.writerow(["date", "activity_score", "steps", "calories_active"])
-    for row in activity_rows:
-        writer.writerow(
+        ],
+    ),
+    "activity": _CsvSection(
+        "Activity (Oura)",
+        ["date", "activity_score", "steps", "calories_active"],
+        lambda row: [
             [
                 row.get("date", ""),
                 row.get("activity_score", ""),
                 row.get("steps", ""),
                 row.get("calories_active", ""),
             ]
-        )
-
-    # Readiness
-    _section("Readiness (Oura)")
-    writer.writerow(["date", "readiness_score", "hrv_balance", "resting_heart_rate"])
-    for row in readiness_rows:
-        writer.writerow(
+        ],
+    ),
+    "readiness": _CsvSection(
+        "Readiness (Oura)",
+        ["date", "readiness_score", "hrv_balance", "resting_heart_rate"],
+        lambda row: [
             [
                 row.get("date", ""),
                 row.get("readiness_score", ""),
                 row.get("hrv_balance", ""),
                 row.get("resting_heart_rate", ""),
             ]
-        )
+        ],
+    ),
+}
 
-    csv_content = buf.getvalue()
-    return Response(
-        content=csv_content,
-        media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=health_data_{cutoff_date}.csv"
+
+def _csv_text(rows: List[list]) -> str:
+    buf = io.StringIO()
+    csv.writer(buf).writerows(rows)
+    return buf.getvalue()
+
+
+async def _health_data_csv(export: PagedExport, profile: dict) -> AsyncIterator[str]:
+    yield _csv_text(
+        [
+            [],
+            ["### Profile ###"],
+            ["date_of_birth", "biological_sex", "weight_kg", "height_cm"],
+            [
+                profile.get("date_of_birth", ""),
+                profile.get("biological_sex", ""),
+                profile.get("weight_kg", ""),
+                profile.get("height_cm", ""),
+            ],
+        ]
+    )
+    for section, layout in _CSV_SECTIONS.items():
+        yield _csv_text([[], [f"### {layout.title} ###"], layout.header])
+        async for page in export.pages(section):
+            yield _csv_text([out for row in page for out in layout.rows(row)])
+
+    # Row counts close the file; a download without them was cut short.
+    yield _csv_text(
+        [[], ["### Export Summary ###"], ["section", "rows"]]
+        + [[section, count] for section, count in export.counts.items()]
+    )
+
+
+async def _health_data_json(
+    export: PagedExport, profile: dict, days: int
+) -> AsyncIterator[str]:
+    head = json.dumps(
+        {
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "days": days,
+            "profile": profile,
         },
+        default=str,
+    )
+    yield head[:-1]
+    for section in _CSV_SECTIONS:
+        yield f', "{section}": ['
+        sep = "\n"
+        async for page in export.pages(section):
+            yield sep + ",\n".join(json.dumps(row, default=str) for row in page)
+            sep = ",\n"
+        yield "]"
+    yield f', "row_counts": {json.dumps(export.counts)}}}\n'
+
+
+async def _health_data_ndjson(
+    export: PagedExport, profile: dict, days: int
+) -> AsyncIterator[str]:
+    yield json.dumps(
+        {
+            "type": "export",
+            "exported_at": datetime.now(timezone.utc).isoformat(),
+            "days": days,
+        }
+    ) + "\n"
+    yield json.dumps({"type": "profile", "data": profile}, default=str) + "\n"
+    for section in _CSV_SECTIONS:
+        async for page in export.pages(section):
+            yield "".join(
+                json.dumps({"type": section, "data": row}, default=str) + "\n"
+                for row in page
+            )
+    yield json.dumps({"type": "export_complete", "row_counts": export.counts}) + "\n"
+
+
+@router.get("/health-data")
+async def export_health_data(
+    format: str = Query(
+        default="json", regex="^(json|csv|ndjson)$"
+    ),  # pylint: disable=redefined-builtin
+    days: int = Query(default=90, ge=1, le=365),
+    gzip: bool = Query(default=False),
+    current_user: dict = Depends(get_current_user),
+):
+    """
+    Export comprehensive health data as JSON, NDJSON or CSV.
+
+    format=json    →  application/json, nested structure with all health records
+    format=ndjson  →  application/x-ndjson, one {"type", "data"} record per line
+    format=csv     →  text/csv, flat table (one row per event/measurement)
+    days           →  look-back window (default 90, max 365)
+    gzip           →  download as a .gz file
+
+    Every row in the window is exported; the file ends with per-section row
+    counts, so a download missing them was interrupted.
+    """
+    user_id = current_user["id"]
+    now = datetime.now(timezone.utc)
+    cutoff = (now - timedelta(days=days)).isoformat()
+    cutoff_date = (now - timedelta(days=days)).date().isoformat()
+    profile = await _export_profile(user_id)
+    params = {
+        "user_id": user_id,
+        "cutoff": quote(cutoff, safe=""),
+        "cutoff_date": cutoff_date,
+    }
+
+    async def chunks() -> AsyncIterator[str]:
+        async with PagedExport(_HEALTH_DATA_TABLES, params) as export:
+            if format == "csv":
+                body = _health_data_csv(export, profile)
+            elif format == "ndjson":
+                body = _health_data_ndjson(export, profile, days)
+            else:
+                body = _health_data_json(export, profile, days)
+            async for chunk in body:
+                yield chunk
+
+    media_types = {
+        "json": "application/json",
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv",
+    }
+    return download_response(
+        chunks(),
+        media_types[format],
+        f"health_data_{cutoff_date}.{format}",
+        gzip=gzip,
     )
@@ -0,0 +1,211 @@
+"""
+Streaming Export Engine
+
+Exports used to read each table with one capped ``_supabase_get`` (e.g.
+``limit=120`` nights of sleep), one table after another, and build the whole
+file in memory.  Long-history users got silently truncated files, and a
+PostgREST error looked the same as an empty table.
+
+This module pages every table with keyset pagination (newest first, ``id``
+as the tie-breaker), runs the tables' pagers concurrently, and lets the
+writer consume them in section order through small bounded queues.  Memory
+is bounded by ``tables x EXPORT_PREFETCH_PAGES x EXPORT_PAGE_SIZE`` rows no
+matter how much history there is.  Reads go through
+``_supabase_get_strict``: a failed page aborts the stream instead of being
+written out as "no rows", so a truncated download never looks complete.
+
+Configuration:
+    EXPORT_PAGE_SIZE         rows per PostgREST page (default 1000)
+    EXPORT_PREFETCH_PAGES    pages buffered per table ahead of the writer (default 2)
+    EXPORT_PAGE_TIMEOUT_S    budget for one page (default 30)
+"""
+
+import asyncio
+import os
+import zlib
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote
+
+import aiohttp
+from fastapi.responses import StreamingResponse
+
+from common.utils.logging import get_logger
+from ..dependencies.usage_gate import _supabase_get_strict
+
+logger = get_logger(__name__)
+
+PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", "1000"))
+PREFETCH_PAGES = int(os.environ.get("EXPORT_PREFETCH_PAGES", "2"))
+PAGE_TIMEOUT = aiohttp.ClientTimeout(
+    total=float(os.environ.get("EXPORT_PAGE_TIMEOUT_S", "30"))
+)
+
+Row = Dict[str, Any]
+
+
+class ExportTable(NamedTuple):
+    """One exported table and how to page through it."""
+
+    section: str  # key of the section in the export
+    table: str
+    select: str  # columns written to the export
+    filters: str  # PostgREST filters; {placeholders} filled per export
+    order: str  # keyset column, exported newest first
+
+
+def _pg_value(value: Any) -> str:
+    # Double quotes protect PostgREST's reserved characters (",", ".", ":",
+    # parentheses); percent-encoding keeps "+" in timezone offsets intact.
+    return quote(f'"{value}"', safe="")
+
+
+def keyset_filter(order: str, value: Any, row_id: Any) -> str:
+    """Rows strictly after ``(value, row_id)`` in ``order.desc.nullslast,id.desc``."""
+    rid = _pg_value(row_id)
+    if value is None:
+        return f"and=({order}.is.null,id.lt.{rid})"
+    val = _pg_value(value)
+    return f"or=({order}.lt.{val},{order}.is.null,and({order}.eq.{val},id.lt.{rid}))"
+
+
+async def iter_pages(
+    table: str, query: str, order: str, page_size: Optional[int] = None
+) -> AsyncIterator[List[Row]]:
+    """
+    Yield every row matching *query*, newest first, one page at a time.
+
+    *query* must select ``id`` and the *order* column, which form the cursor.
+    """
+    page_size = page_size or PAGE_SIZE
+    cursor = ""
+    while True:
+        rows = await _supabase_get_strict(
+            table,
+            f"{query}&order={order}.desc.nullslast,id.desc&limit={page_size}{cursor}",
+            PAGE_TIMEOUT,
+        )
+        more = len(rows) == page_size
+        if more:
+            # Taken before yielding: the consumer may trim the rows.
+            last = rows[-1]
+            cursor = "&" + keyset_filter(order, last.get(order), last["id"])
+        if rows:
+            yield rows
+        if not more:
+            return
+
+
+_DONE = object()
+
+
+class PagedExport:
+    """
+    Concurrent pagers for a set of export tables.
+
+    Use as ``async with PagedExport(tables, params) as export`` and read each
+    section with ``export.pages(section)``; leaving the block cancels any
+    pager still running (e.g. when the client disconnects).
+    """
+
+    def __init__(
+        self,
+        tables: Sequence[ExportTable],
+        params: Mapping[str, str],
+        page_size: Optional[int] = None,
+    ):
+        self.tables = {t.section: t for t in tables}
+        self.params = params
+        self.page_size = page_size or PAGE_SIZE
+        self.counts: Dict[str, int] = {t.section: 0 for t in tables}
+        self._queues: Dict[
+            str, "asyncio.Queue[Union[List[Row], Exception, object]]"
+        ] = {}
+        self._tasks: List["asyncio.Task[None]"] = []
+
+    async def __aenter__(self) -> "PagedExport":
+        for section, spec in self.tables.items():
+            queue: "asyncio.Queue[Any]" = asyncio.Queue(maxsize=max(1, PREFETCH_PAGES))
+            self._queues[section] = queue
+            self._tasks.append(asyncio.ensure_future(self._pump(spec, queue)))
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    @staticmethod
+    def _columns(spec: ExportTable) -> Tuple[str, List[str]]:
+        """Columns to fetch, and the cursor columns to drop before writing."""
+        selected = spec.select.split(",")
+        if "*" in selected:
+            return spec.select, []
+        extra = [c for c in ("id", spec.order) if c not in selected]
+        return ",".join(extra + selected), extra
+
+    async def _pump(self, spec: ExportTable, queue: "asyncio.Queue[Any]") -> None:
+        select, extra = self._columns(spec)
+        query = spec.filters.format(**self.params) + f"&select={select}"
+        try:
+            async for rows in iter_pages(spec.table, query, spec.order, self.page_size):
+                for row in rows:
+                    for col in extra:
+                        row.pop(col, None)
+                await queue.put(rows)
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:  # pylint: disable=broad-except
+            await queue.put(exc)
+            return
+        await queue.put(_DONE)
+
+    async def pages(self, section: str) -> AsyncIterator[List[Row]]:
+        """Pages of *section* in export order; re-raises the pager's error."""
+        queue = self._queues[section]
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                logger.error(f"Export of {self.tables[section].table} failed: {item}")
+                raise item
+            self.counts[section] += len(item)
+            yield item
+
+
+async def gzip_chunks(chunks: AsyncIterator[str]) -> AsyncIterator[bytes]:
+    """Gzip a text stream incrementally."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def download_response(
+    chunks: AsyncIterator[str], media_type: str, filename: str, gzip: bool = False
+) -> StreamingResponse:
+    """Stream *chunks* as a file download, optionally as ``<filename>.gz``."""
+    if gzip:
+        return StreamingResponse(
+            gzip_chunks(chunks),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f"attachment; filename={filename}.gz"},
+        )
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
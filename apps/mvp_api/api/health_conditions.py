@@ -9,7 +9,6 @@ engine can prioritize condition-relevant metric pairs.
 # pylint: disable=line-too-long
 
 import json
-import os
 import uuid
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
@@ -21,7 +20,9 @@ from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
     UsageGate,
+    _supabase_delete,
     _supabase_get,
+    _supabase_patch,
     _supabase_upsert,
 )
 
@@ -324,65 +325,6 @@ class ConditionCatalogItem(BaseModel):
     tracked_variable_count: int
 
 
-# ---------------------------------------------------------------------------
-# Supabase helpers
-# ---------------------------------------------------------------------------
-
-
-async def _supabase_delete(table: str, params: str) -> bool:
-    """DELETE from Supabase PostgREST."""
-    import aiohttp
-
-    supabase_url = os.environ.get("SUPABASE_URL", "").rstrip("/")
-    supabase_key = os.environ.get("SUPABASE_SERVICE_KEY", "")
-    if not supabase_url or not supabase_key:
-        return False
-
-    url = f"{supabase_url}/rest/v1/{table}?{params}"
-    headers = {
-        "apikey": supabase_key,
-        "Authorization": f"Bearer {supabase_key}",
-        "Content-Type": "application/json",
-    }
-    timeout = aiohttp.ClientTimeout(total=5)
-    try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.delete(url, headers=headers) as resp:
-                return resp.status in (200, 204)
-    except (aiohttp.ClientError, TimeoutError) as exc:
-        logger.warning("Supabase DELETE %s failed: %s", table, exc)
-        return False
-
-
-async def _supabase_patch(table: str, params: str, body: dict) -> Optional[dict]:
-    """PATCH to Supabase PostgREST."""
-    import aiohttp
-
-    supabase_url = os.environ.get("SUPABASE_URL", "").rstrip("/")
-    supabase_key = os.environ.get("SUPABASE_SERVICE_KEY", "")
-    if not supabase_url or not supabase_key:
-        return None
-
-    url = f"{supabase_url}/rest/v1/{table}?{params}"
-    headers = {
-        "apikey": supabase_key,
-        "Authorization": f"Bearer {supabase_key}",
-        "Content-Type": "application/json",
-        "Prefer": "return=representation",
-    }
-    timeout = aiohttp.ClientTimeout(total=5)
-    try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.patch(url, headers=headers, json=body) as resp:
-                if resp.status in (200, 201):
-                    data = await resp.json()
-                    return data[0] if isinstance(data, list) and data else data
-                return None
-    except (aiohttp.ClientError, TimeoutError) as exc:
-        logger.warning("Supabase PATCH %s failed: %s", table, exc)
-        return None
-
-
 def _resolve_tracked_variables(condition_name: str) -> List[str]:
     """Look up tracked variables for a condition from the hardcoded map."""
     # Try exact key match
@@ -751,7 +751,9 @@ async def normalize_and_persist_ingest(
     polling endpoint (Session 3 will unify the two paths).
     """
     from common.metrics.normalizer import HealthNormalizer  # late import avoids cycles
-    from common.metrics.persistence import persist_normalized_metrics
+    from common.metrics.daily_store import get_daily_store_cache
+    from common.metrics.persistence import persist_normalized_batch
+    from .correlations import forget_correlation_state
 
     try:
         by_date = _build_raw_day(source, data_points)
@@ -759,7 +761,7 @@ async def normalize_and_persist_ingest(
             return
 
         normalizer = HealthNormalizer()
-        total_rows = 0
+        days = []
 
         for date_str, raw_day in by_date.items():
             if not raw_day:
@@ -775,15 +777,18 @@ async def normalize_and_persist_ingest(
                 user_baseline={},
             )
             if metrics:
-                n = await persist_normalized_metrics(user_id, date_str, metrics)
-                total_rows += n
+                days.append((user_id, date_str, metrics))
 
+        result = await persist_normalized_batch(days)
+        get_daily_store_cache().invalidate(user_id)
+        forget_correlation_state(user_id)
         logger.info(
-            "normalize_and_persist: user=%s source=%s dates=%d rows=%d",
+            "normalize_and_persist: user=%s source=%s dates=%d rows=%d failed=%d",
             user_id,
             source,
             len(by_date),
-            total_rows,
+            result.accepted,
+            result.failed,
         )
     except Exception as exc:  # pylint: disable=broad-except
         logger.error(
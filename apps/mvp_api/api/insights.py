@@ -819,6 +819,42 @@ async def get_insights(
 # ---------------------------------------------------------------------------
 
 
+async def _on_demand_research(context: dict) -> Optional[str]:
+    """PubMed summary for the user's meds, conditions and symptoms; caches the articles."""
+    from .literature_ingest import get_literature_ingestor
+    from .medical_literature import _pubmed_fetch_articles, _pubmed_search
+
+    query_parts = []
+    if context.get("medications"):
+        query_parts.append(" ".join(context["medications"][:2]))  # type: ignore[index]
+    if context.get("health_conditions"):
+        query_parts.append(context["health_conditions"][0].split("(")[0].strip())  # type: ignore[index]
+    if context.get("symptom_summary"):
+        _ss = str(context["symptom_summary"])
+        query_parts.append(_ss.split(";")[0].strip()[:50])
+    if not query_parts:
+        return None
+    on_demand_query = " ".join(query_parts)[:100]
+    pmids = await _pubmed_search(on_demand_query, max_results=2)
+    if not pmids:
+        return None
+    articles = (await _pubmed_fetch_articles(pmids))[:2]
+    await get_literature_ingestor().cache_articles(articles)
+    on_demand_parts = [
+        "[%s] %s"
+        % (
+            (art.get("title") or "")[:100],
+            (art.get("abstract") or "")[:300],
+        )
+        for art in articles
+    ]
+    if not on_demand_parts:
+        return None
+    return "On-demand research (PubMed) for '%s': " % on_demand_query + " | ".join(
+        on_demand_parts
+    )
+
+
 async def _gather_correlated_context(current_user: dict) -> dict:
     """Gather timeline, correlations, medications, supplements, symptoms, profile for unified insights."""
     user_id = str(current_user.get("id", ""))
@@ -1152,40 +1188,9 @@ async def _gather_correlated_context(current_user: dict) -> dict:
 
     # On-demand research: narrow PubMed query from meds + conditions + symptoms
     try:
-        from .medical_literature import (
-            _pubmed_search,
-            _pubmed_fetch_articles,
-            _cache_article,
-        )
-
-        query_parts = []
-        if context.get("medications"):
-            query_parts.append(" ".join(context["medications"][:2]))  # type: ignore[index]
-        if context.get("health_conditions"):
-            query_parts.append(context["health_conditions"][0].split("(")[0].strip())  # type: ignore[index]
-        if context.get("symptom_summary"):
-            _ss = str(context["symptom_summary"])
-            query_parts.append(_ss.split(";")[0].strip()[:50])
-        if query_parts:
-            on_demand_query = " ".join(query_parts)[:100]
-            pmids = await _pubmed_search(on_demand_query, max_results=2)
-            if pmids:
-                articles = await _pubmed_fetch_articles(pmids)
-                for art in articles[:2]:
-                    await _cache_article(art)
-                on_demand_parts = [
-                    "[%s] %s"
-                    % (
-                        (art.get("title") or "")[:100],
-                        (art.get("abstract") or "")[:300],
-                    )
-                    for art in articles[:2]
-                ]
-                if on_demand_parts:
-                    context["on_demand_research_summary"] = (
-                        "On-demand research (PubMed) for '%s': " % on_demand_query
-                        + " | ".join(on_demand_parts)
-                    )
+        on_demand = await _on_demand_research(context)
+        if on_demand:
+            context["on_demand_research_summary"] = on_demand
     except Exception as e:
         logger.warning("On-demand research for correlated insights: %s", e)
 
@@ -496,13 +496,15 @@ Rules:
 
 async def _call_claude(prompt: str, max_tokens: int = 500) -> str:
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway, json_reply
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "{}"
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "insights_intelligence",
+            memoize=True,
+            memo_if=json_reply,
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
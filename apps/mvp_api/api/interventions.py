@@ -18,16 +18,14 @@ adapting treatment.
 
 import json
 import os
-import ssl
 import uuid
 from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-import certifi
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
@@ -48,10 +46,6 @@ ANTHROPIC_API_KEY = os.environ.get("ANTHROPIC_API_KEY", "")
 ANTHROPIC_MODEL = os.environ.get("INTERVENTION_AI_MODEL", "claude-sonnet-4-6")
 
 
-def _ssl_ctx() -> ssl.SSLContext:
-    return ssl.create_default_context(cafile=certifi.where())
-
-
 # ---------------------------------------------------------------------------
 # Pydantic models
 # ---------------------------------------------------------------------------
@@ -357,27 +351,15 @@ Observed metric changes:
 
 Write a 2–3 sentence plain-English summary of what this personal experiment revealed. Be specific about which metrics changed and by how much. End with one practical insight the user can apply going forward. Keep it encouraging and factual. Do not diagnose or prescribe."""
 
-    url = "https://api.anthropic.com/v1/messages"
-    headers = {
-        "x-api-key": ANTHROPIC_API_KEY,
-        "anthropic-version": "2023-06-01",
-        "content-type": "application/json",
-    }
-    payload = {
-        "model": ANTHROPIC_MODEL,
-        "max_tokens": 300,
-        "messages": [{"role": "user", "content": prompt}],
-    }
-    timeout = aiohttp.ClientTimeout(total=15)
-    connector = aiohttp.TCPConnector(ssl=_ssl_ctx())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.post(url, headers=headers, json=payload) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    return result["content"][0]["text"].strip()
+        result = await get_llm_gateway().create(
+            "interventions",
+            model=ANTHROPIC_MODEL,
+            max_tokens=300,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=15,
+        )
+        return result.content[0].text.strip()
     except Exception as exc:
         logger.warning("AI outcome summary failed: %s", exc)
 
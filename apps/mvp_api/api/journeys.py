@@ -11,15 +11,13 @@ cycle-based timing, and lab checkpoints.
 
 import json
 import os
-import ssl
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
-import aiohttp
-import certifi
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
@@ -227,28 +225,14 @@ Description: {phase.get('description', '')}
 Write 1-2 sentences summarizing this phase completion and what to expect next. Be encouraging."""
 
     try:
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-        timeout = aiohttp.ClientTimeout(total=10)
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": ANTHROPIC_MODEL,
-                    "max_tokens": 200,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-            ) as resp:
-                if resp.status == 200:
-                    result = await resp.json()
-                    return result["content"][0]["text"].strip()
+        result = await get_llm_gateway().create(
+            "journeys",
+            model=ANTHROPIC_MODEL,
+            max_tokens=200,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=10,
+        )
+        return result.content[0].text.strip()
     except Exception as exc:
         logger.warning("Journey phase summary failed: %s", exc)
 
@@ -1375,7 +1375,7 @@ Generate a JSON array of the top 3 doctor discussion items. Each item:
 
 Return ONLY valid JSON array, no markdown."""
 
-        raw = await _call_claude(prompt, max_tokens=500)
+        raw = await _call_claude(prompt, max_tokens=500, expect_json=True)
         try:
             if "```" in raw:
                 raw = raw[raw.find("[") : raw.rfind("]") + 1]
@@ -1593,17 +1593,21 @@ async def generate_doctor_note(
 # ---------------------------------------------------------------------------
 
 
-async def _call_claude(prompt: str, max_tokens: int = 300) -> str:
+async def _call_claude(
+    prompt: str, max_tokens: int = 300, expect_json: bool = False
+) -> str:
     """Call Claude for lab analysis."""
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway, json_reply
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Upload your lab results to receive personalized analysis."
 
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "lab_intelligence",
+            memoize=True,
+            memo_if=json_reply if expect_json else None,
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
@@ -16,9 +16,11 @@ from datetime import date, datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
 import aiohttp
+import anthropic
 from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from pydantic import BaseModel, field_validator
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
@@ -1226,41 +1228,21 @@ async def scan_lab_result_image(
         ) from exc
 
     try:
-        import certifi
-        import ssl
-
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-
-        async with aiohttp.ClientSession(connector=connector) as session:
-            payload: Dict[str, Any] = {
-                "model": ANTHROPIC_MODEL,
-                "max_tokens": 8192,
-                "messages": [{"role": "user", "content": content_blocks}],
-            }
-            # PDF documents need the beta header
-            headers: Dict[str, str] = {
-                "x-api-key": ANTHROPIC_API_KEY,
-                "anthropic-version": "2023-06-01",
-                "content-type": "application/json",
-            }
-            if any(b.get("type") == "document" for b in content_blocks):
-                headers["anthropic-beta"] = "pdfs-2024-09-25"
-
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers=headers,
-                json=payload,
-            ) as resp:
-                if resp.status != 200:
-                    body = await resp.text()
-                    logger.error("Anthropic scan error %s: %s", resp.status, body)
-                    raise HTTPException(status_code=502, detail="AI extraction failed")
+        params: Dict[str, Any] = {
+            "model": ANTHROPIC_MODEL,
+            "max_tokens": 8192,
+            "messages": [{"role": "user", "content": content_blocks}],
+        }
+        # PDF documents need the beta header
+        if any(b.get("type") == "document" for b in content_blocks):
+            params["extra_headers"] = {"anthropic-beta": "pdfs-2024-09-25"}
 
-                data = await resp.json()
-                raw_text = data["content"][0]["text"]
-                return _parse_scan_response(raw_text)
+        result = await get_llm_gateway().create("lab_scan", **params)
+        return _parse_scan_response(result.content[0].text)
 
+    except anthropic.APIStatusError as exc:
+        logger.error("Anthropic scan error %s: %s", exc.status_code, exc.message)
+        raise HTTPException(status_code=502, detail="AI extraction failed")
     except HTTPException:
         raise
     except json.JSONDecodeError as exc:
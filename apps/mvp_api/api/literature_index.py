@@ -0,0 +1,164 @@
+"""
+Literature Vector Index
+
+``semantic_search`` used to download up to 500 embeddings as JSON from
+``article_embeddings`` on every query and score them in pure Python, so
+every article past the first 500 was invisible.  ``LiteratureIndex``
+keeps the whole corpus in a ``common.ai.vector_index.VectorIndex``:
+
+  * The snapshot is rebuilt from ``article_embeddings`` (keyset-paged, see
+    ``export_stream.iter_pages``) once it is older than
+    ``LITERATURE_INDEX_REFRESH_S``, in the background while queries keep
+    using the current one.  It is written under ``LITERATURE_INDEX_DIR``
+    and memory-mapped, so a worker that finds a fresh snapshot from a
+    sibling maps it instead of downloading the corpus again.
+  * Newly embedded articles are added to the in-memory delta (see
+    ``literature_ingest``), so they are searchable immediately in that
+    worker.
+
+Configuration:
+    LITERATURE_INDEX_DIR        snapshot directory (default <tmp>/literature_index)
+    LITERATURE_INDEX_REFRESH_S  snapshot lifetime before a rebuild (default 3600)
+    LITERATURE_INDEX_IVF_LISTS  IVF partitions, 0 for exact search (default 0)
+    LITERATURE_INDEX_NPROBE     partitions scanned per query (default 8)
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from common.ai.vector_index import VectorIndex
+from common.utils.logging import get_logger
+from .export_stream import iter_pages
+
+logger = get_logger(__name__)
+
+INDEX_DIR = os.environ.get(
+    "LITERATURE_INDEX_DIR", os.path.join(tempfile.gettempdir(), "literature_index")
+)
+REFRESH_S = float(os.environ.get("LITERATURE_INDEX_REFRESH_S", "3600"))
+IVF_LISTS = int(os.environ.get("LITERATURE_INDEX_IVF_LISTS", "0"))
+NPROBE = int(os.environ.get("LITERATURE_INDEX_NPROBE", "8"))
+
+_EMBEDDING_TYPE = "abstract"
+
+
+def _parse_embedding(value: Any) -> Optional[List[float]]:
+    """JSONB arrays arrive as lists; pgvector columns as ``"[...]"`` strings."""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, list) and value else None
+
+
+class LiteratureIndex:
+    """Process-wide vector index over ``article_embeddings``."""
+
+    def __init__(
+        self,
+        path: Optional[str] = INDEX_DIR,
+        refresh_s: float = REFRESH_S,
+        ivf_lists: int = IVF_LISTS,
+        nprobe: int = NPROBE,
+    ):
+        self.refresh_s = refresh_s
+        self.index = VectorIndex(path=path, ivf_lists=ivf_lists, nprobe=nprobe)
+        self._rebuild: Optional["asyncio.Task[None]"] = None
+        self._rebuilds = 0
+        self._last_error: Optional[str] = None
+
+    def _stale(self) -> bool:
+        built_at = self.index.built_at
+        return not built_at or time.time() - built_at >= self.refresh_s
+
+    async def ready(self) -> VectorIndex:
+        """
+        The index, current enough to query.
+
+        Maps a newer sibling snapshot if there is one.  With no snapshot at
+        all the first caller waits for the build; a stale one is rebuilt in
+        the background.
+        """
+        if self.index.path:
+            try:
+                self.index.load()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning(f"Literature index snapshot unreadable: {exc}")
+        if self._stale():
+            if self._rebuild is None or self._rebuild.done():
+                self._rebuild = asyncio.ensure_future(self.rebuild())
+            if not self.index.built_at:
+                await asyncio.shield(self._rebuild)
+        return self.index
+
+    async def rebuild(self) -> None:
+        """Page every abstract embedding into a new snapshot."""
+        since = self.index.mark()
+        ids: List[str] = []
+        # One float32 block per page; Python float lists live for a page only.
+        pages: List[np.ndarray] = []
+        dim = 0
+        started = time.perf_counter()
+        try:
+            async for rows in iter_pages(
+                "article_embeddings",
+                f"embedding_type=eq.{_EMBEDDING_TYPE}&select=id,created_at,article_id,embedding",
+                "created_at",
+            ):
+                page: List[List[float]] = []
+                for row in rows:
+                    emb = _parse_embedding(row.get("embedding"))
+                    if emb is None or (dim and len(emb) != dim):
+                        continue
+                    dim = len(emb)
+                    ids.append(str(row["article_id"]))
+                    page.append(emb)
+                if page:
+                    pages.append(np.asarray(page, dtype=np.float32))
+            vectors = np.concatenate(pages) if pages else np.empty((0, dim), np.float32)
+            del pages
+            loop = asyncio.get_running_loop()
+            snapshot = await loop.run_in_executor(
+                None, self.index.prepare, ids, vectors
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            self._last_error = str(exc)
+            logger.error(f"Literature index rebuild failed: {exc}")
+            return
+        self.index.install(snapshot, since)
+        self._rebuilds += 1
+        self._last_error = None
+        logger.info(
+            f"Literature index rebuilt: {len(ids)} vectors "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+
+    def add(self, article_id: str, embedding: List[float]) -> None:
+        """Make a freshly stored embedding searchable in this worker."""
+        self.index.upsert(str(article_id), embedding)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.index.stats(),
+            "rebuilds": self._rebuilds,
+            "rebuilding": self._rebuild is not None and not self._rebuild.done(),
+            "last_error": self._last_error,
+        }
+
+
+_literature_index: Optional[LiteratureIndex] = None  # pylint: disable=invalid-name
+
+
+def get_literature_index() -> LiteratureIndex:
+    """Process-wide literature index."""
+    global _literature_index  # pylint: disable=global-statement,invalid-name
+    if _literature_index is None:
+        _literature_index = LiteratureIndex()
+    return _literature_index
@@ -0,0 +1,253 @@
+"""
+Literature Ingestion
+
+``search_literature`` used to cache each PubMed article with its own lookup
+and insert, then embed it with one OpenAI request on a fresh
+``ClientSession`` — three or more serial round trips per article before
+the response went out.  ``LiteratureIngestor`` batches both stages:
+
+  * ``cache_articles`` — one ``pubmed_id=in.(...)`` lookup and one bulk
+    upsert of the articles not yet stored.  Concurrent searches that return
+    overlapping PMIDs wait on the in-flight write instead of repeating it.
+  * ``embed_articles`` — run after the response (FastAPI background task):
+    one lookup for abstracts already embedded, batched OpenAI embedding
+    requests for the rest, one bulk insert into ``article_embeddings``, and
+    the new vectors are added to the literature index.  Articles already
+    being embedded by another search are skipped.
+
+Configuration:
+    LITERATURE_EMBED_BATCH   inputs per OpenAI embeddings request (default 64)
+"""
+
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import aiohttp
+
+from common.utils.logging import get_logger
+from ..dependencies.usage_gate import (
+    _supabase_get,
+    _supabase_upsert,
+    _supabase_upsert_many,
+)
+from .literature_index import get_literature_index
+
+logger = get_logger(__name__)
+
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBED_BATCH = int(os.environ.get("LITERATURE_EMBED_BATCH", "64"))
+
+_EMBED_TIMEOUT = aiohttp.ClientTimeout(total=60)
+_MAX_EMBED_CHARS = 8000
+
+
+async def generate_embeddings(texts: Sequence[str]) -> List[Optional[List[float]]]:
+    """Embed *texts* with batched OpenAI requests; None where it failed."""
+    out: List[Optional[List[float]]] = [None] * len(texts)
+    todo = [
+        (i, t.strip()[:_MAX_EMBED_CHARS])
+        for i, t in enumerate(texts)
+        if t and t.strip()
+    ]
+    if not OPENAI_API_KEY or not todo:
+        return out
+    async with aiohttp.ClientSession() as session:
+        for start in range(0, len(todo), max(1, EMBED_BATCH)):
+            batch = todo[start : start + max(1, EMBED_BATCH)]
+            try:
+                async with session.post(
+                    "https://api.openai.com/v1/embeddings",
+                    headers={
+                        "Authorization": f"Bearer {OPENAI_API_KEY}",
+                        "Content-Type": "application/json",
+                    },
+                    json={"model": EMBEDDING_MODEL, "input": [t for _, t in batch]},
+                    timeout=_EMBED_TIMEOUT,
+                ) as resp:
+                    if resp.status != 200:
+                        logger.warning(f"Embedding batch failed: status={resp.status}")
+                        continue
+                    data = await resp.json()
+            except Exception as e:
+                logger.warning("Embedding generation failed: %s", e)
+                continue
+            for item in data.get("data", []):
+                emb = item.get("embedding")
+                pos = item.get("index")
+                if isinstance(emb, list) and isinstance(pos, int) and pos < len(batch):
+                    out[batch[pos][0]] = emb
+    return out
+
+
+def article_text(article: Dict[str, Any]) -> str:
+    """Title and abstract, the text embedded for semantic search."""
+    parts = [article.get("title") or "", article.get("abstract") or ""]
+    return " ".join(p for p in parts if p).strip()
+
+
+class LiteratureIngestor:
+    """Batched, de-duplicated caching and embedding of fetched articles."""
+
+    def __init__(self):
+        self._articles: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        self._embedding: Set[str] = set()
+        self._lookups = 0
+        self._inserted = 0
+        self._coalesced = 0
+        self._embedded = 0
+        self._embed_skipped = 0
+        self._failures = 0
+
+    # ------------------------------------------------------------------
+    # Articles
+    # ------------------------------------------------------------------
+
+    async def _store(self, articles: List[Dict[str, Any]]) -> Dict[str, str]:
+        """pubmed_id -> research_articles.id for *articles*, inserting new ones."""
+        pmids = [a["pubmed_id"] for a in articles]
+        self._lookups += 1
+        rows = await _supabase_get(
+            "research_articles",
+            f"pubmed_id=in.({','.join(pmids)})&select=id,pubmed_id",
+        )
+        ids = {str(r["pubmed_id"]): str(r["id"]) for r in rows or []}
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        new = [
+            {**a, "source": "pubmed", "relevance_score": 0.8, "fetched_at": fetched_at}
+            for a in articles
+            if a["pubmed_id"] not in ids
+        ]
+        if new:
+            # on_conflict covers a sibling worker inserting the same PMID meanwhile.
+            stored = await _supabase_upsert_many(
+                "research_articles", new, on_conflict="pubmed_id"
+            )
+            self._inserted += len(stored)
+            ids.update({str(r["pubmed_id"]): str(r["id"]) for r in stored})
+        return ids
+
+    async def cache_articles(
+        self, articles: List[Dict[str, Any]]
+    ) -> List[Optional[str]]:
+        """Store *articles*; returns their ``research_articles`` ids (None if not stored)."""
+        owned: Dict[str, Dict[str, Any]] = {}
+        futures: Dict[str, "asyncio.Future[Optional[str]]"] = {}
+        loop = asyncio.get_running_loop()
+        for article in articles:
+            pmid = article.get("pubmed_id")
+            if not pmid or pmid in futures:
+                continue
+            future = self._articles.get(pmid)
+            if future is None:
+                future = loop.create_future()
+                self._articles[pmid] = future
+                owned[pmid] = article
+            else:
+                self._coalesced += 1
+            futures[pmid] = future
+
+        if owned:
+            ids: Dict[str, str] = {}
+            try:
+                ids = await self._store(list(owned.values()))
+            except Exception as exc:  # pylint: disable=broad-except
+                self._failures += 1
+                logger.error(f"Caching {len(owned)} articles failed: {exc}")
+            finally:
+                # Also on cancellation: waiters for these PMIDs must not hang.
+                for pmid in owned:
+                    self._articles.pop(pmid, None)
+                    if not futures[pmid].done():
+                        futures[pmid].set_result(ids.get(pmid))
+
+        result: List[Optional[str]] = []
+        for article in articles:
+            pmid = article.get("pubmed_id")
+            if pmid:
+                result.append(await asyncio.shield(futures[pmid]))
+            else:
+                stored = await _supabase_upsert(
+                    "research_articles",
+                    {
+                        **article,
+                        "source": "pubmed",
+                        "relevance_score": 0.8,
+                        "fetched_at": datetime.now(timezone.utc).isoformat(),
+                    },
+                )
+                result.append(
+                    str(stored["id"]) if stored and stored.get("id") else None
+                )
+        return result
+
+    # ------------------------------------------------------------------
+    # Embeddings
+    # ------------------------------------------------------------------
+
+    async def embed_articles(self, items: List[Tuple[str, str]]) -> None:
+        """Embed ``(article_id, text)`` pairs whose abstract is not embedded yet."""
+        items = [
+            (aid, text) for aid, text in items if text and aid not in self._embedding
+        ]
+        if not items or not OPENAI_API_KEY:
+            return
+        claimed = {aid for aid, _ in items}
+        self._embedding |= claimed
+        try:
+            rows = await _supabase_get(
+                "article_embeddings",
+                f"article_id=in.({','.join(claimed)})&embedding_type=eq.abstract&select=article_id",
+            )
+            done = {str(r["article_id"]) for r in rows or []}
+            self._embed_skipped += len(done)
+            items = [(aid, text) for aid, text in items if aid not in done]
+            if not items:
+                return
+            vectors = await generate_embeddings([text for _, text in items])
+            payload = [
+                {
+                    "article_id": aid,
+                    "embedding_type": "abstract",
+                    "section_name": None,
+                    "text_content": text[:10000],
+                    "embedding": emb,
+                }
+                for (aid, text), emb in zip(items, vectors)
+                if emb
+            ]
+            stored = await _supabase_upsert_many("article_embeddings", payload)
+            index = get_literature_index()
+            for row in stored:
+                index.add(str(row["article_id"]), row.get("embedding") or [])
+            self._embedded += len(stored)
+        except Exception as exc:  # pylint: disable=broad-except
+            self._failures += 1
+            logger.error(f"Embedding {len(items)} articles failed: {exc}")
+        finally:
+            self._embedding -= claimed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "articles_in_flight": len(self._articles),
+            "embeddings_in_flight": len(self._embedding),
+            "lookups": self._lookups,
+            "inserted": self._inserted,
+            "coalesced": self._coalesced,
+            "embedded": self._embedded,
+            "embed_skipped": self._embed_skipped,
+            "failures": self._failures,
+        }
+
+
+_ingestor: Optional[LiteratureIngestor] = None  # pylint: disable=invalid-name
+
+
+def get_literature_ingestor() -> LiteratureIngestor:
+    """Process-wide literature ingestor."""
+    global _ingestor  # pylint: disable=global-statement,invalid-name
+    if _ingestor is None:
+        _ingestor = LiteratureIngestor()
+    return _ingestor
@@ -769,7 +769,7 @@ JSON structure:
 Be specific to their data. Do NOT give generic wellness advice. Every recommendation must be tied to an abnormal lab, condition, or medical record finding."""
 
     try:
-        raw = await _call_claude(prompt, max_tokens=4000)
+        raw = await _call_claude(prompt, max_tokens=4000, expect_json=True)
         # Strip markdown fences if present
         import re
 
@@ -836,17 +836,21 @@ Be specific to their data. Do NOT give generic wellness advice. Every recommenda
 # ---------------------------------------------------------------------------
 
 
-async def _call_claude(prompt: str, max_tokens: int = 200) -> str:
+async def _call_claude(
+    prompt: str, max_tokens: int = 200, expect_json: bool = False
+) -> str:
     """Call Claude for treatment analysis."""
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway, json_reply
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Track your medications to receive personalized treatment insights."
 
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "med_intelligence",
+            memoize=True,
+            memo_if=json_reply if expect_json else None,
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
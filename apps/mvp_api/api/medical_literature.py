@@ -7,7 +7,7 @@ it cites specific studies [Author et al. Journal Year] and shows
 evidence hierarchy: Meta-analysis > RCT > Observational > Other.
 
 Indexed: PubMed. Cochrane Database and clinical guidelines are planned
-(no ChromaDB/Pinecone; semantic search uses cached article embeddings when available).
+(no ChromaDB/Pinecone; semantic search uses the in-process index in literature_index.py).
 
 Phase 2 of Health Intelligence Features
 """
@@ -18,7 +18,15 @@ from typing import Dict, List, Literal, Optional
 from xml.etree import ElementTree as ET
 
 import aiohttp
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    File,
+    HTTPException,
+    Query,
+    UploadFile,
+)
 from pydantic import BaseModel, Field
 
 from common.middleware.auth import get_current_user
@@ -26,10 +34,16 @@ from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
     UsageGate,
     _supabase_get,
-    _supabase_patch,
     _supabase_upsert,
     get_user_tier,
 )
+from .literature_index import get_literature_index
+from .literature_ingest import (
+    article_text,
+    generate_embeddings,
+    get_literature_ingestor,
+)
+from .pubmed_cache import get_pubmed_cache
 
 logger = get_logger(__name__)
 router = APIRouter()
@@ -179,9 +193,6 @@ async def _pubmed_search(
         "sort": "relevance",
     }
 
-    if NCBI_API_KEY:
-        params["api_key"] = NCBI_API_KEY
-
     # Add date filter if provided
     if date_from or date_to:
         date_range = ""
@@ -198,28 +209,46 @@ async def _pubmed_search(
         params["mindate"] = date_range.split(":")[0]
         params["maxdate"] = date_range.split(":")[1]
 
+    return await get_pubmed_cache().search(params, lambda: _esearch(params))
+
+
+async def _esearch(params: Dict) -> Optional[List[str]]:
+    """Call NCBI esearch; None on failure or when the rate limit sheds the call."""
+    if not await get_pubmed_cache().limiter.acquire():
+        logger.warning(f"PubMed search shed by NCBI rate limit: {params.get('term')}")
+        return None
+    if NCBI_API_KEY:
+        params = {**params, "api_key": NCBI_API_KEY}
     timeout = aiohttp.ClientTimeout(total=10)
     try:
         async with aiohttp.ClientSession(timeout=timeout) as session:
             async with session.get(PUBMED_SEARCH_URL, params=params) as resp:
                 if resp.status != 200:
                     logger.error(f"PubMed search failed: {resp.status}")
-                    return []
+                    return None
                 data = await resp.json()
                 pmids = data.get("esearchresult", {}).get("idlist", [])
                 logger.info(
-                    f"PubMed search returned {len(pmids)} results for query: {query}"
+                    f"PubMed search returned {len(pmids)} results for query: {params.get('term')}"
                 )
                 return pmids
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.error(f"PubMed search error: {exc}")
-        return []
+        return None
 
 
 async def _pubmed_fetch_articles(pmids: List[str]) -> List[Dict]:
-    """Fetch article details from PubMed."""
+    """Fetch article details from PubMed (cached per PMID)."""
     if not pmids:
         return []
+    return await get_pubmed_cache().articles(pmids, _efetch)
+
+
+async def _efetch(pmids: List[str]) -> Optional[List[Dict]]:
+    """Call NCBI efetch for *pmids*; None on failure or when shed."""
+    if not await get_pubmed_cache().limiter.acquire():
+        logger.warning(f"PubMed fetch of {len(pmids)} articles shed by NCBI rate limit")
+        return None
 
     params = {
         "db": "pubmed",
@@ -237,13 +266,13 @@ async def _pubmed_fetch_articles(pmids: List[str]) -> List[Dict]:
             async with session.get(PUBMED_FETCH_URL, params=params) as resp:
                 if resp.status != 200:
                     logger.error(f"PubMed fetch failed: {resp.status}")
-                    return []
+                    return None
 
                 xml_text = await resp.text()
                 return _parse_pubmed_xml(xml_text)
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.error(f"PubMed fetch error: {exc}")
-        return []
+        return None
 
 
 def _evidence_level_from_publication_types(types: List[str]) -> str:
@@ -385,120 +414,14 @@ def _parse_pubmed_xml(xml_text: str) -> List[Dict]:
         return []
 
 
-async def _cache_article(article_data: Dict) -> Optional[str]:
-    """Cache article in database and return article ID."""
-    # Check if article already exists
-    if article_data.get("pubmed_id"):
-        existing = await _supabase_get(
-            "research_articles",
-            f"pubmed_id=eq.{article_data['pubmed_id']}&select=id&limit=1",
-        )
-        if existing:
-            return existing[0]["id"]
-
-    # Insert new article
-    payload = {
-        **article_data,
-        "source": "pubmed",
-        "relevance_score": 0.8,  # Default relevance
-        "fetched_at": datetime.now(timezone.utc).isoformat(),
-    }
-
-    result = await _supabase_upsert("research_articles", payload)
-    if result:
-        return result.get("id")
-    return None
-
-
 # ============================================================================
 # EMBEDDINGS & SEMANTIC SEARCH
 # ============================================================================
 
-EMBEDDING_MODEL = "text-embedding-3-small"
-
-
-def _cosine_similarity(a: List[float], b: List[float]) -> float:
-    """Cosine similarity between two vectors."""
-    if not a or not b or len(a) != len(b):
-        return 0.0
-    dot = sum(x * y for x, y in zip(a, b))
-    norm_a = sum(x * x for x in a) ** 0.5
-    norm_b = sum(x * x for x in b) ** 0.5
-    if norm_a == 0 or norm_b == 0:
-        return 0.0
-    return dot / (norm_a * norm_b)
-
 
 async def _generate_embedding(text: str) -> Optional[List[float]]:
     """Generate embedding for text via OpenAI API."""
-    if not OPENAI_API_KEY or not text or not text.strip():
-        return None
-    text = (text or "").strip()[:8000]
-    async with aiohttp.ClientSession() as session:
-        try:
-            async with session.post(
-                "https://api.openai.com/v1/embeddings",
-                headers={
-                    "Authorization": f"Bearer {OPENAI_API_KEY}",
-                    "Content-Type": "application/json",
-                },
-                json={"model": EMBEDDING_MODEL, "input": text},
-                timeout=aiohttp.ClientTimeout(total=30),
-            ) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
-                emb = data.get("data", [{}])[0].get("embedding")
-                return emb if isinstance(emb, list) else None
-        except Exception as e:
-            logger.warning("Embedding generation failed: %s", e)
-            return None
-
-
-async def _store_embedding(
-    article_id: str,
-    text_content: str,
-    embedding: List[float],
-    embedding_type: str = "abstract",
-) -> bool:
-    """Store or replace embedding for an article (one row per article, type=abstract)."""
-    if not text_content or not embedding:
-        return False
-    payload = {
-        "article_id": article_id,
-        "embedding_type": embedding_type,
-        "section_name": None,
-        "text_content": text_content[:10000],
-        "embedding": embedding,
-    }
-    # Upsert by article_id + embedding_type so we don't duplicate
-    existing = await _supabase_get(
-        "article_embeddings",
-        f"article_id=eq.{article_id}&embedding_type=eq.{embedding_type}&select=id&limit=1",
-    )
-    if existing:
-        await _supabase_patch(
-            "article_embeddings",
-            f"id=eq.{existing[0]['id']}",
-            {
-                "text_content": payload["text_content"],
-                "embedding": payload["embedding"],
-            },
-        )
-        return True
-    result = await _supabase_upsert("article_embeddings", payload)
-    return bool(result)
-
-
-async def _ensure_article_embedding(article_id: str, article_data: Dict) -> None:
-    """Generate and store embedding for title+abstract if we have OpenAI key."""
-    text_parts = [article_data.get("title") or "", article_data.get("abstract") or ""]
-    text = " ".join(p for p in text_parts if p).strip()
-    if not text:
-        return
-    emb = await _generate_embedding(text)
-    if emb:
-        await _store_embedding(article_id, text, emb, "abstract")
+    return (await generate_embeddings([text]))[0]
 
 
 async def _fetch_articles_by_ids(article_ids: List[str]) -> List[Dict]:
@@ -605,6 +528,7 @@ async def _openai_chat_completion(
 @router.post("/search", response_model=SearchResultsResponse)
 async def search_literature(
     request: PubMedSearchRequest,
+    background_tasks: BackgroundTasks,
     current_user: dict = Depends(UsageGate("medical_literature")),
 ):
     """
@@ -637,14 +561,15 @@ async def search_literature(
     # Fetch article details
     article_data_list = await _pubmed_fetch_articles(pmids[: request.max_results])
 
-    # Cache articles and build response
+    # Cache articles in one batch; embed them after the response is sent
     articles = []
     article_ids = []
-    for article_data in article_data_list:
-        article_id = await _cache_article(article_data)
+    embed_items = []
+    cached_ids = await get_literature_ingestor().cache_articles(article_data_list)
+    for article_data, article_id in zip(article_data_list, cached_ids):
         if article_id:
             article_ids.append(article_id)
-            await _ensure_article_embedding(article_id, article_data)
+            embed_items.append((article_id, article_text(article_data)))
             articles.append(
                 ResearchArticle(
                     id=article_id,
@@ -683,6 +608,8 @@ async def search_literature(
     query_result = await _supabase_upsert("research_queries", query_payload)
     query_id = query_result.get("id") if query_result else None
 
+    background_tasks.add_task(get_literature_ingestor().embed_articles, embed_items)
+
     return SearchResultsResponse(
         query=request.query,
         total_results=len(pmids),
@@ -711,27 +638,8 @@ async def semantic_search(
             status_code=503,
             detail="Could not generate query embedding.",
         )
-    # Load cached embeddings (limit to avoid huge response)
-    rows = await _supabase_get(
-        "article_embeddings",
-        "embedding_type=eq.abstract&select=article_id,embedding&limit=500",
-    )
-    if not rows:
-        return SearchResultsResponse(
-            query=request.query,
-            total_results=0,
-            articles=[],
-            query_id=None,
-        )
-    # Compute similarity for each
-    scored = []
-    for row in rows:
-        emb = row.get("embedding")
-        if isinstance(emb, list) and len(emb) == len(query_embedding):
-            score = _cosine_similarity(query_embedding, emb)
-            scored.append((str(row["article_id"]), score))
-    scored.sort(key=lambda x: -x[1])
-    top_ids = [aid for aid, _ in scored[: request.max_results]]
+    index = await get_literature_index().ready()
+    top_ids = [aid for aid, _ in index.search(query_embedding, request.max_results)]
     if not top_ids:
         return SearchResultsResponse(
             query=request.query,
@@ -778,7 +686,7 @@ async def semantic_search(
         )
     return SearchResultsResponse(
         query=request.query,
-        total_results=len(scored),
+        total_results=len(index),
         articles=articles,
         query_id=None,
     )
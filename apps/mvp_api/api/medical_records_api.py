@@ -529,7 +529,7 @@ async def _generate_record_summary(record_type: str, data: dict, user_id: str) -
 async def _extract_with_claude(file_bytes: bytes, prompt: str, is_pdf: bool) -> dict:
     """Extract structured data from file using Claude."""
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
         import certifi
         import ssl
 
@@ -537,7 +537,7 @@ async def _extract_with_claude(file_bytes: bytes, prompt: str, is_pdf: bool) ->
         if not api_key:
             return {}
 
-        client = anthropic.AsyncAnthropic(api_key=api_key)
+        gateway = get_llm_gateway()
 
         if is_pdf:
             b64 = base64.b64encode(file_bytes).decode("utf-8")
@@ -552,7 +552,8 @@ async def _extract_with_claude(file_bytes: bytes, prompt: str, is_pdf: bool) ->
                 },
                 {"type": "text", "text": prompt},
             ]
-            result = await client.messages.create(
+            result = await gateway.create(
+                "medical_records",
                 model="claude-sonnet-4-6",
                 max_tokens=2000,
                 messages=[{"role": "user", "content": content}],
@@ -586,7 +587,8 @@ async def _extract_with_claude(file_bytes: bytes, prompt: str, is_pdf: bool) ->
                 },
                 {"type": "text", "text": prompt},
             ]
-            result = await client.messages.create(
+            result = await gateway.create(
+                "medical_records",
                 model="claude-sonnet-4-6",
                 max_tokens=2000,
                 messages=[{"role": "user", "content": content}],
@@ -614,13 +616,13 @@ async def _extract_with_claude(file_bytes: bytes, prompt: str, is_pdf: bool) ->
 async def _call_claude_text(prompt: str, max_tokens: int = 500) -> str:
     """Call Claude for plain text response."""
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Upload processed. Review the extracted data below."
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "medical_records",
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
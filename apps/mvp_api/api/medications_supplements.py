@@ -1011,7 +1011,7 @@ async def scan_prescription_image(
     supplement bottle, pill strip, or handwritten doctor prescription using
     Claude Vision AI.
     """
-    import anthropic
+    from common.ai.llm_gateway import get_llm_gateway
     import os
 
     api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -1072,8 +1072,8 @@ Rules:
 - Return the JSON object only, no markdown fences or extra text"""
 
     try:
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "medication_scan",
             model="claude-sonnet-4-6",
             max_tokens=1200,
             messages=[
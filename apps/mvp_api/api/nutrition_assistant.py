@@ -1170,14 +1170,14 @@ async def nutrition_home_summary(
 async def _call_claude(prompt: str, max_tokens: int = 250) -> str:
     """Call Claude for a short generation."""
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Unable to generate insight — AI service not configured."
 
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "nutrition_insight",
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
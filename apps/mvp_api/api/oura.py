@@ -28,7 +28,9 @@ from datetime import datetime, timedelta
 import os
 
 from common.middleware.auth import get_current_user
+from common.metrics.daily_store import get_daily_store_cache
 from common.utils.logging import get_logger
+from .correlations import forget_correlation_state
 from ..dependencies.usage_gate import (
     _supabase_get,
     _supabase_upsert,
@@ -284,10 +286,10 @@ async def _persist_oura_to_normalized(
 ) -> int:
     """Run flattened Oura data through canonical normalizer → health_metrics_normalized."""
     from common.metrics.normalizer import HealthNormalizer
-    from common.metrics.persistence import persist_normalized_metrics
+    from common.metrics.persistence import persist_normalized_batch
 
     normalizer = HealthNormalizer()
-    total = 0
+    days = []
     for date_str, raw_day in by_date.items():
         if not raw_day:
             continue
@@ -298,9 +300,17 @@ async def _persist_oura_to_normalized(
             user_baseline={},
         )
         if metrics:
-            n = await persist_normalized_metrics(user_id, date_str, metrics)
-            total += n
-    return total
+            days.append((user_id, date_str, metrics))
+    result = await persist_normalized_batch(days)
+    if result.failed:
+        logger.warning(
+            "Oura normalized persist: user=%s accepted=%d failed=%d chunks=%d",
+            user_id,
+            result.accepted,
+            result.failed,
+            len(result.chunks),
+        )
+    return result.accepted
 
 
 async def _persist_oura_to_native(
@@ -573,6 +583,8 @@ async def sync_data(current_user: dict = Depends(get_user_optional)):
 
             # Persist canonical data to health_metrics_normalized
             normalized_count = await _persist_oura_to_normalized(user_id, by_date)
+            get_daily_store_cache().invalidate(user_id)
+            forget_correlation_state(user_id)
 
             logger.info(
                 "Oura sync: user=%s days=%d raw=%d normalized=%d",
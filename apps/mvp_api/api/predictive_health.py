@@ -17,6 +17,7 @@ import aiohttp
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel
 
+from common.metrics.daily_store import DailyMetricStore, get_daily_store_cache
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import (
     UsageGate,
@@ -1345,9 +1346,18 @@ async def _fetch_native_health_sources(
     Fetch time-series values from native_health_data for all connected sources.
     Returns (metric_series_dict, display_source_names).
     metric_series_dict: {metric_type: [sorted daily values]}
+
+    The rows are folded into a DailyMetricStore kept in the shared
+    DailyStoreCache, so the three prediction endpoints reuse one fetch.
     """
     from datetime import date as _date
 
+    cache = get_daily_store_cache()
+    cached = cache.get((user_id, "native_series", days))
+    if cached is not None:
+        store, display_names = cached
+        return _store_series(store), list(display_names)
+
     start_d = (_date.today() - timedelta(days=days)).isoformat()
 
     try:
@@ -1360,7 +1370,9 @@ async def _fetch_native_health_sources(
         logger.warning("Could not fetch native_health_data for predictions: %s", exc)
         return {}, []
 
-    by_metric: Dict[str, Dict[str, float]] = {}  # metric_type → {date: value}
+    dates: List[str] = []
+    metrics: List[str] = []
+    values: List[float] = []
     sources_seen: set = set()
 
     for row in rows or []:
@@ -1381,18 +1393,28 @@ async def _fetch_native_health_sources(
         if val == 0:
             continue
 
-        by_metric.setdefault(metric_type, {})[date_str] = val
+        dates.append(date_str)
+        metrics.append(metric_type)
+        values.append(val)
         sources_seen.add(source)
 
-    # Convert to sorted lists
-    series: Dict[str, List[float]] = {
-        mt: [v for _, v in sorted(date_vals.items())]
-        for mt, date_vals in by_metric.items()
-    }
+    # The last row for a (date, metric) wins, as the API returns them in order
+    store = DailyMetricStore.from_rows(
+        dates, metrics, values, priorities=range(len(values))
+    )
     display_names = [
         _PREDICTION_SOURCE_LABELS.get(s, s.capitalize()) for s in sorted(sources_seen)
     ]
-    return series, display_names
+    cache.put((user_id, "native_series", days), store, tuple(display_names))
+    return _store_series(store), display_names
+
+
+def _store_series(store: DailyMetricStore) -> Dict[str, List[float]]:
+    """``{metric: [daily values in date order]}`` for the metrics with data."""
+    return {
+        metric: store.column(metric)[store.present(metric)].tolist()
+        for metric in store.metrics_with_data()
+    }
 
 
 async def _fetch_user_health_profile(user_id: str, days: int) -> Tuple[List[str], str]:
@@ -0,0 +1,413 @@
+"""
+PubMed Cache
+
+``_pubmed_search`` and ``_pubmed_fetch_articles`` called NCBI E-utilities
+on every request, although popular condition queries repeat constantly
+across users and NCBI allows only 3 requests/s (10 with an API key) per
+client.  This module puts a shared cache and a rate limiter in front of
+them:
+
+  * **Queries** — normalised ``esearch`` parameters -> PMID list, fresh
+    for ``PUBMED_QUERY_TTL_S``.  Past that, the entry is still served for
+    up to ``PUBMED_STALE_S`` more while one background refresh runs.
+  * **Articles** — PMID -> parsed article, stored once; ``efetch`` is
+    called only for the PMIDs that are missing.
+  * **Rate limit** — a token bucket shared by every worker through Redis
+    (one Lua call per request) when ``REDIS_URL`` points at a remote
+    Redis, else a per-process bucket with the rate divided by
+    ``WEB_CONCURRENCY``.  Callers queue for up to ``PUBMED_RATE_MAX_WAIT_S``;
+    beyond that the request is shed (stale data is served if there is any)
+    instead of earning NCBI 429s.
+
+Entries live in an in-process LRU and, with Redis, in ``pubmed:*`` keys
+shared by all workers.  Concurrent misses for the same key share one load.
+
+Configuration:
+    PUBMED_QUERY_TTL_S       query freshness (default 21600)
+    PUBMED_STALE_S           extra time a stale query is served (default 604800)
+    PUBMED_ARTICLE_TTL_S     article lifetime (default 2592000)
+    PUBMED_CACHE_MAX_ENTRIES in-process entries (default 5000)
+    NCBI_RATE_PER_S          NCBI requests/s across workers (3, or 10 with NCBI_API_KEY)
+    PUBMED_RATE_BURST        bucket size (default: the rate)
+    PUBMED_RATE_MAX_WAIT_S   longest a request queues for a token (default 5)
+    PUBMED_RATE_REDIS_BACKOFF_S  local-only period after a Redis error (default 30)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from common.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+QUERY_TTL_S = float(os.environ.get("PUBMED_QUERY_TTL_S", "21600"))
+STALE_S = float(os.environ.get("PUBMED_STALE_S", "604800"))
+ARTICLE_TTL_S = float(os.environ.get("PUBMED_ARTICLE_TTL_S", "2592000"))
+MAX_ENTRIES = int(os.environ.get("PUBMED_CACHE_MAX_ENTRIES", "5000"))
+RATE_PER_S = float(
+    os.environ.get("NCBI_RATE_PER_S", "10" if os.environ.get("NCBI_API_KEY") else "3")
+)
+RATE_BURST = float(os.environ.get("PUBMED_RATE_BURST", str(RATE_PER_S)))
+RATE_MAX_WAIT_S = float(os.environ.get("PUBMED_RATE_MAX_WAIT_S", "5"))
+RATE_REDIS_BACKOFF_S = float(os.environ.get("PUBMED_RATE_REDIS_BACKOFF_S", "30"))
+
+_RATE_KEY = "pubmed:ratelimit"
+
+# Reserve one token from a bucket in a Redis hash.  Returns the seconds to
+# wait before using it, or -1 when that would exceed the caller's max wait
+# (nothing is reserved then).  Time comes from the Redis server so every
+# worker sees the same clock.
+_TOKEN_BUCKET_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_wait = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens < 1 then
+  wait = (1 - tokens) / rate
+  if wait > max_wait then
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    return '-1'
+  end
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil((burst / rate + max_wait) * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+def _redis_from_env() -> Any:
+    """Shared Redis client, or None when REDIS_URL is unset or local."""
+    url = (os.environ.get("REDIS_URL") or "").strip()
+    if not url or "localhost" in url or "127.0.0.1" in url:
+        return None
+    try:
+        import redis.asyncio as redis  # pylint: disable=import-outside-toplevel
+
+        return redis.from_url(url, encoding="utf-8", decode_responses=True)
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning(f"PubMed cache Redis unavailable: {exc}")
+        return None
+
+
+def normalize_query(term: str) -> str:
+    """Case- and whitespace-insensitive form of a search term."""
+    return re.sub(r"\s+", " ", (term or "").strip().lower())
+
+
+class TokenBucket:
+    """Token-bucket rate limiter, shared through Redis when available."""
+
+    def __init__(
+        self,
+        rate_per_s: float = RATE_PER_S,
+        burst: float = RATE_BURST,
+        max_wait_s: float = RATE_MAX_WAIT_S,
+        redis: Any = None,
+        local_share: int = 1,
+        redis_backoff_s: float = RATE_REDIS_BACKOFF_S,
+    ):
+        self.rate = max(rate_per_s, 0.01)
+        self.burst = max(burst, 1.0)
+        self.max_wait_s = max_wait_s
+        self.redis = redis
+        self.redis_backoff_s = redis_backoff_s
+        # After a Redis error the local bucket is used until this time, then
+        # Redis is tried again.
+        self._redis_retry_at = 0.0
+        self._redis_errors = 0
+        # Without Redis each worker gets an equal slice of the global rate.
+        self._local_rate = self.rate / max(1, local_share)
+        self._tokens = self.burst
+        self._stamp = time.monotonic()
+        self._granted = 0
+        self._shed = 0
+        self._waited_s = 0.0
+
+    def _reserve_local(self) -> float:
+        now = time.monotonic()
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._stamp) * self._local_rate
+        )
+        self._stamp = now
+        wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self._local_rate
+        if wait > self.max_wait_s:
+            return -1.0
+        self._tokens -= 1
+        return wait
+
+    def _shared(self) -> bool:
+        return self.redis is not None and time.monotonic() >= self._redis_retry_at
+
+    async def _reserve(self) -> float:
+        if self._shared():
+            try:
+                raw = await self.redis.eval(
+                    _TOKEN_BUCKET_LUA,
+                    1,
+                    _RATE_KEY,
+                    self.rate,
+                    self.burst,
+                    self.max_wait_s,
+                )
+                return float(raw)
+            except Exception as exc:  # pylint: disable=broad-except
+                self._redis_errors += 1
+                self._redis_retry_at = time.monotonic() + self.redis_backoff_s
+                logger.warning(
+                    f"Shared NCBI rate limit unavailable, using local for "
+                    f"{self.redis_backoff_s:g}s: {exc}"
+                )
+        return self._reserve_local()
+
+    async def acquire(self) -> bool:
+        """Wait for a request slot; False if the queue is too long (shed)."""
+        wait = await self._reserve()
+        if wait < 0:
+            self._shed += 1
+            return False
+        if wait > 0:
+            self._waited_s += wait
+            await asyncio.sleep(wait)
+        self._granted += 1
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_s": self.rate,
+            "shared": self._shared(),
+            "redis_errors": self._redis_errors,
+            "granted": self._granted,
+            "shed": self._shed,
+            "avg_wait_ms": round(self._waited_s / self._granted * 1000, 1)
+            if self._granted
+            else 0.0,
+        }
+
+
+Entry = Tuple[Any, float]  # (value, stored_at wall-clock)
+
+
+class PubMedCache:
+    """Query and article cache with stale-while-revalidate."""
+
+    def __init__(
+        self,
+        redis: Any = None,
+        limiter: Optional[TokenBucket] = None,
+        query_ttl_s: float = QUERY_TTL_S,
+        stale_s: float = STALE_S,
+        article_ttl_s: float = ARTICLE_TTL_S,
+        max_entries: int = MAX_ENTRIES,
+    ):
+        self.redis = redis
+        self.limiter = limiter or TokenBucket(
+            redis=redis, local_share=int(os.environ.get("WEB_CONCURRENCY", "1") or 1)
+        )
+        self.query_ttl_s = query_ttl_s
+        self.stale_s = stale_s
+        self.article_ttl_s = article_ttl_s
+        self.max_entries = max_entries
+        self._local: "OrderedDict[str, Entry]" = OrderedDict()
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._refreshing: Set["asyncio.Task[Any]"] = set()
+        self._hits = 0
+        self._stale_hits = 0
+        self._misses = 0
+        self._refreshes = 0
+        self._article_hits = 0
+        self._article_misses = 0
+
+    # ------------------------------------------------------------------
+    # Storage tiers
+    # ------------------------------------------------------------------
+
+    def _remember(self, key: str, entry: Entry) -> None:
+        self._local[key] = entry
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _read(self, keys: List[str]) -> Dict[str, Entry]:
+        found: Dict[str, Entry] = {}
+        remote: List[str] = []
+        for key in keys:
+            entry = self._local.get(key)
+            if entry is not None:
+                self._local.move_to_end(key)
+                found[key] = entry
+            else:
+                remote.append(key)
+        if remote and self.redis is not None:
+            try:
+                raws = await self.redis.mget(remote)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.debug(f"PubMed cache Redis read failed: {exc}")
+                raws = []
+            for key, raw in zip(remote, raws):
+                if raw:
+                    data = json.loads(raw)
+                    entry = (data["v"], data["t"])
+                    self._remember(key, entry)
+                    found[key] = entry
+        return found
+
+    async def _write(self, items: Dict[str, Any], keep_s: float) -> None:
+        now = time.time()
+        for key, value in items.items():
+            self._remember(key, (value, now))
+        if self.redis is None or not items:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            for key, value in items.items():
+                pipe.set(key, json.dumps({"v": value, "t": now}), ex=int(keep_s))
+            await pipe.execute()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.debug(f"PubMed cache Redis write failed: {exc}")
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def query_key(params: Dict[str, Any]) -> str:
+        normal = {k: v for k, v in params.items() if k != "api_key"}
+        normal["term"] = normalize_query(str(normal.get("term", "")))
+        digest = hashlib.sha256(
+            json.dumps(normal, sort_keys=True, default=str).encode()
+        )
+        return f"pubmed:q:{digest.hexdigest()}"
+
+    async def _load(
+        self, key: str, load: Callable[[], Awaitable[Optional[List[str]]]]
+    ) -> Optional[List[str]]:
+        """Run *load* once per key at a time; store what it returns."""
+        future = self._inflight.get(key)
+        if future is None:
+
+            async def run() -> Optional[List[str]]:
+                try:
+                    value = await load()
+                    if value is not None:
+                        await self._write({key: value}, self.query_ttl_s + self.stale_s)
+                    return value
+                finally:
+                    self._inflight.pop(key, None)
+
+            future = asyncio.ensure_future(run())
+            self._inflight[key] = future
+        return await asyncio.shield(future)
+
+    async def search(
+        self,
+        params: Dict[str, Any],
+        load: Callable[[], Awaitable[Optional[List[str]]]],
+    ) -> List[str]:
+        """
+        PMIDs for an ``esearch`` request.
+
+        *load* performs the NCBI call and returns None on failure (failures
+        are not cached).  Stale entries are returned at once and refreshed
+        in the background.
+        """
+        key = self.query_key(params)
+        entry = (await self._read([key])).get(key)
+        if entry is not None:
+            pmids, stored_at = entry
+            age = time.time() - stored_at
+            if age < self.query_ttl_s:
+                self._hits += 1
+                return list(pmids)
+            if age < self.query_ttl_s + self.stale_s:
+                self._stale_hits += 1
+                if key not in self._inflight:
+                    self._refreshes += 1
+                    task = asyncio.ensure_future(self._load(key, load))
+                    self._refreshing.add(task)
+                    task.add_done_callback(self._refreshing.discard)
+                return list(pmids)
+        self._misses += 1
+        return list(await self._load(key, load) or [])
+
+    # ------------------------------------------------------------------
+    # Articles
+    # ------------------------------------------------------------------
+
+    async def articles(
+        self,
+        pmids: List[str],
+        load: Callable[[List[str]], Awaitable[Optional[List[Dict]]]],
+    ) -> List[Dict]:
+        """Parsed articles for *pmids* (in that order); fetches only the missing ones."""
+        keys = {pmid: f"pubmed:a:{pmid}" for pmid in pmids}
+        found = await self._read(list(keys.values()))
+        now = time.time()
+        have: Dict[str, Dict] = {
+            pmid: found[key][0]
+            for pmid, key in keys.items()
+            if key in found and now - found[key][1] < self.article_ttl_s
+        }
+        missing = [pmid for pmid in pmids if pmid not in have]
+        self._article_hits += len(have)
+        self._article_misses += len(missing)
+        if missing:
+            fetched = await load(missing) or []
+            fresh = {str(a["pubmed_id"]): a for a in fetched if a.get("pubmed_id")}
+            await self._write(
+                {keys[p]: a for p, a in fresh.items() if p in keys}, self.article_ttl_s
+            )
+            have.update(fresh)
+        return [have[pmid] for pmid in pmids if pmid in have]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._local),
+            "redis": self.redis is not None,
+            "hits": self._hits,
+            "stale_hits": self._stale_hits,
+            "misses": self._misses,
+            "refreshes": self._refreshes,
+            "article_hits": self._article_hits,
+            "article_misses": self._article_misses,
+            "rate_limit": self.limiter.stats(),
+        }
+
+    async def close(self) -> None:
+        for task in list(self._refreshing):
+            task.cancel()
+        if self.redis is not None:
+            try:
+                await self.redis.aclose()
+            except Exception:  # pylint: disable=broad-except
+                pass
+
+
+_pubmed_cache: Optional[PubMedCache] = None  # pylint: disable=invalid-name
+
+
+def get_pubmed_cache() -> PubMedCache:
+    """Process-wide PubMed cache."""
+    global _pubmed_cache  # pylint: disable=global-statement,invalid-name
+    if _pubmed_cache is None:
+        _pubmed_cache = PubMedCache(redis=_redis_from_env())
+    return _pubmed_cache
+
+
+async def close_pubmed_cache() -> None:
+    """Stop background refreshes and close Redis; called from the lifespan."""
+    global _pubmed_cache  # pylint: disable=global-statement,invalid-name
+    if _pubmed_cache is not None:
+        await _pubmed_cache.close()
+        _pubmed_cache = None
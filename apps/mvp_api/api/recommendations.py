@@ -13,15 +13,13 @@ personalized nutrition recommendations. Patterns detected:
 
 import json
 import os
-import ssl
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
-import aiohttp
-import certifi
 from fastapi import APIRouter, Depends, Request
 from pydantic import BaseModel
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 from ..dependencies.usage_gate import UsageGate, _supabase_get, _supabase_insert
@@ -898,36 +896,14 @@ Respond in JSON:
 Important: Do not provide medical diagnoses. Frame as observed patterns and suggestions."""
 
     try:
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": ANTHROPIC_MODEL,
-                    "max_tokens": 1024,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-            ) as resp:
-                if resp.status != 200:
-                    logger.warning(
-                        "Anthropic API returned %s for recommendations", resp.status
-                    )
-                    return _fallback_recommendations(patterns), _fallback_summary(
-                        patterns
-                    )
-
-                result = await resp.json()
-
-        content = result["content"][0]["text"]
+        result = await get_llm_gateway().create(
+            "recommendations",
+            model=ANTHROPIC_MODEL,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=15,
+        )
+        content = result.content[0].text
         # Extract JSON block if wrapped in markdown
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0].strip()
@@ -1149,30 +1125,14 @@ Respond in JSON:
 Keep it practical and actionable. No medical diagnoses."""
 
     try:
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        connector = aiohttp.TCPConnector(ssl=ssl_ctx)
-        timeout = aiohttp.ClientTimeout(total=15)
-        async with aiohttp.ClientSession(
-            connector=connector, timeout=timeout
-        ) as session:
-            async with session.post(
-                "https://api.anthropic.com/v1/messages",
-                headers={
-                    "x-api-key": ANTHROPIC_API_KEY,
-                    "anthropic-version": "2023-06-01",
-                    "Content-Type": "application/json",
-                },
-                json={
-                    "model": ANTHROPIC_MODEL,
-                    "max_tokens": 1024,
-                    "messages": [{"role": "user", "content": prompt}],
-                },
-            ) as resp:
-                if resp.status != 200:
-                    raise ValueError(f"Anthropic returned {resp.status}")
-                result = await resp.json()
-
-        content = result["content"][0]["text"]
+        result = await get_llm_gateway().create(
+            "recommendations",
+            model=ANTHROPIC_MODEL,
+            max_tokens=1024,
+            messages=[{"role": "user", "content": prompt}],
+            timeout=15,
+        )
+        content = result.content[0].text
         if "```json" in content:
             content = content.split("```json")[1].split("```")[0].strip()
         elif "```" in content:
@@ -5,22 +5,27 @@ Domain-specific expert agents with orchestrator for holistic health analysis
 
 # pylint: disable=too-many-locals,too-many-branches,too-many-statements,broad-except,import-outside-toplevel,too-few-public-methods,missing-class-docstring,invalid-name
 
-import os
+import asyncio
 import re
 from datetime import datetime, timedelta
 from typing import Any, Dict, List
 
-import anthropic
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel  # pylint: disable=too-few-public-methods
 
+from common.ai.llm_gateway import get_llm_gateway, system_blocks
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
+from ..agents.context_snapshot import gather_sources, get_context_snapshot
 from ..dependencies.usage_gate import UsageGate, _supabase_get
 
 logger = get_logger(__name__)
 router = APIRouter()
 
+# Specialist windows span up to a year of rows, so they get more headroom
+# than the chat snapshot's per-source budget.
+_DATA_TIMEOUT_S = 8.0
+
 # ============================================================================
 # Request/Response Models
 # ============================================================================
@@ -626,16 +631,18 @@ async def _call_specialist_agent(  # pylint: disable=too-many-locals
     specialist_name: str,
     prompt_template: str,
     data_summary: Dict[str, Any],
-    anthropic_client,
 ) -> SpecialistInsight:
     """Call a specialist agent and parse response"""
 
     prompt = prompt_template.format(data_summary=str(data_summary))
 
     try:
-        response = await anthropic_client.messages.create(
+        response = await get_llm_gateway().create(
+            "meta_analysis",
             model="claude-sonnet-4-6",
-            system="You are a medical specialist providing evidence-based analysis.",
+            system=system_blocks(
+                "You are a medical specialist providing evidence-based analysis."
+            ),
             messages=[{"role": "user", "content": prompt}],
             temperature=0.3,
             max_tokens=1500,
@@ -823,7 +830,6 @@ def _parse_predicted_outcomes(section: str) -> List[Dict[str, Any]]:
 async def _call_integration_agent(
     specialist_insights: List[SpecialistInsight],
     correlation_data: str,
-    anthropic_client,
 ) -> Dict[str, Any]:
     """Call the integration agent to synthesize all specialist insights"""
 
@@ -846,9 +852,10 @@ async def _call_integration_agent(
     )
 
     try:
-        response = await anthropic_client.messages.create(
+        response = await get_llm_gateway().create(
+            "meta_analysis",
             model="claude-sonnet-4-6",
-            system=(
+            system=system_blocks(
                 "You are an Integration Agent synthesizing specialist "
                 "insights into holistic diagnosis. Follow the output format exactly."
             ),
@@ -982,26 +989,38 @@ async def generate_meta_analysis(  # pylint: disable=too-many-locals
     Pro+ feature. Results are cached in memory per user for instant retrieval.
     """
     try:
-        anthropic_client = anthropic.AsyncAnthropic(
-            api_key=os.environ.get("ANTHROPIC_API_KEY", "")
-        )
         user_id = current_user["id"]
 
-        # Gather data for all specialists
-        sleep_data = await _gather_sleep_data(user_id, days)
-        nutrition_data = await _gather_nutrition_data(user_id, days)
-        cardiovascular_data = await _gather_cardiovascular_data(user_id, days)
-        activity_data = await _gather_activity_data(user_id, days)
-        symptom_data = await _gather_symptom_data(user_id, days)
+        # Gather every specialist's data and the shared user snapshot at once
+        gathered, failed = await gather_sources(
+            {
+                "sleep": lambda: _gather_sleep_data(user_id, days),
+                "nutrition": lambda: _gather_nutrition_data(user_id, days),
+                "cardiovascular": lambda: _gather_cardiovascular_data(user_id, days),
+                "activity": lambda: _gather_activity_data(user_id, days),
+                "symptoms": lambda: _gather_symptom_data(user_id, days),
+                "snapshot": lambda: get_context_snapshot(user_id, current_user),
+            },
+            timeout=_DATA_TIMEOUT_S,
+        )
+        if failed:
+            logger.warning(f"Meta-analysis data unavailable for: {', '.join(failed)}")
+        sleep_data = gathered.get("sleep") or {"available": False}
+        nutrition_data = gathered.get("nutrition") or {"available": False}
+        cardiovascular_data = gathered.get("cardiovascular") or {"available": False}
+        activity_data = gathered.get("activity") or {"available": False}
+        symptom_data = gathered.get("symptoms") or {"available": False}
+        snapshot = gathered.get("snapshot") or {}
 
         # Call specialist agents in parallel where data is available
-        specialist_insights: List[SpecialistInsight] = []
+        specialist_calls = []
 
         if sleep_data.get("available"):
-            sleep_insight = await _call_specialist_agent(
-                "sleep", SLEEP_AGENT_PROMPT, sleep_data, anthropic_client
+            specialist_calls.append(
+                _call_specialist_agent(
+                    "sleep", SLEEP_AGENT_PROMPT, sleep_data
+                )
             )
-            specialist_insights.append(sleep_insight)
 
         if nutrition_data.get("available"):
             prefs_summary = _build_preferences_summary(
@@ -1011,34 +1030,41 @@ async def generate_meta_analysis(  # pylint: disable=too-many-locals
                 user_preferences=prefs_summary,
                 data_summary="{data_summary}",  # placeholder for _call_specialist_agent
             )
-            nutrition_insight = await _call_specialist_agent(
-                "nutrition", nutrition_prompt, nutrition_data, anthropic_client
+            specialist_calls.append(
+                _call_specialist_agent(
+                    "nutrition", nutrition_prompt, nutrition_data
+                )
             )
-            specialist_insights.append(nutrition_insight)
 
         if cardiovascular_data.get("available"):
-            cardio_insight = await _call_specialist_agent(
-                "cardiovascular",
-                CARDIOVASCULAR_AGENT_PROMPT,
-                cardiovascular_data,
-                anthropic_client,
+            specialist_calls.append(
+                _call_specialist_agent(
+                    "cardiovascular",
+                    CARDIOVASCULAR_AGENT_PROMPT,
+                    cardiovascular_data,
+                )
             )
-            specialist_insights.append(cardio_insight)
 
         if activity_data.get("available"):
-            movement_insight = await _call_specialist_agent(
-                "movement", MOVEMENT_AGENT_PROMPT, activity_data, anthropic_client
+            specialist_calls.append(
+                _call_specialist_agent(
+                    "movement", MOVEMENT_AGENT_PROMPT, activity_data
+                )
             )
-            specialist_insights.append(movement_insight)
 
         if symptom_data.get("available"):
-            mental_health_insight = await _call_specialist_agent(
-                "mental_health",
-                MENTAL_HEALTH_AGENT_PROMPT,
-                symptom_data,
-                anthropic_client,
+            specialist_calls.append(
+                _call_specialist_agent(
+                    "mental_health",
+                    MENTAL_HEALTH_AGENT_PROMPT,
+                    symptom_data,
+                )
             )
-            specialist_insights.append(mental_health_insight)
+
+        # _call_specialist_agent never raises; order follows the calls above.
+        specialist_insights: List[SpecialistInsight] = list(
+            await asyncio.gather(*specialist_calls)
+        )
 
         # Build correlation summary for integration agent context
         correlation_summary = (
@@ -1048,10 +1074,18 @@ async def generate_meta_analysis(  # pylint: disable=too-many-locals
             f"Avg steps: {activity_data.get('avg_steps', 'N/A')}, "
             f"Symptoms logged: {symptom_data.get('total_symptoms', 'N/A')}"
         )
+        if snapshot.get("health_conditions"):
+            correlation_summary += (
+                f", Known conditions: {', '.join(snapshot['health_conditions'])}"
+            )
+        if snapshot.get("medications"):
+            correlation_summary += ", Medications: " + ", ".join(
+                m["name"] for m in snapshot["medications"]
+            )
 
         # Call integration agent
         integration_result = await _call_integration_agent(
-            specialist_insights, correlation_summary, anthropic_client
+            specialist_insights, correlation_summary
         )
 
         # Build primary diagnosis object
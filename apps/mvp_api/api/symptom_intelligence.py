@@ -480,13 +480,14 @@ async def history_summary(
 
 async def _call_claude(prompt: str, max_tokens: int = 250) -> str:
     try:
-        import anthropic
+        from common.ai.llm_gateway import get_llm_gateway
 
         api_key = os.environ.get("ANTHROPIC_API_KEY")
         if not api_key:
             return "Log more symptoms to get personalized trigger analysis."
-        client = anthropic.AsyncAnthropic(api_key=api_key)
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "symptom_intelligence",
+            memoize=True,
             model="claude-sonnet-4-6",
             max_tokens=max_tokens,
             messages=[{"role": "user", "content": prompt}],
@@ -0,0 +1,29 @@
+"""
+Internal-caller dependencies.
+
+Cron jobs and operators authenticate with the shared ``CRON_SECRET``, sent
+as the ``X-Cron-Secret`` header (as the email summary and nudge jobs do).
+Endpoints that expose process internals depend on ``require_cron_secret``::
+
+    @app.get("/health/runtime", dependencies=[Depends(require_cron_secret)])
+
+Configuration:
+    CRON_SECRET   shared secret; when unset every internal call is refused
+"""
+
+import os
+import secrets
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+
+async def require_cron_secret(
+    x_cron_secret: Optional[str] = Header(None, alias="X-Cron-Secret"),
+) -> None:
+    """Reject callers that do not present the configured CRON_SECRET."""
+    cron_secret = os.environ.get("CRON_SECRET", "")
+    if not cron_secret:
+        raise HTTPException(status_code=503, detail="CRON_SECRET not configured")
+    if not x_cron_secret or not secrets.compare_digest(x_cron_secret, cron_secret):
+        raise HTTPException(status_code=401, detail="Invalid cron secret")
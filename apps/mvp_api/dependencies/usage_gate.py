@@ -5,26 +5,43 @@ Checks whether a user has remaining quota for a given feature
 based on their subscription tier. Returns 403 when limit is exceeded.
 """
 
+import asyncio
+import copy
+import functools
 import os
 import ssl
 import time
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date, timedelta
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+)
 
 import aiohttp
-import certifi
 from fastapi import HTTPException, Request
 
+from common.clients.postgrest_pool import get_postgrest_pool, shared_ssl_context
 from common.middleware.auth import get_current_user
 from common.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
+# Per-call budget; the connection pool itself is shared (see postgrest_pool).
+_TIMEOUT = aiohttp.ClientTimeout(total=5)
+
 
 def _ssl_context() -> ssl.SSLContext:
-    """Return an SSL context using certifi CA bundle (fixes macOS cert verification)."""
-    return ssl.create_default_context(cafile=certifi.where())
+    """Return the process-wide certifi SSL context (fixes macOS cert verification)."""
+    return shared_ssl_context()
 
 
 SUPABASE_URL = os.environ.get("SUPABASE_URL", "").rstrip("/")
@@ -102,26 +119,185 @@ def _current_week_start() -> str:
     return monday.isoformat()
 
 
+# ---------------------------------------------------------------------------
+# Request-scoped read cache (single-flight)
+# ---------------------------------------------------------------------------
+
+
+class _ReadCache:  # pylint: disable=too-few-public-methods
+    """Per-request memo of in-flight and completed PostgREST reads."""
+
+    def __init__(self) -> None:
+        self.entries: Dict[Tuple[str, str], "asyncio.Future[list]"] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self, table: str) -> None:
+        for key in [k for k in self.entries if k[0] == table]:
+            del self.entries[key]
+
+
+_read_cache: ContextVar[Optional[_ReadCache]] = ContextVar(
+    "supabase_read_cache", default=None
+)
+
+
+def _normalize_params(params: str) -> str:
+    """Order-insensitive cache key for a PostgREST query string."""
+    return "&".join(sorted(p for p in params.split("&") if p))
+
+
+@contextmanager
+def supabase_read_cache() -> Iterator[_ReadCache]:
+    """
+    Memoize ``_supabase_get`` calls for the duration of the block.
+
+    Concurrent identical reads (same table and query params, in any order)
+    share a single in-flight HTTP request; writes through the helpers below
+    drop cached reads for the written table.  Tasks spawned inside the block
+    (e.g. via ``asyncio.gather``) inherit the cache.
+
+    Usage:
+        with supabase_read_cache():
+            await asyncio.gather(get_health_score(...), get_timeline(...))
+    """
+    cache = _ReadCache()
+    token = _read_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _read_cache.reset(token)
+        if cache.hits or cache.misses:
+            logger.debug(
+                f"Supabase read cache: {cache.hits} hits, {cache.misses} misses"
+            )
+
+
+# Callbacks notified after every write helper call as ``(table, user_id)``;
+# user_id is None when the write does not name a single user.
+_write_listeners: List[Callable[[str, Optional[str]], None]] = []
+
+
+def on_supabase_write(listener: Callable[[str, Optional[str]], None]) -> None:
+    """Register *listener* to be told about writes made through these helpers."""
+    if listener not in _write_listeners:
+        _write_listeners.append(listener)
+
+
+def _written_user_id(args: tuple, kwargs: dict) -> Optional[str]:
+    """Best-effort user_id of a write, from its row body or ``user_id=eq.`` filter."""
+    body = kwargs.get("body")
+    params = kwargs.get("params")
+    for arg in args:
+        if isinstance(arg, (dict, list)) and body is None:
+            body = arg
+        elif isinstance(arg, str) and params is None:
+            params = arg
+    if isinstance(body, dict) and body.get("user_id"):
+        return str(body["user_id"])
+    if isinstance(body, list):
+        users = {str(row.get("user_id")) for row in body if isinstance(row, dict)}
+        if len(users) == 1 and "None" not in users:
+            return users.pop()
+    if params:
+        for part in params.split("&"):
+            if part.startswith("user_id=eq."):
+                return part[len("user_id=eq.") :]
+    return None
+
+
+def _invalidates_reads(func):
+    """Drop request-scoped cached reads for the table a write helper touched."""
+
+    @functools.wraps(func)
+    async def wrapper(table: str, *args, **kwargs):
+        try:
+            return await func(table, *args, **kwargs)
+        finally:
+            cache = _read_cache.get()
+            if cache is not None:
+                cache.invalidate(table)
+            if _write_listeners:
+                user_id = _written_user_id(args, kwargs)
+                for listener in _write_listeners:
+                    try:
+                        listener(table, user_id)
+                    except Exception as exc:  # pylint: disable=broad-except
+                        logger.warning(f"Supabase write listener failed: {exc}")
+
+    return wrapper
+
+
 async def _supabase_get(table: str, params: str) -> list:
+    """GET from Supabase PostgREST (memoized inside ``supabase_read_cache``)."""
+    cache = _read_cache.get()
+    if cache is None:
+        return await _supabase_fetch(table, params)
+
+    key = (table, _normalize_params(params))
+    future = cache.entries.get(key)
+    if future is None:
+        cache.misses += 1
+        future = asyncio.ensure_future(_supabase_fetch(table, params))
+        cache.entries[key] = future
+    else:
+        cache.hits += 1
+    rows = await asyncio.shield(future)
+    # Callers routinely mutate returned rows; never hand out shared objects.
+    return copy.deepcopy(rows)
+
+
+async def _supabase_fetch(table: str, params: str) -> list:
     """GET from Supabase PostgREST."""
     if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
         return []
     url = f"{SUPABASE_URL}/rest/v1/{table}?{params}"
-    timeout = aiohttp.ClientTimeout(total=5)
-    connector = aiohttp.TCPConnector(ssl=_ssl_context())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.get(url, headers=_supabase_headers()) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                return []
+        session = await get_postgrest_pool().session()
+        async with session.get(
+            url, headers=_supabase_headers(), timeout=_TIMEOUT
+        ) as resp:
+            if resp.status == 200:
+                return await resp.json()
+            return []
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.warning(f"Supabase GET {table} failed: {exc}")
         return []
 
 
+class SupabaseReadError(RuntimeError):
+    """A PostgREST read failed (raised only by ``_supabase_get_strict``)."""
+
+
+async def _supabase_get_strict(
+    table: str, params: str, timeout: Optional[aiohttp.ClientTimeout] = None
+) -> list:
+    """
+    GET from Supabase PostgREST, raising ``SupabaseReadError`` on failure.
+
+    ``_supabase_get`` returns ``[]`` for an outage, which is fine for
+    dashboards but would make an export silently drop rows.  Bypasses the
+    request read cache: pages are read once.
+    """
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        return []
+    url = f"{SUPABASE_URL}/rest/v1/{table}?{params}"
+    try:
+        session = await get_postgrest_pool().session()
+        async with session.get(
+            url, headers=_supabase_headers(), timeout=timeout or _TIMEOUT
+        ) as resp:
+            if resp.status == 200:
+                return await resp.json()
+            body = await resp.text()
+    except (aiohttp.ClientError, TimeoutError) as exc:
+        raise SupabaseReadError(f"Supabase GET {table} failed: {exc}") from exc
+    raise SupabaseReadError(
+        f"Supabase GET {table} returned {resp.status}: {body[:200]}"
+    )
+
+
+@_invalidates_reads
 async def _supabase_upsert(
     table: str, body: dict, on_conflict: Optional[str] = None
 ) -> Optional[dict]:
@@ -143,31 +319,68 @@ async def _supabase_upsert(
         **_supabase_headers(),
         "Prefer": "resolution=merge-duplicates,return=representation",
     }
-    timeout = aiohttp.ClientTimeout(total=5)
-    connector = aiohttp.TCPConnector(ssl=_ssl_context())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.post(url, headers=headers, json=body) as resp:
-                if resp.status in (200, 201):
-                    data = await resp.json()
-                    result = data[0] if isinstance(data, list) and data else data
-                    logger.info(
-                        f"Supabase upsert {table} succeeded: status={resp.status}, result={result}"
-                    )
-                    return result
-
-                error_text = await resp.text()
-                logger.error(
-                    f"Supabase upsert {table} failed: status={resp.status}, error={error_text}"
+        session = await get_postgrest_pool().session()
+        async with session.post(
+            url, headers=headers, json=body, timeout=_TIMEOUT
+        ) as resp:
+            if resp.status in (200, 201):
+                data = await resp.json()
+                result = data[0] if isinstance(data, list) and data else data
+                logger.info(
+                    f"Supabase upsert {table} succeeded: status={resp.status}, result={result}"
                 )
-                return None
+                return result
+
+            error_text = await resp.text()
+            logger.error(
+                f"Supabase upsert {table} failed: status={resp.status}, error={error_text}"
+            )
+            return None
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.warning(f"Supabase upsert {table} failed: {exc}")
         return None
 
 
+@_invalidates_reads
+async def _supabase_upsert_many(
+    table: str, rows: List[dict], on_conflict: Optional[str] = None
+) -> List[dict]:
+    """Upsert many rows in one PostgREST request; returns the stored rows.
+
+    Every row must carry the same keys (a PostgREST bulk-insert rule).
+    Returns [] on failure.
+    """
+    if not rows or not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        return []
+    url = f"{SUPABASE_URL}/rest/v1/{table}"
+    if on_conflict:
+        url += f"?on_conflict={on_conflict}"
+    headers = {
+        **_supabase_headers(),
+        "Prefer": "resolution=merge-duplicates,return=representation",
+    }
+    try:
+        session = await get_postgrest_pool().session()
+        async with session.post(
+            url, headers=headers, json=rows, timeout=_TIMEOUT
+        ) as resp:
+            if resp.status in (200, 201):
+                data = await resp.json()
+                logger.info(f"Supabase bulk upsert {table} succeeded: {len(rows)} rows")
+                return data if isinstance(data, list) else []
+
+            error_text = await resp.text()
+            logger.error(
+                f"Supabase bulk upsert {table} failed: status={resp.status}, error={error_text}"
+            )
+            return []
+    except (aiohttp.ClientError, TimeoutError) as exc:
+        logger.warning(f"Supabase bulk upsert {table} failed: {exc}")
+        return []
+
+
+@_invalidates_reads
 async def _supabase_patch(table: str, params: str, body: dict) -> Optional[dict]:
     """PATCH (update) to Supabase PostgREST."""
     if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
@@ -177,29 +390,28 @@ async def _supabase_patch(table: str, params: str, body: dict) -> Optional[dict]
         **_supabase_headers(),
         "Prefer": "return=representation",
     }
-    timeout = aiohttp.ClientTimeout(total=5)
-    connector = aiohttp.TCPConnector(ssl=_ssl_context())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.patch(url, headers=headers, json=body) as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    result = data[0] if isinstance(data, list) and data else data
-                    logger.info(f"Supabase patch {table} succeeded")
-                    return result
-
-                error_text = await resp.text()
-                logger.error(
-                    f"Supabase patch {table} failed: status={resp.status}, error={error_text}"
-                )
-                return None
+        session = await get_postgrest_pool().session()
+        async with session.patch(
+            url, headers=headers, json=body, timeout=_TIMEOUT
+        ) as resp:
+            if resp.status == 200:
+                data = await resp.json()
+                result = data[0] if isinstance(data, list) and data else data
+                logger.info(f"Supabase patch {table} succeeded")
+                return result
+
+            error_text = await resp.text()
+            logger.error(
+                f"Supabase patch {table} failed: status={resp.status}, error={error_text}"
+            )
+            return None
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.warning(f"Supabase patch {table} failed: {exc}")
         return None
 
 
+@_invalidates_reads
 async def _supabase_insert(table: str, body: dict) -> Optional[dict]:
     """INSERT (POST) to Supabase PostgREST."""
     if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
@@ -209,57 +421,138 @@ async def _supabase_insert(table: str, body: dict) -> Optional[dict]:
         **_supabase_headers(),
         "Prefer": "return=representation",
     }
-    timeout = aiohttp.ClientTimeout(total=5)
-    connector = aiohttp.TCPConnector(ssl=_ssl_context())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.post(url, headers=headers, json=body) as resp:
-                if resp.status in (200, 201):
-                    data = await resp.json()
-                    result = data[0] if isinstance(data, list) and data else data
-                    logger.info(f"Supabase insert {table} succeeded")
-                    return result
-
-                error_text = await resp.text()
-                logger.error(
-                    f"Supabase insert {table} failed: status={resp.status}, error={error_text}"
-                )
-                return None
+        session = await get_postgrest_pool().session()
+        async with session.post(
+            url, headers=headers, json=body, timeout=_TIMEOUT
+        ) as resp:
+            if resp.status in (200, 201):
+                data = await resp.json()
+                result = data[0] if isinstance(data, list) and data else data
+                logger.info(f"Supabase insert {table} succeeded")
+                return result
+
+            error_text = await resp.text()
+            logger.error(
+                f"Supabase insert {table} failed: status={resp.status}, error={error_text}"
+            )
+            return None
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.warning(f"Supabase insert {table} failed: {exc}")
         return None
 
 
+@_invalidates_reads
 async def _supabase_delete(table: str, params: str) -> bool:
     """DELETE from Supabase PostgREST."""
     if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
         return False
     url = f"{SUPABASE_URL}/rest/v1/{table}?{params}"
-    timeout = aiohttp.ClientTimeout(total=5)
-    connector = aiohttp.TCPConnector(ssl=_ssl_context())
     try:
-        async with aiohttp.ClientSession(
-            timeout=timeout, connector=connector
-        ) as session:
-            async with session.delete(url, headers=_supabase_headers()) as resp:
-                if resp.status in (200, 204):
-                    logger.info(f"Supabase delete {table} succeeded")
-                    return True
-
-                error_text = await resp.text()
-                logger.error(
-                    f"Supabase delete {table} failed: status={resp.status}, error={error_text}"
-                )
-                return False
+        session = await get_postgrest_pool().session()
+        async with session.delete(
+            url, headers=_supabase_headers(), timeout=_TIMEOUT
+        ) as resp:
+            if resp.status in (200, 204):
+                logger.info(f"Supabase delete {table} succeeded")
+                return True
+
+            error_text = await resp.text()
+            logger.error(
+                f"Supabase delete {table} failed: status={resp.status}, error={error_text}"
+            )
+            return False
     except (aiohttp.ClientError, TimeoutError) as exc:
         logger.warning(f"Supabase delete {table} failed: {exc}")
         return False
 
 
+# Functions reported missing by PostgREST -> monotonic time of the 404.
+_missing_rpcs: Dict[str, float] = {}
+_RPC_RECHECK_S = 300.0
+
+
+def _rpc_missing(function: str) -> bool:
+    """True while *function* recently 404'd (e.g. its migration is not applied yet)."""
+    missing_at = _missing_rpcs.get(function)
+    if missing_at is None:
+        return False
+    if time.monotonic() - missing_at > _RPC_RECHECK_S:
+        del _missing_rpcs[function]
+        return False
+    return True
+
+
+async def _supabase_rpc(function: str, body: dict) -> Optional[Any]:
+    """POST to a Supabase PostgREST RPC (``/rest/v1/rpc/<function>``)."""
+    if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+        return None
+    url = f"{SUPABASE_URL}/rest/v1/rpc/{function}"
+    try:
+        session = await get_postgrest_pool().session()
+        async with session.post(
+            url, headers=_supabase_headers(), json=body, timeout=_TIMEOUT
+        ) as resp:
+            if resp.status == 200:
+                return await resp.json()
+
+            error_text = await resp.text()
+            if resp.status == 404:
+                _missing_rpcs[function] = time.monotonic()
+            logger.error(
+                f"Supabase rpc {function} failed: status={resp.status}, error={error_text}"
+            )
+            return None
+    except (aiohttp.ClientError, TimeoutError) as exc:
+        logger.warning(f"Supabase rpc {function} failed: {exc}")
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Tier cache
+# ---------------------------------------------------------------------------
+
+# Tiers change only on checkout/webhook events; a short TTL bounds staleness
+# across workers, and billing calls forget_user_tier() after its own writes.
+TIER_CACHE_TTL_S = float(os.environ.get("USAGE_TIER_CACHE_TTL_S", "60"))
+TIER_CACHE_MAX_USERS = int(os.environ.get("USAGE_TIER_CACHE_MAX_USERS", "10000"))
+
+# { user_id: (tier, monotonic expiry) }, least recently used first
+_tier_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+
+def _cached_tier(user_id: str) -> Optional[str]:
+    entry = _tier_cache.get(user_id)
+    if entry is None:
+        return None
+    tier, expires_at = entry
+    if time.monotonic() >= expires_at:
+        del _tier_cache[user_id]
+        return None
+    _tier_cache.move_to_end(user_id)
+    return tier
+
+
+def _remember_tier(user_id: str, tier: str) -> None:
+    _tier_cache[user_id] = (tier, time.monotonic() + TIER_CACHE_TTL_S)
+    _tier_cache.move_to_end(user_id)
+    while len(_tier_cache) > TIER_CACHE_MAX_USERS:
+        _tier_cache.popitem(last=False)
+
+
+def forget_user_tier(user_id: Optional[str] = None) -> None:
+    """Drop the cached tier for *user_id* (or every user when omitted)."""
+    if user_id is None:
+        _tier_cache.clear()
+    else:
+        _tier_cache.pop(user_id, None)
+
+
 async def get_user_tier(user_id: str) -> str:
     """Look up the user's subscription tier. Defaults to 'free'."""
+    tier = _cached_tier(user_id)
+    if tier is not None:
+        return tier
     rows = await _supabase_get(
         "subscriptions",
         f"user_id=eq.{user_id}&status=in.(active,trialing)&select=tier&limit=1",
@@ -270,9 +563,29 @@ async def get_user_tier(user_id: str) -> str:
         else "free"
     )
     logger.info(f"get_user_tier({user_id}) -> {tier}, rows={rows}")
+    _remember_tier(user_id, tier)
     return tier
 
 
+# ---------------------------------------------------------------------------
+# Quota accounting
+# ---------------------------------------------------------------------------
+
+
+class UsageDecision(NamedTuple):
+    """Outcome of consuming one unit of a feature's weekly quota."""
+
+    tier: str
+    limit: int
+    used: int
+    allowed: bool
+
+
+def _feature_limits(feature: str) -> Dict[str, int]:
+    """Weekly limit of *feature* for every tier."""
+    return {tier: limits.get(feature, 0) for tier, limits in TIER_LIMITS.items()}
+
+
 async def get_usage_count(user_id: str, feature: str, week_start: str) -> int:
     """Get the current week's usage count for a feature."""
     rows = await _supabase_get(
@@ -285,10 +598,16 @@ async def get_usage_count(user_id: str, feature: str, week_start: str) -> int:
     return 0
 
 
-async def increment_usage(user_id: str, feature: str, week_start: str) -> None:
-    """Increment usage count (upsert). If row exists, increment; otherwise create."""
-    # First try to get existing count
-    current = await get_usage_count(user_id, feature, week_start)
+async def increment_usage(
+    user_id: str, feature: str, week_start: str, current: Optional[int] = None
+) -> None:
+    """Increment usage count (upsert). If row exists, increment; otherwise create.
+
+    Read-then-write, so not safe under concurrency; ``consume_usage`` is the
+    atomic path.  Pass *current* when the caller already read the count.
+    """
+    if current is None:
+        current = await get_usage_count(user_id, feature, week_start)
     await _supabase_upsert(
         "usage_tracking",
         {
@@ -298,20 +617,90 @@ async def increment_usage(user_id: str, feature: str, week_start: str) -> None:
             "usage_count": current + 1,
             "updated_at": "now()",
         },
+        on_conflict="user_id,feature,week_start",
     )
 
 
+async def _consume_usage_fallback(
+    user_id: str, feature: str, week_start: str
+) -> UsageDecision:
+    """Non-atomic read-check-upsert, used until the consume_usage RPC exists."""
+    tier = await get_user_tier(user_id)
+    limit = TIER_LIMITS.get(tier, TIER_LIMITS["free"]).get(feature, 0)
+    if limit in (-1, 0):
+        return UsageDecision(tier, limit, 0, limit == -1)
+    used = await get_usage_count(user_id, feature, week_start)
+    if used >= limit:
+        return UsageDecision(tier, limit, used, False)
+    await increment_usage(user_id, feature, week_start, current=used)
+    return UsageDecision(tier, limit, used + 1, True)
+
+
+async def consume_usage(user_id: str, feature: str) -> UsageDecision:
+    """
+    Check and consume one unit of *feature* for the current week.
+
+    A cached tier whose limit is unlimited (-1) or unavailable (0) is
+    answered in-process.  Otherwise the ``consume_usage`` Postgres function
+    resolves the tier, checks the limit and increments the counter in one
+    round trip and one statement, so concurrent requests cannot overrun the
+    quota.  Falls back to the read-then-upsert path if the RPC is missing or
+    fails.
+    """
+    week_start = _current_week_start()
+
+    tier = _cached_tier(user_id)
+    if tier is not None:
+        limit = TIER_LIMITS.get(tier, TIER_LIMITS["free"]).get(feature, 0)
+        if limit in (-1, 0):
+            return UsageDecision(tier, limit, 0, limit == -1)
+
+    if not _rpc_missing("consume_usage"):
+        rows = await _supabase_rpc(
+            "consume_usage",
+            {
+                "p_user_id": user_id,
+                "p_feature": feature,
+                "p_week_start": week_start,
+                "p_limits": _feature_limits(feature),
+            },
+        )
+        if rows and isinstance(rows, list):
+            row = rows[0]
+            decision = UsageDecision(
+                tier=row.get("tier") or "free",
+                limit=int(row.get("usage_limit", 0)),
+                used=int(row.get("used", 0)),
+                allowed=bool(row.get("allowed")),
+            )
+            _remember_tier(user_id, decision.tier)
+            cache = _read_cache.get()
+            if cache is not None:
+                cache.invalidate("usage_tracking")
+            return decision
+
+    return await _consume_usage_fallback(user_id, feature, week_start)
+
+
 async def get_usage_summary(user_id: str) -> Dict[str, Dict[str, Any]]:
     """Get usage summary for all features for the current week."""
     tier = await get_user_tier(user_id)
     week_start = _current_week_start()
     limits = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
 
+    rows = await _supabase_get(
+        "usage_tracking",
+        f"user_id=eq.{user_id}&week_start=eq.{week_start}&select=feature,usage_count",
+    )
+    counts = {
+        row.get("feature"): row.get("usage_count", 0)
+        for row in (rows if isinstance(rows, list) else [])
+    }
+
     summary = {}
     for feature, limit in limits.items():
-        used = await get_usage_count(user_id, feature, week_start) if limit != -1 else 0
         summary[feature] = {
-            "used": used,
+            "used": counts.get(feature, 0) if limit != -1 else 0,
             "limit": limit,
             "period": "week",
         }
@@ -345,18 +734,12 @@ class UsageGate:  # pylint: disable=too-few-public-methods
                 }
 
         current_user = await get_current_user(request)
-        user_id = current_user["id"]
-
-        tier = await get_user_tier(user_id)
-        limits = TIER_LIMITS.get(tier, TIER_LIMITS["free"])
-        limit = limits.get(self.feature, 0)
-
-        # Unlimited
-        if limit == -1:
+        decision = await consume_usage(current_user["id"], self.feature)
+        if decision.allowed:
             return current_user
 
         # Feature not available for this tier
-        if limit == 0:
+        if decision.limit == 0:
             raise HTTPException(
                 status_code=403,
                 detail={
@@ -365,34 +748,26 @@ class UsageGate:  # pylint: disable=too-few-public-methods
                     "feature": self.feature,
                     "limit": 0,
                     "used": 0,
-                    "tier": tier,
-                    "upgrade_url": "/pricing",
-                },
-            )
-
-        week_start = _current_week_start()
-        used = await get_usage_count(user_id, self.feature, week_start)
-
-        if used >= limit:
-            raise HTTPException(
-                status_code=403,
-                detail={
-                    "error": "usage_limit_reached",
-                    "message": (
-                        f"You've used all {limit} "
-                        f"{self.feature.replace('_', ' ')} this week"
-                    ),
-                    "feature": self.feature,
-                    "limit": limit,
-                    "used": used,
-                    "tier": tier,
+                    "tier": decision.tier,
                     "upgrade_url": "/pricing",
                 },
             )
 
-        # Increment usage
-        await increment_usage(user_id, self.feature, week_start)
-        return current_user
+        raise HTTPException(
+            status_code=403,
+            detail={
+                "error": "usage_limit_reached",
+                "message": (
+                    f"You've used all {decision.limit} "
+                    f"{self.feature.replace('_', ' ')} this week"
+                ),
+                "feature": self.feature,
+                "limit": decision.limit,
+                "used": decision.used,
+                "tier": decision.tier,
+                "upgrade_url": "/pricing",
+            },
+        )
 
 
 # ---------------------------------------------------------------------------
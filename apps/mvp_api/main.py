@@ -13,14 +13,22 @@ _base = Path(__file__).parent
 load_dotenv(dotenv_path=_base / ".env", override=False)
 load_dotenv(dotenv_path=Path(__file__).parent.parent.parent / ".env", override=False)
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
+from common.ai.llm_gateway import close_llm_gateway, get_llm_gateway
+from common.clients.postgrest_pool import close_postgrest_pool, get_postgrest_pool
+from common.metrics.daily_store import get_daily_store_cache
+from common.middleware.auth import get_token_verifier
+from common.pdf.render_service import get_pdf_renderer, shutdown_pdf_renderer
+from common.utils.loop_lag import get_loop_lag_monitor
+from common.utils.process_pool import get_process_pool, shutdown_process_pool
 from common.utils.logging import get_logger
 from common.middleware.error_handling import setup_error_handlers
 from common.config.settings import get_settings
 
+from .dependencies.internal import require_cron_secret
 from .api.oura import router as oura_router
 from .api.timeline import router as timeline_router
 from .api.insights import router as insights_router
@@ -38,6 +46,9 @@ from .api.health_questionnaire import router as health_questionnaire_router
 from .api.medications_supplements import router as medications_supplements_router
 from .api.symptom_journal import router as symptom_journal_router
 from .api.medical_literature import router as medical_literature_router
+from .api.literature_index import get_literature_index
+from .api.literature_ingest import get_literature_ingestor
+from .api.pubmed_cache import close_pubmed_cache, get_pubmed_cache
 from .api.ai_agents import router as ai_agents_router
 from .api.predictive_health import router as predictive_health_router
 from .api.lab_results import router as lab_results_router
@@ -82,8 +93,15 @@ settings = get_settings()
 async def lifespan(app: FastAPI):
     """Application lifecycle management"""
     logger.info("Starting MVP API service...")
+    get_loop_lag_monitor().start()
     yield
     logger.info("Shutting down MVP API service...")
+    await get_loop_lag_monitor().stop()
+    await close_postgrest_pool()
+    await close_llm_gateway()
+    shutdown_process_pool()
+    shutdown_pdf_renderer()
+    await close_pubmed_cache()
 
 
 app = FastAPI(
@@ -315,6 +333,24 @@ async def health_check():
     return {"status": "healthy", "service": "mvp-api"}
 
 
+@app.get("/health/runtime", dependencies=[Depends(require_cron_secret)])
+async def runtime_metrics():
+    """Connection-pool and runtime metrics for capacity sizing (X-Cron-Secret)"""
+    return {
+        "service": "mvp-api",
+        "postgrest_pool": get_postgrest_pool().stats(),
+        "event_loop_lag": get_loop_lag_monitor().stats(),
+        "process_pool": get_process_pool().stats(),
+        "auth_token_cache": get_token_verifier().stats(),
+        "daily_store_cache": get_daily_store_cache().stats(),
+        "llm_gateway": get_llm_gateway().stats(),
+        "pdf_renderer": get_pdf_renderer().stats(),
+        "literature_index": get_literature_index().stats(),
+        "literature_ingest": get_literature_ingestor().stats(),
+        "pubmed_cache": get_pubmed_cache().stats(),
+    }
+
+
 @app.get("/")
 async def root():
     """Root endpoint"""
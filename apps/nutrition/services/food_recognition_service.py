@@ -493,13 +493,13 @@ class FoodRecognitionService:
         self, image_bytes: bytes
     ) -> List[Dict[str, Any]]:
         """Recognize foods using Anthropic Claude Vision API."""
-        import anthropic
         import json
 
+        from common.ai.llm_gateway import get_llm_gateway
+
         # base64 encoding adds ~33% overhead; Anthropic limit is 5 MB base64
         # so raw bytes must be ≤ 3.5 MB to stay safely under 5 MB after encoding
         image_bytes = self._compress_for_api(image_bytes, max_bytes=3_500_000)
-        client = anthropic.AsyncAnthropic(api_key=self.anthropic_api_key)
         image_base64 = base64.b64encode(image_bytes).decode("utf-8")
         media_type = self._image_media_type(image_bytes)
 
@@ -523,7 +523,8 @@ Identify every distinct food item visible. Return the JSON array only, no markdo
 Example:
 [{"name": "ripe banana", "quantity": 2, "unit": "pieces", "confidence": 0.95, "description": "Two ripe yellow bananas", "category": "fruit"}, {"name": "fried chicken nuggets", "quantity": 4, "unit": "nuggets", "confidence": 0.90, "description": "Four golden-brown breaded chicken nuggets", "category": "protein"}]"""
 
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "food_recognition",
             model="claude-sonnet-4-6",
             max_tokens=1000,
             messages=[
@@ -581,9 +582,9 @@ Example:
 
     async def _recognize_with_openai(self, image_bytes: bytes) -> List[Dict[str, Any]]:
         """Recognize foods using OpenAI Vision API."""
-        import openai
+        from common.ai.llm_gateway import get_llm_gateway
 
-        client = openai.AsyncOpenAI(api_key=self.openai_api_key)
+        client = get_llm_gateway().client("openai")
 
         # Convert image to base64
         image_base64 = base64.b64encode(image_bytes).decode("utf-8")
@@ -893,11 +894,11 @@ Example:
         self, image_bytes: bytes, food_items: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """Estimate portions using Anthropic Claude Vision API."""
-        import anthropic
         import json
 
+        from common.ai.llm_gateway import get_llm_gateway
+
         image_bytes = self._compress_for_api(image_bytes, max_bytes=3_500_000)
-        client = anthropic.AsyncAnthropic(api_key=self.anthropic_api_key)
         image_base64 = base64.b64encode(image_bytes).decode("utf-8")
         media_type = self._image_media_type(image_bytes)
         food_names = [item["name"] for item in food_items]
@@ -922,7 +923,8 @@ Return ONLY a JSON object where each key is the food name and the value is an ob
 
 Example: {{"banana": {{"quantity": 2, "unit": "pieces", "grams": 240}}, "grilled salmon": {{"quantity": 1, "unit": "fillet", "grams": 180}}, "steamed rice": {{"quantity": 1, "unit": "cups", "grams": 185}}, "chicken nuggets": {{"quantity": 6, "unit": "nuggets", "grams": 108}}}}"""
 
-        result = await client.messages.create(
+        result = await get_llm_gateway().create(
+            "food_recognition",
             model="claude-sonnet-4-6",
             max_tokens=500,
             messages=[
@@ -1017,9 +1019,9 @@ Example: {{"banana": {{"quantity": 2, "unit": "pieces", "grams": 240}}, "grilled
         self, image_bytes: bytes, food_items: List[Dict[str, Any]]
     ) -> List[Dict[str, Any]]:
         """Estimate portions using OpenAI Vision API."""
-        import openai
+        from common.ai.llm_gateway import get_llm_gateway
 
-        client = openai.AsyncOpenAI(api_key=self.openai_api_key)
+        client = get_llm_gateway().client("openai")
 
         # Convert image to base64
         image_base64 = base64.b64encode(image_bytes).decode("utf-8")
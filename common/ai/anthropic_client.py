@@ -1,23 +1,23 @@
 """
 Anthropic Client
-Provides a singleton AsyncAnthropic client for AI operations
+Provides the shared AsyncAnthropic client for AI operations.
+
+The client is owned by the LLM gateway (``common.ai.llm_gateway``); prefer
+``get_llm_gateway().create(...)`` so calls get concurrency budgets,
+memoization and usage metrics.
 """
 
-import os
-from typing import Optional
 import anthropic
 
+from common.ai.llm_gateway import get_llm_gateway
 from common.utils.logging import get_logger
 
 logger = get_logger(__name__)
 
-# Global Anthropic client instance
-_async_anthropic_client: Optional[anthropic.AsyncAnthropic] = None  # pylint: disable=invalid-name
-
 
 def get_anthropic_client() -> anthropic.AsyncAnthropic:
     """
-    Get async Anthropic client singleton.
+    Get the gateway's pooled async Anthropic client.
 
     Returns:
         anthropic.AsyncAnthropic: Async Anthropic client instance
@@ -25,21 +25,13 @@ def get_anthropic_client() -> anthropic.AsyncAnthropic:
     Raises:
         ValueError: If ANTHROPIC_API_KEY is not configured
     """
-    global _async_anthropic_client  # pylint: disable=global-statement,invalid-name
-
-    if _async_anthropic_client is None:
-        api_key = os.getenv("ANTHROPIC_API_KEY")
-        if not api_key:
-            raise ValueError("ANTHROPIC_API_KEY environment variable not set")
-
-        _async_anthropic_client = anthropic.AsyncAnthropic(api_key=api_key)
-        logger.info("Anthropic async client initialized successfully")
-
-    return _async_anthropic_client
+    gateway = get_llm_gateway()
+    if not gateway.api_key("anthropic"):
+        raise ValueError("ANTHROPIC_API_KEY environment variable not set")
+    return gateway.client("anthropic")
 
 
 def reset_anthropic_client() -> None:
     """Reset the Anthropic client singleton (useful for testing)"""
-    global _async_anthropic_client  # pylint: disable=global-statement,invalid-name
-    _async_anthropic_client = None
+    get_llm_gateway().drop_client("anthropic")
     logger.info("Anthropic client reset")
@@ -0,0 +1,527 @@
+"""
+LLM Gateway
+Shared entry point for every Anthropic call made by the services.
+
+Callers used to build an ``anthropic.AsyncAnthropic`` per request, so every
+call paid a fresh connection pool and TLS handshake, identical prompts were
+paid for again, and nothing bounded how many calls one feature could have
+in flight.  ``LLMGateway`` keeps:
+
+  * one pooled client per provider (per event loop), rebuilt only when the
+    API key changes (the replaced client is closed).  Clients keep the SDK's
+    retries but with a per-attempt timeout far below the SDK's ten minutes,
+    so a stalled attempt is retried instead of holding a feature slot;
+  * per-feature concurrency semaphores, so a burst of one feature (e.g.
+    image scans) cannot starve chat;
+  * an opt-in content-hash memo for deterministic prompts: identical
+    request parameters share one in-flight call and reuse the result
+    until it expires.  Replies cut off at max_tokens, or rejected by the
+    caller's ``memo_if`` check (e.g. ``json_reply``), are not kept;
+  * ``cache_control`` markers on static system prompts (``cache_system=True``
+    or ``system_blocks()``), so Anthropic prompt caching bills the shared
+    prefix at the cached-read rate;
+  * per-feature token usage (including cache reads/writes) and latency,
+    reported by ``stats()``.
+
+Usage::
+
+    from common.ai.llm_gateway import get_llm_gateway
+
+    result = await get_llm_gateway().create(
+        "lab_intelligence",
+        model="claude-sonnet-4-6",
+        max_tokens=800,
+        messages=[{"role": "user", "content": prompt}],
+        memoize=True,
+    )
+
+    async with get_llm_gateway().stream("ai_chat", **params) as stream:
+        async for text in stream.text_stream:
+            ...
+
+Configuration:
+    LLM_CONCURRENCY_DEFAULT     in-flight calls per feature (default 8)
+    LLM_CONCURRENCY_<FEATURE>   override for one feature, e.g.
+                                LLM_CONCURRENCY_AI_CHAT=16
+    LLM_MEMO_TTL_S              memoized response lifetime (default 3600)
+    LLM_MEMO_MAX_ENTRIES        memoized responses kept (default 512)
+    LLM_POOL_MAX_CONNECTIONS    HTTP connections per provider (default 50)
+    LLM_MAX_RETRIES             SDK retries per call (default 2)
+    LLM_TIMEOUT_S               per-attempt timeout in seconds (default 60);
+                                a call's own ``timeout`` overrides it
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict, defaultdict
+from contextlib import asynccontextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import anthropic
+
+from common.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+_CACHE_CONTROL = {"type": "ephemeral"}
+
+SystemPrompt = Union[str, List[Dict[str, Any]]]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def system_blocks(static: str, dynamic: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    System prompt as content blocks with the cacheable prefix marked.
+
+    *static* is identical across calls (agent persona, specialist prompt) and
+    carries the cache breakpoint; *dynamic* (per-user context) follows it.
+    """
+    blocks: List[Dict[str, Any]] = [
+        {"type": "text", "text": static, "cache_control": dict(_CACHE_CONTROL)}
+    ]
+    if dynamic:
+        blocks.append({"type": "text", "text": dynamic})
+    return blocks
+
+
+def _mark_system(system: SystemPrompt) -> SystemPrompt:
+    """Add a cache breakpoint to a plain system prompt (blocks pass through)."""
+    if isinstance(system, str) and system:
+        return system_blocks(system)
+    return system
+
+
+def json_reply(result: Any) -> bool:
+    """``memo_if`` check: the reply text holds a JSON object or array.
+
+    Tolerates markdown fences and prose around the JSON, as the callers'
+    own parsing does.
+    """
+    text = result.content[0].text
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return False
+    start = min(starts)
+    end = text.rfind("}" if text[start] == "{" else "]")
+    try:
+        json.loads(text[start : end + 1])
+    except ValueError:
+        return False
+    return True
+
+
+def memo_key(params: Dict[str, Any]) -> str:
+    """Content hash of a request's parameters."""
+    canonical = json.dumps(params, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class _FeatureStats:  # pylint: disable=too-few-public-methods
+    """Usage counters for one feature (process lifetime)."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.memo_hits = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.cache_read_tokens = 0
+        self.cache_write_tokens = 0
+        self.latency_total_s = 0.0
+        self.latency_max_s = 0.0
+        self.wait_total_s = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        completed = self.calls - self.errors
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "memo_hits": self.memo_hits,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cache_read_tokens": self.cache_read_tokens,
+            "cache_write_tokens": self.cache_write_tokens,
+            "avg_latency_ms": (
+                round(self.latency_total_s / completed * 1000, 1) if completed else 0.0
+            ),
+            "max_latency_ms": round(self.latency_max_s * 1000, 1),
+            "avg_wait_ms": (
+                round(self.wait_total_s / self.calls * 1000, 1) if self.calls else 0.0
+            ),
+        }
+
+
+class LLMGateway:
+    """Pooled provider clients with concurrency budgets, memoization and metrics."""
+
+    def __init__(
+        self,
+        default_concurrency: Optional[int] = None,
+        memo_ttl_s: Optional[float] = None,
+        memo_max_entries: Optional[int] = None,
+    ):
+        self.default_concurrency = max(
+            1, default_concurrency or _env_int("LLM_CONCURRENCY_DEFAULT", 8)
+        )
+        self.memo_ttl_s = (
+            memo_ttl_s if memo_ttl_s is not None else _env_float("LLM_MEMO_TTL_S", 3600)
+        )
+        self.memo_max_entries = memo_max_entries or _env_int(
+            "LLM_MEMO_MAX_ENTRIES", 512
+        )
+        self.max_connections = _env_int("LLM_POOL_MAX_CONNECTIONS", 50)
+        self.max_retries = max(0, _env_int("LLM_MAX_RETRIES", 2))
+        self.timeout_s = _env_float("LLM_TIMEOUT_S", 60.0)
+
+        # provider -> (client, api key, client class, loop)
+        self._clients: Dict[str, Tuple[Any, str, Any, Any]] = {}
+        # feature -> (semaphore, loop)
+        self._slots: Dict[str, Tuple[asyncio.Semaphore, Any]] = {}
+        # memo key -> (result, monotonic expiry), least recently used first
+        self._memo: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        self._memo_inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        self._stats: Dict[str, _FeatureStats] = defaultdict(_FeatureStats)
+        # close() tasks of replaced clients, kept referenced until done
+        self._closing: Set["asyncio.Task[None]"] = set()
+
+    # ------------------------------------------------------------------
+    # Provider clients
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def api_key(provider: str = "anthropic") -> str:
+        """Read the provider key at call time so .env loaded after import is picked up."""
+        env = {"anthropic": "ANTHROPIC_API_KEY", "openai": "OPENAI_API_KEY"}[provider]
+        return (os.environ.get(env) or "").strip()
+
+    def client(self, provider: str = "anthropic") -> Any:
+        """Return the pooled async client for *provider*.
+
+        Clients hold connections bound to the event loop they were first used
+        on, so a caller on a different loop gets a new client.
+        """
+        key = self.api_key(provider)
+        if provider == "anthropic":
+            factory = anthropic.AsyncAnthropic
+        elif provider == "openai":
+            from openai import AsyncOpenAI  # pylint: disable=import-outside-toplevel
+
+            factory = AsyncOpenAI
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        cached = self._clients.get(provider)
+        if cached is not None:
+            client, cached_key, cached_factory, cached_loop = cached
+            if (cached_key, cached_factory, cached_loop) == (key, factory, loop):
+                return client
+            self._retire(provider, client, cached_loop)
+
+        client = factory(
+            api_key=key,
+            max_retries=self.max_retries,
+            timeout=self.timeout_s,
+            **self._pool_kwargs(provider),
+        )
+        self._clients[provider] = (client, key, factory, loop)
+        logger.info(f"LLM gateway: {provider} client pool opened")
+        return client
+
+    def _pool_kwargs(self, provider: str) -> Dict[str, Any]:
+        if provider != "anthropic" or not hasattr(anthropic, "DefaultAsyncHttpxClient"):
+            return {}
+        import httpx  # pylint: disable=import-outside-toplevel
+
+        return {
+            "http_client": anthropic.DefaultAsyncHttpxClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                )
+            )
+        }
+
+    def drop_client(self, provider: str = "anthropic") -> None:
+        """Forget the pooled client for *provider*; the next call builds a new one."""
+        cached = self._clients.pop(provider, None)
+        if cached is not None:
+            self._retire(provider, cached[0], cached[3])
+
+    def _retire(self, provider: str, client: Any, loop: Any) -> None:
+        """Close a replaced client on the loop its connections belong to."""
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+        if loop is None or loop is current:
+            if current is None:
+                return  # no loop to drive close(); the pool is dropped with it
+            task = current.create_task(self._close_client(provider, client))
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+        elif loop.is_running():
+            asyncio.run_coroutine_threadsafe(self._close_client(provider, client), loop)
+        # A stopped loop's connections cannot be closed from here.
+
+    @staticmethod
+    async def _close_client(provider: str, client: Any) -> None:
+        close = getattr(client, "close", None)
+        if close is None:
+            return
+        try:
+            await close()
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning(f"Error closing {provider} client: {exc}")
+
+    async def close(self) -> None:
+        """Close every pooled client (idempotent)."""
+        clients, self._clients = self._clients, {}
+        for provider, (client, *_rest) in clients.items():
+            await self._close_client(provider, client)
+        loop = asyncio.get_running_loop()
+        retiring = [t for t in self._closing if t.get_loop() is loop]
+        if retiring:
+            await asyncio.gather(*retiring, return_exceptions=True)
+
+    # ------------------------------------------------------------------
+    # Concurrency budgets
+    # ------------------------------------------------------------------
+
+    def concurrency_limit(self, feature: str) -> int:
+        env = "LLM_CONCURRENCY_" + feature.upper().replace("-", "_")
+        return max(1, _env_int(env, self.default_concurrency))
+
+    def _semaphore(self, feature: str) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        entry = self._slots.get(feature)
+        if entry is None or entry[1] is not loop:
+            entry = (asyncio.Semaphore(self.concurrency_limit(feature)), loop)
+            self._slots[feature] = entry
+        return entry[0]
+
+    @asynccontextmanager
+    async def _slot(self, feature: str) -> AsyncIterator[_FeatureStats]:
+        stats = self._stats[feature]
+        stats.calls += 1
+        stats.waiting += 1
+        queued_at = time.perf_counter()
+        semaphore = self._semaphore(feature)
+        try:
+            await semaphore.acquire()
+        finally:
+            stats.waiting -= 1
+        stats.wait_total_s += time.perf_counter() - queued_at
+        stats.in_flight += 1
+        try:
+            yield stats
+        finally:
+            stats.in_flight -= 1
+            semaphore.release()
+
+    # ------------------------------------------------------------------
+    # Instrumentation
+    # ------------------------------------------------------------------
+
+    def _record(
+        self, feature: str, started: float, usage: Any, failed: bool, model: Any
+    ) -> None:
+        stats = self._stats[feature]
+        elapsed = time.perf_counter() - started
+        if failed:
+            stats.errors += 1
+        else:
+            stats.latency_total_s += elapsed
+            stats.latency_max_s = max(stats.latency_max_s, elapsed)
+        if usage is not None:
+            stats.input_tokens += getattr(usage, "input_tokens", 0) or 0
+            stats.output_tokens += getattr(usage, "output_tokens", 0) or 0
+            stats.cache_read_tokens += getattr(usage, "cache_read_input_tokens", 0) or 0
+            stats.cache_write_tokens += (
+                getattr(usage, "cache_creation_input_tokens", 0) or 0
+            )
+        logger.debug(
+            f"LLM {feature} ({model}) {'failed' if failed else 'ok'} "
+            f"in {elapsed * 1000:.0f}ms, usage={usage}"
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-feature usage, latency and memo counters."""
+        return {
+            "features": {name: s.as_dict() for name, s in sorted(self._stats.items())},
+            "memo_entries": len(self._memo),
+            "memo_in_flight": len(self._memo_inflight),
+            "default_concurrency": self.default_concurrency,
+        }
+
+    # ------------------------------------------------------------------
+    # Calls
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _prepare(params: Dict[str, Any], cache_system: bool) -> Dict[str, Any]:
+        if cache_system and params.get("system"):
+            params = {**params, "system": _mark_system(params["system"])}
+        return params
+
+    async def _create_now(self, feature: str, params: Dict[str, Any]) -> Any:
+        async with self._slot(feature):
+            started = time.perf_counter()
+            try:
+                result = await self.client("anthropic").messages.create(**params)
+            except BaseException:
+                self._record(feature, started, None, True, params.get("model"))
+                raise
+            self._record(
+                feature,
+                started,
+                getattr(result, "usage", None),
+                False,
+                params.get("model"),
+            )
+            return result
+
+    def _memo_get(self, key: str) -> Optional[Any]:
+        entry = self._memo.get(key)
+        if entry is None:
+            return None
+        result, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._memo[key]
+            return None
+        self._memo.move_to_end(key)
+        return result
+
+    def _memo_put(self, key: str, result: Any) -> None:
+        self._memo[key] = (result, time.monotonic() + self.memo_ttl_s)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_max_entries:
+            self._memo.popitem(last=False)
+
+    async def create(
+        self,
+        feature: str,
+        *,
+        memoize: bool = False,
+        memo_if: Optional[Callable[[Any], bool]] = None,
+        cache_system: bool = False,
+        **params: Any,
+    ) -> Any:
+        """
+        ``messages.create`` through the gateway.
+
+        With ``memoize=True`` an identical earlier request (same parameters,
+        including model and max_tokens) is answered from memory; only use it
+        for prompts where any valid answer may be reused.  A reply is kept
+        only if it was not cut off at max_tokens and *memo_if* (when given)
+        accepts it, so a reply the caller cannot parse is asked for again.
+        Memoized results are shared objects — read them, do not mutate them.
+        """
+        params = self._prepare(params, cache_system)
+        if not memoize:
+            return await self._create_now(feature, params)
+
+        key = memo_key(params)
+        cached = self._memo_get(key)
+        if cached is not None:
+            self._stats[feature].memo_hits += 1
+            return cached
+
+        future = self._memo_inflight.get(key)
+        if future is not None:
+            self._stats[feature].memo_hits += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._create_now(feature, params))
+        self._memo_inflight[key] = future
+
+        def _settle(done: "asyncio.Future[Any]") -> None:
+            self._memo_inflight.pop(key, None)
+            if done.cancelled() or done.exception() is not None:
+                return
+            result = done.result()
+            if getattr(result, "stop_reason", None) == "max_tokens":
+                return
+            try:
+                keep = memo_if is None or memo_if(result)
+            except Exception:  # pylint: disable=broad-except
+                keep = False
+            if keep:
+                self._memo_put(key, result)
+
+        future.add_done_callback(_settle)
+        # Shielded so a cancelled caller does not abort the call for the others.
+        return await asyncio.shield(future)
+
+    @asynccontextmanager
+    async def stream(
+        self, feature: str, *, cache_system: bool = False, **params: Any
+    ) -> AsyncIterator[Any]:
+        """``messages.stream`` through the gateway; the slot is held until the stream closes."""
+        params = self._prepare(params, cache_system)
+        async with self._slot(feature):
+            started = time.perf_counter()
+            usage = None
+            failed = True
+            try:
+                async with self.client("anthropic").messages.stream(**params) as stream:
+                    yield stream
+                    snapshot = getattr(stream, "current_message_snapshot", None)
+                    usage = getattr(snapshot, "usage", None)
+                failed = False
+            finally:
+                self._record(feature, started, usage, failed, params.get("model"))
+
+    def clear_memo(self) -> None:
+        """Forget every memoized response."""
+        self._memo.clear()
+
+
+_gateway: Optional[LLMGateway] = None  # pylint: disable=invalid-name
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide LLM gateway."""
+    global _gateway  # pylint: disable=global-statement,invalid-name
+    if _gateway is None:
+        _gateway = LLMGateway()
+    return _gateway
+
+
+async def close_llm_gateway() -> None:
+    """Close the gateway's pooled clients (call from the application lifespan)."""
+    if _gateway is not None:
+        await _gateway.close()
@@ -0,0 +1,395 @@
+"""
+In-process vector index for cosine top-k search.
+
+Embeddings are stored once as a float32 matrix with unit-length rows, so a
+query is a single matrix-vector product followed by ``np.argpartition``
+over the scores — no per-row Python loop and no re-normalising at query
+time.
+
+Layers:
+
+  * **Snapshot** — the bulk of the corpus.  ``prepare()`` writes it to disk
+    (``vectors.npy``, ``ids.json``, optional IVF files) in a versioned
+    directory and flips ``CURRENT`` atomically; ``load()`` maps
+    ``vectors.npy`` read-only with ``np.load(mmap_mode="r")``, so every
+    worker process on the host shares the same page-cache pages instead of
+    holding its own copy.  ``install()`` swaps a prepared snapshot in.
+  * **Delta** — vectors added since the snapshot (``upsert()``), kept in
+    process memory and scanned exactly.  A delta entry shadows the
+    snapshot row with the same id.
+
+Optional IVF partitioning (``ivf_lists > 0``): at build time rows are
+clustered with spherical k-means and grouped by nearest centroid; a query
+scores only the rows of its ``nprobe`` closest centroids, keeping search
+sublinear as the corpus grows.  Below ``ivf_lists * IVF_MIN_ROWS_PER_LIST``
+rows the exact flat scan is used.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+IVF_MIN_ROWS_PER_LIST = 39  # k-means needs a few dozen points per centroid
+_KMEANS_ITERATIONS = 10
+_KMEANS_SAMPLE_PER_LIST = 256
+_KEEP_SNAPSHOTS = 2
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy of *vectors* scaled to unit length (zero rows stay zero)."""
+    out = np.asarray(vectors, dtype=np.float32).copy()
+    norms = np.linalg.norm(out, axis=-1, keepdims=True)
+    np.divide(out, norms, out=out, where=norms > 0)
+    return out
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the *k* highest scores, best first."""
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+def _spherical_kmeans(vectors: np.ndarray, n_lists: int, seed: int = 0) -> np.ndarray:
+    """Unit-length centroids for *n_lists* partitions of unit *vectors*."""
+    rng = np.random.default_rng(seed)
+    sample_size = min(vectors.shape[0], n_lists * _KMEANS_SAMPLE_PER_LIST)
+    sample = np.asarray(
+        vectors[rng.choice(vectors.shape[0], sample_size, replace=False)]
+    )
+    centroids = sample[rng.choice(sample_size, n_lists, replace=False)].copy()
+    for _ in range(_KMEANS_ITERATIONS):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~sums.any(axis=1)
+        # Re-seed empty partitions from random sample points.
+        sums[empty] = sample[rng.choice(sample_size, int(empty.sum()))]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+def _assign(
+    vectors: np.ndarray, centroids: np.ndarray, chunk: int = 8192
+) -> np.ndarray:
+    out = np.empty(vectors.shape[0], dtype=np.int32)
+    for start in range(0, vectors.shape[0], chunk):
+        block = np.asarray(vectors[start : start + chunk])
+        out[start : start + chunk] = np.argmax(block @ centroids.T, axis=1)
+    return out
+
+
+class _Snapshot:
+    """Immutable base layer; swapped in whole so readers never see a mix."""
+
+    def __init__(
+        self,
+        ids: List[str],
+        matrix: np.ndarray,
+        centroids: Optional[np.ndarray] = None,
+        order: Optional[np.ndarray] = None,
+        offsets: Optional[np.ndarray] = None,
+        built_at: float = 0.0,
+        version: str = "",
+    ):
+        self.ids = ids
+        self.pos = {aid: i for i, aid in enumerate(ids)}
+        self.matrix = matrix
+        self.centroids = centroids  # IVF: (lists, dim) or None for flat
+        self.order = order  # row numbers grouped by list
+        self.offsets = offsets  # list i is order[offsets[i]:offsets[i + 1]]
+        self.built_at = built_at
+        self.version = version
+
+    @property
+    def dim(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 else 0
+
+    def candidate_rows(self, query: np.ndarray, nprobe: int) -> Optional[np.ndarray]:
+        """IVF rows to score for *query*, or None for a full scan."""
+        if self.centroids is None:
+            return None
+        lists = top_k(self.centroids @ query, nprobe)
+        return np.concatenate(
+            [self.order[self.offsets[i] : self.offsets[i + 1]] for i in lists]
+        )
+
+
+_EMPTY = _Snapshot([], np.empty((0, 0), dtype=np.float32))
+
+
+class VectorIndex:
+    """Cosine top-k over a snapshot matrix plus an in-memory delta."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ivf_lists: int = 0,
+        nprobe: int = 8,
+    ):
+        self.path = path
+        self.ivf_lists = max(0, ivf_lists)
+        self.nprobe = max(1, nprobe)
+        self._snap = _EMPTY
+        self._shadowed = np.zeros(0, dtype=bool)
+        self._delta_ids: List[str] = []
+        self._delta_pos: Dict[str, int] = {}
+        self._delta_rows: List[np.ndarray] = []
+        self._delta_seq: List[int] = []
+        self._delta_matrix: Optional[np.ndarray] = None
+        self._seq = 0
+        self._queries = 0
+        self._scanned = 0
+
+    def __len__(self) -> int:
+        return len(self._snap.ids) - int(self._shadowed.sum()) + len(self._delta_ids)
+
+    @property
+    def dim(self) -> int:
+        if self._snap.dim:
+            return self._snap.dim
+        return int(self._delta_rows[0].shape[0]) if self._delta_rows else 0
+
+    @property
+    def built_at(self) -> float:
+        """Wall-clock time the current snapshot was built (0 if none)."""
+        return self._snap.built_at
+
+    # ------------------------------------------------------------------
+    # Delta
+    # ------------------------------------------------------------------
+
+    def mark(self) -> int:
+        """Position in the update stream; pass to ``install(since=...)``."""
+        return self._seq
+
+    def upsert(self, item_id: str, vector: Sequence[float]) -> bool:
+        """Add or replace one vector; False if its dimension does not fit."""
+        row = normalize_rows(np.asarray(vector, dtype=np.float32))
+        if row.ndim != 1 or (self.dim and row.shape[0] != self.dim):
+            return False
+        self._seq += 1
+        at = self._delta_pos.get(item_id)
+        if at is None:
+            self._delta_pos[item_id] = len(self._delta_ids)
+            self._delta_ids.append(item_id)
+            self._delta_rows.append(row)
+            self._delta_seq.append(self._seq)
+        else:
+            self._delta_rows[at] = row
+            self._delta_seq[at] = self._seq
+        base = self._snap.pos.get(item_id)
+        if base is not None:
+            self._shadowed[base] = True
+        self._delta_matrix = None
+        return True
+
+    def _rebase_delta(self, snap: _Snapshot, since: int) -> None:
+        """Keep delta entries newer than *since* or absent from *snap*."""
+        keep = [
+            i
+            for i, aid in enumerate(self._delta_ids)
+            if self._delta_seq[i] > since or aid not in snap.pos
+        ]
+        if snap.dim:
+            keep = [i for i in keep if self._delta_rows[i].shape[0] == snap.dim]
+        self._delta_ids = [self._delta_ids[i] for i in keep]
+        self._delta_rows = [self._delta_rows[i] for i in keep]
+        self._delta_seq = [self._delta_seq[i] for i in keep]
+        self._delta_pos = {aid: i for i, aid in enumerate(self._delta_ids)}
+        self._delta_matrix = None
+        shadowed = np.zeros(len(snap.ids), dtype=bool)
+        for aid in self._delta_ids:
+            base = snap.pos.get(aid)
+            if base is not None:
+                shadowed[base] = True
+        self._snap, self._shadowed = snap, shadowed
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def prepare(
+        self, ids: Sequence[str], vectors: Iterable[Sequence[float]]
+    ) -> _Snapshot:
+        """
+        Normalise, partition and persist a new snapshot without installing it.
+
+        This is the expensive half of ``build()`` and touches no shared
+        state, so it can run in an executor thread.
+        """
+        ids = list(ids)
+        if not ids:
+            return _Snapshot(
+                [], np.empty((0, 0), dtype=np.float32), built_at=time.time()
+            )
+        if not isinstance(vectors, np.ndarray):
+            vectors = list(vectors)
+        matrix = normalize_rows(
+            np.asarray(vectors, dtype=np.float32).reshape(len(ids), -1)
+        )
+        centroids = order = offsets = None
+        if self.ivf_lists and len(ids) >= self.ivf_lists * IVF_MIN_ROWS_PER_LIST:
+            centroids = _spherical_kmeans(matrix, self.ivf_lists)
+            assign = _assign(matrix, centroids)
+            order = np.argsort(assign, kind="stable").astype(np.int64)
+            offsets = np.searchsorted(assign[order], np.arange(self.ivf_lists + 1))
+        snap = _Snapshot(ids, matrix, centroids, order, offsets, built_at=time.time())
+        return self._write(snap) if self.path else snap
+
+    def install(self, snapshot: _Snapshot, since: Optional[int] = None) -> None:
+        """
+        Swap in a snapshot from ``prepare()``.
+
+        Delta entries added after ``mark()`` returned *since* survive the
+        swap; older ones are dropped where the new snapshot covers them.
+        """
+        self._rebase_delta(snapshot, self._seq if since is None else since)
+
+    def build(self, ids: Sequence[str], vectors: Iterable[Sequence[float]]) -> None:
+        """Replace the snapshot with *ids*/*vectors* (persisted to ``path``)."""
+        self.install(self.prepare(ids, vectors))
+
+    def _write(self, snap: _Snapshot) -> _Snapshot:
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        target = os.path.join(self.path, version)
+        os.makedirs(target, exist_ok=True)
+        np.save(os.path.join(target, "vectors.npy"), snap.matrix)
+        if snap.centroids is not None:
+            np.save(os.path.join(target, "centroids.npy"), snap.centroids)
+            np.save(os.path.join(target, "order.npy"), snap.order)
+            np.save(os.path.join(target, "offsets.npy"), snap.offsets)
+        with open(os.path.join(target, "ids.json"), "w", encoding="utf-8") as fh:
+            json.dump({"ids": snap.ids, "built_at": snap.built_at}, fh)
+        current = os.path.join(self.path, "CURRENT")
+        with open(current + ".tmp", "w", encoding="utf-8") as fh:
+            fh.write(version)
+        os.replace(current + ".tmp", current)
+        self._prune(version)
+        # Serve from the mapped file like every other worker does.
+        return self._read(version) or snap
+
+    def _prune(self, current: str) -> None:
+        versions = sorted(
+            d for d in os.listdir(self.path) if d.startswith("v") and d != current
+        )
+        # Unlinking a mapped file is safe on POSIX; the pages live until unmapped.
+        for stale in versions[: max(0, len(versions) - (_KEEP_SNAPSHOTS - 1))]:
+            shutil.rmtree(os.path.join(self.path, stale), ignore_errors=True)
+
+    def _read(self, version: str) -> Optional[_Snapshot]:
+        target = os.path.join(self.path, version)
+        try:
+            with open(os.path.join(target, "ids.json"), encoding="utf-8") as fh:
+                meta = json.load(fh)
+            matrix = np.load(os.path.join(target, "vectors.npy"), mmap_mode="r")
+            ivf = None
+            if os.path.exists(os.path.join(target, "centroids.npy")):
+                ivf = tuple(
+                    np.load(os.path.join(target, f"{name}.npy"))
+                    for name in ("centroids", "order", "offsets")
+                )
+        except (OSError, ValueError):
+            return None
+        if matrix.shape[0] != len(meta["ids"]):
+            return None
+        return _Snapshot(
+            meta["ids"],
+            matrix,
+            *(ivf or (None, None, None)),
+            built_at=meta.get("built_at", 0.0),
+            version=version,
+        )
+
+    def current_version(self) -> Optional[str]:
+        """Version named by ``CURRENT`` on disk, if any."""
+        if not self.path:
+            return None
+        try:
+            with open(os.path.join(self.path, "CURRENT"), encoding="utf-8") as fh:
+                return fh.read().strip() or None
+        except OSError:
+            return None
+
+    def load(self) -> bool:
+        """Map the newest on-disk snapshot if it differs from the one in use."""
+        version = self.current_version()
+        if not version or version == self._snap.version:
+            return False
+        snap = self._read(version)
+        if snap is None:
+            return False
+        self._rebase_delta(snap, 0)
+        return True
+
+    # ------------------------------------------------------------------
+    # Query
+    # ------------------------------------------------------------------
+
+    def search(self, query: Sequence[float], k: int) -> List[Tuple[str, float]]:
+        """Top-*k* ``(id, cosine)`` pairs; empty if the dimension differs."""
+        q = normalize_rows(np.asarray(query, dtype=np.float32))
+        if k <= 0 or q.ndim != 1 or q.shape[0] != self.dim:
+            return []
+        self._queries += 1
+        snap = self._snap
+        ids: List[str] = []
+        parts: List[np.ndarray] = []
+
+        if snap.ids:
+            rows = snap.candidate_rows(q, self.nprobe)
+            if rows is None:
+                scores = snap.matrix @ q
+                live = ~self._shadowed
+            else:
+                scores = snap.matrix[rows] @ q
+                live = ~self._shadowed[rows]
+            scores = np.where(live, scores, -np.inf)
+            self._scanned += scores.shape[0]
+            best = top_k(scores, k)
+            best = best[np.isfinite(scores[best])]
+            base = best if rows is None else rows[best]
+            ids.extend(snap.ids[i] for i in base)
+            parts.append(scores[best])
+
+        if self._delta_ids:
+            if self._delta_matrix is None:
+                self._delta_matrix = np.stack(self._delta_rows)
+            scores = self._delta_matrix @ q
+            self._scanned += scores.shape[0]
+            best = top_k(scores, k)
+            ids.extend(self._delta_ids[i] for i in best)
+            parts.append(scores[best])
+
+        if not ids:
+            return []
+        merged = np.concatenate(parts)
+        return [(ids[i], float(merged[i])) for i in top_k(merged, k)]
+
+    def stats(self) -> Dict[str, object]:
+        snap = self._snap
+        return {
+            "vectors": len(self),
+            "dim": self.dim,
+            "snapshot_rows": len(snap.ids),
+            "delta_rows": len(self._delta_ids),
+            "mode": "ivf" if snap.centroids is not None else "flat",
+            "ivf_lists": 0 if snap.centroids is None else int(snap.centroids.shape[0]),
+            "nprobe": self.nprobe,
+            "mapped": isinstance(snap.matrix, np.memmap),
+            "snapshot_age_s": round(time.time() - snap.built_at, 1)
+            if snap.built_at
+            else None,
+            "queries": self._queries,
+            "avg_rows_scanned": round(self._scanned / self._queries, 1)
+            if self._queries
+            else 0.0,
+        }
@@ -0,0 +1,452 @@
+"""
+Micro-batching Kafka consumer runtime.
+
+Service consumers used to ``poll()`` one message, run its handler and
+commit that single offset before polling again, so every event paid for a
+handler round trip plus a synchronous commit.  ``BatchConsumer`` instead:
+
+  * pulls up to ``KAFKA_CONSUMER_BATCH`` messages per ``consume()`` call
+    (run in a worker thread so the event loop stays free);
+  * groups the batch by (topic, partition, key) and hands each group, in
+    offset order, to an async handler — so a handler can bulk-write a
+    user's readings in one statement;
+  * runs groups concurrently, at most ``KAFKA_CONSUMER_CONCURRENCY`` at a
+    time; events that share a key never run concurrently or out of order;
+  * retries failed groups with backoff and hands groups that still fail to
+    ``on_failure`` (``dead_letter_handler()`` republishes them to a
+    dead-letter topic);
+  * commits offsets once per batch, in a worker thread, after every group
+    has been handled.  A group that neither succeeded nor reached
+    ``on_failure`` is not committed: its partition is rewound to the
+    group's first offset and redelivered (later groups on that partition
+    are replayed with it, so handlers must be idempotent);
+  * reports per-batch processing time and consumer lag in ``stats()``.
+
+``InMemoryConsumer`` reads what an ``InMemoryProducer`` delivered, for
+tests and local runs without a broker.
+
+Configuration:
+    KAFKA_CONSUMER_BATCH          messages per consume() call (default 500)
+    KAFKA_CONSUMER_POLL_S         consume() timeout (default 1.0)
+    KAFKA_CONSUMER_CONCURRENCY    groups handled at once (default 16)
+    KAFKA_CONSUMER_RETRIES        retries of a failing group (default 3)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import json
+import os
+import random
+import time
+from collections import defaultdict
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from common.clients.kafka_publisher import InMemoryProducer
+from common.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+GroupKey = Tuple[str, int, Optional[str]]
+TopicPartitionKey = Tuple[str, int]
+GroupHandler = Callable[[str, Optional[str], List[Dict[str, Any]]], Awaitable[None]]
+FailureHandler = Callable[
+    [str, Optional[str], List[Dict[str, Any]], BaseException], Awaitable[None]
+]
+
+# librdkafka's RD_KAFKA_RESP_ERR__PARTITION_EOF; not an actual error.
+_PARTITION_EOF = -191
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def consumer_config(group_id: str, bootstrap_servers: str) -> Dict[str, Any]:
+    """librdkafka settings for batch consumption with manual commits."""
+    return {
+        "bootstrap.servers": bootstrap_servers,
+        "group.id": group_id,
+        "auto.offset.reset": "latest",
+        # Offsets are committed by BatchConsumer after each handled batch.
+        "enable.auto.commit": False,
+        "session.timeout.ms": 30000,
+        "heartbeat.interval.ms": 3000,
+        "max.poll.interval.ms": 300000,
+        # Let the broker fill batches instead of returning single messages.
+        "fetch.min.bytes": 64 * 1024,
+        "fetch.wait.max.ms": 100,
+    }
+
+
+def _topic_partition(topic: str, partition: int, offset: int) -> Any:
+    try:
+        from confluent_kafka import (  # pylint: disable=import-outside-toplevel
+            TopicPartition,
+        )
+    except ImportError:
+        return SimpleNamespace(topic=topic, partition=partition, offset=offset)
+    return TopicPartition(topic, partition, offset)
+
+
+def dead_letter_handler(publisher: Any, suffix: str = "-dlq") -> FailureHandler:
+    """
+    ``on_failure`` that republishes a failed group to ``<topic><suffix>``.
+
+    Each event keeps its key and gains ``x-source-topic`` / ``x-error``
+    headers.  Raises if the broker does not acknowledge every event, so the
+    group is redelivered rather than lost.
+    """
+
+    async def publish(
+        topic: str, key: Optional[str], events: List[Dict[str, Any]], exc: BaseException
+    ) -> None:
+        headers = {"x-source-topic": topic, "x-error": str(exc)[:512]}
+        deliveries = [
+            await publisher.send(topic + suffix, event, key=key, headers=headers)
+            for event in events
+        ]
+        await asyncio.gather(*deliveries)
+
+    return publish
+
+
+def _decode_key(msg: Any) -> Optional[str]:
+    key = msg.key()
+    if isinstance(key, bytes):
+        return key.decode("utf-8", errors="replace")
+    return key
+
+
+class BatchConsumer:
+    """Consume in batches, dispatch key groups concurrently, commit per batch."""
+
+    def __init__(
+        self,
+        consumer: Any,
+        handler: GroupHandler,
+        name: str = "consumer",
+        batch_size: Optional[int] = None,
+        poll_timeout_s: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        retry_base_s: float = 0.5,
+        on_failure: Optional[FailureHandler] = None,
+    ):
+        self.consumer = consumer
+        self.handler = handler
+        self.name = name
+        self.batch_size = batch_size or _env_int("KAFKA_CONSUMER_BATCH", 500)
+        self.poll_timeout_s = (
+            poll_timeout_s
+            if poll_timeout_s is not None
+            else float(os.environ.get("KAFKA_CONSUMER_POLL_S", "1.0"))
+        )
+        self.max_concurrency = max_concurrency or _env_int(
+            "KAFKA_CONSUMER_CONCURRENCY", 16
+        )
+        self.max_retries = (
+            max_retries
+            if max_retries is not None
+            else _env_int("KAFKA_CONSUMER_RETRIES", 3)
+        )
+        self.retry_base_s = retry_base_s
+        self.on_failure = on_failure
+        self.running = False
+        self._slots = asyncio.Semaphore(self.max_concurrency)
+        self._batches = 0
+        self._messages = 0
+        self._undecodable = 0
+        self._retries = 0
+        self._dead_lettered = 0
+        self._redelivered = 0
+        self._batch_failures = 0
+        self._commit_failures = 0
+        self._batch_ms_total = 0.0
+        self._batch_ms_max = 0.0
+        self._last_batch_size = 0
+        self._lag: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Loop
+    # ------------------------------------------------------------------
+
+    async def run(self) -> None:
+        """Consume until ``stop()``; closes the consumer on the way out."""
+        self.running = True
+        loop = asyncio.get_running_loop()
+        logger.info(f"📡 Starting batch consumer {self.name}")
+        try:
+            while self.running:
+                try:
+                    messages = await loop.run_in_executor(
+                        None,
+                        self.consumer.consume,
+                        self.batch_size,
+                        self.poll_timeout_s,
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    logger.error(f"❌ Kafka consume failed for {self.name}: {exc}")
+                    await asyncio.sleep(self.poll_timeout_s)
+                    continue
+                if not messages:
+                    continue
+                try:
+                    await self.process_batch(messages)
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Uncommitted: replayed after a restart or rebalance.
+                    self._batch_failures += 1
+                    logger.error(f"❌ Batch processing failed for {self.name}: {exc}")
+                    await asyncio.sleep(self.poll_timeout_s)
+        finally:
+            self.running = False
+            try:
+                self.consumer.close()
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.error(f"❌ Error closing consumer {self.name}: {exc}")
+            logger.info(f"🛑 Stopped batch consumer {self.name}")
+
+    def stop(self) -> None:
+        """Ask ``run()`` to exit after the batch in progress."""
+        self.running = False
+
+    # ------------------------------------------------------------------
+    # Batches
+    # ------------------------------------------------------------------
+
+    def group(self, messages: List[Any]) -> Dict[GroupKey, List[Dict[str, Any]]]:
+        """Decode *messages* into offset-ordered groups per (topic, partition, key)."""
+        return self._group(messages)[0]
+
+    def _group(
+        self, messages: List[Any]
+    ) -> Tuple[
+        Dict[GroupKey, List[Dict[str, Any]]],
+        Dict[GroupKey, int],
+        Dict[TopicPartitionKey, int],
+    ]:
+        """Groups, each group's first offset, and each partition's next offset."""
+        groups: Dict[GroupKey, List[Dict[str, Any]]] = defaultdict(list)
+        first_offsets: Dict[GroupKey, int] = {}
+        ends: Dict[TopicPartitionKey, int] = {}
+        for msg in messages:
+            err = msg.error()
+            if err is not None:
+                if getattr(err, "code", lambda: None)() != _PARTITION_EOF:
+                    logger.error(f"❌ Consumer error on {self.name}: {err}")
+                continue
+            ends[(msg.topic(), msg.partition())] = msg.offset() + 1
+            try:
+                event = json.loads(msg.value())
+            except (TypeError, ValueError) as exc:
+                self._undecodable += 1
+                logger.error(f"❌ Failed to parse message from {msg.topic()}: {exc}")
+                continue
+            group_key = (msg.topic(), msg.partition(), _decode_key(msg))
+            groups[group_key].append(event)
+            first_offsets.setdefault(group_key, msg.offset())
+        return groups, first_offsets, ends
+
+    async def _run_group(
+        self, group_key: GroupKey, events: List[Dict[str, Any]]
+    ) -> bool:
+        """False when the group was neither handled nor dead-lettered."""
+        topic, _, key = group_key
+        async with self._slots:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    await self.handler(topic, key, events)
+                    return True
+                except Exception as exc:  # pylint: disable=broad-except
+                    if attempt < self.max_retries:
+                        self._retries += 1
+                        delay = (
+                            self.retry_base_s
+                            * (2**attempt)
+                            * random.uniform(0.5, 1.5)
+                        )
+                        logger.warning(
+                            f"⚠️ Handler for {topic} key={key} failed ({exc}); retrying in {delay:.2f}s"
+                        )
+                        await asyncio.sleep(delay)
+                        continue
+                    logger.error(
+                        f"❌ Giving up on {len(events)} event(s) from {topic} key={key}: {exc}"
+                    )
+                    if self.on_failure is None:
+                        logger.error(
+                            f"❌ No dead-letter handler on {self.name}; redelivering"
+                        )
+                        return False
+                    try:
+                        await self.on_failure(topic, key, events, exc)
+                    except Exception as dlq_exc:  # pylint: disable=broad-except
+                        logger.error(
+                            f"❌ Dead-lettering {topic} key={key} failed ({dlq_exc}); redelivering"
+                        )
+                        return False
+                    self._dead_lettered += len(events)
+                    return True
+        return False
+
+    async def process_batch(self, messages: List[Any]) -> None:
+        """Handle one consumed batch, then commit its offsets."""
+        started = time.monotonic()
+        groups, first_offsets, ends = self._group(messages)
+        keys = list(groups)
+        handled = await asyncio.gather(*(self._run_group(k, groups[k]) for k in keys))
+
+        # A partition with an unhandled group resumes from that group.
+        rewind: Dict[TopicPartitionKey, int] = {}
+        for group_key, ok in zip(keys, handled):
+            if not ok:
+                tp, offset = group_key[:2], first_offsets[group_key]
+                rewind[tp] = min(offset, rewind.get(tp, offset))
+                self._redelivered += len(groups[group_key])
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                None, functools.partial(self._commit, ends, rewind)
+            )
+        except Exception as exc:  # pylint: disable=broad-except
+            self._commit_failures += 1
+            logger.error(f"❌ Offset commit failed for {self.name}: {exc}")
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self._batches += 1
+        self._messages += len(messages)
+        self._last_batch_size = len(messages)
+        self._batch_ms_total += elapsed_ms
+        self._batch_ms_max = max(self._batch_ms_max, elapsed_ms)
+        self._update_lag()
+
+    def _commit(
+        self, ends: Dict[TopicPartitionKey, int], rewind: Dict[TopicPartitionKey, int]
+    ) -> None:
+        """Blocking commit of this batch's offsets (run in a worker thread)."""
+        if not rewind:
+            # Commits the positions reached by this batch, in one request.
+            self.consumer.commit(asynchronous=False)
+            return
+        offsets = [
+            _topic_partition(topic, partition, rewind.get((topic, partition), end))
+            for (topic, partition), end in ends.items()
+        ]
+        for tp in offsets:
+            if (tp.topic, tp.partition) in rewind:
+                self.consumer.seek(tp)
+        self.consumer.commit(offsets=offsets, asynchronous=False)
+
+    def _update_lag(self) -> None:
+        try:
+            assignment = self.consumer.assignment()
+            if not assignment:
+                return
+            lag = {}
+            for tp in self.consumer.position(assignment):
+                _, high = self.consumer.get_watermark_offsets(tp, cached=True)
+                if tp.offset >= 0 and high >= 0:
+                    lag[f"{tp.topic}[{tp.partition}]"] = max(high - tp.offset, 0)
+            self._lag = lag
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.debug(f"Consumer lag unavailable for {self.name}: {exc}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self.running,
+            "batches": self._batches,
+            "messages": self._messages,
+            "last_batch_size": self._last_batch_size,
+            "avg_batch_ms": round(self._batch_ms_total / self._batches, 2)
+            if self._batches
+            else 0.0,
+            "max_batch_ms": round(self._batch_ms_max, 2),
+            "retries": self._retries,
+            "dead_lettered": self._dead_lettered,
+            "redelivered": self._redelivered,
+            "batch_failures": self._batch_failures,
+            "undecodable": self._undecodable,
+            "commit_failures": self._commit_failures,
+            "lag": dict(self._lag),
+            "total_lag": sum(self._lag.values()),
+        }
+
+
+class InMemoryConsumer:
+    """
+    Consumer stand-in over an ``InMemoryProducer``'s delivered messages.
+
+    Tracks a read position and a committed offset per (topic, partition) so
+    tests can check what a restart would replay.
+    """
+
+    def __init__(self, broker: InMemoryProducer, topics: List[str]):
+        self.broker = broker
+        self.topics = list(topics)
+        # (topic, partition) -> next offset to read
+        self.positions: Dict[TopicPartitionKey, int] = defaultdict(int)
+        self.committed: Dict[TopicPartitionKey, int] = {}
+        self.closed = False
+
+    def consume(self, num_messages: int = 1, timeout: float = -1) -> List[Any]:
+        batch: List[Any] = []
+        for topic in self.topics:
+            for msg in self.broker.topics.get(topic, []):
+                if len(batch) >= num_messages:
+                    break
+                if msg.offset() >= self.positions[(topic, msg.partition())]:
+                    batch.append(msg)
+        for msg in batch:
+            self.positions[(msg.topic(), msg.partition())] = msg.offset() + 1
+        if not batch and timeout and timeout > 0:
+            time.sleep(min(timeout, 0.005))
+        return batch
+
+    def seek(self, tp: Any) -> None:
+        self.positions[(tp.topic, tp.partition)] = tp.offset
+
+    def commit(
+        self,
+        message: Any = None,
+        offsets: Optional[List[Any]] = None,
+        asynchronous: bool = True,
+    ) -> None:
+        if offsets is None:
+            self.committed.update(self.positions)
+            return
+        for tp in offsets:
+            self.committed[(tp.topic, tp.partition)] = tp.offset
+
+    def assignment(self) -> List[Any]:
+        return [
+            SimpleNamespace(topic=t, partition=p, offset=-1)
+            for t in self.topics
+            for p in range(self.broker.partitions)
+        ]
+
+    def position(self, partitions: List[Any]) -> List[Any]:
+        return [
+            SimpleNamespace(
+                topic=tp.topic,
+                partition=tp.partition,
+                offset=self.positions.get((tp.topic, tp.partition), 0),
+            )
+            for tp in partitions
+        ]
+
+    def get_watermark_offsets(
+        self, tp: Any, cached: bool = False, timeout: float = None
+    ) -> Tuple[int, int]:
+        high = sum(
+            1
+            for m in self.broker.topics.get(tp.topic, [])
+            if m.partition() == tp.partition
+        )
+        return 0, high
+
+    def close(self) -> None:
+        self.closed = True
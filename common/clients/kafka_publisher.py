@@ -0,0 +1,407 @@
+"""
+Asynchronous, batched Kafka publishing.
+
+Service producers used to call ``producer.produce(...)`` followed by
+``producer.flush(timeout=10)`` for every event, so each event cost a full
+broker round trip and could block the event loop for up to ten seconds.
+``AsyncKafkaPublisher`` keeps one librdkafka producer per client id and
+never flushes on the request path:
+
+  * ``send()`` serialises the event, hands it to librdkafka and returns an
+    ``asyncio.Future`` that resolves with a ``DeliveryReport`` once the
+    broker acknowledges it.  Await it, or drop it for fire-and-forget —
+    failures are still counted and logged.
+  * A background thread polls the producer and resolves the futures on the
+    event loop.  librdkafka batches per partition (``linger.ms``,
+    ``batch.size``) and compresses each batch, so throughput is bounded by
+    the broker rather than by one event per round trip.
+  * At most ``KAFKA_OUTBOX_MAX`` events are in flight.  When the outbox is
+    full, ``send()`` waits for deliveries to free a slot (backpressure) and
+    raises ``PublishQueueFull`` after ``KAFKA_ENQUEUE_TIMEOUT_S``.
+  * ``close()`` flushes what is left; it is meant for shutdown only.
+
+``InMemoryProducer`` implements the slice of the confluent-kafka
+``Producer`` API used here and records messages per topic, for tests and
+for local runs without a broker.
+
+Configuration:
+    KAFKA_LINGER_MS          time a batch waits to fill (default 20)
+    KAFKA_BATCH_SIZE         bytes per partition batch (default 262144)
+    KAFKA_COMPRESSION        compression.type (default lz4)
+    KAFKA_OUTBOX_MAX         events in flight before send() waits (default 100000)
+    KAFKA_ENQUEUE_TIMEOUT_S  longest send() waits for space (default 5)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Union
+
+from common.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PublishQueueFull(Exception):
+    """The outbox stayed full for longer than the enqueue timeout."""
+
+
+class PublishError(Exception):
+    """The broker rejected or never acknowledged a message."""
+
+
+class DeliveryReport(NamedTuple):
+    topic: str
+    partition: int
+    offset: int
+    latency_ms: float
+
+
+def producer_config(client_id: str, bootstrap_servers: str) -> Dict[str, Any]:
+    """librdkafka settings for batched, compressed, idempotent publishing."""
+    return {
+        "bootstrap.servers": bootstrap_servers,
+        "client.id": client_id,
+        "acks": "all",
+        "enable.idempotence": True,
+        # Idempotence keeps ordering per partition with up to 5 in flight.
+        "max.in.flight.requests.per.connection": 5,
+        "linger.ms": _env_int("KAFKA_LINGER_MS", 20),
+        "batch.size": _env_int("KAFKA_BATCH_SIZE", 256 * 1024),
+        "compression.type": os.environ.get("KAFKA_COMPRESSION", "lz4"),
+        "queue.buffering.max.messages": _env_int("KAFKA_OUTBOX_MAX", 100_000),
+        "message.timeout.ms": 120_000,
+    }
+
+
+class _InMemoryMessage:
+    """Delivered-message handle with the confluent-kafka accessors."""
+
+    def __init__(self, topic: str, partition: int, offset: int, key, value, headers):
+        self._topic, self._partition, self._offset = topic, partition, offset
+        self._key, self._value, self._headers = key, value, headers
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def key(self) -> Optional[bytes]:
+        return self._key
+
+    def value(self) -> Optional[bytes]:
+        return self._value
+
+    def headers(self) -> Optional[list]:
+        return self._headers
+
+    def error(self) -> None:
+        return None
+
+
+class InMemoryProducer:
+    """
+    Broker stand-in with the confluent-kafka ``Producer`` surface used here.
+
+    ``produce()`` queues the message; ``poll()``/``flush()`` "deliver" it
+    (append to ``topics[topic]``) and fire its callback.  Messages with the
+    same key land on the same partition, in order.  ``fail_topics`` makes
+    deliveries to those topics fail, to exercise error paths.
+    """
+
+    def __init__(self, partitions: int = 3, max_messages: int = 100_000):
+        self.partitions = partitions
+        self.max_messages = max_messages
+        self.topics: Dict[str, List[_InMemoryMessage]] = defaultdict(list)
+        self.fail_topics: set = set()
+        self._queue: List[tuple] = []
+        self._lock = threading.Lock()
+        self._offsets: Dict[tuple, int] = defaultdict(int)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def produce(
+        self, topic, value=None, key=None, headers=None, on_delivery=None, **_kw
+    ):
+        with self._lock:
+            if len(self._queue) >= self.max_messages:
+                raise BufferError("Local: Queue full")
+            self._queue.append(
+                (topic, key, value, headers, on_delivery or _kw.get("callback"))
+            )
+
+    def poll(self, timeout: float = 0) -> int:
+        with self._lock:
+            batch, self._queue = self._queue, []
+        for topic, key, value, headers, callback in batch:
+            partition = hash(key) % self.partitions if key is not None else 0
+            offset = self._offsets[(topic, partition)]
+            self._offsets[(topic, partition)] += 1
+            msg = _InMemoryMessage(topic, partition, offset, key, value, headers)
+            err = None
+            if topic in self.fail_topics:
+                err = "Broker: Topic authorization failed"
+            else:
+                self.topics[topic].append(msg)
+            if callback:
+                callback(err, msg)
+        if not batch and timeout:
+            time.sleep(min(timeout, 0.005))
+        return len(batch)
+
+    def flush(self, timeout: float = 0) -> int:
+        self.poll(0)
+        return len(self._queue)
+
+    def values(self, topic: str) -> List[Any]:
+        """Decoded JSON payloads delivered to *topic*."""
+        return [json.loads(m.value()) for m in self.topics.get(topic, [])]
+
+
+Payload = Union[bytes, str, Dict[str, Any], List[Any]]
+
+
+def _encode(value: Payload) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, str):
+        return value.encode("utf-8")
+    return json.dumps(value, default=str).encode("utf-8")
+
+
+class AsyncKafkaPublisher:
+    """Non-blocking producer facade with delivery futures and a bounded outbox."""
+
+    def __init__(
+        self,
+        producer: Any,
+        outbox_max: Optional[int] = None,
+        enqueue_timeout_s: Optional[float] = None,
+        poll_interval_s: float = 0.05,
+    ):
+        self.producer = producer
+        self.outbox_max = outbox_max or _env_int("KAFKA_OUTBOX_MAX", 100_000)
+        self.enqueue_timeout_s = (
+            enqueue_timeout_s
+            if enqueue_timeout_s is not None
+            else float(os.environ.get("KAFKA_ENQUEUE_TIMEOUT_S", "5"))
+        )
+        self.poll_interval_s = poll_interval_s
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._in_flight = 0
+        self._sent = 0
+        self._delivered = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latency_total_ms = 0.0
+        self._by_topic: Dict[str, int] = defaultdict(int)
+        self._started_at = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Bound to the loop that first publishes (one loop per worker).
+            self._loop = loop
+            self._slots = asyncio.Semaphore(self.outbox_max)
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._poll_forever, name="kafka-publisher-poll", daemon=True
+            )
+            self._thread.start()
+
+    def _poll_forever(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.producer.poll(self.poll_interval_s)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.warning(f"Kafka poll failed: {exc}")
+                time.sleep(self.poll_interval_s)
+
+    def close(self, timeout: float = 10.0) -> int:
+        """Stop polling and flush; returns the number of undelivered messages."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=max(self.poll_interval_s * 4, 1.0))
+            self._thread = None
+        try:
+            remaining = self.producer.flush(timeout)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error(f"Kafka flush on shutdown failed: {exc}")
+            remaining = self._in_flight
+        if remaining:
+            logger.warning(
+                f"Kafka publisher closed with {remaining} undelivered message(s)"
+            )
+        return remaining
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def _on_delivery(
+        self,
+        future: "asyncio.Future[DeliveryReport]",
+        topic: str,
+        queued_at: float,
+    ) -> Callable[[Any, Any], None]:
+        loop = self._loop
+
+        def settle(err: Any, msg: Any) -> None:
+            latency_ms = (time.monotonic() - queued_at) * 1000
+            self._in_flight -= 1
+            self._slots.release()
+            if err is not None:
+                self._failed += 1
+                logger.error(f"❌ Message delivery to {topic} failed: {err}")
+                if not future.done():
+                    future.set_exception(PublishError(str(err)))
+                    # Fire-and-forget callers never retrieve it.
+                    future.exception()
+                return
+            self._delivered += 1
+            self._by_topic[topic] += 1
+            self._latency_total_ms += latency_ms
+            if not future.done():
+                future.set_result(
+                    DeliveryReport(
+                        msg.topic(), msg.partition(), msg.offset(), latency_ms
+                    )
+                )
+
+        def callback(err: Any, msg: Any) -> None:
+            # Runs on the poll thread (or in flush()); hop onto the loop.
+            if loop.is_closed():
+                return
+            loop.call_soon_threadsafe(settle, err, msg)
+
+        return callback
+
+    async def send(
+        self,
+        topic: str,
+        value: Payload,
+        key: Optional[Union[str, bytes]] = None,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> "asyncio.Future[DeliveryReport]":
+        """
+        Queue one message; returns its delivery future.
+
+        Waits only when the outbox is full.  Raises ``PublishQueueFull`` if
+        no slot frees up within the enqueue timeout.
+        """
+        self._ensure_started()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.enqueue_timeout_s)
+        except asyncio.TimeoutError:
+            self._rejected += 1
+            raise PublishQueueFull(f"Kafka outbox full ({self.outbox_max} in flight)")
+        future: "asyncio.Future[DeliveryReport]" = self._loop.create_future()
+        if isinstance(key, str):
+            key = key.encode("utf-8")
+        kwargs: Dict[str, Any] = {
+            "value": _encode(value),
+            "key": key,
+            "on_delivery": self._on_delivery(future, topic, time.monotonic()),
+        }
+        if headers:
+            kwargs["headers"] = [(k, v.encode("utf-8")) for k, v in headers.items()]
+        while True:
+            try:
+                self.producer.produce(topic, **kwargs)
+                break
+            except BufferError:
+                # librdkafka's own queue is full: let the poll thread drain it.
+                await asyncio.sleep(self.poll_interval_s)
+            except Exception:
+                self._slots.release()
+                self._failed += 1
+                raise
+        self._in_flight += 1
+        self._sent += 1
+        return future
+
+    async def send_and_wait(
+        self, topic: str, value: Payload, key=None, headers=None
+    ) -> DeliveryReport:
+        """Queue one message and wait for the broker's acknowledgement."""
+        return await (await self.send(topic, value, key, headers))
+
+    def stats(self) -> Dict[str, Any]:
+        uptime = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "in_flight": self._in_flight,
+            "outbox_max": self.outbox_max,
+            "sent": self._sent,
+            "delivered": self._delivered,
+            "failed": self._failed,
+            "rejected_full": self._rejected,
+            "avg_delivery_ms": round(self._latency_total_ms / self._delivered, 2)
+            if self._delivered
+            else 0.0,
+            "delivered_per_s": round(self._delivered / uptime, 1),
+            "by_topic": dict(self._by_topic),
+        }
+
+
+_publishers: Dict[str, AsyncKafkaPublisher] = {}
+
+
+def get_kafka_publisher(
+    client_id: str, bootstrap_servers: str
+) -> Optional[AsyncKafkaPublisher]:
+    """
+    Process-wide publisher for *client_id*, or None if Kafka is unavailable.
+
+    ``KAFKA_IN_MEMORY=1`` substitutes ``InMemoryProducer`` for local runs.
+    """
+    publisher = _publishers.get(client_id)
+    if publisher is not None:
+        return publisher
+    if os.environ.get("KAFKA_IN_MEMORY") == "1":
+        producer: Any = InMemoryProducer()
+    else:
+        try:
+            from confluent_kafka import (
+                Producer,
+            )  # pylint: disable=import-outside-toplevel
+
+            producer = Producer(producer_config(client_id, bootstrap_servers))
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.error(f"❌ Failed to initialize Kafka producer {client_id}: {exc}")
+            return None
+    publisher = AsyncKafkaPublisher(producer)
+    _publishers[client_id] = publisher
+    logger.info(f"✅ Kafka publisher {client_id} ready ({bootstrap_servers})")
+    return publisher
+
+
+def close_kafka_publishers(timeout: float = 10.0) -> None:
+    """Flush and stop every publisher; called on shutdown."""
+    for client_id, publisher in list(_publishers.items()):
+        publisher.close(timeout)
+        _publishers.pop(client_id, None)
@@ -0,0 +1,253 @@
+"""
+Shared, pooled aiohttp session for Supabase PostgREST calls.
+
+Every PostgREST helper used to open its own ``ClientSession`` with a fresh
+``TCPConnector`` and a freshly loaded certifi CA bundle, paying a full
+TCP + TLS handshake per query.  This module keeps one keep-alive connection
+pool per process (per event loop) and one cached SSL context, so repeated
+calls to the same Supabase host reuse warm connections.
+
+The pool is created lazily on first use and closed from the application
+lifespan::
+
+    from common.clients.postgrest_pool import get_postgrest_pool
+
+    session = await get_postgrest_pool().session()
+    async with session.get(url, headers=headers, timeout=timeout) as resp:
+        ...
+
+    # on shutdown
+    await close_postgrest_pool()
+
+Sizing is controlled by environment variables:
+
+    SUPABASE_POOL_LIMIT            total connections (default 100)
+    SUPABASE_POOL_LIMIT_PER_HOST   connections per host (default 50)
+    SUPABASE_POOL_KEEPALIVE_S      idle keep-alive in seconds (default 30)
+
+``PostgRESTPool.stats()`` reports, from aiohttp's public trace hooks,
+requests in flight, connections created and reused, and the time requests
+spent queued waiting for a free connection.  The open / idle / in-use
+connection counts are read from connector internals aiohttp does not
+publish; they are best effort and ``None`` when those fields are absent.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import ssl
+import time
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+import certifi
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_LIMIT = 100
+_DEFAULT_LIMIT_PER_HOST = 50
+_DEFAULT_KEEPALIVE_S = 30.0
+
+
+@lru_cache(maxsize=1)
+def shared_ssl_context() -> ssl.SSLContext:
+    """certifi-backed SSL context, loaded once per process."""
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class PostgRESTPool:
+    """Lazily created ``aiohttp.ClientSession`` with a bounded keep-alive pool."""
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+    ):
+        self.limit = limit or _env_int("SUPABASE_POOL_LIMIT", _DEFAULT_LIMIT)
+        self.limit_per_host = limit_per_host or _env_int(
+            "SUPABASE_POOL_LIMIT_PER_HOST", _DEFAULT_LIMIT_PER_HOST
+        )
+        self.keepalive_timeout = keepalive_timeout or _env_float(
+            "SUPABASE_POOL_KEEPALIVE_S", _DEFAULT_KEEPALIVE_S
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._connector: Optional[aiohttp.TCPConnector] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+
+        # Counters (process lifetime)
+        self._connections_created = 0
+        self._connections_reused = 0
+        self._queued_total = 0
+        self._queued_now = 0
+        self._wait_total_s = 0.0
+        self._wait_max_s = 0.0
+        self._in_flight = 0
+
+    # ------------------------------------------------------------------
+    # Tracing hooks — feed the pool metrics
+    # ------------------------------------------------------------------
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        trace = aiohttp.TraceConfig()
+
+        async def on_queued_start(_session, ctx: SimpleNamespace, _params) -> None:
+            ctx.queued_at = time.perf_counter()
+            self._queued_total += 1
+            self._queued_now += 1
+
+        async def on_queued_end(_session, ctx: SimpleNamespace, _params) -> None:
+            self._queued_now = max(0, self._queued_now - 1)
+            started = getattr(ctx, "queued_at", None)
+            if started is not None:
+                waited = time.perf_counter() - started
+                self._wait_total_s += waited
+                self._wait_max_s = max(self._wait_max_s, waited)
+
+        async def on_create_end(_session, _ctx, _params) -> None:
+            self._connections_created += 1
+
+        async def on_reuse(_session, _ctx, _params) -> None:
+            self._connections_reused += 1
+
+        async def on_request_start(_session, _ctx, _params) -> None:
+            self._in_flight += 1
+
+        async def on_request_done(_session, _ctx, _params) -> None:
+            self._in_flight = max(0, self._in_flight - 1)
+
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_create_end)
+        trace.on_connection_reuseconn.append(on_reuse)
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_done)
+        trace.on_request_exception.append(on_request_done)
+        return trace
+
+    # ------------------------------------------------------------------
+    # Session lifecycle
+    # ------------------------------------------------------------------
+
+    def _needs_new_session(self, loop: asyncio.AbstractEventLoop) -> bool:
+        return self._session is None or self._session.closed or self._loop is not loop
+
+    async def session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use.
+
+        A session is bound to the event loop it was created on; if the caller
+        runs on a different loop (e.g. a test harness creating a loop per test)
+        a new session is created for that loop.
+        """
+        loop = asyncio.get_running_loop()
+        if not self._needs_new_session(loop):
+            return self._session  # type: ignore[return-value]
+
+        if self._lock is None or self._loop is not loop:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._needs_new_session(loop):
+                self._connector = aiohttp.TCPConnector(
+                    ssl=shared_ssl_context(),
+                    limit=self.limit,
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=self.keepalive_timeout,
+                    ttl_dns_cache=300,
+                    enable_cleanup_closed=True,
+                )
+                self._session = aiohttp.ClientSession(
+                    connector=self._connector,
+                    trace_configs=[self._trace_config()],
+                )
+                self._loop = loop
+                logger.info(
+                    "PostgREST pool opened (limit=%d, per_host=%d, keepalive=%.0fs)",
+                    self.limit,
+                    self.limit_per_host,
+                    self.keepalive_timeout,
+                )
+        return self._session  # type: ignore[return-value]
+
+    async def close(self) -> None:
+        """Close the pooled session (idempotent)."""
+        session, self._session = self._session, None
+        self._connector = None
+        self._loop = None
+        if session is not None and not session.closed:
+            await session.close()
+            logger.info("PostgREST pool closed")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _connector_counts(self) -> Tuple[Optional[int], Optional[int]]:
+        """Best-effort (idle, in_use) from aiohttp connector internals."""
+        connector = self._connector
+        if connector is None or connector.closed:
+            return 0, 0
+        conns = getattr(connector, "_conns", None)
+        acquired = getattr(connector, "_acquired", None)
+        if not isinstance(conns, dict) or acquired is None:
+            return None, None
+        return sum(len(v) for v in conns.values()), len(acquired)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage for sizing under load."""
+        idle, in_use = self._connector_counts()
+        avg_wait_ms = (
+            (self._wait_total_s / self._queued_total) * 1000.0
+            if self._queued_total
+            else 0.0
+        )
+        return {
+            # Best effort: aiohttp does not publish these counts
+            "open": idle + in_use if idle is not None else None,
+            "idle": idle,
+            "in_use": in_use,
+            "requests_in_flight": self._in_flight,
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            "waiting": self._queued_now,
+            "queued_total": self._queued_total,
+            "wait_avg_ms": round(avg_wait_ms, 3),
+            "wait_max_ms": round(self._wait_max_s * 1000.0, 3),
+            "connections_created": self._connections_created,
+            "connections_reused": self._connections_reused,
+        }
+
+
+_pool: Optional[PostgRESTPool] = None
+
+
+def get_postgrest_pool() -> PostgRESTPool:
+    """Process-wide pool singleton."""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        _pool = PostgRESTPool()
+    return _pool
+
+
+async def close_postgrest_pool() -> None:
+    """Close the singleton pool; called from the application lifespan."""
+    if _pool is not None:
+        await _pool.close()
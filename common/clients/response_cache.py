@@ -0,0 +1,600 @@
+"""
+Per-user response cache for idempotent gateway GETs.
+
+Dashboards poll the same read-only gateway routes many times a minute and
+every poll used to travel to the upstream service.  ``ResponseCache`` keeps
+the raw upstream answer so repeated reads are served from the gateway:
+
+  * an in-process LRU bounded by total body bytes, in front of
+  * an optional Redis tier (one hash per user and route prefix), so
+    several gateway replicas share entries and invalidations.
+
+With Redis configured every user also has a generation counter there.
+``invalidate()`` bumps it, and an in-process entry is only served while
+the counter still reads what it did when the entry was remembered, so a
+write through one replica is seen by the others on their next read (one
+small ``GET`` per memory hit instead of the entry itself).
+
+Entries are partitioned by a SHA-256 of the caller's ``Authorization``
+header — never by a claim the gateway has not verified — and keyed by
+method, path, query string and the ``Accept`` / ``Accept-Encoding``
+request headers (bodies are stored still content-encoded).
+
+Freshness follows the upstream: ``Cache-Control: no-store`` or a
+``Set-Cookie`` disables storage, ``no-cache`` stores but revalidates every
+time, ``max-age`` / ``s-maxage`` set the lifetime (capped), otherwise the
+route's default TTL applies.  Stale entries carrying an upstream ``ETag``
+are revalidated with ``If-None-Match`` instead of refetched.  Every entry
+gets an ``ETag`` (the upstream one or a body digest), and a matching
+``If-None-Match`` from the client is answered with 304.
+
+Concurrent identical misses are collapsed: the first caller loads, the
+others await its result.  Writes call ``invalidate()`` with the route
+prefixes they affect.
+
+Sizing is controlled by environment variables:
+
+    GATEWAY_CACHE_MAX_MB          in-process body bytes (default 64)
+    GATEWAY_CACHE_MAX_ENTRY_KB    largest cacheable body (default 512)
+    GATEWAY_CACHE_MAX_TTL_S       cap on upstream max-age (default 300)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+import httpx
+from starlette.responses import Response
+
+from common.clients.upstream_proxy import filter_headers
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_MB = 64.0
+_DEFAULT_MAX_ENTRY_KB = 512
+_DEFAULT_MAX_TTL_S = 300.0
+
+# Headers that describe one particular transfer, not the cached body.
+_UNSTORED_HEADERS = frozenset({"content-length", "date", "age", "set-cookie"})
+_CACHE_CONTROL_TOKEN = re.compile(r"\s*([\w-]+)\s*(?:=\s*\"?([^\",]*)\"?)?\s*(?:,|$)")
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """``"private, max-age=60"`` -> ``{"private": None, "max-age": "60"}``."""
+    if not value:
+        return {}
+    return {
+        m.group(1).lower(): m.group(2)
+        for m in _CACHE_CONTROL_TOKEN.finditer(value)
+        if m.group(1)
+    }
+
+
+def response_ttl(
+    headers: Mapping[str, str], default_ttl_s: float, max_ttl_s: float
+) -> Optional[float]:
+    """Seconds an upstream response stays fresh, or None if it must not be stored."""
+    if "set-cookie" in headers:
+        return None
+    vary = headers.get("vary", "")
+    if "*" in vary:
+        return None
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        raw = directives.get(name)
+        if raw is not None:
+            try:
+                return max(0.0, min(float(raw), max_ttl_s))
+            except ValueError:
+                return 0.0
+    return min(default_ttl_s, max_ttl_s)
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an ``If-None-Match`` list against *etag* (RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+@dataclass
+class CachedResponse:
+    """Buffered upstream response plus its freshness metadata."""
+
+    status_code: int
+    headers: List[Tuple[str, str]]
+    body: bytes
+    etag: str
+    upstream_etag: Optional[str] = None
+    stored_at: float = field(default_factory=time.time)
+    expires_at: float = 0.0
+
+    @classmethod
+    def from_upstream(
+        cls, upstream: httpx.Response, body: bytes, ttl_s: float, decoded: bool = False
+    ) -> "CachedResponse":
+        """*decoded*: *body* is ``upstream.content``, no longer content-encoded."""
+        skip = _UNSTORED_HEADERS
+        if decoded:
+            skip = skip | {"content-encoding"}
+        headers = [
+            (k.decode("latin-1"), v.decode("latin-1"))
+            for k, v in filter_headers(upstream.headers.raw)
+            if k.decode("latin-1").lower() not in skip
+        ]
+        upstream_etag = upstream.headers.get("etag")
+        etag = upstream_etag or f'W/"{hashlib.sha256(body).hexdigest()[:32]}"'
+        if upstream_etag is None:
+            headers.append(("etag", etag))
+        now = time.time()
+        return cls(
+            status_code=upstream.status_code,
+            headers=headers,
+            body=body,
+            etag=etag,
+            upstream_etag=upstream_etag,
+            stored_at=now,
+            expires_at=now + ttl_s,
+        )
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now if now is not None else time.time()) < self.expires_at
+
+    def refreshed(self, ttl_s: float) -> "CachedResponse":
+        now = time.time()
+        return replace(self, stored_at=now, expires_at=now + ttl_s)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.body) + sum(len(k) + len(v) for k, v in self.headers) + 128
+
+    def header(self, name: str) -> Optional[str]:
+        name = name.lower()
+        for key, value in self.headers:
+            if key.lower() == name:
+                return value
+        return None
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "s": self.status_code,
+                "h": self.headers,
+                "b": base64.b64encode(self.body).decode("ascii"),
+                "e": self.etag,
+                "u": self.upstream_etag,
+                "t": self.stored_at,
+                "x": self.expires_at,
+            },
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def from_json(cls, raw: Union[str, bytes]) -> "CachedResponse":
+        data = json.loads(raw)
+        return cls(
+            status_code=data["s"],
+            headers=[tuple(h) for h in data["h"]],
+            body=base64.b64decode(data["b"]),
+            etag=data["e"],
+            upstream_etag=data.get("u"),
+            stored_at=data["t"],
+            expires_at=data["x"],
+        )
+
+    def render(
+        self, if_none_match: Optional[str] = None, cache_status: str = "HIT"
+    ) -> Response:
+        """Starlette response for a client, 304 when its validator matches."""
+        age = str(max(0, int(time.time() - self.stored_at)))
+        if self.status_code == 200 and etag_matches(if_none_match, self.etag):
+            headers = {"etag": self.etag, "age": age, "x-cache": cache_status}
+            for name in ("cache-control", "vary", "expires", "last-modified"):
+                value = self.header(name)
+                if value is not None:
+                    headers[name] = value
+            return Response(status_code=304, headers=headers)
+        response = Response(content=self.body, status_code=self.status_code)
+        response.raw_headers = [
+            (k.encode("latin-1"), v.encode("latin-1")) for k, v in self.headers
+        ] + [
+            (b"content-length", str(len(self.body)).encode("latin-1")),
+            (b"age", age.encode("latin-1")),
+            (b"x-cache", cache_status.encode("latin-1")),
+        ]
+        return response
+
+
+@dataclass
+class PassThrough:
+    """Upstream response too large to buffer; relay *head* then *chunks*."""
+
+    upstream: httpx.Response
+    head: bytes = b""
+    chunks: Optional[AsyncIterator[bytes]] = None
+
+
+LoadResult = Union[CachedResponse, PassThrough]
+Loader = Callable[[Optional[str]], Awaitable[httpx.Response]]
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional Redis) per-user GET cache with single-flight."""
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_entry_bytes: Optional[int] = None,
+        max_ttl_s: Optional[float] = None,
+        redis: Any = None,
+        key_prefix: str = "gateway:cache",
+    ):
+        self.max_bytes = max_bytes or int(
+            _env_float("GATEWAY_CACHE_MAX_MB", _DEFAULT_MAX_MB) * 1024 * 1024
+        )
+        self.max_entry_bytes = max_entry_bytes or int(
+            _env_float("GATEWAY_CACHE_MAX_ENTRY_KB", _DEFAULT_MAX_ENTRY_KB) * 1024
+        )
+        self.max_ttl_s = (
+            max_ttl_s
+            if max_ttl_s is not None
+            else _env_float("GATEWAY_CACHE_MAX_TTL_S", _DEFAULT_MAX_TTL_S)
+        )
+        # redis.asyncio client (or None); assigned once the lifespan connects.
+        self.redis = redis
+        self.key_prefix = key_prefix
+
+        # (partition, namespace, key) -> entry
+        self._entries: "OrderedDict[Tuple[str, str, str], CachedResponse]" = (
+            OrderedDict()
+        )
+        self._index: Dict[Tuple[str, str], Set[str]] = {}
+        # slot -> the partition's Redis generation when the entry was remembered
+        self._generations: Dict[Tuple[str, str, str], Optional[str]] = {}
+        self._bytes = 0
+        self._inflight: Dict[
+            Tuple[str, str, str], "asyncio.Future[Optional[CachedResponse]]"
+        ] = {}
+        self.counts: Dict[str, int] = {}
+
+    # ------------------------------------------------------------------
+    # Keys
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def partition(authorization: Optional[str]) -> Optional[str]:
+        """Cache partition for a caller; None for anonymous requests (not cached)."""
+        if not authorization:
+            return None
+        return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:32]
+
+    @staticmethod
+    def request_key(
+        method: str, path: str, query: str, headers: Mapping[str, str]
+    ) -> str:
+        raw = "\n".join(
+            (
+                method.upper(),
+                path,
+                query,
+                headers.get("accept", ""),
+                headers.get("accept-encoding", ""),
+            )
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:40]
+
+    def _redis_key(self, partition: str, namespace: str) -> str:
+        return f"{self.key_prefix}:{partition}:{namespace}"
+
+    def _generation_key(self, partition: str) -> str:
+        return f"{self.key_prefix}:gen:{partition}"
+
+    @property
+    def _generation_ttl_s(self) -> int:
+        # Outlives any fresh entry: one remembered before an invalidation
+        # always sees the bumped counter while it could still be served.
+        return int(self.max_ttl_s) * 2 + 60
+
+    # ------------------------------------------------------------------
+    # Storage
+    # ------------------------------------------------------------------
+
+    async def lookup(
+        self, partition: str, namespace: str, key: str
+    ) -> Optional[CachedResponse]:
+        """Entry for the key (possibly stale), memory first, then Redis."""
+        slot = (partition, namespace, key)
+        entry = self._entries.get(slot)
+        if entry is not None:
+            if self.redis is not None:
+                try:
+                    generation = await self.redis.get(self._generation_key(partition))
+                except Exception as e:
+                    # Redis down: the local copy is the best we have.
+                    logger.debug(f"Gateway cache Redis generation read failed: {e}")
+                    generation = self._generations.get(slot)
+                if _decode(generation) != self._generations.get(slot):
+                    # Invalidated through another replica.
+                    self._forget(slot)
+                    entry = None
+            if entry is not None:
+                self._entries.move_to_end(slot)
+                return entry
+        if self.redis is None:
+            return None
+        try:
+            pipe = self.redis.pipeline()
+            pipe.get(self._generation_key(partition))
+            pipe.hget(self._redis_key(partition, namespace), key)
+            generation, raw = await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Gateway cache Redis read failed: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            entry = CachedResponse.from_json(raw)
+        except (ValueError, KeyError, TypeError):
+            return None
+        self._remember(slot, entry, _decode(generation))
+        return entry
+
+    async def store(
+        self, partition: str, namespace: str, key: str, entry: CachedResponse
+    ) -> None:
+        if len(entry.body) > self.max_entry_bytes:
+            return
+        slot = (partition, namespace, key)
+        if self.redis is None:
+            self._remember(slot, entry)
+            return
+        redis_key = self._redis_key(partition, namespace)
+        # Stale entries are kept a while for ETag revalidation.
+        keep_s = int(max(entry.expires_at - time.time(), 0) + self.max_ttl_s) + 1
+        generation = None
+        try:
+            pipe = self.redis.pipeline()
+            pipe.get(self._generation_key(partition))
+            pipe.hset(redis_key, key, entry.to_json())
+            pipe.expire(redis_key, keep_s)
+            generation = (await pipe.execute())[0]
+        except Exception as e:
+            # Remembered untagged: dropped once Redis reports any invalidation.
+            logger.debug(f"Gateway cache Redis write failed: {e}")
+        self._remember(slot, entry, _decode(generation))
+
+    async def invalidate(self, partition: str, namespaces: Iterable[str]) -> None:
+        """Drop every entry of *partition* under the given route prefixes."""
+        namespaces = list(namespaces)
+        for namespace in namespaces:
+            for key in self._index.pop((partition, namespace), set()):
+                entry = self._entries.pop((partition, namespace, key), None)
+                self._generations.pop((partition, namespace, key), None)
+                if entry is not None:
+                    self._bytes -= entry.nbytes
+        self._count("invalidated")
+        if self.redis is None or not namespaces:
+            return
+        generation_key = self._generation_key(partition)
+        try:
+            pipe = self.redis.pipeline()
+            pipe.delete(
+                *(self._redis_key(partition, namespace) for namespace in namespaces)
+            )
+            pipe.incr(generation_key)
+            pipe.expire(generation_key, self._generation_ttl_s)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Gateway cache Redis invalidation failed: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._index.clear()
+        self._generations.clear()
+        self._bytes = 0
+
+    def _remember(
+        self,
+        slot: Tuple[str, str, str],
+        entry: CachedResponse,
+        generation: Optional[str] = None,
+    ) -> None:
+        self._forget(slot)
+        size = entry.nbytes
+        if size > self.max_bytes:
+            return
+        self._entries[slot] = entry
+        self._generations[slot] = generation
+        self._index.setdefault(slot[:2], set()).add(slot[2])
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._forget(next(iter(self._entries)))
+
+    def _forget(self, slot: Tuple[str, str, str]) -> None:
+        entry = self._entries.pop(slot, None)
+        if entry is None:
+            return
+        self._generations.pop(slot, None)
+        self._bytes -= entry.nbytes
+        keys = self._index.get(slot[:2])
+        if keys is not None:
+            keys.discard(slot[2])
+            if not keys:
+                del self._index[slot[:2]]
+
+    # ------------------------------------------------------------------
+    # Read-through with single-flight
+    # ------------------------------------------------------------------
+
+    async def load(
+        self,
+        partition: str,
+        namespace: str,
+        key: str,
+        loader: Loader,
+        default_ttl_s: float,
+        refresh: bool = False,
+    ) -> Tuple[LoadResult, str]:
+        """
+        Serve from cache or call *loader*; returns ``(result, outcome)``.
+
+        *loader* receives the upstream ETag to revalidate with (or None) and
+        returns an upstream response (streamed, or already read).  With
+        *refresh* a fresh entry is revalidated anyway (client ``no-cache``).
+        *outcome* is one of ``hit``, ``miss``, ``revalidated`` or
+        ``coalesced``.
+        """
+        slot = (partition, namespace, key)
+        cached = await self.lookup(partition, namespace, key)
+        if cached is not None and cached.is_fresh() and not refresh:
+            return cached, self._count("hit")
+
+        flight = self._inflight.get(slot)
+        if flight is not None:
+            shared = await asyncio.shield(flight)
+            if shared is not None:
+                return shared, self._count("coalesced")
+            upstream = await loader(None)
+            return await self._absorb(slot, upstream, None, 0.0, store=False)
+
+        flight = asyncio.get_running_loop().create_future()
+        flight.add_done_callback(_consume_exception)
+        self._inflight[slot] = flight
+        try:
+            stale = cached if cached is not None and cached.upstream_etag else None
+            upstream = await loader(stale.upstream_etag if stale else None)
+            result, outcome = await self._absorb(slot, upstream, stale, default_ttl_s)
+        except asyncio.CancelledError:
+            # Waiters fall back to their own upstream call.
+            flight.set_result(None)
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            raise
+        else:
+            flight.set_result(result if isinstance(result, CachedResponse) else None)
+            return result, outcome
+        finally:
+            self._inflight.pop(slot, None)
+
+    async def _absorb(
+        self,
+        slot: Tuple[str, str, str],
+        upstream: httpx.Response,
+        stale: Optional[CachedResponse],
+        default_ttl_s: float,
+        store: bool = True,
+    ) -> Tuple[LoadResult, str]:
+        ttl = response_ttl(upstream.headers, default_ttl_s, self.max_ttl_s)
+        if upstream.status_code == 304 and stale is not None:
+            await upstream.aclose()
+            entry = stale.refreshed(ttl or 0.0)
+            await self.store(*slot, entry)
+            return entry, self._count("revalidated")
+
+        if upstream.is_stream_consumed:
+            # Already read (and decoded) by the caller, e.g. ``forward_request``.
+            entry = CachedResponse.from_upstream(
+                upstream, upstream.content, ttl or 0.0, decoded=True
+            )
+        else:
+            declared = upstream.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > self.max_entry_bytes:
+                return PassThrough(upstream), self._count("miss")
+
+            chunks = upstream.aiter_raw()
+            body = bytearray()
+            try:
+                async for chunk in chunks:
+                    body += chunk
+                    if len(body) > self.max_entry_bytes:
+                        passthrough = PassThrough(upstream, bytes(body), chunks)
+                        return passthrough, self._count("miss")
+            except BaseException:
+                await upstream.aclose()
+                raise
+            await upstream.aclose()
+            entry = CachedResponse.from_upstream(upstream, bytes(body), ttl or 0.0)
+
+        # A zero-TTL entry is only worth keeping if it can be revalidated.
+        if (
+            store
+            and ttl is not None
+            and upstream.status_code == 200
+            and (ttl > 0 or entry.upstream_etag)
+        ):
+            await self.store(*slot, entry)
+        return entry, self._count("miss")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def _count(self, outcome: str) -> str:
+        self.counts[outcome] = self.counts.get(outcome, 0) + 1
+        return outcome
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self._inflight),
+            "redis": self.redis is not None,
+            **self.counts,
+        }
+
+
+def _decode(value: Union[str, bytes, None]) -> Optional[str]:
+    if isinstance(value, bytes):
+        return value.decode("ascii")
+    return value
+
+
+def _consume_exception(future: "asyncio.Future") -> None:
+    # Waiters may all have gone away; never log "exception was never retrieved".
+    if not future.cancelled():
+        future.exception()
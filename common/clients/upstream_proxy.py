@@ -0,0 +1,344 @@
+"""
+Pooled, streaming reverse-proxy helpers for the API gateway.
+
+The gateway used to open a fresh ``httpx.AsyncClient`` for every forwarded
+request, buffer the whole body with ``await request.json()`` and re-encode
+the upstream answer with ``JSONResponse(content=response.json())``.  That
+paid a TCP (+TLS) handshake per call, dropped query strings and most
+headers, broke on anything that was not JSON and held complete payloads in
+memory.
+
+This module keeps one long-lived client per upstream service and proxies
+bodies as byte streams in both directions:
+
+    pool = UpstreamPool()
+    client = pool.client("nutrition", "http://nutrition:8000", timeout=30.0)
+
+    upstream_request = build_upstream_request(client, request, "/meals")
+    upstream = await client.send(upstream_request, stream=True)
+    return stream_response(upstream)
+
+    # on shutdown
+    await pool.aclose()
+
+Request bodies are read from ``request.stream()`` only as fast as the
+upstream accepts them, and response chunks are pulled from the upstream only
+as fast as the downstream client drains them, so memory stays flat for large
+uploads, exports and server-sent events.  Clients negotiate HTTP/2 when the
+optional ``h2`` package is installed.
+
+Sizing is controlled by environment variables (per upstream):
+
+    GATEWAY_POOL_MAX_CONNECTIONS   total connections (default 100)
+    GATEWAY_POOL_MAX_KEEPALIVE     idle keep-alive connections (default 20)
+    GATEWAY_POOL_KEEPALIVE_S       idle keep-alive expiry in seconds (default 30)
+    GATEWAY_CONNECT_TIMEOUT_S      connect / pool-acquire timeout (default 5)
+
+``RouteTable`` maps public path prefixes (``/nutrition``) to registry
+service names, replacing per-service route functions.
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import logging
+import os
+from dataclasses import dataclass
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import StreamingResponse
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_MAX_CONNECTIONS = 100
+_DEFAULT_MAX_KEEPALIVE = 20
+_DEFAULT_KEEPALIVE_S = 30.0
+_DEFAULT_CONNECT_TIMEOUT_S = 5.0
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+# RFC 9110 §7.6.1 connection-specific headers, plus Host (set from the
+# upstream URL) — never forwarded in either direction.
+HOP_BY_HOP_HEADERS = frozenset(
+    {
+        "connection",
+        "keep-alive",
+        "proxy-authenticate",
+        "proxy-authorization",
+        "proxy-connection",
+        "te",
+        "trailer",
+        "trailers",
+        "transfer-encoding",
+        "upgrade",
+        "host",
+    }
+)
+
+# Rewritten by the gateway: the client's own values are never passed on.
+FORWARDED_HEADERS = frozenset(
+    {b"x-forwarded-for", b"x-forwarded-proto", b"x-forwarded-host"}
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# ----------------------------------------------------------------------
+# Routing
+# ----------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class ProxyRoute:
+    """Public path prefix served by one upstream service."""
+
+    prefix: str
+    service: str
+    upstream_prefix: str = ""
+    # Seconds GET responses may be served from the gateway response cache
+    # when the upstream sends no max-age (0 = route is not cached).
+    cache_ttl_s: float = 0.0
+
+    def upstream_path(self, path: str) -> str:
+        """Rewrite a public path (``/nutrition/meals``) to the upstream one."""
+        rest = path[len(self.prefix) :] if path.startswith(self.prefix) else path
+        if not rest.startswith("/"):
+            rest = "/" + rest
+        return f"{self.upstream_prefix}{rest}"
+
+
+class RouteTable:
+    """Longest-prefix lookup on path-segment boundaries."""
+
+    def __init__(self, routes: Iterable[ProxyRoute]):
+        self.routes: List[ProxyRoute] = sorted(
+            routes, key=lambda r: len(r.prefix), reverse=True
+        )
+
+    def __iter__(self):
+        return iter(self.routes)
+
+    def match(self, path: str) -> Optional[ProxyRoute]:
+        for route in self.routes:
+            if path == route.prefix or path.startswith(route.prefix + "/"):
+                return route
+        return None
+
+
+# ----------------------------------------------------------------------
+# Client pool
+# ----------------------------------------------------------------------
+
+
+class UpstreamPool:
+    """One lazily created, keep-alive ``httpx.AsyncClient`` per upstream."""
+
+    def __init__(
+        self,
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        keepalive_expiry: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+        http2: Optional[bool] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """*transport* replaces the network layer (``httpx.MockTransport`` in tests)."""
+        self.max_connections = max_connections or _env_int(
+            "GATEWAY_POOL_MAX_CONNECTIONS", _DEFAULT_MAX_CONNECTIONS
+        )
+        self.max_keepalive = max_keepalive or _env_int(
+            "GATEWAY_POOL_MAX_KEEPALIVE", _DEFAULT_MAX_KEEPALIVE
+        )
+        self.keepalive_expiry = keepalive_expiry or _env_float(
+            "GATEWAY_POOL_KEEPALIVE_S", _DEFAULT_KEEPALIVE_S
+        )
+        self.connect_timeout = connect_timeout or _env_float(
+            "GATEWAY_CONNECT_TIMEOUT_S", _DEFAULT_CONNECT_TIMEOUT_S
+        )
+        self.http2 = HTTP2_AVAILABLE if http2 is None else (http2 and HTTP2_AVAILABLE)
+        self._transport = transport
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._requests: Dict[str, int] = {}
+
+    def client(
+        self, service: str, base_url: str, timeout: float = 30.0
+    ) -> httpx.AsyncClient:
+        """Return the shared client for *service*, creating it on first use."""
+        client = self._clients.get(service)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                http2=self.http2,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+                timeout=httpx.Timeout(
+                    timeout, connect=self.connect_timeout, pool=self.connect_timeout
+                ),
+                transport=self._transport,
+                follow_redirects=False,
+            )
+            self._clients[service] = client
+            logger.info(
+                "Upstream pool opened for %s (%s, http2=%s)",
+                service,
+                base_url,
+                self.http2,
+            )
+        self._requests[service] = self._requests.get(service, 0) + 1
+        return client
+
+    async def aclose(self) -> None:
+        """Close every upstream client (idempotent)."""
+        clients, self._clients = self._clients, {}
+        for service, client in clients.items():
+            try:
+                await client.aclose()
+            except Exception as e:  # pragma: no cover - best effort on shutdown
+                logger.warning("Error closing upstream client %s: %s", service, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http2": self.http2,
+            "max_connections": self.max_connections,
+            "max_keepalive": self.max_keepalive,
+            "open_clients": sorted(self._clients),
+            "requests": dict(self._requests),
+        }
+
+
+# ----------------------------------------------------------------------
+# Streaming
+# ----------------------------------------------------------------------
+
+
+def _connection_tokens(headers: Sequence[Tuple[bytes, bytes]]) -> frozenset:
+    # Headers named in Connection are hop-by-hop too (RFC 9110 §7.6.1).
+    tokens = set()
+    for key, value in headers:
+        if key.lower() == b"connection":
+            tokens.update(t.strip().lower() for t in value.decode("latin-1").split(","))
+    return frozenset(tokens)
+
+
+def filter_headers(headers: Sequence[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    """Drop hop-by-hop headers, keeping order and repeated keys."""
+    drop = HOP_BY_HOP_HEADERS | _connection_tokens(headers)
+    return [(k, v) for k, v in headers if k.decode("latin-1").lower() not in drop]
+
+
+def has_body(request: Request) -> bool:
+    headers = request.headers
+    if "transfer-encoding" in headers:
+        return True
+    return headers.get("content-length", "0") not in ("", "0")
+
+
+def build_upstream_request(
+    client: httpx.AsyncClient,
+    request: Request,
+    upstream_path: str,
+    extra_headers: Optional[Dict[str, str]] = None,
+    drop_headers: Iterable[str] = (),
+) -> httpx.Request:
+    """
+    Mirror *request* onto *client*'s upstream at *upstream_path*.
+
+    The query string is passed through verbatim, end-to-end headers are
+    kept (repeated keys included) unless named in *drop_headers*, and the
+    body is streamed from ``request.stream()`` rather than buffered.
+    Incoming X-Forwarded-* headers are replaced: X-Forwarded-For becomes one
+    header extending the incoming chain with the client address, and
+    X-Forwarded-Proto / X-Forwarded-Host describe the gateway's own request.
+    """
+    drop = FORWARDED_HEADERS | {h.lower().encode("latin-1") for h in drop_headers}
+    headers = [
+        (k, v) for k, v in filter_headers(request.headers.raw) if k.lower() not in drop
+    ]
+    chain = [
+        hop.strip()
+        for value in request.headers.getlist("x-forwarded-for")
+        for hop in value.split(",")
+        if hop.strip()
+    ]
+    if request.client is not None:
+        chain.append(request.client.host)
+    if chain:
+        headers.append((b"x-forwarded-for", ", ".join(chain).encode("latin-1")))
+    headers.append((b"x-forwarded-proto", request.url.scheme.encode("latin-1")))
+    if "host" in request.headers:
+        headers.append((b"x-forwarded-host", request.headers["host"].encode("latin-1")))
+    for key, value in (extra_headers or {}).items():
+        name = key.lower().encode("latin-1")
+        headers = [(k, v) for k, v in headers if k.lower() != name]
+        headers.append((name, value.encode("latin-1")))
+
+    url = upstream_path
+    query = request.scope.get("query_string", b"")
+    if query:
+        url = f"{url}?{query.decode('latin-1')}"
+
+    return client.build_request(
+        request.method,
+        url,
+        headers=headers,
+        content=request.stream() if has_body(request) else None,
+    )
+
+
+async def _relay(
+    upstream: httpx.Response, head: bytes, chunks: Optional[AsyncIterator[bytes]]
+) -> AsyncIterator[bytes]:
+    try:
+        if head:
+            yield head
+        async for chunk in chunks if chunks is not None else upstream.aiter_raw():
+            yield chunk
+    finally:
+        await upstream.aclose()
+
+
+def stream_response(
+    upstream: httpx.Response,
+    head: bytes = b"",
+    chunks: Optional[AsyncIterator[bytes]] = None,
+) -> StreamingResponse:
+    """
+    Relay a ``send(..., stream=True)`` response without decoding it.
+
+    Bytes are passed through as received (``aiter_raw``), so
+    ``Content-Encoding`` and ``Content-Length`` stay valid; the upstream
+    connection returns to the pool once the body is drained or the client
+    disconnects.  A caller that already consumed part of the body passes
+    it as *head* together with the partially read *chunks* iterator.
+    """
+    response = StreamingResponse(
+        _relay(upstream, head, chunks), status_code=upstream.status_code
+    )
+    response.raw_headers = filter_headers(upstream.headers.raw)
+    return response
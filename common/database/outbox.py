@@ -0,0 +1,544 @@
+"""
+Transactional outbox for service events.
+
+Handlers used to publish to Kafka after their DB commit, so a broker
+outage either stalled the request or silently dropped the event.  With
+the outbox, the event is a row in ``event_outbox`` written by the same
+transaction as the data change (``enqueue_event``), and ``OutboxRelay``
+drains the table in the background:
+
+  * each batch is claimed in a short transaction: up to
+    ``OUTBOX_BATCH_SIZE`` due rows, in id order, get a lease
+    (``next_attempt_at`` pushed ``OUTBOX_CLAIM_S`` ahead) so no other relay
+    picks them up.  On Postgres an advisory lock serializes the claims;
+  * the claimed rows are handed to the shared ``AsyncKafkaPublisher``
+    (idempotent producer, batched and compressed) with no transaction
+    open.  Different partition keys (the user / patient id) are sent in
+    parallel, but each key's rows one after another, and a key stops at
+    its first failure, so a later event can never overtake a retry;
+  * the outcome is recorded in a second short transaction: delivered rows
+    are marked published, failed rows are retried with exponential backoff
+    and jitter (parked after ``OUTBOX_MAX_ATTEMPTS``), and rows that were
+    not tried give their lease back;
+  * rows waiting on a retry, and every later row with the same key, are
+    left out of the claim query, so blocked keys cost nothing and due rows
+    behind them are still reached;
+  * ``stats()`` reports lag (age of the oldest pending event), throughput
+    and failures.
+
+Delivery is at-least-once; consumers already dedupe on the event ids.
+
+Configuration:
+    OUTBOX_BATCH_SIZE          rows relayed per batch (default 500)
+    OUTBOX_POLL_INTERVAL_S     idle wait between empty polls (default 0.5)
+    OUTBOX_MAX_ATTEMPTS        deliveries tried before a row is parked (default 12)
+    OUTBOX_RETRY_BASE_S        first retry delay, doubled per attempt (default 1)
+    OUTBOX_RETRY_MAX_S         retry delay cap (default 300)
+    OUTBOX_RETENTION_H         how long published rows are kept (default 24)
+    OUTBOX_CLAIM_S             lease on a claimed batch; must exceed the producer's
+                               message.timeout.ms (default 180)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    Integer,
+    String,
+    Text,
+    delete,
+    exists,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.orm import aliased
+
+from common.models.base import Base
+from common.utils.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Arbitrary constant shared by every relay: pg_try_advisory_xact_lock key.
+_RELAY_LOCK_ID = 0x0E7B0C5
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: Optional[datetime]) -> Optional[datetime]:
+    # SQLite hands back naive datetimes; Postgres returns aware ones.
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class OutboxEvent(Base):
+    """One pending (or recently published) event."""
+
+    __tablename__ = "event_outbox"
+    __table_args__ = (
+        Index(
+            "idx_event_outbox_pending",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+        ),
+        Index(
+            "idx_event_outbox_pending_key",
+            "partition_key",
+            "id",
+            postgresql_where=text("published_at IS NULL"),
+        ),
+        Index("idx_event_outbox_published_at", "published_at"),
+    )
+
+    id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        autoincrement=True,
+    )
+    topic = Column(String(255), nullable=False)
+    partition_key = Column(String(255), nullable=True)
+    payload = Column(JSON, nullable=False)
+    headers = Column(JSON, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    published_at = Column(DateTime(timezone=True), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), nullable=True)
+    last_error = Column(Text, nullable=True)
+
+
+def enqueue_event(
+    session: Any,
+    topic: str,
+    payload: Dict[str, Any],
+    key: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> OutboxEvent:
+    """
+    Stage *payload* for *topic* in *session*'s transaction.
+
+    Works with sync and async sessions alike; the event becomes visible to
+    the relay only when the caller commits, and is discarded on rollback.
+    """
+    row = OutboxEvent(
+        topic=topic,
+        partition_key=key,
+        payload=payload,
+        headers=headers,
+        created_at=_utcnow(),
+        attempts=0,
+    )
+    session.add(row)
+    return row
+
+
+def backoff_delay(attempts: int, base_s: float, max_s: float) -> float:
+    """Exponential backoff with +/-50% jitter, so retries do not align."""
+    delay = min(max_s, base_s * (2 ** max(attempts - 1, 0)))
+    return delay * random.uniform(0.5, 1.5)
+
+
+def sendable(rows: Sequence[OutboxEvent], now: datetime) -> List[OutboxEvent]:
+    """
+    The rows of an id-ordered batch that may be sent now.
+
+    A row still waiting for its retry blocks every later row with the same
+    partition key, which keeps each key's events in order.
+    """
+    blocked = set()
+    ready = []
+    for row in rows:
+        if row.partition_key in blocked:
+            continue
+        due = _aware(row.next_attempt_at)
+        if due is not None and due > now:
+            if row.partition_key is not None:
+                blocked.add(row.partition_key)
+            continue
+        ready.append(row)
+    return ready
+
+
+class _Claimed(NamedTuple):
+    """What the relay needs of a claimed row once its transaction is over."""
+
+    id: int
+    topic: str
+    key: Optional[str]
+    payload: Dict[str, Any]
+    headers: Optional[Dict[str, str]]
+    attempts: int
+
+
+class OutboxRelay:
+    """Background task that moves ``event_outbox`` rows onto Kafka."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Any],
+        publisher: Any,
+        batch_size: Optional[int] = None,
+        poll_interval_s: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_s: Optional[float] = None,
+        retry_max_s: Optional[float] = None,
+        retention_h: Optional[float] = None,
+        claim_s: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size or _env_int("OUTBOX_BATCH_SIZE", 500)
+        self.poll_interval_s = (
+            poll_interval_s
+            if poll_interval_s is not None
+            else _env_float("OUTBOX_POLL_INTERVAL_S", 0.5)
+        )
+        self.max_attempts = max_attempts or _env_int("OUTBOX_MAX_ATTEMPTS", 12)
+        self.retry_base_s = (
+            retry_base_s
+            if retry_base_s is not None
+            else _env_float("OUTBOX_RETRY_BASE_S", 1.0)
+        )
+        self.retry_max_s = (
+            retry_max_s
+            if retry_max_s is not None
+            else _env_float("OUTBOX_RETRY_MAX_S", 300.0)
+        )
+        self.retention = timedelta(
+            hours=retention_h or _env_float("OUTBOX_RETENTION_H", 24.0)
+        )
+        self.claim_s = claim_s or _env_float("OUTBOX_CLAIM_S", 180.0)
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+        self._last_purge = 0.0
+        self._published = 0
+        self._failed = 0
+        self._parked = 0
+        self._batches = 0
+        self._batch_ms_total = 0.0
+        self._lag_s = 0.0
+        self._pending_seen = 0
+        self._last_error: Optional[str] = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(), name="outbox-relay")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def wake(self) -> None:
+        """Skip the idle wait (e.g. right after a handler committed events)."""
+        self._wake.set()
+
+    async def run(self) -> None:
+        while True:
+            try:
+                relayed = await self.relay_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pylint: disable=broad-except
+                self._last_error = str(exc)
+                logger.error(f"❌ Outbox relay batch failed: {exc}")
+                relayed = 0
+            if relayed >= self.batch_size:
+                continue  # backlog: go straight to the next batch
+            self._wake.clear()
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Relaying
+    # ------------------------------------------------------------------
+
+    async def _acquire_lock(self, session: Any) -> bool:
+        bind = getattr(session, "bind", None)
+        if bind is None or bind.dialect.name != "postgresql":
+            return True
+        result = await session.execute(
+            text("SELECT pg_try_advisory_xact_lock(:lock_id)"),
+            {"lock_id": _RELAY_LOCK_ID},
+        )
+        return bool(result.scalar())
+
+    def _pending(self, model: Any = OutboxEvent) -> List[Any]:
+        return [model.published_at.is_(None), model.attempts < self.max_attempts]
+
+    def _claim_query(self, now: datetime):
+        """Due rows, in id order, that no earlier row with their key is waiting behind."""
+        earlier = aliased(OutboxEvent)
+        return (
+            select(OutboxEvent)
+            .where(
+                *self._pending(),
+                or_(
+                    OutboxEvent.next_attempt_at.is_(None),
+                    OutboxEvent.next_attempt_at <= now,
+                ),
+                ~exists().where(
+                    *self._pending(earlier),
+                    earlier.partition_key == OutboxEvent.partition_key,
+                    earlier.id < OutboxEvent.id,
+                    earlier.next_attempt_at > now,
+                ),
+            )
+            .order_by(OutboxEvent.id)
+            .limit(self.batch_size)
+        )
+
+    async def relay_once(self) -> int:
+        """Relay one batch; returns the number of events delivered."""
+        started = time.monotonic()
+        claimed = await self._claim()
+        if not claimed:
+            return 0
+        outcomes = await self._deliver(claimed)
+        delivered = await self._record(claimed, outcomes)
+        self._batches += 1
+        self._batch_ms_total += (time.monotonic() - started) * 1000
+        return delivered
+
+    async def _claim(self) -> List[_Claimed]:
+        async with self.session_factory() as session:
+            if not await self._acquire_lock(session):
+                await session.rollback()
+                return []  # another relay is claiming right now
+            now = _utcnow()
+            oldest = (
+                await session.execute(
+                    select(OutboxEvent.created_at)
+                    .where(*self._pending())
+                    .order_by(OutboxEvent.id)
+                    .limit(1)
+                )
+            ).scalar()
+            self._lag_s = (now - _aware(oldest)).total_seconds() if oldest else 0.0
+            rows = sendable(
+                (await session.execute(self._claim_query(now))).scalars().all(), now
+            )
+            self._pending_seen = len(rows)
+            claimed = [
+                _Claimed(
+                    r.id,
+                    r.topic,
+                    r.partition_key,
+                    r.payload,
+                    r.headers,
+                    r.attempts or 0,
+                )
+                for r in rows
+            ]
+            if claimed:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_([c.id for c in claimed]))
+                    .values(next_attempt_at=now + timedelta(seconds=self.claim_s))
+                    .execution_options(synchronize_session=False)
+                )
+            await self._purge(session, now)
+            await session.commit()
+        return claimed
+
+    async def _deliver(
+        self, claimed: List[_Claimed]
+    ) -> Dict[int, Optional[BaseException]]:
+        """
+        Send *claimed* and wait for the broker; row id -> error (None if delivered).
+
+        Rows are sent in waves holding at most one row per partition key; a
+        key's next row goes out only after the previous one was delivered.
+        Rows left out after a failure are missing from the result.
+        """
+        lanes: Dict[Any, List[_Claimed]] = {}
+        for row in claimed:
+            lanes.setdefault(
+                row.key if row.key is not None else ("row", row.id), []
+            ).append(row)
+        queues = list(lanes.values())
+        outcomes: Dict[int, Optional[BaseException]] = {}
+        # Stop waiting well before the lease runs out and another relay may claim the rows.
+        deadline = time.monotonic() + self.claim_s * 0.9
+        while queues:
+            wave = [queue.pop(0) for queue in queues]
+            futures = {}
+            for row in wave:
+                try:
+                    futures[row.id] = await self.publisher.send(
+                        row.topic, row.payload, key=row.key, headers=row.headers
+                    )
+                except Exception as exc:  # pylint: disable=broad-except
+                    # Outbox full / producer gone: fail this row, keep going.
+                    outcomes[row.id] = exc
+            if futures:
+                await asyncio.wait(
+                    futures.values(), timeout=max(deadline - time.monotonic(), 0.0)
+                )
+            for row_id, future in futures.items():
+                if not future.done():
+                    outcomes[row_id] = asyncio.TimeoutError(
+                        "delivery not confirmed before the claim expired"
+                    )
+                elif future.cancelled():
+                    outcomes[row_id] = asyncio.CancelledError()
+                else:
+                    outcomes[row_id] = future.exception()
+            queues = [
+                queue
+                for queue, row in zip(queues, wave)
+                if queue and outcomes[row.id] is None
+            ]
+        return outcomes
+
+    async def _record(
+        self, claimed: List[_Claimed], outcomes: Dict[int, Optional[BaseException]]
+    ) -> int:
+        now = _utcnow()
+        delivered_ids = [
+            row.id for row in claimed if row.id in outcomes and outcomes[row.id] is None
+        ]
+        released_ids = [row.id for row in claimed if row.id not in outcomes]
+        async with self.session_factory() as session:
+            if delivered_ids:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(delivered_ids))
+                    .values(published_at=now)
+                    .execution_options(synchronize_session=False)
+                )
+            if released_ids:
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(released_ids))
+                    .values(next_attempt_at=None)
+                    .execution_options(synchronize_session=False)
+                )
+            for row in claimed:
+                error = outcomes.get(row.id)
+                if error is None:
+                    continue
+                attempts = row.attempts + 1
+                await session.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id == row.id)
+                    .values(
+                        attempts=attempts,
+                        last_error=str(error)[:1000],
+                        next_attempt_at=now
+                        + timedelta(
+                            seconds=backoff_delay(
+                                attempts, self.retry_base_s, self.retry_max_s
+                            )
+                        ),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                self._failed += 1
+                if attempts >= self.max_attempts:
+                    self._parked += 1
+                    logger.error(
+                        f"❌ Outbox event {row.id} to {row.topic} parked after {attempts} attempts: {error}"
+                    )
+            await session.commit()
+        self._published += len(delivered_ids)
+        return len(delivered_ids)
+
+    async def _purge(self, session: Any, now: datetime) -> None:
+        if time.monotonic() - self._last_purge < 300:
+            return
+        self._last_purge = time.monotonic()
+        await session.execute(
+            delete(OutboxEvent)
+            .where(OutboxEvent.published_at < now - self.retention)
+            .execution_options(synchronize_session=False)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "lag_s": round(self._lag_s, 3),
+            "pending_in_last_batch": self._pending_seen,
+            "published": self._published,
+            "failed_attempts": self._failed,
+            "parked": self._parked,
+            "batches": self._batches,
+            "avg_batch_ms": round(self._batch_ms_total / self._batches, 2)
+            if self._batches
+            else 0.0,
+            "last_error": self._last_error,
+        }
+
+
+_relays: Dict[str, OutboxRelay] = {}
+
+
+def start_outbox_relay(client_id: str, bootstrap_servers: str) -> Optional[OutboxRelay]:
+    """Start (once per process) the relay that publishes as *client_id*."""
+    from common.clients.kafka_publisher import (
+        get_kafka_publisher,
+    )  # pylint: disable=import-outside-toplevel
+    from common.database.connection import (
+        get_db_manager,
+    )  # pylint: disable=import-outside-toplevel
+
+    relay = _relays.get(client_id)
+    if relay is None:
+        publisher = get_kafka_publisher(client_id, bootstrap_servers)
+        if publisher is None:
+            logger.warning("⚠️ Outbox relay not started: no Kafka publisher")
+            return None
+        relay = OutboxRelay(get_db_manager().get_async_session_factory(), publisher)
+        _relays[client_id] = relay
+    relay.start()
+    logger.info(f"✅ Outbox relay started for {client_id}")
+    return relay
+
+
+def get_outbox_relay(client_id: str) -> Optional[OutboxRelay]:
+    return _relays.get(client_id)
+
+
+async def stop_outbox_relays() -> None:
+    """Stop every relay; undelivered rows stay in the table for the next start."""
+    for client_id, relay in list(_relays.items()):
+        await relay.stop()
+        _relays.pop(client_id, None)
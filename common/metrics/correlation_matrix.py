@@ -0,0 +1,306 @@
+"""
+Vectorised pairwise correlation statistics over date × variable matrices.
+
+The correlation API evaluates hundreds of ``(metric_a, metric_b, lag)``
+combinations per request (fixed pairs, multi-lag sweeps, condition pairs,
+learned priors, native-device pairs), each with Pearson *and* Spearman.
+Doing that one aligned Python list at a time is the hot path of the
+endpoint.  This module evaluates all of them in batched NumPy operations:
+
+  * ``daily_matrix()`` folds a ``{date: {metric: value}}`` dict into a
+    float64 matrix (rows = dates, columns = metrics, NaN = missing).
+  * ``lagged_pair_stats()`` takes two such matrices plus column / lag index
+    arrays and returns r, p and the pairwise-complete sample size for every
+    pair at once.  Row ``i`` of matrix A is aligned with row ``i + lag`` of
+    matrix B (lag is an index offset in the shared date list).
+
+Statistics (``t_test_p_values`` is shared with ``PairMoments``):
+
+  * Pearson r with a two-tailed t-test p-value (regularised incomplete beta,
+    Lentz continued fraction — evaluated element-wise in arrays).
+  * Spearman = Pearson on average ranks (ties share their mean rank), ranked
+    within each pair's complete-case subset.
+  * Pairs with fewer than ``min_n`` complete observations, or with a constant
+    series, report r = 0, p = 1.
+"""
+
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+_TINY = 1e-30
+
+
+# ---------------------------------------------------------------------------
+# Matrix construction
+# ---------------------------------------------------------------------------
+
+
+def daily_matrix(
+    daily: Dict[str, Dict[str, float]],
+    dates: Sequence[str],
+    variables: Sequence[str],
+    zero_is_missing: bool = False,
+    keep_zero: Iterable[str] = (),
+) -> np.ndarray:
+    """
+    Build a ``len(dates) × len(variables)`` float64 matrix from a daily dict.
+
+    Missing dates / metrics (and non-numeric values) become NaN.  When
+    *zero_is_missing* is set, exact zeros are treated as "not logged" except
+    for the metrics listed in *keep_zero*.
+    """
+    col = {v: j for j, v in enumerate(variables)}
+    out = np.full((len(dates), len(variables)), np.nan, dtype=np.float64)
+    for i, d in enumerate(dates):
+        day = daily.get(d)
+        if not day:
+            continue
+        for metric, value in day.items():
+            j = col.get(metric)
+            if j is None:
+                continue
+            try:
+                out[i, j] = float(value)
+            except (TypeError, ValueError):
+                continue
+
+    if zero_is_missing and out.size:
+        zero_cols = np.ones(len(variables), dtype=bool)
+        for metric in keep_zero:
+            j = col.get(metric)
+            if j is not None:
+                zero_cols[j] = False
+        out[:, zero_cols] = np.where(
+            out[:, zero_cols] == 0.0, np.nan, out[:, zero_cols]
+        )
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Core statistics
+# ---------------------------------------------------------------------------
+
+
+def average_ranks(values: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """
+    Column-wise 1-based ranks over the *valid* entries, ties averaged.
+
+    Invalid entries get NaN.  Fully vectorised: columns are sorted together
+    and tie groups are resolved with one ``bincount``.
+    """
+    n, k = values.shape
+    ranks = np.full((n, k), np.nan, dtype=np.float64)
+    if n == 0 or k == 0:
+        return ranks
+
+    filled = np.where(valid, values, np.inf)
+    order = np.argsort(filled, axis=0, kind="mergesort")
+    sorted_vals = np.take_along_axis(filled, order, axis=0)
+
+    # A new tie group starts at the top of each column and wherever the
+    # sorted value changes; column-major cumsum keeps columns apart.
+    new_group = np.ones((n, k), dtype=bool)
+    new_group[1:] = sorted_vals[1:] != sorted_vals[:-1]
+    group_id = np.cumsum(new_group.ravel(order="F")) - 1
+    position = np.tile(np.arange(1, n + 1, dtype=np.float64), k)
+    mean_pos = np.bincount(group_id, weights=position) / np.bincount(group_id)
+    sorted_ranks = mean_pos[group_id].reshape((n, k), order="F")
+
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+    ranks[~valid] = np.nan
+    return ranks
+
+
+def _masked_pearson(
+    x: np.ndarray, y: np.ndarray, valid: np.ndarray, min_n: int
+) -> tuple:
+    """Column-wise Pearson r over the valid rows of each column pair."""
+    n = valid.sum(axis=0)
+    safe_n = np.maximum(n, 1)
+    x0 = np.where(valid, x, 0.0)
+    y0 = np.where(valid, y, 0.0)
+    dx = np.where(valid, x - x0.sum(axis=0) / safe_n, 0.0)
+    dy = np.where(valid, y - y0.sum(axis=0) / safe_n, 0.0)
+
+    cov = (dx * dy).sum(axis=0)
+    sx = np.sqrt((dx * dx).sum(axis=0))
+    sy = np.sqrt((dy * dy).sum(axis=0))
+
+    # Exact constant-series check (a mean-centred sum can be off by an ulp).
+    x_const = np.where(valid, x, np.inf).min(axis=0) == np.where(valid, x, -np.inf).max(
+        axis=0
+    )
+    y_const = np.where(valid, y, np.inf).min(axis=0) == np.where(valid, y, -np.inf).max(
+        axis=0
+    )
+    degenerate = (n < min_n) | x_const | y_const | (sx == 0) | (sy == 0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = cov / (sx * sy)
+    r = np.clip(np.where(degenerate, 0.0, r), -1.0, 1.0)
+    return r, n, degenerate
+
+
+def _lgamma(values: np.ndarray) -> np.ndarray:
+    """Element-wise log-gamma (NumPy has no native lgamma; inputs repeat a lot)."""
+    uniq, inverse = np.unique(values, return_inverse=True)
+    table = np.array([math.lgamma(v) for v in uniq], dtype=np.float64)
+    return table[inverse].reshape(values.shape)
+
+
+def reg_incomplete_beta(
+    x: np.ndarray, a: np.ndarray, b: np.ndarray, max_iter: int = 100
+) -> np.ndarray:
+    """Vectorised regularised incomplete beta I_x(a, b) via Lentz continued fraction."""
+    x, a, b = np.broadcast_arrays(
+        np.asarray(x, dtype=np.float64),
+        np.asarray(a, dtype=np.float64),
+        np.asarray(b, dtype=np.float64),
+    )
+    out = np.zeros(x.shape, dtype=np.float64)
+    out[x >= 1] = 1.0
+    inside = (x > 0) & (x < 1)
+    if not inside.any():
+        return out
+
+    xs, as_, bs = x[inside], a[inside], b[inside]
+    lbeta = _lgamma(as_) + _lgamma(bs) - _lgamma(as_ + bs)
+    front = np.exp(as_ * np.log(xs) + bs * np.log(1 - xs) - lbeta) / as_
+
+    def _guard(v: np.ndarray) -> np.ndarray:
+        return np.where(np.abs(v) < _TINY, _TINY, v)
+
+    with np.errstate(over="ignore", invalid="ignore", divide="ignore"):
+        d = 1.0 / _guard(1.0 - (as_ + bs) * xs / (as_ + 1))
+        c = np.ones_like(xs)
+        f = d.copy()
+
+        # Iterate only the not-yet-converged elements (idx into the inside set).
+        idx = np.arange(xs.size)
+        xa, aa, ba, da, ca, fa = xs, as_, bs, d, c, f
+        for m in range(1, max_iter + 1):
+            # even step
+            num = m * (ba - m) * xa / ((aa + 2 * m - 1) * (aa + 2 * m))
+            da = 1.0 / _guard(1.0 + num * da)
+            ca = _guard(1.0 + num / ca)
+            fa = fa * da * ca
+
+            # odd step
+            num = -(aa + m) * (aa + ba + m) * xa / ((aa + 2 * m) * (aa + 2 * m + 1))
+            da = 1.0 / _guard(1.0 + num * da)
+            ca = _guard(1.0 + num / ca)
+            delta = da * ca
+            fa = fa * delta
+
+            done = np.abs(delta - 1.0) < 1e-8
+            if done.any():
+                f[idx[done]] = fa[done]
+                keep = ~done
+                idx, xa, aa, ba = idx[keep], xa[keep], aa[keep], ba[keep]
+                da, ca, fa = da[keep], ca[keep], fa[keep]
+                if idx.size == 0:
+                    break
+        f[idx] = fa
+
+    out[inside] = front * f
+    return out
+
+
+def t_test_p_values(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """Two-tailed p-values for Pearson r with n observations (df = n - 2)."""
+    r = np.asarray(r, dtype=np.float64)
+    df = np.asarray(n, dtype=np.float64) - 2
+    p = np.ones(r.shape, dtype=np.float64)
+
+    perfect = np.abs(r) >= 1.0
+    ok = (df > 0) & ~perfect
+    if ok.any():
+        rr = r[ok]
+        t2 = rr * rr * df[ok] / (1 - rr * rr)
+        x = df[ok] / (df[ok] + t2)
+        p[ok] = np.clip(reg_incomplete_beta(x, df[ok] / 2.0, 0.5), 0.0, 1.0)
+    p[perfect & (df > 0)] = 0.0
+    return p
+
+
+# ---------------------------------------------------------------------------
+# Batched pair evaluation
+# ---------------------------------------------------------------------------
+
+
+@dataclass(frozen=True)
+class PairStats:
+    """Per-pair results, aligned with the input index arrays."""
+
+    r: np.ndarray
+    p: np.ndarray
+    n: np.ndarray
+
+
+def lagged_pair_stats(
+    a: np.ndarray,
+    b: np.ndarray,
+    cols_a: Sequence[int],
+    cols_b: Sequence[int],
+    lags: Sequence[int],
+    methods: Sequence[str] = ("pearson",),
+    min_n: int = 5,
+) -> Dict[str, PairStats]:
+    """
+    Correlate ``a[:, cols_a[k]]`` (row i) with ``b[:, cols_b[k]]`` (row i + lags[k])
+    for every k, using pairwise-complete observations.
+
+    *a* and *b* must share the same row (date) index.  *methods* is any of
+    ``"pearson"`` / ``"spearman"``; the complete-case masks are shared between
+    methods and all p-values are solved in one vectorised pass.
+    """
+    cols_a = np.asarray(cols_a, dtype=np.intp)
+    cols_b = np.asarray(cols_b, dtype=np.intp)
+    lags = np.asarray(lags, dtype=np.intp)
+    total = len(cols_a)
+    rows = a.shape[0]
+
+    r_out = np.zeros((len(methods), total), dtype=np.float64)
+    n_out = np.zeros(total, dtype=np.int64)
+    degenerate_out = np.ones((len(methods), total), dtype=bool)
+
+    for lag in np.unique(lags):
+        idx = np.nonzero(lags == lag)[0]
+        span = rows - int(lag)
+        if span <= 0:
+            continue
+        x = a[:span, cols_a[idx]]
+        y = b[int(lag) : int(lag) + span, cols_b[idx]]
+        valid = ~np.isnan(x) & ~np.isnan(y)
+        for m, method in enumerate(methods):
+            if method == "spearman":
+                xm, ym = average_ranks(x, valid), average_ranks(y, valid)
+            else:
+                xm, ym = x, y
+            r, n, degenerate = _masked_pearson(xm, ym, valid, min_n)
+            r_out[m, idx] = r
+            n_out[idx] = n
+            degenerate_out[m, idx] = degenerate
+
+    p_out = t_test_p_values(r_out, np.broadcast_to(n_out, r_out.shape))
+    p_out[degenerate_out] = 1.0
+    return {
+        method: PairStats(r=r_out[m], p=p_out[m], n=n_out)
+        for m, method in enumerate(methods)
+    }
+
+
+def complete_rows(
+    a: np.ndarray, b: np.ndarray, col_a: int, col_b: int, lag: int
+) -> List[int]:
+    """Row indices i (into *a*) where both a[i, col_a] and b[i + lag, col_b] are present."""
+    span = a.shape[0] - lag
+    if span <= 0:
+        return []
+    valid = ~np.isnan(a[:span, col_a]) & ~np.isnan(b[lag : lag + span, col_b])
+    return np.nonzero(valid)[0].tolist()
@@ -0,0 +1,371 @@
+"""
+Columnar per-user daily metric store.
+
+Health data arrives as one PostgREST row per (date, metric, source) and
+every consumer used to fold it into ``{date: {metric: value}}`` dicts, then
+walk those dicts again to build matrices.  ``DailyMetricStore`` keeps the
+same information column-wise instead:
+
+  * ``dates`` — sorted ISO date index shared by every column.
+  * one float64 array per metric (NaN = missing), so the presence mask is
+    simply ``~np.isnan(column)``.
+
+Canonical metrics from ``common.metrics.registry`` come first, in registry
+order; extra outcome variables (symptoms, adherence, ``lab_*``) follow
+sorted by name.
+
+Building from rows resolves conflicts vectorised — for each (date, metric)
+cell the value with the highest priority wins, the earliest row among
+equals — which is how multi-source data is deduplicated by
+``SOURCE_PRIORITY``.  Stores are layered with ``merge`` (fill gaps or
+overwrite, optionally skipping dates), cut with ``window`` and handed to
+downstream engines via ``matrix()``; ``to_daily()`` produces the legacy
+dict shape.
+
+The correlation engine and the prediction API build their daily series
+here.  The timeline still folds native rows itself: it shows both sources'
+raw ``value_json`` per day (``alt_metrics``), which one value per cell
+cannot hold.  health_score and health_twin read summary and profile rows,
+not daily series.
+
+``DailyStoreCache`` keeps built stores per user with an LRU bounded by
+bytes and a short TTL:
+
+    DAILY_STORE_CACHE_MAX_MB   total column memory across users (default 64)
+    DAILY_STORE_CACHE_TTL_S    seconds a built store is reused (default 120)
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from common.metrics.registry import CANONICAL_METRICS
+
+_CANONICAL_ORDER = {name: i for i, name in enumerate(CANONICAL_METRICS)}
+
+
+def _metric_sort_key(metric: str) -> Tuple[int, str]:
+    return (_CANONICAL_ORDER.get(metric, len(_CANONICAL_ORDER)), metric)
+
+
+class DailyMetricStore:
+    """Date index plus one float64 column per metric (NaN = missing)."""
+
+    def __init__(
+        self,
+        dates: Sequence[str] = (),
+        columns: Optional[Dict[str, np.ndarray]] = None,
+    ):
+        """*dates* must be sorted and unique; each column aligns with them."""
+        self.dates: List[str] = list(dates)
+        self._row = {d: i for i, d in enumerate(self.dates)}
+        self._columns: Dict[str, np.ndarray] = {}
+        for metric in sorted(columns or {}, key=_metric_sort_key):
+            values = np.asarray(columns[metric], dtype=np.float64)
+            if values.shape != (len(self.dates),):
+                raise ValueError(
+                    f"column {metric!r} has shape {values.shape}, "
+                    f"expected ({len(self.dates)},)"
+                )
+            self._columns[metric] = values
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def from_rows(
+        cls,
+        dates: Sequence[str],
+        metrics: Sequence[str],
+        values: Sequence[float],
+        priorities: Optional[Sequence[float]] = None,
+    ) -> "DailyMetricStore":
+        """
+        Build from parallel row arrays.
+
+        Where several rows share a (date, metric) cell, the highest
+        *priority* wins; among equal priorities the earliest row wins.
+        NaN values are ignored.
+        """
+        v = np.asarray(values, dtype=np.float64)
+        keep = ~np.isnan(v)
+        if not keep.any():
+            return cls()
+        d = np.asarray(dates, dtype=str)[keep]
+        m = np.asarray(metrics, dtype=str)[keep]
+        v = v[keep]
+        p = (
+            np.zeros(v.size)
+            if priorities is None
+            else np.asarray(priorities, dtype=np.float64)[keep]
+        )
+
+        date_keys, rows = np.unique(d, return_inverse=True)
+        metric_keys, cols = np.unique(m, return_inverse=True)
+        # Winner first: highest priority, then arrival order.
+        order = np.lexsort((np.arange(v.size), -p))
+        cells = (rows * metric_keys.size + cols)[order]
+        _, first = np.unique(cells, return_index=True)
+        winners = order[first]
+
+        grid = np.full((date_keys.size, metric_keys.size), np.nan)
+        grid[rows[winners], cols[winners]] = v[winners]
+        return cls(
+            date_keys.tolist(),
+            {str(metric): grid[:, j].copy() for j, metric in enumerate(metric_keys)},
+        )
+
+    @classmethod
+    def from_daily(cls, daily: Dict[str, Dict[str, float]]) -> "DailyMetricStore":
+        """Build from a ``{date: {metric: value}}`` dict (non-numeric values skipped)."""
+        dates: List[str] = []
+        metrics: List[str] = []
+        values: List[float] = []
+        for date_str, day in daily.items():
+            for metric, value in day.items():
+                try:
+                    values.append(float(value))
+                except (TypeError, ValueError):
+                    continue
+                dates.append(date_str)
+                metrics.append(metric)
+        if not values:
+            return cls()
+        return cls.from_rows(dates, metrics, values)
+
+    def copy(self) -> "DailyMetricStore":
+        return DailyMetricStore(
+            self.dates, {m: c.copy() for m, c in self._columns.items()}
+        )
+
+    # ------------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------------
+
+    @property
+    def metrics(self) -> List[str]:
+        return list(self._columns)
+
+    def __contains__(self, metric: str) -> bool:
+        return metric in self._columns
+
+    def metrics_with_data(self) -> List[str]:
+        """Metrics with at least one value, in column order."""
+        return [m for m, c in self._columns.items() if not np.isnan(c).all()]
+
+    def column(self, metric: str) -> np.ndarray:
+        """Values of *metric* aligned with ``dates`` (all NaN when absent)."""
+        col = self._columns.get(metric)
+        return col if col is not None else np.full(len(self.dates), np.nan)
+
+    def present(self, metric: str) -> np.ndarray:
+        """Boolean mask of dates that have a value for *metric*."""
+        return ~np.isnan(self.column(metric))
+
+    def dates_with_data(self) -> List[str]:
+        if not self._columns:
+            return []
+        any_present = np.zeros(len(self.dates), dtype=bool)
+        for col in self._columns.values():
+            any_present |= ~np.isnan(col)
+        return [d for d, ok in zip(self.dates, any_present) if ok]
+
+    def __len__(self) -> int:
+        """Number of dates with at least one value."""
+        return len(self.dates_with_data())
+
+    @property
+    def nbytes(self) -> int:
+        # Column payload plus a rough per-date / per-metric bookkeeping cost.
+        return sum(c.nbytes for c in self._columns.values()) + 64 * (
+            len(self.dates) + len(self._columns)
+        )
+
+    def matrix(
+        self,
+        dates: Sequence[str],
+        variables: Sequence[str],
+        zero_is_missing: bool = False,
+        keep_zero: Iterable[str] = (),
+    ) -> np.ndarray:
+        """
+        ``len(dates) × len(variables)`` float64 matrix, NaN where missing.
+
+        Same contract as ``correlation_matrix.daily_matrix`` without walking
+        a dict per cell.
+        """
+        out = np.full((len(dates), len(variables)), np.nan, dtype=np.float64)
+        if not len(dates) or not len(variables):
+            return out
+        idx = np.array([self._row.get(d, -1) for d in dates], dtype=np.intp)
+        hit = idx >= 0
+        keep = set(keep_zero)
+        for j, metric in enumerate(variables):
+            col = self._columns.get(metric)
+            if col is None:
+                continue
+            out[hit, j] = col[idx[hit]]
+            if zero_is_missing and metric not in keep:
+                out[out[:, j] == 0.0, j] = np.nan
+        return out
+
+    def window(self, start: str, end: Optional[str] = None) -> "DailyMetricStore":
+        """Copy restricted to the dates in ``[start, end)`` (open-ended without *end*)."""
+        lo = bisect_left(self.dates, start)
+        hi = len(self.dates) if end is None else max(bisect_left(self.dates, end), lo)
+        return DailyMetricStore(
+            self.dates[lo:hi], {m: c[lo:hi].copy() for m, c in self._columns.items()}
+        )
+
+    def to_daily(self) -> Dict[str, Dict[str, float]]:
+        """Legacy ``{date: {metric: value}}`` view; dates without values are omitted."""
+        daily: Dict[str, Dict[str, float]] = {}
+        columns = [(m, c.tolist()) for m, c in self._columns.items()]
+        for i, date_str in enumerate(self.dates):
+            day = {m: values[i] for m, values in columns if not math.isnan(values[i])}
+            if day:
+                daily[date_str] = day
+        return daily
+
+    # ------------------------------------------------------------------
+    # Layering
+    # ------------------------------------------------------------------
+
+    def _reindex(self, dates: List[str]) -> None:
+        if dates == self.dates:
+            return
+        new_row = {d: i for i, d in enumerate(dates)}
+        target = np.array([new_row[d] for d in self.dates], dtype=np.intp)
+        for metric, col in self._columns.items():
+            grown = np.full(len(dates), np.nan)
+            grown[target] = col
+            self._columns[metric] = grown
+        self.dates = dates
+        self._row = new_row
+
+    def merge(
+        self,
+        other: "DailyMetricStore",
+        overwrite: bool = False,
+        skip_dates: Iterable[str] = (),
+    ) -> "DailyMetricStore":
+        """
+        Layer *other* onto this store in place and return self.
+
+        With ``overwrite=False`` only missing cells are filled; with
+        ``overwrite=True`` *other*'s values replace existing ones.  Dates in
+        *skip_dates* are left untouched.
+        """
+        if not other._columns:
+            return self
+        self._reindex(sorted(set(self.dates) | set(other.dates)))
+        target = np.array([self._row[d] for d in other.dates], dtype=np.intp)
+        skip = set(skip_dates)
+        allowed = np.array([d not in skip for d in other.dates], dtype=bool)
+
+        added = False
+        for metric, src in other._columns.items():
+            col = self._columns.get(metric)
+            if col is None:
+                col = np.full(len(self.dates), np.nan)
+                added = True
+            mask = ~np.isnan(src) & allowed
+            if not overwrite:
+                mask &= np.isnan(col[target])
+            col[target[mask]] = src[mask]
+            self._columns[metric] = col
+
+        if added:
+            self._columns = {
+                m: self._columns[m] for m in sorted(self._columns, key=_metric_sort_key)
+            }
+        return self
+
+
+class DailyStoreCache:
+    """Per-user LRU of built stores, bounded by total bytes, with a TTL."""
+
+    def __init__(self, max_bytes: Optional[int] = None, ttl_s: Optional[float] = None):
+        self.max_bytes = max_bytes or int(
+            float(os.environ.get("DAILY_STORE_CACHE_MAX_MB", "64")) * 1024 * 1024
+        )
+        self.ttl_s = (
+            ttl_s
+            if ttl_s is not None
+            else float(os.environ.get("DAILY_STORE_CACHE_TTL_S", "120"))
+        )
+        # key -> (store, extra, expires_at); key[0] is the user id
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[DailyMetricStore, object, float]]" = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self, key: Tuple[Hashable, ...]
+    ) -> Optional[Tuple[DailyMetricStore, object]]:
+        """Copy of the cached store plus its extra payload, or None."""
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() >= entry[2]:
+            if entry is not None:
+                self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0].copy(), entry[1]
+
+    def put(
+        self, key: Tuple[Hashable, ...], store: DailyMetricStore, extra: object = None
+    ) -> None:
+        if key in self._entries:
+            self._drop(key)
+        size = store.nbytes
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (store.copy(), extra, time.monotonic() + self.ttl_s)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, user_id: str) -> None:
+        """Drop every cached store for *user_id* (call after writes)."""
+        for key in [k for k in self._entries if k[0] == user_id]:
+            self._drop(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._bytes = 0
+
+    def _drop(self, key: Tuple[Hashable, ...]) -> None:
+        store, _, _ = self._entries.pop(key)
+        self._bytes -= store.nbytes
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_cache: Optional[DailyStoreCache] = None
+
+
+def get_daily_store_cache() -> DailyStoreCache:
+    """Process-wide cache singleton."""
+    global _cache  # pylint: disable=global-statement
+    if _cache is None:
+        _cache = DailyStoreCache()
+    return _cache
@@ -0,0 +1,172 @@
+"""
+Granger causality tests on NumPy least squares.
+
+Does X help predict Y beyond Y's own history?  For each lag L the restricted
+AR(L) model
+
+    Y_t = α + β₁ Y_{t-1} + … + β_L Y_{t-L}
+
+is compared with the unrestricted ARX(L) model that adds X_{t-1} … X_{t-L},
+using an F-test on the residual sums of squares.  The lag with the smallest
+p-value is reported when it is below ``max_p``.
+
+Everything here is pure computation with no I/O so it can be shipped to a
+worker process (see ``common.utils.process_pool``).  ``granger_batch`` takes
+an absolute wall-clock deadline so a request-level CPU budget holds even when
+work sat in the pool queue first.
+"""
+
+from __future__ import annotations
+
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from common.metrics.correlation_matrix import reg_incomplete_beta
+
+GRANGER_MAX_LAG = 14
+GRANGER_MAX_P = 0.10
+
+GrangerResult = Tuple[Optional[int], Optional[float]]
+
+
+def ols_rss(X: np.ndarray, y: np.ndarray) -> Optional[float]:
+    """
+    Residual sum of squares of the OLS fit y ~ X.
+
+    Returns None when there are too few observations (n < k + 2) or the
+    design matrix is rank-deficient.
+    """
+    n, k = X.shape
+    if n == 0 or n < k + 2:
+        return None
+    beta, _resid, rank, _sv = np.linalg.lstsq(X, y, rcond=None)
+    if rank < k:
+        return None
+    resid = y - X @ beta
+    return float(resid @ resid)
+
+
+def _lag_matrix(series: np.ndarray, lag: int) -> np.ndarray:
+    """Rows t = lag..n-1 holding series[t-lag .. t-1]."""
+    return sliding_window_view(series, lag)[: len(series) - lag]
+
+
+def ar_rss(y: np.ndarray, lag: int) -> Optional[float]:
+    """RSS of the restricted AR(lag) model (intercept + lag Y-lags)."""
+    n_train = len(y) - lag
+    if n_train < lag + 3:
+        return None
+    X = np.column_stack([np.ones(n_train), _lag_matrix(y, lag)])
+    return ols_rss(X, y[lag:])
+
+
+def arx_rss(y: np.ndarray, x: np.ndarray, lag: int) -> Optional[float]:
+    """RSS of the unrestricted ARX(lag) model (intercept + lag Y-lags + lag X-lags)."""
+    n_train = len(y) - lag
+    if n_train < 2 * lag + 3:
+        return None
+    X = np.column_stack([np.ones(n_train), _lag_matrix(y, lag), _lag_matrix(x, lag)])
+    return ols_rss(X, y[lag:])
+
+
+def f_dist_p_value(f_stat: float, df1: int, df2: int) -> float:
+    """
+    Upper-tail p-value P(F > f_stat) via the regularised incomplete beta.
+
+    P(F > f) = I_x(df2/2, df1/2) with x = df2 / (df2 + df1·f).  The continued
+    fraction only converges quickly for x < (a + 1) / (a + b + 2), so the
+    other side is evaluated through I_x(a, b) = 1 - I_{1-x}(b, a).
+    """
+    if f_stat <= 0 or df1 <= 0 or df2 <= 0:
+        return 1.0
+    a, b = df2 / 2.0, df1 / 2.0
+    x = df2 / (df2 + df1 * f_stat)
+    if x < (a + 1) / (a + b + 2):
+        p = float(reg_incomplete_beta(np.array([x]), a, b)[0])
+    else:
+        one_minus_x = (df1 * f_stat) / (df2 + df1 * f_stat)
+        p = 1.0 - float(reg_incomplete_beta(np.array([one_minus_x]), b, a)[0])
+    return max(0.0, min(1.0, p))
+
+
+def granger_causality_test(
+    x_series: Sequence[float],
+    y_series: Sequence[float],
+    max_lag: Optional[int] = None,
+    max_p: float = GRANGER_MAX_P,
+    deadline: Optional[float] = None,
+) -> GrangerResult:
+    """
+    Test whether X Granger-causes Y.
+
+    Uses up to GRANGER_MAX_LAG lags when enough data; otherwise min(14, n//3).
+    Returns (optimal_lag, p_value) if significant, else (None, None).  When
+    *deadline* (``time.time()`` seconds) passes, remaining lags are skipped and
+    the best result so far is used.
+    """
+    x = np.asarray(x_series, dtype=np.float64)
+    y = np.asarray(y_series, dtype=np.float64)
+    n = len(x)
+    lag_limit = max_lag if max_lag is not None else min(GRANGER_MAX_LAG, max(1, n // 3))
+    if n < lag_limit + 5:
+        return (None, None)
+
+    best_lag: Optional[int] = None
+    best_p = 1.0
+
+    for lag in range(1, lag_limit + 1):
+        if deadline is not None and time.time() > deadline:
+            break
+        n_train = n - lag
+        if n_train < lag + 3:
+            continue
+
+        rss_restricted = ar_rss(y, lag)
+        rss_unrestricted = arx_rss(y, x, lag)
+        if rss_unrestricted is None or rss_restricted is None:
+            continue
+        if rss_restricted <= 0 or rss_unrestricted < 0:
+            continue
+
+        # df1 = number of X-lag restrictions, df2 = unrestricted residual df
+        df1 = lag
+        df2 = n_train - 2 * lag - 1
+        if df2 <= 0:
+            continue
+
+        rss_diff = rss_restricted - rss_unrestricted
+        if rss_diff <= 0:
+            # X lags did not reduce RSS — no causal evidence at this lag
+            continue
+
+        f_stat = (rss_diff / df1) / (rss_unrestricted / df2)
+        p_value = f_dist_p_value(f_stat, df1, df2)
+        if p_value < best_p:
+            best_p = p_value
+            best_lag = lag
+
+    if best_lag and best_p < max_p:
+        return (best_lag, best_p)
+    return (None, None)
+
+
+def granger_batch(
+    pairs: List[Tuple[List[float], List[float]]],
+    deadline: Optional[float] = None,
+) -> List[Optional[GrangerResult]]:
+    """
+    Run ``granger_causality_test`` for each (x, y) pair in order.
+
+    Pairs not started before *deadline* come back as None so the caller can
+    tell "not significant" from "not evaluated".
+    """
+    results: List[Optional[GrangerResult]] = []
+    for x_vals, y_vals in pairs:
+        if deadline is not None and time.time() > deadline:
+            results.append(None)
+            continue
+        results.append(granger_causality_test(x_vals, y_vals, deadline=deadline))
+    return results
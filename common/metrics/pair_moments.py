@@ -0,0 +1,177 @@
+"""
+Incrementally maintained Pearson sufficient statistics for lagged metric pairs.
+
+For every ``(col_a, col_b, lag)`` pair the engine keeps
+
+    n, Σx, Σy, Σxy, Σx², Σy²
+
+over the aligned, pairwise-complete rows ``(a[i, col_a], b[i + lag, col_b])``
+of a date-indexed window (rows = dates, NaN = missing — the same matrices
+``common.metrics.correlation_matrix.daily_matrix`` builds).  Pearson r and its
+p-value follow from the sums in O(1) per pair, so when the window moves the
+sums are corrected by subtracting the aligned rows that touch departed or
+rewritten dates and adding the rows that touch new ones — work proportional
+to ``pairs × changed days`` rather than ``pairs × window``.
+
+Values are shifted by a per-pair offset (the column mean when the pair was
+first seen) before accumulating, which keeps Σx² − (Σx)²/n well conditioned.
+Spearman has no additive sufficient statistics; callers rank the window
+directly for that.
+"""
+
+from __future__ import annotations
+
+from typing import Optional, Sequence
+
+import numpy as np
+
+from common.metrics.correlation_matrix import PairStats, t_test_p_values
+
+# Relative variance below which a series counts as constant.
+_CONST_RTOL = 1e-12
+
+
+def _column_means(m: np.ndarray, cols: np.ndarray) -> np.ndarray:
+    if m.shape[0] == 0 or cols.size == 0:
+        return np.zeros(cols.size, dtype=np.float64)
+    sub = m[:, cols]
+    present = ~np.isnan(sub)
+    count = present.sum(axis=0)
+    total = np.where(present, sub, 0.0).sum(axis=0)
+    return np.where(count > 0, total / np.maximum(count, 1), 0.0)
+
+
+class PairMoments:
+    """Σ-statistics for a growing set of ``(col_a, col_b, lag)`` pairs."""
+
+    def __init__(self) -> None:
+        self.cols_a = np.zeros(0, dtype=np.intp)
+        self.cols_b = np.zeros(0, dtype=np.intp)
+        self.lags = np.zeros(0, dtype=np.intp)
+        self._shift_a = np.zeros(0, dtype=np.float64)
+        self._shift_b = np.zeros(0, dtype=np.float64)
+        # rows: n, Σx, Σy, Σxy, Σx², Σy²
+        self._sums = np.zeros((6, 0), dtype=np.float64)
+
+    def __len__(self) -> int:
+        return int(self.lags.size)
+
+    def copy(self) -> "PairMoments":
+        other = PairMoments()
+        other.cols_a = self.cols_a.copy()
+        other.cols_b = self.cols_b.copy()
+        other.lags = self.lags.copy()
+        other._shift_a = self._shift_a.copy()
+        other._shift_b = self._shift_b.copy()
+        other._sums = self._sums.copy()
+        return other
+
+    def extend(
+        self,
+        a: np.ndarray,
+        b: np.ndarray,
+        cols_a: Sequence[int],
+        cols_b: Sequence[int],
+        lags: Sequence[int],
+    ) -> None:
+        """Append pairs and accumulate them over every row of *a* / *b*."""
+        cols_a = np.asarray(cols_a, dtype=np.intp)
+        cols_b = np.asarray(cols_b, dtype=np.intp)
+        lags = np.asarray(lags, dtype=np.intp)
+        if cols_a.size == 0:
+            return
+        start = len(self)
+        self.cols_a = np.concatenate([self.cols_a, cols_a])
+        self.cols_b = np.concatenate([self.cols_b, cols_b])
+        self.lags = np.concatenate([self.lags, lags])
+        self._shift_a = np.concatenate([self._shift_a, _column_means(a, cols_a)])
+        self._shift_b = np.concatenate([self._shift_b, _column_means(b, cols_b)])
+        self._sums = np.concatenate(
+            [self._sums, np.zeros((6, cols_a.size), dtype=np.float64)], axis=1
+        )
+        self._accumulate(a, b, 1.0, head=0, tail=0, only=np.arange(start, len(self)))
+
+    def slide(
+        self,
+        old_a: np.ndarray,
+        old_b: np.ndarray,
+        new_a: np.ndarray,
+        new_b: np.ndarray,
+        evicted: int,
+        kept: int,
+    ) -> None:
+        """
+        Move the window from the old matrices to the new ones.
+
+        Old rows ``[0, evicted)`` left the window, old rows
+        ``[evicted, evicted + kept)`` are unchanged and become new rows
+        ``[0, kept)``, and everything after that was rewritten or appended.
+        Matrices may gain columns; existing column indices must be stable.
+        """
+        if kept == 0:
+            # Nothing survives — rebuild rather than subtract down to round-off.
+            self._sums[:] = 0.0
+            self._accumulate(new_a, new_b, 1.0, head=0, tail=0)
+            return
+        self._accumulate(old_a, old_b, -1.0, head=evicted, tail=evicted + kept)
+        self._accumulate(new_a, new_b, 1.0, head=0, tail=kept)
+
+    def _accumulate(
+        self,
+        a: np.ndarray,
+        b: np.ndarray,
+        sign: float,
+        head: int,
+        tail: int,
+        only: Optional[np.ndarray] = None,
+    ) -> None:
+        """Add ``sign`` × the aligned rows (i, i + lag) with i < head or i + lag >= tail."""
+        rows = a.shape[0]
+        pairs = np.arange(len(self)) if only is None else only
+        if rows == 0 or pairs.size == 0:
+            return
+        for lag in np.unique(self.lags[pairs]):
+            idx = pairs[self.lags[pairs] == lag]
+            span = rows - int(lag)
+            if span <= 0:
+                continue
+            i = np.arange(span)
+            touched = (i < head) | (i + int(lag) >= tail)
+            if not touched.any():
+                continue
+            i = i[touched]
+            x = a[i][:, self.cols_a[idx]] - self._shift_a[idx]
+            y = b[i + int(lag)][:, self.cols_b[idx]] - self._shift_b[idx]
+            valid = ~np.isnan(x) & ~np.isnan(y)
+            x = np.where(valid, x, 0.0)
+            y = np.where(valid, y, 0.0)
+            self._sums[:, idx] += sign * np.stack(
+                [
+                    valid.sum(axis=0),
+                    x.sum(axis=0),
+                    y.sum(axis=0),
+                    (x * y).sum(axis=0),
+                    (x * x).sum(axis=0),
+                    (y * y).sum(axis=0),
+                ]
+            )
+
+    def stats(self, min_n: int = 5) -> PairStats:
+        """Pearson r, two-tailed p and n for every pair (r = 0, p = 1 when degenerate)."""
+        n_raw, sx, sy, sxy, sxx, syy = self._sums
+        n = np.rint(n_raw).astype(np.int64)
+        safe_n = np.maximum(n, 1)
+        var_x = sxx - sx * sx / safe_n
+        var_y = syy - sy * sy / safe_n
+        cov = sxy - sx * sy / safe_n
+        degenerate = (
+            (n < min_n)
+            | (var_x <= _CONST_RTOL * np.maximum(sxx, 1e-300))
+            | (var_y <= _CONST_RTOL * np.maximum(syy, 1e-300))
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = cov / np.sqrt(var_x * var_y)
+        r = np.clip(np.where(degenerate, 0.0, r), -1.0, 1.0)
+        p = t_test_p_values(r, n)
+        p[degenerate] = 1.0
+        return PairStats(r=r, p=p, n=n)
@@ -34,32 +34,94 @@ Table DDL (run once in Supabase SQL editor) — also mirrored in
 
 Usage::
 
-    from common.metrics.persistence import persist_normalized_metrics
+    from common.metrics.persistence import (
+        persist_normalized_batch,
+        persist_normalized_metrics,
+    )
 
     n = await persist_normalized_metrics(
         user_id="uuid-...",
         date="2026-03-18",
         metrics=normalized_metric_list,
     )
+
+    # Backfills: many (user_id, date, metrics) days in a few requests
+    result = await persist_normalized_batch(
+        [(user_id, date_str, metrics) for date_str, metrics in by_date.items()]
+    )
+    result.accepted, result.failed, result.chunks
+
+Writes go through the shared PostgREST connection pool
+(``common.clients.postgrest_pool``) with ``return=minimal``, so nothing but a
+status line comes back per chunk.  Chunk size and concurrency default to:
+
+    NORMALIZED_PERSIST_CHUNK_ROWS   rows per upsert request (default 500)
+    NORMALIZED_PERSIST_CONCURRENCY  chunks in flight at once (default 4)
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
-import ssl
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
 
 import aiohttp
-import certifi
 
+from common.clients.postgrest_pool import get_postgrest_pool
 from common.metrics.adapters.base import NormalizedMetric
 
 logger = logging.getLogger(__name__)
 
 _TABLE = "health_metrics_normalized"
 _ON_CONFLICT = "user_id,date,canonical_metric,source"
+_TIMEOUT = aiohttp.ClientTimeout(total=30)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.environ.get(name, default)))
+    except (TypeError, ValueError):
+        return default
+
+
+DEFAULT_CHUNK_ROWS = _env_int("NORMALIZED_PERSIST_CHUNK_ROWS", 500)
+DEFAULT_CONCURRENCY = _env_int("NORMALIZED_PERSIST_CONCURRENCY", 4)
+
+# One (user_id, date, metrics) unit of work for the batch writer.
+NormalizedDay = Tuple[str, str, Sequence[NormalizedMetric]]
+
+
+@dataclass
+class ChunkResult:
+    """Outcome of one upsert request."""
+
+    index: int
+    rows: int
+    accepted: int
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> int:
+        return self.rows - self.accepted
+
+
+@dataclass
+class BatchResult:
+    """Per-chunk and total outcome of ``persist_normalized_batch``."""
+
+    chunks: List[ChunkResult] = field(default_factory=list)
+
+    @property
+    def accepted(self) -> int:
+        return sum(c.accepted for c in self.chunks)
+
+    @property
+    def failed(self) -> int:
+        return sum(c.failed for c in self.chunks)
 
 
 # ---------------------------------------------------------------------------
@@ -67,17 +129,12 @@ _ON_CONFLICT = "user_id,date,canonical_metric,source"
 # ---------------------------------------------------------------------------
 
 
-def _ssl_ctx() -> ssl.SSLContext:
-    """certifi CA bundle — fixes macOS SSL cert verification."""
-    return ssl.create_default_context(cafile=certifi.where())
-
-
 def _headers(service_key: str) -> dict:
     return {
         "apikey": service_key,
         "Authorization": f"Bearer {service_key}",
         "Content-Type": "application/json",
-        "Prefer": "resolution=merge-duplicates,return=representation",
+        "Prefer": "resolution=merge-duplicates,return=minimal",
     }
 
 
@@ -96,11 +153,131 @@ def _to_row(user_id: str, date: str, m: NormalizedMetric, now_iso: str) -> dict:
     }
 
 
+def _build_rows(days: Iterable[NormalizedDay], now_iso: str) -> List[dict]:
+    """
+    Flatten *days* into rows, keeping the last row per conflict key.
+
+    Postgres rejects an upsert that touches the same conflict key twice in
+    one statement, so duplicates must never share a chunk.
+    """
+    rows: Dict[Tuple[str, str, str, str], dict] = {}
+    for user_id, date, metrics in days:
+        for m in metrics:
+            row = _to_row(user_id, date, m, now_iso)
+            rows[(user_id, date, m.canonical_metric, m.source)] = row
+    return list(rows.values())
+
+
+async def _post_chunk(
+    session: aiohttp.ClientSession,
+    url: str,
+    headers: dict,
+    index: int,
+    rows: List[dict],
+    slots: asyncio.Semaphore,
+) -> ChunkResult:
+    async with slots:
+        try:
+            async with session.post(
+                url, headers=headers, json=rows, timeout=_TIMEOUT
+            ) as resp:
+                if resp.status in (200, 201, 204):
+                    return ChunkResult(index, len(rows), len(rows), resp.status)
+                err = await resp.text()
+                logger.error(
+                    "persist_normalized chunk %d failed: status=%d error=%s",
+                    index,
+                    resp.status,
+                    err,
+                )
+                return ChunkResult(index, len(rows), 0, resp.status, err)
+        except Exception as exc:  # pylint: disable=broad-except
+            logger.warning("persist_normalized chunk %d exception: %s", index, exc)
+            return ChunkResult(index, len(rows), 0, None, str(exc))
+
+
 # ---------------------------------------------------------------------------
 # Public API
 # ---------------------------------------------------------------------------
 
 
+async def persist_normalized_batch(
+    days: Iterable[NormalizedDay],
+    *,
+    chunk_rows: Optional[int] = None,
+    max_concurrency: Optional[int] = None,
+    supabase_url: Optional[str] = None,
+    supabase_service_key: Optional[str] = None,
+) -> BatchResult:
+    """
+    Upsert many ``(user_id, date, metrics)`` days into ``health_metrics_normalized``.
+
+    Rows are flattened across days (and users), de-duplicated on the conflict
+    key, split into upserts of at most *chunk_rows* rows and sent with at most
+    *max_concurrency* requests in flight over the shared connection pool.
+    A failed chunk does not stop the others.
+
+    Parameters
+    ----------
+    days:
+        Iterable of ``(user_id, "YYYY-MM-DD", [NormalizedMetric, ...])``.
+    chunk_rows:
+        Rows per request (default ``NORMALIZED_PERSIST_CHUNK_ROWS``).
+    max_concurrency:
+        Requests in flight (default ``NORMALIZED_PERSIST_CONCURRENCY``).
+    supabase_url, supabase_service_key:
+        Override the ``SUPABASE_URL`` / ``SUPABASE_SERVICE_KEY`` env vars.
+
+    Returns
+    -------
+    BatchResult
+        Accepted / failed row counts per chunk and in total.  Empty when
+        credentials are unavailable or there is nothing to write.
+    """
+    url_base = (supabase_url or os.environ.get("SUPABASE_URL") or "").rstrip("/")
+    key = supabase_service_key or os.environ.get("SUPABASE_SERVICE_KEY") or ""
+
+    if not url_base or not key:
+        logger.debug(
+            "persist_normalized_batch: Supabase credentials not set — skipping"
+        )
+        return BatchResult()
+
+    rows = _build_rows(days, datetime.now(timezone.utc).isoformat())
+    if not rows:
+        return BatchResult()
+
+    size = max(1, chunk_rows or DEFAULT_CHUNK_ROWS)
+    chunks = [rows[i : i + size] for i in range(0, len(rows), size)]
+    url = f"{url_base}/rest/v1/{_TABLE}?on_conflict={_ON_CONFLICT}"
+    headers = _headers(key)
+
+    try:
+        session = await get_postgrest_pool().session()
+    except Exception as exc:  # pylint: disable=broad-except
+        logger.warning("persist_normalized exception: %s", exc)
+        return BatchResult(
+            [ChunkResult(i, len(c), 0, None, str(exc)) for i, c in enumerate(chunks)]
+        )
+
+    slots = asyncio.Semaphore(max(1, max_concurrency or DEFAULT_CONCURRENCY))
+    results = await asyncio.gather(
+        *(
+            _post_chunk(session, url, headers, i, chunk, slots)
+            for i, chunk in enumerate(chunks)
+        )
+    )
+    result = BatchResult(list(results))
+    logger.debug(
+        "persist_normalized_batch: rows=%d chunks=%d accepted=%d failed=%d",
+        len(rows),
+        len(chunks),
+        result.accepted,
+        result.failed,
+    )
+    return result
+
+
 async def persist_normalized_metrics(
     user_id: str,
     date: str,
@@ -113,7 +290,8 @@ async def persist_normalized_metrics(
     Upsert *metrics* for *user_id* / *date* into ``health_metrics_normalized``.
 
     Conflict key is ``(user_id, date, canonical_metric, source)`` — re-calling
-    with the same data is safe (idempotent upsert).
+    with the same data is safe (idempotent upsert).  For more than one day use
+    ``persist_normalized_batch``.
 
     Parameters
     ----------
@@ -134,47 +312,15 @@ async def persist_normalized_metrics(
         Number of rows accepted by Supabase.  Returns 0 on error or when
         credentials are unavailable.
     """
-    url_base = (supabase_url or os.environ.get("SUPABASE_URL") or "").rstrip("/")
-    key = supabase_service_key or os.environ.get("SUPABASE_SERVICE_KEY") or ""
-
-    if not url_base or not key:
-        logger.debug(
-            "persist_normalized_metrics: Supabase credentials not set — skipping"
-        )
-        return 0
-
-    if not metrics:
-        return 0
-
-    now_iso = datetime.now(timezone.utc).isoformat()
-    rows = [_to_row(user_id, date, m, now_iso) for m in metrics]
-
-    url = f"{url_base}/rest/v1/{_TABLE}?on_conflict={_ON_CONFLICT}"
-    try:
-        async with aiohttp.ClientSession(
-            timeout=aiohttp.ClientTimeout(total=30),
-            connector=aiohttp.TCPConnector(ssl=_ssl_ctx()),
-        ) as session:
-            async with session.post(url, headers=_headers(key), json=rows) as resp:
-                if resp.status in (200, 201):
-                    data = await resp.json()
-                    accepted = len(data) if isinstance(data, list) else len(rows)
-                    logger.debug(
-                        "persist_normalized: user=%s date=%s accepted=%d",
-                        user_id,
-                        date,
-                        accepted,
-                    )
-                    return accepted
-
-                err = await resp.text()
-                logger.error(
-                    "persist_normalized failed: status=%d error=%s",
-                    resp.status,
-                    err,
-                )
-                return 0
-
-    except Exception as exc:  # pylint: disable=broad-except
-        logger.warning("persist_normalized exception: %s", exc)
-        return 0
+    result = await persist_normalized_batch(
+        [(user_id, date, metrics)],
+        supabase_url=supabase_url,
+        supabase_service_key=supabase_service_key,
+    )
+    logger.debug(
+        "persist_normalized: user=%s date=%s accepted=%d",
+        user_id,
+        date,
+        result.accepted,
+    )
+    return result.accepted
@@ -31,13 +31,24 @@ For each meal entry with a valid timestamp:
     excursion = peak - baseline
     auc       = trapezoid_integrate(post_window)
     t_to_peak = time(argmax) - meal_time  (minutes)
+
+Readings are sorted once into parallel epoch / value lists
+(``GlucoseSeries``) and each window is located with ``bisect``, so a meal
+costs O(log n + window) instead of a scan of the whole trace.  Build the
+series once and pass it to several calls, or use ``analyze_windows`` /
+``analyze_many`` to evaluate several post-window lengths (and users) in one
+pass::
+
+    series = GlucoseSeries(glucose_readings)
+    by_window = analyzer.analyze_windows(series, meal_entries, (60, 120, 180))
 """
 
 from __future__ import annotations
 
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
 
 
 # ---------------------------------------------------------------------------
@@ -138,6 +149,49 @@ def _time_of_day_bucket(dt: datetime) -> str:
     return "late_night"
 
 
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_US = timedelta(microseconds=1)
+_US_PER_MIN = 60 * 10**6
+
+
+def _epoch_us(dt: datetime) -> int:
+    """Exact integer microseconds since the Unix epoch (naive = UTC)."""
+    return (_ensure_utc(dt) - _EPOCH) // _ONE_US
+
+
+class GlucoseSeries:
+    """
+    Glucose readings sorted once into parallel epoch (µs) and mg/dL lists.
+
+    Windows are located with ``bisect`` on ``epochs_us``; build one series per
+    user and reuse it across meals, window lengths and calls.
+    """
+
+    __slots__ = ("epochs_us", "values")
+
+    def __init__(self, readings: Iterable[GlucoseReading]) -> None:
+        pairs = sorted(
+            ((_epoch_us(r.timestamp), r.mg_dl) for r in readings),
+            key=lambda p: p[0],
+        )
+        self.epochs_us: List[int] = [t for t, _ in pairs]
+        self.values: List[float] = [g for _, g in pairs]
+
+    def __len__(self) -> int:
+        return len(self.epochs_us)
+
+    def window(
+        self, start_us: int, end_us: int, lo: int = 0, hi: Optional[int] = None
+    ) -> Tuple[int, int]:
+        """Index range ``[i, j)`` of readings with start_us <= t <= end_us."""
+        hi = len(self.epochs_us) if hi is None else hi
+        i = bisect_left(self.epochs_us, start_us, lo, hi)
+        return i, bisect_right(self.epochs_us, end_us, i, hi)
+
+
+GlucoseInput = Union[GlucoseSeries, Sequence[GlucoseReading]]
+
+
 # ---------------------------------------------------------------------------
 # Analyzer
 # ---------------------------------------------------------------------------
@@ -170,83 +224,132 @@ class PostprandialAnalyzer:
 
     def analyze(
         self,
-        glucose_readings: List[GlucoseReading],
+        glucose_readings: GlucoseInput,
         meal_entries: List[MealEntry],
     ) -> List[PostprandialMetrics]:
         """
         Compute postprandial metrics for each meal with sufficient CGM coverage.
 
-        Meals with fewer than ``min_readings`` post-meal readings are silently
-        skipped. The caller should check that the returned list is non-empty
-        before using it — an empty list means Track B data is unavailable.
+        *glucose_readings* may be a list of readings or a prebuilt
+        ``GlucoseSeries``.  Meals with fewer than ``min_readings`` post-meal
+        readings are silently skipped. The caller should check that the
+        returned list is non-empty before using it — an empty list means
+        Track B data is unavailable.
         """
-        if not glucose_readings or not meal_entries:
-            return []
+        return self.analyze_windows(
+            glucose_readings, meal_entries, (self.post_window_min,)
+        )[self.post_window_min]
 
-        # Normalise timestamps to UTC, sort readings once
-        readings_utc = sorted(
-            [
-                GlucoseReading(_ensure_utc(r.timestamp), r.mg_dl)
-                for r in glucose_readings
-            ],
-            key=lambda r: r.timestamp,
-        )
+    def analyze_windows(
+        self,
+        glucose_readings: GlucoseInput,
+        meal_entries: List[MealEntry],
+        post_windows_min: Sequence[int],
+    ) -> Dict[int, List[PostprandialMetrics]]:
+        """
+        Run the per-meal analysis for several post-window lengths in one pass.
 
-        results: List[PostprandialMetrics] = []
+        Each meal's pre-window and longest post-window are located once;
+        shorter windows are prefixes of the longest one.  Returns
+        ``{post_window_min: [PostprandialMetrics, ...]}`` with every window
+        present (possibly empty).
+        """
+        windows = sorted(set(post_windows_min))
+        results: Dict[int, List[PostprandialMetrics]] = {w: [] for w in windows}
+        if not glucose_readings or not meal_entries or not windows:
+            return results
+
+        series = (
+            glucose_readings
+            if isinstance(glucose_readings, GlucoseSeries)
+            else GlucoseSeries(glucose_readings)
+        )
+        epochs, values = series.epochs_us, series.values
+        longest_us = windows[-1] * _US_PER_MIN
 
         for meal in meal_entries:
             meal_ts = _ensure_utc(meal.timestamp)
+            meal_us = _epoch_us(meal_ts)
 
-            pre_cutoff = meal_ts.timestamp() - self.pre_window_min * 60
-            post_cutoff = meal_ts.timestamp() + self.post_window_min * 60
-
-            pre_vals = [
-                r.mg_dl
-                for r in readings_utc
-                if pre_cutoff <= r.timestamp.timestamp() <= meal_ts.timestamp()
-            ]
-            post_timed = [
-                (
-                    _minutes_between(meal_ts, r.timestamp),
-                    r.mg_dl,
-                )
-                for r in readings_utc
-                if meal_ts.timestamp() <= r.timestamp.timestamp() <= post_cutoff
-            ]
-
-            if len(post_timed) < self.min_readings:
+            pre_lo, pre_hi = series.window(
+                meal_us - self.pre_window_min * _US_PER_MIN, meal_us
+            )
+            post_lo, post_max = series.window(meal_us, meal_us + longest_us)
+            if post_max - post_lo < self.min_readings:
                 continue
 
-            baseline = sum(pre_vals) / len(pre_vals) if pre_vals else post_timed[0][1]
-
-            peak_mg_dl = max(g for _, g in post_timed)
-            peak_idx = max(range(len(post_timed)), key=lambda i: post_timed[i][1])
-            time_to_peak = post_timed[peak_idx][0]
+            pre_vals = values[pre_lo:pre_hi]
+            for w in windows:
+                post_hi = bisect_right(
+                    epochs, meal_us + w * _US_PER_MIN, post_lo, post_max
+                )
+                if post_hi - post_lo < self.min_readings:
+                    continue
+                results[w].append(
+                    self._meal_metrics(
+                        meal, meal_ts, meal_us, series, post_lo, post_hi, pre_vals
+                    )
+                )
+        return results
 
-            auc = _trapezoid_auc(post_timed)
-            excursion = peak_mg_dl - baseline
+    def analyze_many(
+        self,
+        by_user: Mapping[str, Tuple[GlucoseInput, List[MealEntry]]],
+        post_windows_min: Optional[Sequence[int]] = None,
+    ) -> Dict[str, Dict[int, List[PostprandialMetrics]]]:
+        """
+        ``analyze_windows`` for several users: ``{user_id: (readings, meals)}``
+        → ``{user_id: {post_window_min: [...]}}``.  Defaults to this
+        analyzer's ``post_window_min``.
+        """
+        windows = tuple(post_windows_min or (self.post_window_min,))
+        return {
+            user_id: self.analyze_windows(readings, meals, windows)
+            for user_id, (readings, meals) in by_user.items()
+        }
 
-            results.append(
-                PostprandialMetrics(
-                    meal_id=meal.meal_id,
-                    meal_date=meal_ts.strftime("%Y-%m-%d"),
-                    meal_time_of_day=_time_of_day_bucket(meal_ts),
-                    baseline_glucose=round(baseline, 1),
-                    postprandial_peak_mgdl=round(peak_mg_dl, 1),
-                    postprandial_excursion_mgdl=round(excursion, 1),
-                    postprandial_auc=auc,
-                    time_to_peak_min=round(time_to_peak, 1),
-                    total_carbs_g=meal.total_carbs_g,
-                    total_fiber_g=meal.total_fiber_g,
-                    total_fat_g=meal.total_fat_g,
-                    total_protein_g=meal.total_protein_g,
-                    total_calories=meal.total_calories,
-                    glycemic_load_est=meal.glycemic_load_est,
-                    readings_used=len(post_timed),
-                )
-            )
+    @staticmethod
+    def _meal_metrics(
+        meal: MealEntry,
+        meal_ts: datetime,
+        meal_us: int,
+        series: GlucoseSeries,
+        post_lo: int,
+        post_hi: int,
+        pre_vals: List[float],
+    ) -> PostprandialMetrics:
+        post_vals = series.values[post_lo:post_hi]
+        post_timed = [
+            # Same arithmetic as timedelta.total_seconds() / 60
+            ((t - meal_us) / 10**6 / 60.0, g)
+            for t, g in zip(series.epochs_us[post_lo:post_hi], post_vals)
+        ]
 
-        return results
+        baseline = sum(pre_vals) / len(pre_vals) if pre_vals else post_vals[0]
+
+        peak_mg_dl = max(post_vals)
+        time_to_peak = post_timed[post_vals.index(peak_mg_dl)][0]
+
+        auc = _trapezoid_auc(post_timed)
+        excursion = peak_mg_dl - baseline
+
+        return PostprandialMetrics(
+            meal_id=meal.meal_id,
+            meal_date=meal_ts.strftime("%Y-%m-%d"),
+            meal_time_of_day=_time_of_day_bucket(meal_ts),
+            baseline_glucose=round(baseline, 1),
+            postprandial_peak_mgdl=round(peak_mg_dl, 1),
+            postprandial_excursion_mgdl=round(excursion, 1),
+            postprandial_auc=auc,
+            time_to_peak_min=round(time_to_peak, 1),
+            total_carbs_g=meal.total_carbs_g,
+            total_fiber_g=meal.total_fiber_g,
+            total_fat_g=meal.total_fat_g,
+            total_protein_g=meal.total_protein_g,
+            total_calories=meal.total_calories,
+            glycemic_load_est=meal.glycemic_load_est,
+            readings_used=len(post_timed),
+        )
 
     def to_meal_series(
         self,
@@ -259,7 +362,8 @@ class PostprandialAnalyzer:
         same length — one entry per meal in the same order as ``metrics``.
 
         Typical use: correlate ``excursion`` against ``total_carbs_g`` etc.
-        by passing the two lists to ``_pearson_r`` or ``_spearman_r``.
+        by stacking the lists as matrix columns for
+        ``common.metrics.correlation_matrix.lagged_pair_stats`` at lag 0.
         """
         if not metrics:
             return {}
@@ -292,7 +396,8 @@ class PostprandialAnalyzer:
         """
         Convenience method: compute all nutrition→glucose correlation pairs
         from postprandial metrics and return them as raw correlation dicts
-        (same shape as ``_one_correlation`` output in the correlation engine).
+        (same shape as the dicts ``_compute_correlations`` returns in the
+        correlation engine).
 
         Uses Pearson r. The caller is responsible for filtering by min_r / max_p.
         """
@@ -4,11 +4,13 @@ Middleware module for Personal Health Assistant
 
 from .auth import (
     AuthMiddleware,
+    TokenVerifier,
     get_optional_user,
     get_current_user,
     require_auth,
     require_roles,
-    require_permissions
+    require_permissions,
+    get_token_verifier
 )
 
 from .error_handling import (
@@ -23,11 +25,13 @@ from .error_handling import (
 __all__ = [
     # Auth middleware
     "AuthMiddleware",
+    "TokenVerifier",
     "get_optional_user",
     "get_current_user",
     "require_auth",
     "require_roles",
     "require_permissions",
+    "get_token_verifier",
     # Error handling middleware
     "ErrorHandlingMiddleware",
     "SecurityErrorMiddleware", 
@@ -5,17 +5,18 @@ Provides JWT validation, role checking, and circuit breaker patterns for all ser
 
 # pylint: disable=missing-class-docstring,too-few-public-methods,invalid-name,broad-except,too-many-locals,too-many-branches,too-many-statements,import-outside-toplevel,protected-access,raise-missing-from,line-too-long,unused-argument,unnecessary-pass
 
+import asyncio
 import base64
+import hashlib
 import json
 import os
-import ssl
 import time
-import urllib.error
-import urllib.request
 import warnings
+from collections import OrderedDict
 from functools import wraps
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+import aiohttp
 import redis.asyncio as redis
 from fastapi import Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
@@ -24,6 +25,7 @@ from jose import JWTError, jwt
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ..clients.postgrest_pool import get_postgrest_pool
 from ..config.settings import settings
 from ..database.connection import get_async_db
 from ..utils.logging import get_logger
@@ -32,187 +34,113 @@ from ..utils.resilience import CircuitBreaker
 logger = get_logger(__name__)
 
 _DEFAULT_JWKS_CACHE_TTL_S = 600  # keep <= Supabase edge cache window
-_JWKS_CACHE: Dict[str, Dict[str, Any]] = {}
+_DEFAULT_TOKEN_CACHE_SIZE = 10_000
+_DEFAULT_REVOCATION_RECHECK_S = 30.0
+_DEFAULT_REDIS_BACKOFF_S = 5.0
 
 
-def _certifi_ssl_context() -> ssl.SSLContext:
-    """
-    Create an SSL context using certifi CA bundle.
-
-    This avoids local dev issues where the Python runtime can't locate system CAs
-    (common on macOS python.org installs).
-    """
+def _get_unverified_claims(token: str) -> Dict[str, Any]:
+    """Read JWT payload without verifying signature (iss routing only)."""
     try:
-        import certifi
-
-        return ssl.create_default_context(cafile=certifi.where())
+        parts = token.split(".")
+        if len(parts) < 2:
+            return {}
+        payload_b64 = parts[1] + "=" * (-len(parts[1]) % 4)
+        payload_bytes = base64.urlsafe_b64decode(payload_b64.encode("utf-8"))
+        return json.loads(payload_bytes.decode("utf-8"))
     except Exception:
-        return ssl.create_default_context()
+        return {}
 
 
-class HTTPBearer401(HTTPBearer):
-    async def __call__(self, request: Request) -> HTTPAuthorizationCredentials:
-        try:
-            credentials = await super().__call__(request)
-        except HTTPException as exc:
-            # FastAPI's HTTPBearer raises 403, convert to 401
-            if exc.status_code == status.HTTP_403_FORBIDDEN:
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Not authenticated",
-                    headers={"WWW-Authenticate": "Bearer"},
-                )
-            raise
-        if credentials is None or credentials.scheme.lower() != "bearer":
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not authenticated",
-                headers={"WWW-Authenticate": "Bearer"},
-            )
-        return credentials
-
-
-# Security scheme
-security = HTTPBearer401()
-
-# Circuit breaker for auth operations
-auth_circuit_breaker = CircuitBreaker(
-    failure_threshold=settings.resilience.circuit_breaker_fail_max,
-    recovery_timeout=settings.resilience.circuit_breaker_reset_timeout,
-    expected_exception=Exception,
-)
+_redis_client: Optional[redis.Redis] = None
+_redis_initialized = False
+# Blacklist reads are skipped until this monotonic time after a Redis error.
+_redis_backoff_until = 0.0
+_redis_errors = 0
 
 
-class AuthMiddleware:
-    """Authentication middleware with JWT validation and role checking"""
+def _get_redis_client() -> Optional[redis.Redis]:
+    """Process-wide Redis client (own connection pool) for the token blacklist.
 
-    def __init__(self, app):
-        self.app = app
-        self.redis_client: Optional[redis.Redis] = None
-        self._init_redis()
-
-    async def __call__(self, scope, receive, send):
-        """FastAPI middleware call method"""
-        if scope["type"] != "http":
-            await self.app(scope, receive, send)
-            return
-
-        # Create request object from scope
-        request = Request(scope, receive)
-
-        try:
-            # Try to get user from request if authentication header is present
-            auth_header = request.headers.get("Authorization")
-            token = None
-
-            # Check for Bearer token in Authorization header
-            if auth_header and auth_header.startswith("Bearer "):
-                token = auth_header.split(" ")[1]
-
-            # Check for session cookie if no Bearer token
-            if not token:
-                token = request.cookies.get("access_token")
+    Skips connection when REDIS_URL is unset or points to localhost (e.g. on
+    Render/Vercel without Redis).
+    """
+    global _redis_client, _redis_initialized  # pylint: disable=global-statement
+    if _redis_initialized:
+        if time.monotonic() < _redis_backoff_until:
+            return None
+        return _redis_client
+    _redis_initialized = True
+    redis_url = (
+        os.environ.get("REDIS_URL")
+        or getattr(settings.external_services, "redis_url", None)
+        or ""
+    ).strip()
+    if not redis_url or "localhost" in redis_url or "127.0.0.1" in redis_url:
+        logger.info(
+            "Redis not configured for auth (token blacklist disabled). "
+            "Set REDIS_URL to a remote Redis (e.g. Render Redis or Upstash) to enable blacklisting."
+        )
+        return None
+    try:
+        _redis_client = redis.from_url(
+            redis_url,
+            encoding="utf-8",
+            decode_responses=True,
+        )
+        logger.info("Redis client initialized for auth middleware")
+    except Exception as e:
+        logger.warning(f"Failed to initialize Redis client: {e}")
+        _redis_client = None
+    return _redis_client
 
-            if token:
-                try:
-                    # Check if token is blacklisted
-                    if await self._is_token_blacklisted(token):
-                        response = JSONResponse(
-                            status_code=401,
-                            content={"detail": "Token has been revoked"},
-                        )
-                        await response(scope, receive, send)
-                        return
 
-                    # Decode JWT token
-                    payload = self._decode_jwt_token(token)
-                    user_id = payload.get("sub")
-                    email = payload.get("email")
+def _back_off_redis() -> None:
+    """Skip Redis for a few seconds after an error instead of retrying every request.
 
-                    if user_id:
-                        # Add user info to request state
-                        request.state.user = {
-                            "id": user_id,
-                            "email": email,
-                            "username": email,
-                            "is_active": True,
-                            "roles": ["user"],
-                            "token_payload": payload,
-                        }
-                        request.state.user_id = user_id
-
-                except HTTPException:
-                    # Token validation failed, but continue without user
-                    pass
-                except Exception as e:
-                    logger.debug(f"Auth middleware error: {e}")
-                    # Continue without user
-                    pass
+    The client is kept (it reconnects on its own), so blacklist checks resume
+    once the backoff window has passed.
+    """
+    global _redis_backoff_until, _redis_errors  # pylint: disable=global-statement
+    _redis_errors += 1
+    backoff_s = float(os.environ.get("AUTH_REDIS_BACKOFF_S", _DEFAULT_REDIS_BACKOFF_S))
+    _redis_backoff_until = time.monotonic() + backoff_s
 
-            # Continue to next middleware/endpoint
-            await self.app(scope, receive, send)
 
-        except Exception as e:
-            logger.error(f"Auth middleware error: {e}")
-            response = JSONResponse(
-                status_code=500, content={"detail": "Authentication middleware error"}
-            )
-            await response(scope, receive, send)
-
-    def _init_redis(self):
-        """Initialize Redis connection for token blacklisting. Skips connection when
-        REDIS_URL is unset or points to localhost (e.g. on Render/Vercel without Redis)."""
-        redis_url = (
-            os.environ.get("REDIS_URL")
-            or getattr(settings.external_services, "redis_url", None)
-            or ""
-        ).strip()
-        if not redis_url or "localhost" in redis_url or "127.0.0.1" in redis_url:
-            self.redis_client = None
-            logger.info(
-                "Redis not configured for auth (token blacklist disabled). "
-                "Set REDIS_URL to a remote Redis (e.g. Render Redis or Upstash) to enable blacklisting."
-            )
-            return
-        try:
-            self.redis_client = redis.from_url(
-                redis_url,
-                encoding="utf-8",
-                decode_responses=True,
-            )
-            logger.info("Redis client initialized for auth middleware")
-        except Exception as e:
-            logger.warning(f"Failed to initialize Redis client: {e}")
-            self.redis_client = None
+def _reset_redis() -> None:
+    global _redis_client, _redis_initialized, _redis_backoff_until  # pylint: disable=global-statement
+    _redis_client = None
+    _redis_initialized = False
+    _redis_backoff_until = 0.0
 
-    async def _is_token_blacklisted(self, token: str) -> bool:
-        """Check if token is blacklisted in Redis"""
-        if not self.redis_client:
-            return False
 
-        try:
-            blacklisted = await self.redis_client.get(f"blacklist:{token}")
-            return blacklisted is not None
-        except Exception as e:
-            logger.error(f"Error checking token blacklist: {e}")
-            self.redis_client = None  # Disable so we don't retry every request
-            return False
+class TokenVerifier:
+    """
+    Process-wide JWT verifier shared by every auth dependency.
+
+    Signing secrets, issuer and API-key settings are read once.  Tokens that
+    verify are remembered (by SHA-256 digest, never the raw token) in an LRU
+    until their ``exp``, so repeat requests skip signature checks entirely.
+    JWKS documents are fetched with the pooled aiohttp session and refreshed
+    in the background once stale; the Supabase ``/auth/v1/user`` fallback
+    uses the same session.  Nothing here blocks the event loop on I/O.
+
+    Configuration:
+        AUTH_TOKEN_CACHE_SIZE       verified tokens kept (default 10000)
+        AUTH_REVOCATION_RECHECK_S   how long a "not blacklisted" answer is
+                                    trusted for a cached token (default 30)
+        AUTH_REDIS_BACKOFF_S        blacklist checks skipped after a Redis
+                                    error before retrying (default 5)
+        SUPABASE_JWKS_CACHE_TTL_S   JWKS freshness window (max 600)
+    """
 
-    def _decode_jwt_token(self, token: str) -> Dict[str, Any]:
-        """Decode and validate JWT token"""
-        # Supabase can sign access tokens with:
-        # - Legacy/shared secret: HS256 (verify with SUPABASE_JWT_SECRET)
-        # - Signing keys: ES256/RS256 (verify via JWKS at `/auth/v1/.well-known/jwks.json`)
-        #
-        # We support both, to be compatible with projects in migration.
+    def __init__(self):
         candidate_secrets: List[str] = []
-
         # Primary (shared platform) secret from settings
         if getattr(settings, "auth", None) and getattr(
             settings.auth, "secret_key", None
         ):
             candidate_secrets.append(settings.auth.secret_key)
-
         # Legacy/alternate env var names used across services and deployments
         for env_name in (
             "JWT_SECRET_KEY",
@@ -223,8 +151,146 @@ class AuthMiddleware:
             v = os.environ.get(env_name)
             if v:
                 candidate_secrets.append(v)
+        # Deduplicate while preserving order
+        self.secrets: List[str] = list(dict.fromkeys(candidate_secrets))
+        self.algorithm = getattr(getattr(settings, "auth", None), "algorithm", "HS256")
 
-        # If token is asymmetric (e.g. ES256/RS256), verify via JWKS.
+        expected_issuer = os.environ.get("SUPABASE_ISSUER")
+        if not expected_issuer:
+            supabase_url = os.environ.get("SUPABASE_URL")
+            if supabase_url:
+                expected_issuer = supabase_url.rstrip("/") + "/auth/v1"
+        self.expected_issuer = expected_issuer.rstrip("/") if expected_issuer else None
+        self.jwks_url = os.environ.get("SUPABASE_JWKS_URL")
+        self.api_key = (
+            os.environ.get("SUPABASE_PUBLISHABLE_KEY")
+            or os.environ.get("SUPABASE_ANON_KEY")
+            or os.environ.get("NEXT_PUBLIC_SUPABASE_PUBLISHABLE_KEY")
+        )
+
+        try:
+            ttl_s = float(
+                os.environ.get(
+                    "SUPABASE_JWKS_CACHE_TTL_S", str(_DEFAULT_JWKS_CACHE_TTL_S)
+                )
+            )
+        except ValueError:
+            ttl_s = _DEFAULT_JWKS_CACHE_TTL_S
+        # Do not cache longer than the default window.
+        self.jwks_ttl_s = max(1.0, min(ttl_s, _DEFAULT_JWKS_CACHE_TTL_S))
+        self.cache_size = int(
+            os.environ.get("AUTH_TOKEN_CACHE_SIZE", _DEFAULT_TOKEN_CACHE_SIZE)
+        )
+        self.revocation_recheck_s = float(
+            os.environ.get("AUTH_REVOCATION_RECHECK_S", _DEFAULT_REVOCATION_RECHECK_S)
+        )
+
+        # digest -> (payload, expires_at)
+        self._verified: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # digest -> time until which "not revoked" is trusted
+        self._not_revoked: "OrderedDict[str, float]" = OrderedDict()
+        # jwks_url -> (jwks, fetched_at)
+        self._jwks: Dict[str, Tuple[Dict[str, Any], float]] = {}
+        self._jwks_inflight: Dict[str, asyncio.Task] = {}
+        # (jwks_url, kid, alg) -> PEM
+        self._pem: Dict[Tuple[str, str, str], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    # ── Verified-token cache ────────────────────────────────────────────────
+
+    @staticmethod
+    def _digest(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def _cached(self, digest: str) -> Optional[Dict[str, Any]]:
+        entry = self._verified.get(digest)
+        if entry is None:
+            return None
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._verified[digest]
+            return None
+        self._verified.move_to_end(digest)
+        return payload
+
+    def _remember(self, digest: str, payload: Dict[str, Any], token: str) -> None:
+        exp = payload.get("exp") or _get_unverified_claims(token).get("exp")
+        try:
+            expires_at = float(exp)
+        except (TypeError, ValueError):
+            return  # no expiry → never cache
+        if expires_at <= time.time():
+            return
+        self._verified[digest] = (payload, expires_at)
+        self._verified.move_to_end(digest)
+        while len(self._verified) > self.cache_size:
+            self._verified.popitem(last=False)
+
+    def forget(self, token: str) -> None:
+        """Drop a token from the local caches (e.g. right after logout)."""
+        digest = self._digest(token)
+        self._verified.pop(digest, None)
+        self._not_revoked.pop(digest, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cached_tokens": len(self._verified),
+            "hits": self.hits,
+            "misses": self.misses,
+            "jwks_urls": len(self._jwks),
+            "revocation_errors": _redis_errors,
+            "revocation_backoff": time.monotonic() < _redis_backoff_until,
+        }
+
+    # ── Public API ──────────────────────────────────────────────────────────
+
+    async def is_revoked(self, token: str) -> bool:
+        """Check the Redis blacklist, trusting a negative answer for a short while."""
+        client = _get_redis_client()
+        if client is None:
+            return False
+        digest = self._digest(token)
+        now = time.time()
+        trusted_until = self._not_revoked.get(digest)
+        if trusted_until is not None and trusted_until > now:
+            return False
+        try:
+            blacklisted = await client.get(f"blacklist:{token}")
+        except Exception as e:
+            logger.error(f"Error checking token blacklist: {e}")
+            _back_off_redis()
+            return False
+        if blacklisted is not None:
+            self.forget(token)
+            return True
+        self._not_revoked[digest] = now + self.revocation_recheck_s
+        self._not_revoked.move_to_end(digest)
+        while len(self._not_revoked) > self.cache_size:
+            self._not_revoked.popitem(last=False)
+        return False
+
+    async def decode(self, token: str) -> Dict[str, Any]:
+        """Verify *token* and return its claims (cached until ``exp``)."""
+        digest = self._digest(token)
+        payload = self._cached(digest)
+        if payload is not None:
+            self.hits += 1
+            return dict(payload)
+        self.misses += 1
+        payload = await self._verify(token)
+        self._remember(digest, payload, token)
+        return dict(payload)
+
+    # ── Verification ────────────────────────────────────────────────────────
+
+    async def _verify(self, token: str) -> Dict[str, Any]:
+        """Decode and validate JWT token"""
+        # Supabase can sign access tokens with:
+        # - Legacy/shared secret: HS256 (verify with SUPABASE_JWT_SECRET)
+        # - Signing keys: ES256/RS256 (verify via JWKS at `/auth/v1/.well-known/jwks.json`)
+        #
+        # We support both, to be compatible with projects in migration.
         try:
             header = jwt.get_unverified_header(token)
         except Exception as e:
@@ -236,27 +302,22 @@ class AuthMiddleware:
             # Prefer local JWKS verification, but fall back to Supabase Auth `/user`
             # endpoint if JWKS verification fails (keeps MVP reliable during key migrations).
             try:
-                return self._decode_with_jwks(token=token, alg=alg, kid=kid)
+                return await self._decode_with_jwks(token=token, alg=alg, kid=kid)
             except HTTPException:
-                return self._decode_with_supabase_auth_user(token=token)
-
-        # Deduplicate while preserving order
-        seen = set()
-        secrets = []
-        for s in candidate_secrets:
-            if s not in seen:
-                seen.add(s)
-                secrets.append(s)
+                return await self._decode_with_supabase_auth_user(token=token)
 
         last_error: Optional[Exception] = None
-        for secret in secrets:
+        for i, secret in enumerate(self.secrets):
             try:
                 payload = jwt.decode(
                     token,
                     secret,
-                    algorithms=[settings.auth.algorithm],
+                    algorithms=[self.algorithm],
                     options={"verify_aud": False},
                 )
+                if i:
+                    # Try the secret that actually signs tokens first next time.
+                    self.secrets.insert(0, self.secrets.pop(i))
                 return payload
             except jwt.ExpiredSignatureError:
                 raise HTTPException(status_code=401, detail="Token has expired")
@@ -270,7 +331,7 @@ class AuthMiddleware:
         # HS256 fallback: if we're missing the legacy shared secret (or keys were migrated),
         # validate against Supabase Auth server directly.
         try:
-            return self._decode_with_supabase_auth_user(token=token)
+            return await self._decode_with_supabase_auth_user(token=token)
         except HTTPException:
             pass
 
@@ -279,7 +340,7 @@ class AuthMiddleware:
             detail = f"Invalid token: {str(last_error)}"
         raise HTTPException(status_code=401, detail=detail)
 
-    def _decode_with_supabase_auth_user(self, token: str) -> Dict[str, Any]:
+    async def _decode_with_supabase_auth_user(self, token: str) -> Dict[str, Any]:
         """
         Validate a Supabase access token by calling the Auth server.
 
@@ -290,53 +351,38 @@ class AuthMiddleware:
         - `SUPABASE_URL` (or a valid `iss` claim in the JWT)
         - an API key for the `apikey` header (prefer `SUPABASE_PUBLISHABLE_KEY`)
         """
-        unverified_claims = self._get_unverified_claims(token)
+        unverified_claims = _get_unverified_claims(token)
         iss = str(unverified_claims.get("iss") or "").rstrip("/")
 
-        expected_issuer = os.environ.get("SUPABASE_ISSUER")
-        if not expected_issuer:
-            supabase_url = os.environ.get("SUPABASE_URL")
-            if supabase_url:
-                expected_issuer = supabase_url.rstrip("/") + "/auth/v1"
-
-        if expected_issuer and iss and iss != expected_issuer.rstrip("/"):
+        if self.expected_issuer and iss and iss != self.expected_issuer:
             raise HTTPException(status_code=401, detail="Invalid token issuer")
 
-        issuer_base = expected_issuer.rstrip("/") if expected_issuer else iss
+        issuer_base = self.expected_issuer or iss
         if not issuer_base:
             raise HTTPException(status_code=401, detail="Missing issuer (iss) claim")
 
-        api_key = (
-            os.environ.get("SUPABASE_PUBLISHABLE_KEY")
-            or os.environ.get("SUPABASE_ANON_KEY")
-            or os.environ.get("NEXT_PUBLIC_SUPABASE_PUBLISHABLE_KEY")
-        )
-        if not api_key:
+        if not self.api_key:
             raise HTTPException(
                 status_code=401,
                 detail="Supabase API key missing for token validation",
             )
 
-        url = issuer_base + "/user"
-        req = urllib.request.Request(
-            url,
-            method="GET",
-            headers={
-                "apikey": api_key,
-                "Authorization": f"Bearer {token}",
-                "Accept": "application/json",
-            },
-        )
         try:
-            with urllib.request.urlopen(
-                req, timeout=6, context=_certifi_ssl_context()
+            session = await get_postgrest_pool().session()
+            async with session.get(
+                issuer_base + "/user",
+                headers={
+                    "apikey": self.api_key,
+                    "Authorization": f"Bearer {token}",
+                    "Accept": "application/json",
+                },
+                timeout=aiohttp.ClientTimeout(total=6),
             ) as resp:
-                body = resp.read().decode("utf-8")
                 if resp.status != 200:
                     raise HTTPException(status_code=401, detail="Invalid token")
-                user_obj = json.loads(body)
-        except urllib.error.HTTPError as e:
-            raise HTTPException(status_code=401, detail="Invalid token") from e
+                user_obj = await resp.json(content_type=None)
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(
                 status_code=401, detail="Token validation failed"
@@ -357,24 +403,18 @@ class AuthMiddleware:
             "iss": issuer_base,
         }
 
-    def _decode_with_jwks(self, token: str, alg: str, kid: str) -> Dict[str, Any]:
+    async def _decode_with_jwks(self, token: str, alg: str, kid: str) -> Dict[str, Any]:
         """
         Verify a Supabase JWT using JWKS (public key discovery).
         Uses SUPABASE_JWKS_URL if set, else derives from token `iss` claim.
         """
-        unverified_claims = self._get_unverified_claims(token)
+        unverified_claims = _get_unverified_claims(token)
         iss = str(unverified_claims.get("iss") or "").rstrip("/")
 
-        expected_issuer = os.environ.get("SUPABASE_ISSUER")
-        if not expected_issuer:
-            supabase_url = os.environ.get("SUPABASE_URL")
-            if supabase_url:
-                expected_issuer = supabase_url.rstrip("/") + "/auth/v1"
-
-        if expected_issuer and iss != expected_issuer.rstrip("/"):
+        if self.expected_issuer and iss != self.expected_issuer:
             raise HTTPException(status_code=401, detail="Invalid token issuer")
 
-        jwks_url = os.environ.get("SUPABASE_JWKS_URL")
+        jwks_url = self.jwks_url
         if not jwks_url:
             if not iss:
                 raise HTTPException(
@@ -382,96 +422,262 @@ class AuthMiddleware:
                 )
             jwks_url = iss + "/.well-known/jwks.json"
 
-        jwks = self._get_cached_jwks(jwks_url)
-        keys = jwks.get("keys") or []
-        if not isinstance(keys, list) or not keys:
-            raise HTTPException(
-                status_code=401,
-                detail="JWKS has no keys (project may be using HS256 legacy secret)",
-            )
-
-        # Find matching kid; if none, use first key matching alg (or any key).
-        key = None
-        if kid:
-            for k in keys:
-                if isinstance(k, dict) and str(k.get("kid") or "") == kid:
-                    key = k
-                    break
-        if key is None:
-            for k in keys:
-                if isinstance(k, dict) and (
-                    not k.get("alg") or str(k.get("alg")).upper() == str(alg).upper()
-                ):
-                    key = k
-                    break
+        jwks = await self._get_jwks(jwks_url)
+        key = self._select_key(jwks, alg, kid)
+        if key is None and kid:
+            # Unknown kid — keys may have rotated since the last fetch.
+            jwks = await self._get_jwks(jwks_url, force=True)
+            key = self._select_key(jwks, alg, kid)
         if key is None:
             raise HTTPException(
                 status_code=401, detail="No matching JWKS key found for token"
             )
 
         try:
-            # Convert JWK to PEM for python-jose verification
-            from jose import jwk  # import here to avoid circular import issues
-
-            constructed = jwk.construct(key, algorithm=alg)
-            pem = constructed.to_pem()
+            pem_key = (jwks_url, str(key.get("kid") or ""), alg)
+            pem = self._pem.get(pem_key)
+            if pem is None:
+                # Convert JWK to PEM for python-jose verification
+                from jose import jwk  # import here to avoid circular import issues
+
+                pem = jwk.construct(key, algorithm=alg).to_pem()
+                self._pem[pem_key] = pem
             return jwt.decode(
                 token,
                 pem,
                 algorithms=[alg],
                 options={"verify_aud": False},
-                issuer=expected_issuer.rstrip("/") if expected_issuer else None,
+                issuer=self.expected_issuer,
             )
         except jwt.ExpiredSignatureError:
             raise HTTPException(status_code=401, detail="Token has expired")
         except JWTError as e:
             raise HTTPException(status_code=401, detail=f"Invalid token: {e}")
 
-    def _get_unverified_claims(self, token: str) -> Dict[str, Any]:
-        """Read JWT payload without verifying signature (iss routing only)."""
+    @staticmethod
+    def _select_key(
+        jwks: Dict[str, Any], alg: str, kid: str
+    ) -> Optional[Dict[str, Any]]:
+        keys = jwks.get("keys") or []
+        if not isinstance(keys, list) or not keys:
+            raise HTTPException(
+                status_code=401,
+                detail="JWKS has no keys (project may be using HS256 legacy secret)",
+            )
+        # Find matching kid; if none, use first key matching alg (or any key).
+        if kid:
+            for k in keys:
+                if isinstance(k, dict) and str(k.get("kid") or "") == kid:
+                    return k
+            return None
+        for k in keys:
+            if isinstance(k, dict) and (
+                not k.get("alg") or str(k.get("alg")).upper() == str(alg).upper()
+            ):
+                return k
+        return None
+
+    async def _get_jwks(self, jwks_url: str, force: bool = False) -> Dict[str, Any]:
+        """
+        Cached JWKS document.  A stale document is still served while a
+        background task refreshes it; only the very first fetch (or a forced
+        one after an unknown ``kid``) is awaited.  Concurrent fetches share
+        one request.
+        """
+        cached = self._jwks.get(jwks_url)
+        if cached and not force:
+            jwks, fetched_at = cached
+            if time.time() - fetched_at > self.jwks_ttl_s:
+                self._jwks_refresh(jwks_url)
+            return jwks
+        task = self._jwks_refresh(jwks_url)
         try:
-            parts = token.split(".")
-            if len(parts) < 2:
-                return {}
-            payload_b64 = parts[1] + "=" * (-len(parts[1]) % 4)
-            payload_bytes = base64.urlsafe_b64decode(payload_b64.encode("utf-8"))
-            return json.loads(payload_bytes.decode("utf-8"))
-        except Exception:
-            return {}
+            return await asyncio.shield(task)
+        except HTTPException:
+            if cached:
+                return cached[0]
+            raise
 
-    def _get_cached_jwks(self, jwks_url: str) -> Dict[str, Any]:
-        ttl_s = float(
-            os.environ.get("SUPABASE_JWKS_CACHE_TTL_S", str(_DEFAULT_JWKS_CACHE_TTL_S))
-        )
-        now = time.time()
-        cached = _JWKS_CACHE.get(jwks_url)
-        if (
-            cached
-            and float(cached.get("expires_at", 0)) > now
-            and isinstance(cached.get("jwks"), dict)
-        ):
-            return cached["jwks"]
+    def _jwks_refresh(self, jwks_url: str) -> asyncio.Task:
+        task = self._jwks_inflight.get(jwks_url)
+        if task is None or task.done():
+            task = asyncio.get_running_loop().create_task(self._fetch_jwks(jwks_url))
+            task.add_done_callback(_consume_task_exception)
+            self._jwks_inflight[jwks_url] = task
+        return task
 
-        req = urllib.request.Request(
-            jwks_url, method="GET", headers={"Accept": "application/json"}
-        )
+    async def _fetch_jwks(self, jwks_url: str) -> Dict[str, Any]:
         try:
-            with urllib.request.urlopen(
-                req, timeout=5, context=_certifi_ssl_context()
+            session = await get_postgrest_pool().session()
+            async with session.get(
+                jwks_url,
+                headers={"Accept": "application/json"},
+                timeout=aiohttp.ClientTimeout(total=5),
             ) as resp:
-                jwks = json.loads(resp.read().decode("utf-8"))
-        except urllib.error.URLError as e:
-            raise HTTPException(status_code=401, detail=f"Failed to fetch JWKS: {e}")
+                resp.raise_for_status()
+                jwks = await resp.json(content_type=None)
         except Exception as e:
+            logger.warning(f"Failed to fetch JWKS from {jwks_url}: {e}")
             raise HTTPException(status_code=401, detail=f"Failed to fetch JWKS: {e}")
-
-        # Do not cache longer than the default window.
-        _JWKS_CACHE[jwks_url] = {
-            "jwks": jwks,
-            "expires_at": now + max(1.0, min(ttl_s, _DEFAULT_JWKS_CACHE_TTL_S)),
+        if not isinstance(jwks, dict):
+            raise HTTPException(
+                status_code=401, detail="Failed to fetch JWKS: not an object"
+            )
+        self._jwks[jwks_url] = (jwks, time.time())
+        # Drop PEMs for keys that are no longer published.
+        kids = {
+            str(k.get("kid") or "")
+            for k in jwks.get("keys") or []
+            if isinstance(k, dict)
         }
+        for pem_key in [k for k in self._pem if k[0] == jwks_url and k[1] not in kids]:
+            del self._pem[pem_key]
         return jwks
 
+
+def _consume_task_exception(task: asyncio.Task) -> None:
+    if not task.cancelled():
+        task.exception()
+
+
+_token_verifier: Optional[TokenVerifier] = None
+
+
+def get_token_verifier() -> TokenVerifier:
+    """Process-wide verifier singleton."""
+    global _token_verifier  # pylint: disable=global-statement
+    if _token_verifier is None:
+        _token_verifier = TokenVerifier()
+    return _token_verifier
+
+
+def reset_token_verifier() -> None:
+    """Re-read secrets/issuer settings and drop all cached tokens and keys."""
+    global _token_verifier  # pylint: disable=global-statement
+    _token_verifier = None
+    _reset_redis()
+
+
+class HTTPBearer401(HTTPBearer):
+    async def __call__(self, request: Request) -> HTTPAuthorizationCredentials:
+        try:
+            credentials = await super().__call__(request)
+        except HTTPException as exc:
+            # FastAPI's HTTPBearer raises 403, convert to 401
+            if exc.status_code == status.HTTP_403_FORBIDDEN:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Not authenticated",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            raise
+        if credentials is None or credentials.scheme.lower() != "bearer":
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        return credentials
+
+
+# Security scheme
+security = HTTPBearer401()
+
+# Circuit breaker for auth operations
+auth_circuit_breaker = CircuitBreaker(
+    failure_threshold=settings.resilience.circuit_breaker_fail_max,
+    recovery_timeout=settings.resilience.circuit_breaker_reset_timeout,
+    expected_exception=Exception,
+)
+
+
+class AuthMiddleware:
+    """Authentication middleware with JWT validation and role checking"""
+
+    def __init__(self, app):
+        self.app = app
+        self._verifier = get_token_verifier()
+
+    @property
+    def redis_client(self) -> Optional[redis.Redis]:
+        return _get_redis_client()
+
+    async def __call__(self, scope, receive, send):
+        """FastAPI middleware call method"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Create request object from scope
+        request = Request(scope, receive)
+
+        try:
+            # Try to get user from request if authentication header is present
+            auth_header = request.headers.get("Authorization")
+            token = None
+
+            # Check for Bearer token in Authorization header
+            if auth_header and auth_header.startswith("Bearer "):
+                token = auth_header.split(" ")[1]
+
+            # Check for session cookie if no Bearer token
+            if not token:
+                token = request.cookies.get("access_token")
+
+            if token:
+                try:
+                    # Check if token is blacklisted
+                    if await self._is_token_blacklisted(token):
+                        response = JSONResponse(
+                            status_code=401,
+                            content={"detail": "Token has been revoked"},
+                        )
+                        await response(scope, receive, send)
+                        return
+
+                    # Decode JWT token
+                    payload = await self._decode_jwt_token(token)
+                    user_id = payload.get("sub")
+                    email = payload.get("email")
+
+                    if user_id:
+                        # Add user info to request state
+                        request.state.user = {
+                            "id": user_id,
+                            "email": email,
+                            "username": email,
+                            "is_active": True,
+                            "roles": ["user"],
+                            "token_payload": payload,
+                        }
+                        request.state.user_id = user_id
+
+                except HTTPException:
+                    # Token validation failed, but continue without user
+                    pass
+                except Exception as e:
+                    logger.debug(f"Auth middleware error: {e}")
+                    # Continue without user
+                    pass
+
+            # Continue to next middleware/endpoint
+            await self.app(scope, receive, send)
+
+        except Exception as e:
+            logger.error(f"Auth middleware error: {e}")
+            response = JSONResponse(
+                status_code=500, content={"detail": "Authentication middleware error"}
+            )
+            await response(scope, receive, send)
+
+    async def _is_token_blacklisted(self, token: str) -> bool:
+        """Check if token is blacklisted in Redis"""
+        return await self._verifier.is_revoked(token)
+
+    async def _decode_jwt_token(self, token: str) -> Dict[str, Any]:
+        """Decode and validate JWT token (see TokenVerifier)"""
+        return await self._verifier.decode(token)
+
     async def _get_user_from_db(
         self, user_id: str, db: AsyncSession
     ) -> Optional[Dict[str, Any]]:
@@ -520,7 +726,7 @@ class AuthMiddleware:
             raise HTTPException(status_code=401, detail="Token has been revoked")
 
         # Decode JWT token
-        payload = self._decode_jwt_token(token)
+        payload = await self._decode_jwt_token(token)
         user_id = payload.get("sub")
         email = payload.get("email")
 
@@ -670,7 +876,7 @@ class AuthMiddleware:
             if await self._is_token_blacklisted(token):
                 return None
 
-            payload = self._decode_jwt_token(token)
+            payload = await self._decode_jwt_token(token)
             user_id = payload.get("sub")
 
             if not user_id:
@@ -746,12 +952,12 @@ async def get_current_user(
             )
 
         # Check if token is blacklisted
-        auth_middleware = AuthMiddleware(None)
-        if await auth_middleware._is_token_blacklisted(token):
+        verifier = get_token_verifier()
+        if await verifier.is_revoked(token):
             raise HTTPException(status_code=401, detail="Token has been revoked")
 
-        # Decode JWT token
-        payload = auth_middleware._decode_jwt_token(token)
+        # Decode JWT token (cached until exp after the first verification)
+        payload = await verifier.decode(token)
         user_id = payload.get("sub")
         email = payload.get("email")
 
@@ -0,0 +1,3 @@
+"""
+PDF rendering: report layouts and the off-loop render service
+"""
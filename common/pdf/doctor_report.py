@@ -0,0 +1,280 @@
+"""
+Doctor-prep report PDF: the one-page-and-up summary a patient brings to an
+appointment (key metrics, trends, health intelligence, correlations, care
+plan progress), drawn directly on a ReportLab canvas.
+
+``render_doctor_report`` takes ``DoctorPrepReport.model_dump()`` so it can run
+in the PDF worker pool without importing the API package.
+"""
+
+import io
+from types import SimpleNamespace
+from typing import Any, Dict
+
+
+class _Record(SimpleNamespace):
+    """Attribute access like the pydantic model, plus ``record["key"]``."""
+
+    def __getitem__(self, key: str) -> Any:
+        return getattr(self, key)
+
+
+def _record(value: Any) -> Any:
+    if isinstance(value, dict):
+        return _Record(**{k: _record(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [_record(v) for v in value]
+    return value
+
+
+def render_doctor_report(data: Dict[str, Any]) -> bytes:
+    """Render a dumped ``DoctorPrepReport`` to PDF bytes."""
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.units import inch
+
+    report = _record(data)
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+    margin = 1.0 * inch
+    bottom_margin = 0.85 * inch  # space reserved for footer
+
+    def add_footer(c: canvas.Canvas) -> None:
+        c.setFont("Helvetica", 9)
+        c.drawString(
+            margin,
+            0.5 * inch,
+            f"Generated: {report.generated_at.strftime('%Y-%m-%d %H:%M UTC')}",
+        )
+        c.drawString(
+            margin,
+            0.35 * inch,
+            "For informational purposes only — not a substitute for medical advice.",
+        )
+
+    def new_page(c: canvas.Canvas) -> float:
+        add_footer(c)
+        c.showPage()
+        return height - margin
+
+    def check_page(c: canvas.Canvas, y: float, needed: float = 0.5 * inch) -> float:
+        if y < bottom_margin + needed:
+            y = new_page(c)
+        return y
+
+    def section_title(c: canvas.Canvas, y: float, text: str) -> float:
+        y = check_page(c, y, 0.6 * inch)
+        c.setFont("Helvetica-Bold", 13)
+        c.setFillColorRGB(0.18, 0.18, 0.18)
+        c.drawString(margin, y, text)
+        y -= 0.05 * inch
+        c.setStrokeColorRGB(0.7, 0.7, 0.7)
+        c.setLineWidth(0.5)
+        c.line(margin, y, width - margin, y)
+        y -= 0.25 * inch
+        return y
+
+    def body_line(
+        c: canvas.Canvas, y: float, text: str, indent: float = 0.2 * inch
+    ) -> float:
+        y = check_page(c, y, 0.3 * inch)
+        c.setFont("Helvetica", 10)
+        c.setFillColorRGB(0.15, 0.15, 0.15)
+        # Wrap long lines
+        max_width_chars = int((width - margin - indent - margin) / (10 * 0.55))
+        if len(text) > max_width_chars:
+            words = text.split()
+            line = ""
+            for word in words:
+                if len(line) + len(word) + 1 <= max_width_chars:
+                    line = f"{line} {word}".strip()
+                else:
+                    c.drawString(margin + indent, y, line)
+                    y -= 0.22 * inch
+                    y = check_page(c, y, 0.3 * inch)
+                    c.setFont("Helvetica", 10)
+                    line = word
+            if line:
+                c.drawString(margin + indent, y, line)
+                y -= 0.22 * inch
+        else:
+            c.drawString(margin + indent, y, text)
+            y -= 0.22 * inch
+        return y
+
+    # ── PAGE 1: Header + Summary ────────────────────────────────────────────
+
+    # Title block
+    c.setFont("Helvetica-Bold", 22)
+    c.setFillColorRGB(0.1, 0.1, 0.4)
+    c.drawString(margin, height - margin, "Health Summary Report")
+
+    c.setFont("Helvetica", 11)
+    c.setFillColorRGB(0.3, 0.3, 0.3)
+    c.drawString(
+        margin,
+        height - margin - 0.35 * inch,
+        f"Period: {report.date_range['start']}  →  {report.date_range['end']}",
+    )
+
+    # Overall score badge
+    score = report.summary.overall_health_score
+    c.setFont("Helvetica-Bold", 13)
+    c.setFillColorRGB(0.1, 0.5, 0.2)
+    c.drawString(
+        margin, height - margin - 0.75 * inch, f"Overall Health Score: {score} / 100"
+    )
+
+    y = height - margin - 1.3 * inch
+
+    # Key Metrics
+    y = section_title(c, y, "Key Metrics")
+    for metric in report.summary.key_metrics:
+        unit_str = f" {metric.unit}" if metric.unit else ""
+        y = body_line(
+            c, y, f"• {metric.name}: {metric.value}{unit_str}  [{metric.status}]"
+        )
+
+    # Trends
+    if report.summary.trends:
+        y -= 0.15 * inch
+        y = section_title(c, y, "Trends")
+        for trend in report.summary.trends:
+            arrow = (
+                "↑"
+                if trend.direction == "improving"
+                else ("↓" if trend.direction == "declining" else "→")
+            )
+            y = body_line(
+                c,
+                y,
+                f"• {trend.metric}: {arrow} {trend.direction}  ({trend.percentage_change:+.1f}%)",
+            )
+
+    # Areas to Discuss
+    if report.summary.concerns:
+        y -= 0.15 * inch
+        y = section_title(c, y, "Areas to Discuss with Doctor")
+        for concern in report.summary.concerns:
+            y = body_line(c, y, f"• {concern}")
+
+    # Positive Progress
+    if report.summary.improvements:
+        y -= 0.15 * inch
+        y = section_title(c, y, "Positive Progress")
+        for improvement in report.summary.improvements:
+            y = body_line(c, y, f"• {improvement}")
+
+    # ── HEALTH INTELLIGENCE SECTION ─────────────────────────────────────────
+    if report.health_intelligence:
+        hi = report.health_intelligence
+        y -= 0.2 * inch
+        y = section_title(c, y, "Health Intelligence Indicators")
+
+        # Trend indicators
+        sleep_arrow = (
+            "↑"
+            if hi.sleep_score_trend == "improving"
+            else ("↓" if hi.sleep_score_trend == "declining" else "→")
+        )
+        hrv_arrow = (
+            "↑"
+            if hi.hrv_trend == "improving"
+            else ("↓" if hi.hrv_trend == "declining" else "→")
+        )
+        y = body_line(
+            c,
+            y,
+            f"• Sleep Score Trend:         {sleep_arrow} {hi.sleep_score_trend.capitalize()}",
+        )
+        y = body_line(
+            c,
+            y,
+            f"• HRV Trend:                 {hrv_arrow} {hi.hrv_trend.capitalize()}",
+        )
+
+        # Scored indicators
+        nq_label = (
+            "Good"
+            if hi.nutrition_quality_score >= 70
+            else ("Fair" if hi.nutrition_quality_score >= 45 else "Needs Improvement")
+        )
+        y = body_line(
+            c,
+            y,
+            f"• Nutrition Quality Score:   {hi.nutrition_quality_score}/100  [{nq_label}]",
+        )
+
+        inf_upper = hi.inflammation_risk.upper()
+        y = body_line(c, y, f"• Inflammation Risk:         {inf_upper}")
+
+        stress_label = (
+            "High"
+            if hi.stress_index > 60
+            else ("Moderate" if hi.stress_index > 40 else "Low")
+        )
+        y = body_line(
+            c,
+            y,
+            f"• Stress Index:              {hi.stress_index}/100  [{stress_label}]",
+        )
+
+        # Personalized actions
+        if hi.personalized_actions:
+            y -= 0.1 * inch
+            y = body_line(c, y, "Recommended Actions:", indent=0)
+            for action in hi.personalized_actions[:5]:
+                y = body_line(c, y, f"  ➜  {action}")
+
+    # ── TOP NUTRITION-HEALTH CORRELATIONS ────────────────────────────────────
+    if report.nutrition_correlations:
+        y -= 0.2 * inch
+        y = section_title(c, y, "Top Nutrition-Health Correlations")
+        for corr in report.nutrition_correlations:
+            r_val = corr.correlation_coefficient
+            direction = "positive" if r_val >= 0 else "negative"
+            y = body_line(
+                c,
+                y,
+                f"• {corr.metric_a_label}  ↔  {corr.metric_b_label}"
+                f"   (r={r_val:+.2f}, {corr.strength}, {direction})",
+            )
+            if corr.effect_description:
+                y = body_line(c, y, f"    {corr.effect_description}", indent=0.5 * inch)
+
+    # ── HEALTH CONDITIONS ────────────────────────────────────────────────────
+    if report.condition_specific_notes:
+        y -= 0.2 * inch
+        y = section_title(c, y, "Active Health Conditions")
+        for note in report.condition_specific_notes:
+            y = body_line(c, y, f"• {note}")
+
+    # ── CARE PLAN PROGRESS ────────────────────────────────────────────────────
+    if report.care_plan_progress:
+        y -= 0.2 * inch
+        y = section_title(c, y, "Care Plan Progress")
+        for plan in report.care_plan_progress:
+            source_tag = " [Doctor-prescribed]" if plan.source == "doctor" else ""
+            y = body_line(c, y, f"• {plan.title}{source_tag}")
+            status_parts = []
+            if plan.current_value is not None and plan.target_value is not None:
+                unit = f" {plan.target_unit}" if plan.target_unit else ""
+                status_parts.append(
+                    f"Current: {plan.current_value}{unit}  /  Target: {plan.target_value}{unit}"
+                )
+            if plan.progress_pct is not None:
+                on_track_str = " ✓ On track" if plan.on_track else " ✗ Behind"
+                status_parts.append(f"Progress: {plan.progress_pct:.0f}%{on_track_str}")
+            if plan.days_remaining is not None:
+                status_parts.append(f"Days remaining: {plan.days_remaining}")
+            if status_parts:
+                y = body_line(
+                    c, y, "  " + "   |   ".join(status_parts), indent=0.4 * inch
+                )
+
+    # Footer on final page
+    add_footer(c)
+    c.save()
+    return buffer.getvalue()
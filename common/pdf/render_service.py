@@ -0,0 +1,237 @@
+"""
+PDF Render Service
+Renders reports off the event loop and reuses finished PDFs.
+
+ReportLab layout is pure-Python CPU work; a multi-page report rendered
+inside an ``async def`` handler stalls every other request on the worker.
+``PDFRenderService.render`` ships a module-level renderer and its payload
+(plain dicts/lists) to a dedicated, bounded process pool, so report
+rendering cannot starve the shared CPU pool used by correlations.
+
+Finished PDFs are kept in a byte-bounded LRU keyed on a digest of the
+renderer and its input, so a repeat download of unchanged data is served
+from memory, and concurrent requests for the same document share one
+render.  Static layout assets (stylesheets, table styles) are cached per
+worker process in ``common.pdf.templates``.
+
+Configuration:
+    PDF_POOL_WORKERS        render processes (default 2)
+    PDF_POOL_MAX_PENDING    renders queued or running before callers wait
+                            (default 4 x workers)
+    PDF_CACHE_TTL_S         finished-PDF lifetime (default 900)
+    PDF_CACHE_MAX_BYTES     memory for finished PDFs (default 64 MiB)
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from common.utils.logging import get_logger
+from common.utils.process_pool import CPUProcessPool
+
+logger = get_logger(__name__)
+
+Renderer = Callable[[Any], bytes]
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def timed_render(renderer: Renderer, payload: Any) -> Tuple[bytes, float]:
+    """Worker-side wrapper: render and report the pure render time."""
+    started = time.perf_counter()
+    pdf = renderer(payload)
+    return pdf, time.perf_counter() - started
+
+
+def render_digest(renderer: Renderer, payload: Any) -> str:
+    """Content digest of one document: renderer identity plus its input."""
+    canonical = json.dumps(payload, sort_keys=True, default=str, ensure_ascii=False)
+    ident = f"{renderer.__module__}.{renderer.__qualname__}\n"
+    return hashlib.sha256((ident + canonical).encode("utf-8")).hexdigest()
+
+
+class PDFRenderService:
+    """Bounded render pool with a digest-keyed cache of finished PDFs."""
+
+    def __init__(
+        self,
+        pool: Optional[CPUProcessPool] = None,
+        ttl_s: Optional[float] = None,
+        max_bytes: Optional[int] = None,
+    ):
+        if pool is None:
+            workers = max(1, _env_int("PDF_POOL_WORKERS", 2))
+            pool = CPUProcessPool(
+                workers=workers,
+                max_pending=_env_int("PDF_POOL_MAX_PENDING", workers * 4),
+            )
+        self.pool = pool
+        self.ttl_s = ttl_s if ttl_s is not None else _env_int("PDF_CACHE_TTL_S", 900)
+        self.max_bytes = max_bytes or _env_int("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024)
+
+        # digest -> (pdf, monotonic expiry), least recently used first
+        self._cache: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._cache_bytes = 0
+        self._inflight: Dict[str, "asyncio.Future[bytes]"] = {}
+
+        self._renders = 0
+        self._failures = 0
+        self._cache_hits = 0
+        self._coalesced = 0
+        self._pending = 0
+        self._render_total_s = 0.0
+        self._render_max_s = 0.0
+        self._wait_total_s = 0.0
+
+    # ------------------------------------------------------------------
+    # Cache
+    # ------------------------------------------------------------------
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        pdf, expires_at = entry
+        if time.monotonic() >= expires_at:
+            self._evict(key)
+            return None
+        self._cache.move_to_end(key)
+        return pdf
+
+    def _cache_put(self, key: str, pdf: bytes) -> None:
+        if len(pdf) > self.max_bytes:
+            return
+        self._evict(key)
+        self._cache[key] = (pdf, time.monotonic() + self.ttl_s)
+        self._cache_bytes += len(pdf)
+        while self._cache_bytes > self.max_bytes:
+            self._evict(next(iter(self._cache)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._cache_bytes -= len(entry[0])
+
+    def clear(self) -> None:
+        """Forget every cached PDF."""
+        self._cache.clear()
+        self._cache_bytes = 0
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+
+    async def _render(self, renderer: Renderer, payload: Any) -> bytes:
+        self._pending += 1
+        queued_at = time.perf_counter()
+        try:
+            pdf, render_s = await self.pool.run(timed_render, renderer, payload)
+        except Exception:
+            self._failures += 1
+            raise
+        finally:
+            self._pending -= 1
+        elapsed = time.perf_counter() - queued_at
+        self._renders += 1
+        self._render_total_s += render_s
+        self._render_max_s = max(self._render_max_s, render_s)
+        self._wait_total_s += max(0.0, elapsed - render_s)
+        logger.debug(
+            f"Rendered {renderer.__qualname__} ({len(pdf)} bytes) "
+            f"in {render_s * 1000:.0f}ms, waited {(elapsed - render_s) * 1000:.0f}ms"
+        )
+        return pdf
+
+    async def render(
+        self, renderer: Renderer, payload: Any, cache_key: Any = None
+    ) -> bytes:
+        """
+        Render ``renderer(payload)`` in the pool, or return the cached PDF.
+
+        *renderer* must be a module-level function and *payload* picklable
+        plain data.  The cache digest covers *payload*, or *cache_key* when
+        given (e.g. the payload minus a generation timestamp).
+        """
+        key = render_digest(renderer, payload if cache_key is None else cache_key)
+        cached = self._cache_get(key)
+        if cached is not None:
+            self._cache_hits += 1
+            return cached
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._coalesced += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._render(renderer, payload))
+        self._inflight[key] = future
+
+        def _settle(done: "asyncio.Future[bytes]") -> None:
+            self._inflight.pop(key, None)
+            if not done.cancelled() and done.exception() is None:
+                self._cache_put(key, done.result())
+
+        future.add_done_callback(_settle)
+        # Shielded so a client that disconnects does not cancel the render
+        # for the others waiting on it (the result is still cached).
+        return await asyncio.shield(future)
+
+    def stats(self) -> Dict[str, Any]:
+        """Render latency, queue depth and cache counters."""
+        workers = getattr(self.pool, "workers", 1)
+        return {
+            "workers": workers,
+            "pending": self._pending,
+            "queue_depth": max(0, self._pending - workers),
+            "renders": self._renders,
+            "failures": self._failures,
+            "cache_hits": self._cache_hits,
+            "coalesced": self._coalesced,
+            "cache_entries": len(self._cache),
+            "cache_bytes": self._cache_bytes,
+            "avg_render_ms": (
+                round(self._render_total_s / self._renders * 1000, 1)
+                if self._renders
+                else 0.0
+            ),
+            "max_render_ms": round(self._render_max_s * 1000, 1),
+            "avg_wait_ms": (
+                round(self._wait_total_s / self._renders * 1000, 1)
+                if self._renders
+                else 0.0
+            ),
+        }
+
+    def shutdown(self) -> None:
+        self.pool.shutdown()
+
+
+_renderer: Optional[PDFRenderService] = None  # pylint: disable=invalid-name
+
+
+def get_pdf_renderer() -> PDFRenderService:
+    """Process-wide PDF render service."""
+    global _renderer  # pylint: disable=global-statement,invalid-name
+    if _renderer is None:
+        _renderer = PDFRenderService()
+    return _renderer
+
+
+async def render_pdf(renderer: Renderer, payload: Any, cache_key: Any = None) -> bytes:
+    """Await a PDF from the shared render service."""
+    return await get_pdf_renderer().render(renderer, payload, cache_key)
+
+
+def shutdown_pdf_renderer() -> None:
+    """Stop render workers; called from the application lifespan."""
+    if _renderer is not None:
+        _renderer.shutdown()
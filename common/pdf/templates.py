@@ -0,0 +1,108 @@
+"""
+PDF Templates
+Static layout assets shared by every report rendered in this process.
+
+Building the ReportLab sample stylesheet and the derived paragraph styles
+costs more than laying out a short report, and the result never changes,
+so it is built once per (worker) process and reused.
+"""
+
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Tuple
+
+
+class HealthExportTheme(NamedTuple):
+    """Colors and paragraph styles of the health history export."""
+
+    teal: Any
+    dark: Any
+    muted: Any
+    grid: Any
+    stripe: Any
+    title: Any
+    h2: Any
+    h3: Any
+    body: Any
+    muted_text: Any
+
+
+@lru_cache(maxsize=1)
+def health_export_theme() -> HealthExportTheme:
+    """Styles for the health history export (built once per process)."""
+    from reportlab.lib import colors
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+
+    styles = getSampleStyleSheet()
+    teal = colors.HexColor("#00D4AA")
+    dark = colors.HexColor("#1A2332")
+    muted = colors.HexColor("#526380")
+
+    return HealthExportTheme(
+        teal=teal,
+        dark=dark,
+        muted=muted,
+        grid=colors.HexColor("#E2E8F0"),
+        stripe=colors.HexColor("#F8FAFC"),
+        title=ParagraphStyle(
+            "Title",
+            parent=styles["Title"],
+            fontSize=20,
+            textColor=dark,
+            spaceAfter=4,
+        ),
+        h2=ParagraphStyle(
+            "H2",
+            parent=styles["Heading2"],
+            fontSize=13,
+            textColor=teal,
+            spaceBefore=14,
+            spaceAfter=4,
+        ),
+        h3=ParagraphStyle(
+            "H3",
+            parent=styles["Heading3"],
+            fontSize=11,
+            textColor=dark,
+            spaceBefore=8,
+            spaceAfter=2,
+        ),
+        body=ParagraphStyle(
+            "Body",
+            parent=styles["Normal"],
+            fontSize=9,
+            textColor=dark,
+            leading=13,
+        ),
+        muted_text=ParagraphStyle(
+            "Muted",
+            parent=styles["Normal"],
+            fontSize=8,
+            textColor=muted,
+            leading=11,
+        ),
+    )
+
+
+@lru_cache(maxsize=2)
+def table_style_commands(bold_header: bool = True) -> Tuple[Tuple[Any, ...], ...]:
+    """TableStyle commands for the export's striped tables."""
+    from reportlab.lib import colors
+
+    theme = health_export_theme()
+    cmds: List[Tuple[Any, ...]] = [
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+        ("ROWBACKGROUNDS", (0, 0), (-1, -1), [colors.white, theme.stripe]),
+        ("GRID", (0, 0), (-1, -1), 0.25, theme.grid),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 4),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 4),
+        ("TOPPADDING", (0, 0), (-1, -1), 3),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 3),
+    ]
+    if bold_header:
+        cmds += [
+            ("BACKGROUND", (0, 0), (-1, 0), theme.teal),
+            ("TEXTCOLOR", (0, 0), (-1, 0), colors.white),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ]
+    return tuple(cmds)
@@ -0,0 +1,84 @@
+"""
+Event Loop Lag Monitor
+Measures how late the asyncio event loop wakes up from a timed sleep.
+
+A healthy loop wakes within a millisecond or two of the requested interval;
+anything that blocks the loop (CPU-bound work, synchronous I/O) shows up as
+lag.  The monitor runs as a background task started from the application
+lifespan and keeps a rolling window of samples for ``stats()``.
+"""
+
+import asyncio
+import contextlib
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class EventLoopLagMonitor:
+    """Samples event-loop scheduling delay every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 0.5, window: int = 240):
+        self.interval = interval
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._max_s = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    def record(self, lag_s: float) -> None:
+        lag_s = max(0.0, lag_s)
+        self._samples.append(lag_s)
+        self._max_s = max(self._max_s, lag_s)
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = loop.time() - started - self.interval
+            self.record(lag)
+            if lag > 1.0:
+                logger.warning(f"Event loop blocked for {lag:.2f}s")
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        if not samples:
+            return {
+                "samples": 0,
+                "last_ms": 0.0,
+                "avg_ms": 0.0,
+                "p95_ms": 0.0,
+                "max_ms": 0.0,
+            }
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        return {
+            "samples": len(samples),
+            "last_ms": round(self._samples[-1] * 1000, 2),
+            "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+            "p95_ms": round(p95 * 1000, 2),
+            "max_ms": round(self._max_s * 1000, 2),
+        }
+
+
+_monitor: Optional[EventLoopLagMonitor] = None
+
+
+def get_loop_lag_monitor() -> EventLoopLagMonitor:
+    """Process-wide monitor singleton."""
+    global _monitor  # pylint: disable=global-statement
+    if _monitor is None:
+        _monitor = EventLoopLagMonitor()
+    return _monitor
@@ -0,0 +1,139 @@
+"""
+Process Pool
+Bounded process pool for CPU-bound work that must not run on the event loop.
+
+Pure-Python / NumPy number crunching inside an ``async def`` handler blocks
+every other request on the worker.  ``run_in_process`` ships a picklable,
+module-level function to a shared ``ProcessPoolExecutor`` and awaits it.
+
+Worker processes use the ``spawn`` start method so they never inherit the
+parent's event loop, sockets or held locks; keep submitted functions in
+lightweight modules (e.g. ``common.metrics``) so worker start-up stays cheap.
+
+Configuration:
+    CPU_POOL_WORKERS       worker processes (default: min(4, cpu_count - 1), >= 1)
+    CPU_POOL_MAX_PENDING   max tasks queued or running before callers wait
+                           (default: 4 x workers)
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from .logging import get_logger
+
+logger = get_logger(__name__)
+
+
+def _default_workers() -> int:
+    try:
+        return max(1, int(os.environ.get("CPU_POOL_WORKERS", "")))
+    except ValueError:
+        return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+class CPUProcessPool:
+    """Lazily started ``ProcessPoolExecutor`` with an async admission limit."""
+
+    def __init__(
+        self, workers: Optional[int] = None, max_pending: Optional[int] = None
+    ):
+        self.workers = workers or _default_workers()
+        try:
+            default_pending = int(os.environ.get("CPU_POOL_MAX_PENDING", ""))
+        except ValueError:
+            default_pending = self.workers * 4
+        self.max_pending = max_pending or max(self.workers, default_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._slots_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._in_flight = 0
+        self._busy_s = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            logger.info(f"CPU process pool started with {self.workers} worker(s)")
+        return self._executor
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._slots is None or self._slots_loop is not loop:
+            self._slots = asyncio.Semaphore(self.max_pending)
+            self._slots_loop = loop
+        return self._slots
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run ``func(*args)`` in a worker process and return its result."""
+        async with self._get_slots():
+            loop = asyncio.get_running_loop()
+            self._submitted += 1
+            self._in_flight += 1
+            started = time.perf_counter()
+            try:
+                result = await loop.run_in_executor(self._get_executor(), func, *args)
+                self._completed += 1
+                return result
+            except BrokenProcessPool:
+                # A worker died (OOM-kill etc.) — rebuild on next use.
+                self._failed += 1
+                self._executor = None
+                logger.error("CPU process pool broken; it will be restarted")
+                raise
+            except Exception:
+                self._failed += 1
+                raise
+            finally:
+                self._in_flight -= 1
+                self._busy_s += time.perf_counter() - started
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            logger.info("CPU process pool shut down")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "started": self._executor is not None,
+            "in_flight": self._in_flight,
+            "submitted": self._submitted,
+            "completed": self._completed,
+            "failed": self._failed,
+            "busy_seconds": round(self._busy_s, 3),
+        }
+
+
+_pool: Optional[CPUProcessPool] = None
+
+
+def get_process_pool() -> CPUProcessPool:
+    """Process-wide pool singleton."""
+    global _pool  # pylint: disable=global-statement
+    if _pool is None:
+        _pool = CPUProcessPool()
+    return _pool
+
+
+async def run_in_process(func: Callable[..., Any], *args: Any) -> Any:
+    """Await ``func(*args)`` on the shared CPU process pool."""
+    return await get_process_pool().run(func, *args)
+
+
+def shutdown_process_pool() -> None:
+    """Stop worker processes; called from the application lifespan."""
+    if _pool is not None:
+        _pool.shutdown()
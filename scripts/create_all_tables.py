@@ -123,10 +123,14 @@ async def create_device_data_tables(engine):
     try:
         from apps.device_data.models.device import Device
         from apps.device_data.models.data_point import DeviceDataPoint
+        from apps.device_data.services.data_statistics import install_counters
+        from common.database.outbox import OutboxEvent
         from common.models.base import Base
 
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
+            # The counters table is useless without its triggers
+            await install_counters(conn)
         print("  ✓ Device Data tables created (2 tables)")
     except Exception as e:
         print(f"  ✗ Device Data tables failed: {e}")
@@ -162,6 +166,7 @@ async def create_medical_records_tables(engine):
             EpicFHIRImagingStudy,
             EpicFHIRSyncLog,
         )
+        from common.database.outbox import OutboxEvent
         from common.models.base import Base
 
         async with engine.begin() as conn:
@@ -0,0 +1,66 @@
+-- Atomic usage-quota consumption for UsageGate.
+-- Resolves the caller's tier, checks the feature limit and increments the
+-- weekly counter in a single statement, so concurrent requests can no longer
+-- both read "one left" and both pass (or both write count + 1).
+--
+-- p_limits maps tier -> weekly limit for p_feature (-1 = unlimited,
+-- 0 = not available), e.g. '{"free": 3, "pro": -1, "pro_plus": -1}'.
+-- The limits table lives in application code (TIER_LIMITS), so it is passed in.
+
+CREATE OR REPLACE FUNCTION public.consume_usage(
+  p_user_id UUID,
+  p_feature TEXT,
+  p_week_start DATE,
+  p_limits JSONB
+)
+RETURNS TABLE (tier TEXT, usage_limit INT, used INT, allowed BOOLEAN)
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+#variable_conflict use_column
+DECLARE
+  v_tier TEXT;
+  v_limit INT;
+  v_used INT;
+BEGIN
+  SELECT s.tier INTO v_tier
+  FROM subscriptions s
+  WHERE s.user_id = p_user_id AND s.status IN ('active', 'trialing')
+  LIMIT 1;
+  v_tier := COALESCE(v_tier, 'free');
+  v_limit := COALESCE((p_limits ->> v_tier)::INT, (p_limits ->> 'free')::INT, 0);
+
+  IF v_limit = -1 THEN
+    RETURN QUERY SELECT v_tier, v_limit, 0, TRUE;
+    RETURN;
+  END IF;
+  IF v_limit = 0 THEN
+    RETURN QUERY SELECT v_tier, v_limit, 0, FALSE;
+    RETURN;
+  END IF;
+
+  -- The conditional DO UPDATE takes the row lock, so the check and the
+  -- increment cannot interleave with another caller.
+  INSERT INTO usage_tracking AS u (user_id, feature, week_start, usage_count, updated_at)
+  VALUES (p_user_id, p_feature, p_week_start, 1, NOW())
+  ON CONFLICT (user_id, feature, week_start) DO UPDATE
+    SET usage_count = u.usage_count + 1, updated_at = NOW()
+    WHERE u.usage_count < v_limit
+  RETURNING u.usage_count INTO v_used;
+
+  IF FOUND THEN
+    RETURN QUERY SELECT v_tier, v_limit, v_used, TRUE;
+    RETURN;
+  END IF;
+
+  SELECT u.usage_count INTO v_used
+  FROM usage_tracking u
+  WHERE u.user_id = p_user_id AND u.feature = p_feature AND u.week_start = p_week_start;
+  RETURN QUERY SELECT v_tier, v_limit, COALESCE(v_used, v_limit), FALSE;
+END;
+$$;
+
+-- Takes an arbitrary user id, so only the backend (service role) may call it.
+REVOKE ALL ON FUNCTION public.consume_usage(UUID, TEXT, DATE, JSONB) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION public.consume_usage(UUID, TEXT, DATE, JSONB) TO service_role;
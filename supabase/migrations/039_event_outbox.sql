@@ -0,0 +1,29 @@
+-- Transactional outbox for service events (device data, medical records).
+-- Rows are written in the same transaction as the data change and relayed
+-- to Kafka by the service's outbox relay (common/database/outbox.py).
+
+CREATE TABLE IF NOT EXISTS event_outbox (
+  id BIGSERIAL PRIMARY KEY,
+  topic VARCHAR(255) NOT NULL,
+  partition_key VARCHAR(255),           -- user / patient id; keeps per-user order
+  payload JSONB NOT NULL,
+  headers JSONB,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+  published_at TIMESTAMPTZ,             -- NULL until the broker acknowledged it
+  attempts INTEGER NOT NULL DEFAULT 0,
+  next_attempt_at TIMESTAMPTZ,          -- retry backoff
+  last_error TEXT
+);
+
+-- The relay scans pending rows in id order.
+CREATE INDEX IF NOT EXISTS idx_event_outbox_pending
+  ON event_outbox(id) WHERE published_at IS NULL;
+-- Claims skip rows queued behind an earlier pending row with the same key.
+CREATE INDEX IF NOT EXISTS idx_event_outbox_pending_key
+  ON event_outbox(partition_key, id) WHERE published_at IS NULL;
+-- Retention purge of published rows.
+CREATE INDEX IF NOT EXISTS idx_event_outbox_published_at
+  ON event_outbox(published_at);
+
+-- Service-role only: no end-user access.
+ALTER TABLE event_outbox ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,190 @@
+"""Tests for the cached, concurrently assembled agent context snapshot."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from apps.mvp_api.agents import context_snapshot
+from apps.mvp_api.agents.context_snapshot import (
+    gather_sources,
+    get_context_snapshot,
+    invalidate_context_snapshot,
+)
+from apps.mvp_api.dependencies import usage_gate
+
+ROWS = {
+    "profiles": [{"first_name": "Ada", "last_name": "Lovelace"}],
+    "health_conditions": [{"condition_name": "PCOS"}],
+    "medications": [{"medication_name": "Metformin", "dosage": "500mg"}],
+    "medication_adherence_log": [{"was_taken": True}, {"was_taken": False}],
+    "weekly_checkins": [{"energy_level": 6}, {"energy_level": 8}],
+}
+
+
+def _fake_get(
+    calls: list,
+    delay: float = 0.01,
+    slow: dict | None = None,
+    down: tuple = (),
+):
+    async def fake_get(table: str, params: str) -> list:
+        calls.append(table)
+        await asyncio.sleep((slow or {}).get(table, delay))
+        if table in down:
+            raise usage_gate.SupabaseReadError(f"Supabase GET {table} returned 503")
+        return [dict(r) for r in ROWS.get(table, [])]
+
+    return fake_get
+
+
+@pytest.fixture(autouse=True)
+def _empty_cache():
+    invalidate_context_snapshot()
+    yield
+    invalidate_context_snapshot()
+
+
+class TestContextSnapshot:
+    @pytest.mark.asyncio
+    async def test_assembles_every_source(self):
+        calls: list = []
+        with patch.object(context_snapshot, "_supabase_get_strict", _fake_get(calls)):
+            ctx = await get_context_snapshot("u1")
+        assert ctx["user_name"] == "Ada Lovelace"
+        assert ctx["first_name"] == "Ada"
+        assert ctx["health_conditions"] == ["PCOS"]
+        assert ctx["medications"][0]["name"] == "Metformin"
+        assert ctx["adherence_pct"] == 50
+        assert ctx["avg_energy"] == 7.0
+        assert "profile_name" not in ctx
+        assert sorted(calls) == sorted(
+            t for src in context_snapshot.CONTEXT_SOURCES for t in src.tables
+        )
+
+    @pytest.mark.asyncio
+    async def test_sources_are_fetched_concurrently(self):
+        calls: list = []
+        loop = asyncio.get_running_loop()
+        with patch.object(
+            context_snapshot, "_supabase_get_strict", _fake_get(calls, 0.05)
+        ):
+            started = loop.time()
+            await get_context_snapshot("u1")
+            elapsed = loop.time() - started
+        assert len(calls) == len(context_snapshot.CONTEXT_SOURCES)
+        assert elapsed < 0.05 * 3
+
+    @pytest.mark.asyncio
+    async def test_token_name_wins_over_profile(self):
+        user = {"token_payload": {"user_metadata": {"full_name": "Grace Hopper"}}}
+        with patch.object(context_snapshot, "_supabase_get_strict", _fake_get([])):
+            ctx = await get_context_snapshot("u1", user)
+        assert ctx["first_name"] == "Grace"
+
+    @pytest.mark.asyncio
+    async def test_cached_and_concurrent_callers_share_one_build(self):
+        calls: list = []
+        with patch.object(context_snapshot, "_supabase_get_strict", _fake_get(calls)):
+            first, second = await asyncio.gather(
+                get_context_snapshot("u1"), get_context_snapshot("u1")
+            )
+            await get_context_snapshot("u1")
+        assert len(calls) == len(context_snapshot.CONTEXT_SOURCES)
+        assert first == second
+        first["health_conditions"].append("mutated")
+        assert second["health_conditions"] == ["PCOS"]
+
+    @pytest.mark.asyncio
+    async def test_write_to_contributing_table_invalidates_user(self):
+        calls: list = []
+
+        async def fake_upsert(*_args, **_kwargs):
+            return {}
+
+        with patch.object(context_snapshot, "_supabase_get_strict", _fake_get(calls)):
+            await get_context_snapshot("u1")
+            await get_context_snapshot("u2")
+            # Run the real invalidation hook around a no-op write.
+            write = usage_gate._invalidates_reads(fake_upsert)
+            await write("health_conditions", {"user_id": "u1"})
+            await write("agent_conversations", {"user_id": "u2"})
+            calls.clear()
+            await get_context_snapshot("u1")
+            await get_context_snapshot("u2")
+        assert len(calls) == len(context_snapshot.CONTEXT_SOURCES)
+
+    def test_condition_writes_go_through_the_hooked_helpers(self):
+        from apps.mvp_api.api import health_conditions
+
+        # Local PATCH/DELETE helpers would skip the invalidation hook.
+        assert health_conditions._supabase_patch is usage_gate._supabase_patch
+        assert health_conditions._supabase_delete is usage_gate._supabase_delete
+
+    @pytest.mark.asyncio
+    async def test_write_during_build_is_not_cached_over(self):
+        calls: list = []
+        with patch.object(
+            context_snapshot, "_supabase_get_strict", _fake_get(calls, 0.05)
+        ):
+            pending = asyncio.ensure_future(get_context_snapshot("u1"))
+            await asyncio.sleep(0.01)
+            invalidate_context_snapshot("u1")
+            await pending
+            calls.clear()
+            await get_context_snapshot("u1")
+        assert calls
+
+    @pytest.mark.asyncio
+    async def test_slow_source_is_dropped_and_not_cached(self):
+        calls: list = []
+        slow = {"health_conditions": 0.5}
+        with patch.object(context_snapshot, "SOURCE_TIMEOUT_S", 0.05), patch.object(
+            context_snapshot, "_supabase_get_strict", _fake_get(calls, slow=slow)
+        ):
+            ctx = await get_context_snapshot("u1")
+            assert "health_conditions" not in ctx
+            assert ctx["medications"]
+            calls.clear()
+            await get_context_snapshot("u1")
+        assert calls
+
+    @pytest.mark.asyncio
+    async def test_failed_read_is_dropped_and_not_cached(self):
+        calls: list = []
+        with patch.object(
+            context_snapshot,
+            "_supabase_get_strict",
+            _fake_get(calls, down=("health_conditions",)),
+        ):
+            ctx = await get_context_snapshot("u1")
+            assert "health_conditions" not in ctx
+            assert ctx["medications"]
+            calls.clear()
+            await get_context_snapshot("u1")
+        assert calls
+
+
+class TestGatherSources:
+    @pytest.mark.asyncio
+    async def test_reports_failures_by_name(self):
+        async def ok():
+            return 1
+
+        async def boom():
+            raise RuntimeError("down")
+
+        results, failed = await gather_sources({"a": ok, "b": boom})
+        assert results == {"a": 1}
+        assert failed == ["b"]
+
+
+class TestWrittenUserId:
+    def test_body_params_and_bulk_rows(self):
+        assert usage_gate._written_user_id(({"user_id": "u1"},), {}) == "u1"
+        assert usage_gate._written_user_id(("id=eq.9&user_id=eq.u2", {}), {}) == "u2"
+        rows = [{"user_id": "u3"}, {"user_id": "u3"}]
+        assert usage_gate._written_user_id((rows,), {}) == "u3"
+        assert usage_gate._written_user_id(("id=eq.9",), {}) is None
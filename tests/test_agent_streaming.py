@@ -0,0 +1,292 @@
+"""Tests for SSE streaming of agent chat and multi-agent consultations."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import List
+
+import anthropic
+import pytest
+
+from apps.mvp_api.api import ai_agents
+from apps.mvp_api.api.ai_agents import Agent, ConsultRequest, _DEFAULT_AGENTS
+
+
+class _FakeStream:
+    def __init__(self, chunks: List[str], fail_after: int | None = None):
+        self._chunks = chunks
+        self._fail_after = fail_after
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    @property
+    async def text_stream(self):
+        for i, chunk in enumerate(self._chunks):
+            if self._fail_after is not None and i >= self._fail_after:
+                raise RuntimeError("stream dropped")
+            await asyncio.sleep(0)
+            yield chunk
+
+
+def _fake_client(replies, delays=None, fail_after=None):
+    """AsyncAnthropic stand-in; *replies* maps a prompt substring to chunks."""
+
+    class Messages:
+        def stream(self, **kwargs):
+            prompt = kwargs["messages"][-1]["content"]
+            for key, chunks in replies.items():
+                if key in prompt:
+                    return _DelayedStream(chunks, (delays or {}).get(key, 0))
+            return _FakeStream(["?"], fail_after)
+
+    class _DelayedStream(_FakeStream):
+        def __init__(self, chunks, delay):
+            super().__init__(chunks, fail_after)
+            self._delay = delay
+
+        async def __aenter__(self):
+            await asyncio.sleep(self._delay)
+            return self
+
+    class Client:
+        messages = Messages()
+
+    return lambda **kw: Client()
+
+
+def _events(frames: List[str]):
+    out = []
+    for frame in frames:
+        event, data = frame.strip().split("\n")
+        out.append((event[len("event: ") :], json.loads(data[len("data: ") :])))
+    return out
+
+
+async def _collect(response) -> List[str]:
+    return [frame async for frame in response.body_iterator]
+
+
+class TestAgentStreamResponse:
+    @pytest.mark.asyncio
+    async def test_yields_chunks_in_order(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(
+            anthropic, "AsyncAnthropic", _fake_client({"sleep": ["Hi ", "Sarah"]})
+        )
+        agent = Agent(_DEFAULT_AGENTS[0])
+        chunks = [
+            c
+            async for c in agent.stream_response(
+                "How can I sleep better?", {}, [], user_id=None
+            )
+        ]
+        assert chunks == ["Hi ", "Sarah"]
+
+    @pytest.mark.asyncio
+    async def test_error_before_first_chunk_yields_apology(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(anthropic, "AsyncAnthropic", _fake_client({}, fail_after=0))
+        agent = Agent(_DEFAULT_AGENTS[0])
+        chunks = [c async for c in agent.stream_response("my sleep", {}, [])]
+        assert chunks == [agent.error_reply]
+
+    @pytest.mark.asyncio
+    async def test_error_after_partial_reply_is_raised(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(
+            anthropic,
+            "AsyncAnthropic",
+            _fake_client({"sleep": ["Rest ", "well"]}, fail_after=1),
+        )
+        agent = Agent(_DEFAULT_AGENTS[0])
+        chunks = []
+        with pytest.raises(RuntimeError):
+            async for c in agent.stream_response("my sleep", {}, []):
+                chunks.append(c)
+        assert chunks == ["Rest "]
+
+    @pytest.mark.asyncio
+    async def test_off_topic_is_answered_without_llm(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+        def no_client(**_kw):
+            raise AssertionError("Anthropic must not be called")
+
+        monkeypatch.setattr(anthropic, "AsyncAnthropic", no_client)
+        agent = Agent(_DEFAULT_AGENTS[0])
+        chunks = [
+            c
+            async for c in agent.stream_response(
+                "Write me a Python sorting algorithm", {}, []
+            )
+        ]
+        assert chunks == [ai_agents._OFFTOPIC_REFUSAL]
+
+
+class TestConsultStream:
+    @pytest.mark.asyncio
+    async def test_consultants_interleave_then_synthesis(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+        async def no_snapshot(*_args, **_kwargs):
+            return {}
+
+        monkeypatch.setattr(ai_agents, "get_context_snapshot", no_snapshot)
+        from apps.mvp_api.agents.specialist_configs import SPECIALIST_AGENTS
+
+        primary, slow, fast = list(SPECIALIST_AGENTS)[:3]
+        replies = {
+            f"You are a {SPECIALIST_AGENTS[slow]['specialty']} specialist": ["slow"],
+            f"You are a {SPECIALIST_AGENTS[fast]['specialty']} specialist": [
+                "fa",
+                "st",
+            ],
+            "Synthesize these perspectives": ["all ", "done"],
+        }
+        delays = {next(iter(replies)): 0.05}
+        monkeypatch.setattr(anthropic, "AsyncAnthropic", _fake_client(replies, delays))
+
+        response = await ai_agents.stream_multi_agent_consult(
+            ConsultRequest(
+                primary_agent=primary,
+                consulting_agents=[slow, fast],
+                question="What helps?",
+            ),
+            current_user={"id": "u1"},
+        )
+        events = _events(await _collect(response))
+        kinds = [e for e, _ in events]
+
+        # The fast consultant finishes before the slow one starts streaming.
+        first_perspective = next(d for e, d in events if e == "perspective")
+        assert first_perspective["agent_type"] == fast
+        assert kinds.index("synthesis_delta") > max(
+            i for i, k in enumerate(kinds) if k.startswith("perspective")
+        )
+        done = events[-1][1]
+        assert kinds[-1] == "done"
+        assert done["synthesis"] == "all done"
+        assert [p["agent_type"] for p in done["perspectives"]] == [slow, fast]
+        assert [p["response"] for p in done["perspectives"]] == ["slow", "fast"]
+
+    @pytest.mark.asyncio
+    async def test_broken_streams_fall_back_instead_of_partial_text(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+
+        async def no_snapshot(*_args, **_kwargs):
+            return {}
+
+        monkeypatch.setattr(ai_agents, "get_context_snapshot", no_snapshot)
+        synthesized: list = []
+        synthesis_prompt = ai_agents._synthesis_prompt
+
+        def record_synthesis(consult, perspectives):
+            synthesized.extend(p.response for p in perspectives)
+            return synthesis_prompt(consult, perspectives)
+
+        monkeypatch.setattr(ai_agents, "_synthesis_prompt", record_synthesis)
+        from apps.mvp_api.agents.specialist_configs import SPECIALIST_AGENTS
+
+        primary, consultant = list(SPECIALIST_AGENTS)[:2]
+        replies = {
+            f"You are a {SPECIALIST_AGENTS[consultant]['specialty']} specialist": [
+                "Try ",
+                "magnesium",
+            ],
+            "Synthesize these perspectives": ["all ", "done"],
+        }
+        monkeypatch.setattr(
+            anthropic, "AsyncAnthropic", _fake_client(replies, fail_after=1)
+        )
+
+        response = await ai_agents.stream_multi_agent_consult(
+            ConsultRequest(
+                primary_agent=primary,
+                consulting_agents=[consultant],
+                question="What helps?",
+            ),
+            current_user={"id": "u1"},
+        )
+        events = _events(await _collect(response))
+        unavailable = (
+            f"[Consultation unavailable: {SPECIALIST_AGENTS[consultant]['agent_name']}]"
+        )
+
+        perspective = next(d for e, d in events if e == "perspective")
+        assert perspective["truncated"] is True
+        assert perspective["response"] == unavailable
+        assert synthesized == [unavailable]
+        assert [e for e, _ in events][-2:] == ["error", "done"]
+        done = events[-1][1]
+        assert done["synthesis"] == ai_agents._SYNTHESIS_FALLBACK
+        assert [p["response"] for p in done["perspectives"]] == [unavailable]
+
+
+class TestChatStream:
+    def _patch_turn(self, monkeypatch, agent, saved):
+        async def prepare(_request, _user_id):
+            return agent, "conv-1", []
+
+        async def context(*_args):
+            return {}
+
+        async def audit(*_args):
+            return None
+
+        async def add_message(conversation_id, user_id, role, content, agent_id=None):
+            saved.append((conversation_id, role, content))
+
+        monkeypatch.setattr(ai_agents, "_prepare_chat_turn", prepare)
+        monkeypatch.setattr(ai_agents, "_get_user_context", context)
+        monkeypatch.setattr(ai_agents, "_log_agent_phi_access", audit)
+        monkeypatch.setattr(ai_agents, "_add_message", add_message)
+
+    @pytest.mark.asyncio
+    async def test_persists_full_reply_after_stream(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(
+            anthropic, "AsyncAnthropic", _fake_client({"sleep": ["Rest ", "well"]})
+        )
+        agent = Agent(_DEFAULT_AGENTS[0])
+        saved: list = []
+        self._patch_turn(monkeypatch, agent, saved)
+
+        response = await ai_agents.stream_message(
+            ai_agents.SendMessageRequest(message="How do I sleep better?"),
+            None,
+            current_user={"id": "u1"},
+        )
+        assert response.media_type == "text/event-stream"
+        events = _events(await _collect(response))
+
+        assert [e for e, _ in events] == ["conversation", "delta", "delta", "done"]
+        assert events[-1][1]["message"]["content"] == "Rest well"
+        assert saved == [("conv-1", "assistant", "Rest well")]
+
+    @pytest.mark.asyncio
+    async def test_interrupted_reply_is_reported_and_not_saved(self, monkeypatch):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        monkeypatch.setattr(
+            anthropic,
+            "AsyncAnthropic",
+            _fake_client({"sleep": ["Rest ", "well"]}, fail_after=1),
+        )
+        agent = Agent(_DEFAULT_AGENTS[0])
+        saved: list = []
+        self._patch_turn(monkeypatch, agent, saved)
+
+        response = await ai_agents.stream_message(
+            ai_agents.SendMessageRequest(message="How do I sleep better?"),
+            None,
+            current_user={"id": "u1"},
+        )
+        events = _events(await _collect(response))
+
+        assert [e for e, _ in events] == ["conversation", "delta", "error"]
+        assert events[-1][1]["truncated"] is True
+        assert saved == []
@@ -0,0 +1,211 @@
+"""Tests for common.middleware.auth.TokenVerifier (cached, non-blocking JWT checks)."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+from fastapi import HTTPException
+from jose import jwk, jwt
+
+from common.middleware import auth as auth_module
+from common.middleware.auth import TokenVerifier
+
+SECRET = "test-secret-for-verifier"
+
+
+def _hs256(exp_in: float = 3600, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "email": "a@example.com",
+        "exp": int(time.time() + exp_in),
+    }
+    payload.update(claims)
+    return jwt.encode(payload, SECRET, algorithm="HS256")
+
+
+@pytest.fixture
+def verifier(monkeypatch):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_ISSUER", raising=False)
+    monkeypatch.delenv("SUPABASE_JWKS_URL", raising=False)
+    return TokenVerifier()
+
+
+class TestTokenCache:
+    @pytest.mark.asyncio
+    async def test_second_decode_is_a_cache_hit(self, verifier):
+        token = _hs256()
+        first = await verifier.decode(token)
+        second = await verifier.decode(token)
+        assert first == second
+        assert first["sub"] == "user-1"
+        assert (verifier.hits, verifier.misses) == (1, 1)
+
+    @pytest.mark.asyncio
+    async def test_cache_returns_copies(self, verifier):
+        token = _hs256()
+        (await verifier.decode(token))["sub"] = "tampered"
+        assert (await verifier.decode(token))["sub"] == "user-1"
+
+    @pytest.mark.asyncio
+    async def test_entry_expires_at_token_exp(self, verifier, monkeypatch):
+        token = _hs256(exp_in=60)
+        await verifier.decode(token)
+        real_time = time.time
+        monkeypatch.setattr(auth_module.time, "time", lambda: real_time() + 120)
+        assert verifier._cached(verifier._digest(token)) is None
+        assert verifier.stats()["cached_tokens"] == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_token_rejected(self, verifier):
+        with pytest.raises(HTTPException) as exc:
+            await verifier.decode(_hs256(exp_in=-60))
+        assert exc.value.detail == "Token has expired"
+
+    @pytest.mark.asyncio
+    async def test_invalid_signature_not_cached(self, verifier, monkeypatch):
+        async def _no_fallback(token):
+            raise HTTPException(status_code=401, detail="Invalid token")
+
+        monkeypatch.setattr(verifier, "_decode_with_supabase_auth_user", _no_fallback)
+        bad = jwt.encode(
+            {"sub": "x", "exp": int(time.time() + 60)}, "other", algorithm="HS256"
+        )
+        for _ in range(2):
+            with pytest.raises(HTTPException):
+                await verifier.decode(bad)
+        assert verifier.stats()["cached_tokens"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lru_bound(self, verifier):
+        verifier.cache_size = 2
+        for i in range(3):
+            await verifier.decode(_hs256(jti=str(i)))
+        assert verifier.stats()["cached_tokens"] == 2
+
+
+class _FakeRedis:
+    def __init__(self, revoked=()):
+        self.revoked = set(revoked)
+        self.calls = 0
+
+    async def get(self, key):
+        self.calls += 1
+        return "1" if key.split(":", 1)[1] in self.revoked else None
+
+
+class TestRevocation:
+    @pytest.mark.asyncio
+    async def test_negative_answer_is_reused(self, verifier, monkeypatch):
+        fake = _FakeRedis()
+        monkeypatch.setattr(auth_module, "_get_redis_client", lambda: fake)
+        token = _hs256()
+        assert not await verifier.is_revoked(token)
+        assert not await verifier.is_revoked(token)
+        assert fake.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_revoked_token_dropped_from_cache(self, verifier, monkeypatch):
+        token = _hs256()
+        await verifier.decode(token)
+        monkeypatch.setattr(
+            auth_module, "_get_redis_client", lambda: _FakeRedis({token})
+        )
+        assert await verifier.is_revoked(token)
+        assert verifier.stats()["cached_tokens"] == 0
+
+    @pytest.mark.asyncio
+    async def test_redis_error_backs_off_then_checks_again(self, verifier, monkeypatch):
+        token = _hs256()
+        fake = _FakeRedis({token})
+        failing = {"left": 1}
+        get = fake.get
+
+        async def flaky_get(key):
+            if failing["left"]:
+                failing["left"] -= 1
+                raise ConnectionError("redis gone")
+            return await get(key)
+
+        fake.get = flaky_get
+        monkeypatch.setattr(auth_module, "_redis_client", fake)
+        monkeypatch.setattr(auth_module, "_redis_initialized", True)
+        monkeypatch.setattr(auth_module, "_redis_backoff_until", 0.0)
+        monkeypatch.setenv("AUTH_REDIS_BACKOFF_S", "60")
+
+        assert not await verifier.is_revoked(token)
+        assert verifier.stats()["revocation_backoff"]
+        assert not await verifier.is_revoked(token)  # skipped while backing off
+        assert fake.calls == 0
+
+        monkeypatch.setattr(auth_module, "_redis_backoff_until", 0.0)
+        assert await verifier.is_revoked(token)
+        assert verifier.stats()["revocation_errors"] >= 1
+
+
+class TestJWKS:
+    @pytest.fixture
+    def rsa_keys(self):
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+
+        private = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        pem = private.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        public = jwk.construct(
+            private.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            ),
+            algorithm="RS256",
+        ).to_dict()
+        public["kid"] = "k1"
+        return pem, {"keys": [public]}
+
+    @pytest.mark.asyncio
+    async def test_fetched_once_then_served_from_cache(
+        self, verifier, monkeypatch, rsa_keys
+    ):
+        pem, jwks = rsa_keys
+        fetches = []
+
+        async def _fetch(url):
+            fetches.append(url)
+            verifier._jwks[url] = (jwks, time.time())
+            return jwks
+
+        monkeypatch.setattr(verifier, "_fetch_jwks", _fetch)
+        issuer = "https://proj.supabase.co/auth/v1"
+        for jti in ("a", "b"):
+            token = jwt.encode(
+                {"sub": "u", "iss": issuer, "exp": int(time.time() + 60), "jti": jti},
+                pem,
+                algorithm="RS256",
+                headers={"kid": "k1"},
+            )
+            assert (await verifier.decode(token))["sub"] == "u"
+        assert fetches == [issuer + "/.well-known/jwks.json"]
+
+    @pytest.mark.asyncio
+    async def test_stale_jwks_served_while_refreshing(
+        self, verifier, monkeypatch, rsa_keys
+    ):
+        pem, jwks = rsa_keys
+        url = "https://proj.supabase.co/auth/v1/.well-known/jwks.json"
+        verifier._jwks[url] = (jwks, time.time() - 10 * verifier.jwks_ttl_s)
+        refreshed = []
+
+        async def _fetch(u):
+            refreshed.append(u)
+            return jwks
+
+        monkeypatch.setattr(verifier, "_fetch_jwks", _fetch)
+        assert await verifier._get_jwks(url) is jwks
+        task = verifier._jwks_inflight[url]
+        await task
+        assert refreshed == [url]
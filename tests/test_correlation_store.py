@@ -0,0 +1,187 @@
+"""Tests for the correlation and prediction APIs reading the columnar health store."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import numpy as np
+import pytest
+
+from apps.mvp_api.api import correlations
+from common.metrics.correlation_matrix import daily_matrix
+from common.metrics.daily_store import DailyMetricStore, get_daily_store_cache
+
+HEALTH = {
+    f"2026-01-{d:02d}": {
+        "sleep_score": 70.0 + (d * 7) % 11,
+        "readiness_score": 60.0 + (d * 7) % 11 + d % 2,
+        "steps": 0.0 if d == 3 else 8000.0 + 100 * d,
+    }
+    for d in range(1, 21)
+}
+NUTRITION = {
+    f"2026-01-{d:02d}": {"total_carbs_g": 200.0 - 3 * ((d * 7) % 11)}
+    for d in range(1, 25)
+}
+
+
+class TestCorrelationBatch:
+    def test_matrices_come_from_the_store(self):
+        store = DailyMetricStore.from_daily(HEALTH)
+        batch = correlations._CorrelationBatch(NUTRITION, store)
+        health_vars = batch._vars[1]
+        assert batch.dates["health"] == sorted(HEALTH)
+        np.testing.assert_array_equal(
+            batch._matrices["health"][0],
+            daily_matrix(HEALTH, sorted(HEALTH), health_vars, zero_is_missing=True),
+        )
+        assert batch.dates["nutrition"] == sorted(set(HEALTH) | set(NUTRITION))
+
+    def test_store_and_dict_give_the_same_correlations(self):
+        store = DailyMetricStore.from_daily(HEALTH)
+        from_store = correlations._compute_correlations(NUTRITION, store)
+        from_dict = correlations._compute_correlations(NUTRITION, HEALTH)
+        strip = lambda cs: [{k: v for k, v in c.items() if k != "id"} for c in cs]
+        assert from_store and strip(from_store) == strip(from_dict)
+
+
+class TestHealthStoreCache:
+    @pytest.mark.asyncio
+    async def test_cached_store_skips_the_timeline(self):
+        cache = get_daily_store_cache()
+        cache.put(
+            ("user-cached", "health", 30),
+            DailyMetricStore.from_daily(HEALTH),
+            ("Oura",),
+        )
+
+        async def timeline():
+            raise AssertionError("timeline fetched despite a cached store")
+
+        try:
+            store, names = await correlations._build_health_store(
+                "user-cached", 30, timeline
+            )
+        finally:
+            cache.invalidate("user-cached")
+        assert names == ["Oura"]
+        assert store.to_daily() == HEALTH
+
+
+class TestTrackBStaleness:
+    def _state(self, nutrition, health):
+        return correlations._IncrementalState(
+            nutrition_daily=nutrition,
+            health_store=DailyMetricStore.from_daily(health),
+            data_sources_used=[],
+            glucose_meal_correlations=[{"metric_a": "meal_carbs"}],
+            batch=None,
+            fetched_on=None,
+            full_at=None,
+        )
+
+    def test_unchanged_refetch_keeps_track_b(self):
+        health = {"2026-01-19": {"avg_glucose_mgdl": 104.0, "steps": 9000.0}}
+        nutrition = {"2026-01-19": {"total_carbs_g": 180.0}}
+        state = self._state(nutrition, health)
+        # A new non-glucose reading alone does not invalidate Track B.
+        fresh = DailyMetricStore.from_daily(
+            {"2026-01-19": {"avg_glucose_mgdl": 104.0, "steps": 9500.0}}
+        )
+        assert not correlations._track_b_inputs_changed(
+            state, nutrition, fresh, "2026-01-18"
+        )
+
+    def test_new_meal_or_glucose_invalidates_track_b(self):
+        health = {"2026-01-19": {"avg_glucose_mgdl": 104.0}}
+        nutrition = {"2026-01-19": {"total_carbs_g": 180.0}}
+        state = self._state(nutrition, health)
+        more_meals = {"2026-01-19": {"total_carbs_g": 240.0}}
+        assert correlations._track_b_inputs_changed(
+            state, more_meals, DailyMetricStore.from_daily(health), "2026-01-18"
+        )
+        new_glucose = DailyMetricStore.from_daily(
+            {**health, "2026-01-20": {"avg_glucose_mgdl": 131.0}}
+        )
+        assert correlations._track_b_inputs_changed(
+            state, nutrition, new_glucose, "2026-01-18"
+        )
+
+
+class TestIncrementalStateInvalidation:
+    def _remember(self, user_id):
+        state = correlations._IncrementalState(
+            nutrition_daily={},
+            health_store=DailyMetricStore.from_daily({}),
+            data_sources_used=[],
+            glucose_meal_correlations=[],
+            batch=None,
+            fetched_on=None,
+            full_at=datetime.now(timezone.utc),
+        )
+        correlations._remember_incremental_state(user_id, 30, state)
+        correlations._remember_incremental_state(user_id, 90, state)
+
+    def test_backfill_write_drops_only_that_users_state(self):
+        self._remember("user-a")
+        self._remember("user-b")
+        try:
+            correlations._on_write("meal_logs", "user-a")
+            assert correlations._get_incremental_state("user-a", 30) is None
+            assert correlations._get_incremental_state("user-a", 90) is None
+            assert correlations._get_incremental_state("user-b", 30) is not None
+            # Writes to tables the daily series do not read keep the state.
+            correlations._on_write("chat_messages", "user-b")
+            assert correlations._get_incremental_state("user-b", 30) is not None
+        finally:
+            correlations.forget_correlation_state()
+        assert not correlations._correlation_state
+
+
+class TestPredictionSeries:
+    @pytest.mark.asyncio
+    async def test_native_rows_fold_once_then_come_from_the_cache(self, monkeypatch):
+        from apps.mvp_api.api import predictive_health
+
+        calls = []
+
+        async def fake_get(table, params):
+            calls.append(table)
+            return [
+                {
+                    "date": "2026-01-02",
+                    "source": "healthkit",
+                    "metric_type": "steps",
+                    "value_json": {"steps": 8000},
+                },
+                {
+                    "date": "2026-01-01",
+                    "source": "healthkit",
+                    "metric_type": "steps",
+                    "value_json": {"steps": 6000},
+                },
+                {
+                    "date": "2026-01-02",
+                    "source": "garmin",
+                    "metric_type": "steps",
+                    "value_json": {"steps": 8200},
+                },
+                {
+                    "date": "2026-01-01",
+                    "source": "healthkit",
+                    "metric_type": "sleep",
+                    "value_json": {"hours": 0},
+                },
+            ]
+
+        monkeypatch.setattr(predictive_health, "_supabase_get", fake_get)
+        try:
+            first = await predictive_health._fetch_native_health_sources("user-p", 30)
+            second = await predictive_health._fetch_native_health_sources("user-p", 30)
+        finally:
+            get_daily_store_cache().invalidate("user-p")
+
+        # Date order, the later row winning a shared day, zero readings dropped.
+        assert first == ({"steps": [6000.0, 8200.0]}, ["Garmin", "Apple Health"])
+        assert second == first
+        assert calls == ["native_health_data"]
@@ -0,0 +1,91 @@
+"""Tests for the bulk device data point ingestion path."""
+
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.device_data.models.data_point import DataPointBase, DataQuality, DataType
+from apps.device_data.services import bulk_ingest
+
+T0 = datetime(2026, 1, 1, 8, 0, 0)
+
+
+def _point(
+    minute: int, value=60, data_type=DataType.HEART_RATE, raw=None
+) -> DataPointBase:
+    return DataPointBase(
+        data_type=data_type,
+        value=value,
+        unit="bpm",
+        timestamp=T0 + timedelta(minutes=minute),
+        raw_value=raw,
+    )
+
+
+class TestPrepareRows:
+    def test_rejects_bad_values_and_collapses_repeats(self):
+        points = [
+            _point(0, raw="60"),
+            _point(1, value="not-a-number"),
+            _point(2, value=float("nan")),
+            _point(0, value=61),  # same metric and instant as the first point
+            _point(0, value=5.5, data_type=DataType.BLOOD_GLUCOSE),
+        ]
+        rows, errors, duplicates = bulk_ingest.prepare_rows(uuid4(), uuid4(), points)
+        assert [e["index"] for e in errors] == [1, 2]
+        assert duplicates == 1
+        assert [(r["data_type"], r["value"]) for r in rows] == [
+            (DataType.HEART_RATE, 60.0),
+            (DataType.BLOOD_GLUCOSE, 5.5),
+        ]
+        assert rows[0]["quality"] == DataQuality.GOOD
+        assert rows[1]["quality"] == DataQuality.FAIR
+        assert len({r["id"] for r in rows}) == 2
+
+
+class TestInsertRows:
+    def test_statement_skips_existing_readings(self):
+        rows, _, _ = bulk_ingest.prepare_rows(uuid4(), uuid4(), [_point(0), _point(1)])
+        sql = str(
+            bulk_ingest.insert_statement(rows).compile(dialect=postgresql.dialect())
+        )
+        assert "ON CONFLICT (device_id, data_type, timestamp) DO NOTHING" in sql
+        assert "RETURNING" in sql
+        assert sql.count("VALUES") == 1
+
+    @pytest.mark.asyncio
+    async def test_chunks_and_returns_inserted_ids(self, monkeypatch):
+        monkeypatch.setenv("DEVICE_DATA_INSERT_CHUNK", "2")
+        rows, _, _ = bulk_ingest.prepare_rows(
+            uuid4(), uuid4(), [_point(m) for m in range(5)]
+        )
+        statements = []
+
+        class _Session:
+            async def execute(self, stmt):
+                chunk = stmt.compile().params
+                statements.append(stmt)
+                # Pretend the row at minute 3 was already stored.
+                ids = [
+                    r["id"]
+                    for r in rows
+                    if r["id"] in chunk.values()
+                    and r["timestamp"] != T0 + timedelta(minutes=3)
+                ]
+                return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ids))
+
+        inserted = await bulk_ingest.insert_rows(_Session(), rows)
+        assert len(statements) == 3
+        assert len(inserted) == 4
+
+    def test_chunk_size_stays_under_the_bind_parameter_limit(self, monkeypatch):
+        monkeypatch.setenv("DEVICE_DATA_INSERT_CHUNK", "5000")
+        rows, _, _ = bulk_ingest.prepare_rows(uuid4(), uuid4(), [_point(0)])
+        size = bulk_ingest._insert_chunk_size(len(rows[0]))
+        assert size == 2047
+        assert size * len(rows[0]) <= bulk_ingest.MAX_BIND_PARAMS
@@ -0,0 +1,167 @@
+"""Tests for single-scan and counter-backed device data statistics."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from apps.device_data.models.data_point import (
+    DataPointCounter,
+    DataQuality,
+    DataSource,
+    DataType,
+)
+from apps.device_data.services import data_statistics
+
+T0 = datetime(2026, 1, 1)
+T1 = datetime(2026, 3, 1)
+
+
+def _row(
+    g_type=1,
+    g_quality=1,
+    g_source=1,
+    data_type=None,
+    quality=None,
+    source=None,
+    **values,
+):
+    base = {
+        "n": 0,
+        "valid": 0,
+        "anomalies": 0,
+        "devices": 0,
+        "first_ts": None,
+        "last_ts": None,
+    }
+    base.update(values)
+    return SimpleNamespace(
+        g_type=g_type,
+        g_quality=g_quality,
+        g_source=g_source,
+        data_type=data_type,
+        quality=quality,
+        source=source,
+        **base,
+    )
+
+
+def _counter(device_id, data_type, quality, n, anomalies=0, first_ts=T0, last_ts=T1):
+    return DataPointCounter(
+        user_id=uuid4(),
+        device_id=device_id,
+        data_type=data_type,
+        quality=quality,
+        source=DataSource.DEVICE_SYNC,
+        n=n,
+        anomalies=anomalies,
+        first_ts=first_ts,
+        last_ts=last_ts,
+    )
+
+
+class TestSingleScan:
+    def test_one_statement_with_grouping_sets(self):
+        sql = str(
+            data_statistics.single_scan_query(uuid4(), T0, T1).compile(
+                dialect=postgresql.dialect()
+            )
+        )
+        assert sql.count("SELECT") == 1
+        assert "GROUPING SETS" in sql
+        assert "FILTER (WHERE" in sql
+
+    def test_fold_grouping_rows(self):
+        rows = [
+            _row(n=5, valid=3, anomalies=1, devices=2, first_ts=T0, last_ts=T1),
+            _row(g_type=0, data_type=DataType.HEART_RATE, n=4),
+            _row(g_type=0, data_type=DataType.BLOOD_GLUCOSE, n=1),
+            _row(g_quality=0, quality=DataQuality.GOOD, n=5),
+            _row(g_source=0, source=DataSource.DEVICE_SYNC, n=5),
+        ]
+        stats = data_statistics.fold_grouping_rows(rows)
+        assert (stats.total_points, stats.valid_points, stats.anomaly_points) == (
+            5,
+            3,
+            1,
+        )
+        assert stats.data_types == {
+            DataType.HEART_RATE.value: 4,
+            DataType.BLOOD_GLUCOSE.value: 1,
+        }
+        assert stats.quality_distribution == {DataQuality.GOOD.value: 5}
+        assert stats.source_distribution == {DataSource.DEVICE_SYNC.value: 5}
+        assert stats.date_range == {"start": T0, "end": T1}
+        assert stats.device_count == 2
+
+    def test_no_data(self):
+        stats = data_statistics.fold_grouping_rows([_row()])
+        assert stats.total_points == 0
+        assert stats.date_range == {}
+
+
+class TestCounters:
+    def test_fold_counter_rows(self):
+        a, b = uuid4(), uuid4()
+        stats = data_statistics.fold_counter_rows(
+            [
+                _counter(a, DataType.HEART_RATE, DataQuality.GOOD, 10, anomalies=2),
+                _counter(
+                    a,
+                    DataType.HEART_RATE,
+                    DataQuality.FAIR,
+                    4,
+                    last_ts=datetime(2026, 4, 1),
+                ),
+                _counter(
+                    b,
+                    DataType.BLOOD_GLUCOSE,
+                    DataQuality.EXCELLENT,
+                    6,
+                    first_ts=datetime(2025, 12, 1),
+                ),
+            ]
+        )
+        assert (stats.total_points, stats.valid_points, stats.anomaly_points) == (
+            20,
+            16,
+            2,
+        )
+        assert stats.data_types == {
+            DataType.HEART_RATE.value: 14,
+            DataType.BLOOD_GLUCOSE.value: 6,
+        }
+        assert stats.device_count == 2
+        assert stats.date_range == {
+            "start": datetime(2025, 12, 1),
+            "end": datetime(2026, 4, 1),
+        }
+
+    @pytest.mark.asyncio
+    async def test_falls_back_to_scan_when_counters_fail(self):
+        executed = []
+
+        class _Nested:
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        class _Session:
+            def begin_nested(self):
+                return _Nested()
+
+            async def execute(self, stmt):
+                executed.append(stmt)
+                if len(executed) == 1:
+                    raise RuntimeError('relation "data_point_counters" does not exist')
+                return SimpleNamespace(all=lambda: [_row(n=3, first_ts=T0, last_ts=T1)])
+
+        stats = await data_statistics.compute_statistics(_Session(), uuid4())
+        assert len(executed) == 2
+        assert stats.total_points == 3
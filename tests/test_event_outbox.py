@@ -0,0 +1,180 @@
+"""Tests for the transactional event outbox and its relay."""
+
+from __future__ import annotations
+
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.orm import Session
+
+from common.clients.kafka_publisher import AsyncKafkaPublisher, InMemoryProducer
+from common.database.outbox import (
+    OutboxEvent,
+    OutboxRelay,
+    _utcnow,
+    backoff_delay,
+    enqueue_event,
+    sendable,
+)
+
+
+class _AsyncSession:
+    """Just enough of AsyncSession over a sync SQLite session."""
+
+    def __init__(self, engine):
+        self._session = Session(engine)
+        self.bind = engine
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self._session.close()
+
+    async def execute(self, stmt, params=None):
+        return self._session.execute(stmt, params)
+
+    async def commit(self):
+        self._session.commit()
+
+    async def rollback(self):
+        self._session.rollback()
+
+
+@pytest.fixture
+def engine():
+    eng = create_engine("sqlite://")
+    OutboxEvent.__table__.create(eng)
+    return eng
+
+
+@pytest.fixture
+def broker():
+    return InMemoryProducer()
+
+
+@pytest.fixture
+def relay(engine, broker):
+    publisher = AsyncKafkaPublisher(broker, poll_interval_s=0.005)
+    yield OutboxRelay(
+        lambda: _AsyncSession(engine), publisher, batch_size=100, retry_base_s=60
+    )
+    publisher.close()
+
+
+def _stage(engine, events, commit=True):
+    with Session(engine) as session:
+        for topic, key, payload in events:
+            enqueue_event(session, topic, payload, key=key)
+        if commit:
+            session.commit()
+
+
+def _rows(engine):
+    with Session(engine) as session:
+        return (
+            session.execute(select(OutboxEvent).order_by(OutboxEvent.id))
+            .scalars()
+            .all()
+        )
+
+
+class TestEnqueue:
+    def test_rolled_back_events_are_never_relayed(self, engine):
+        _stage(engine, [("t", "u1", {"n": 1})], commit=False)
+        assert _rows(engine) == []
+
+
+class TestRelay:
+    @pytest.mark.asyncio
+    async def test_relays_in_order_and_marks_published(self, engine, broker, relay):
+        _stage(engine, [("device-data-raw", f"u{i % 3}", {"n": i}) for i in range(30)])
+        assert await relay.relay_once() == 30
+        assert [v["n"] for v in broker.values("device-data-raw")] == list(range(30))
+        assert all(r.published_at is not None for r in _rows(engine))
+        assert await relay.relay_once() == 0
+        assert relay.stats()["published"] == 30
+
+    @pytest.mark.asyncio
+    async def test_failed_rows_retry_later_and_block_their_key(
+        self, engine, broker, relay
+    ):
+        broker.fail_topics.add("alerts")
+        _stage(engine, [("alerts", "u1", {"n": 1})])
+        await relay.relay_once()
+        [row] = _rows(engine)
+        assert row.published_at is None and row.attempts == 1 and row.last_error
+
+        broker.fail_topics.clear()
+        _stage(engine, [("alerts", "u1", {"n": 2}), ("alerts", "u2", {"n": 3})])
+        await relay.relay_once()
+        # u1's second event waits behind the first one's retry; u2 is unaffected.
+        assert broker.values("alerts") == [{"n": 3}]
+        assert relay.stats()["failed_attempts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_a_key_stops_at_its_first_failure(self, engine, broker, relay):
+        broker.fail_topics.add("bad")
+        _stage(
+            engine,
+            [("bad", "k", {"n": 1}), ("good", "k", {"n": 2}), ("good", "j", {"n": 3})],
+        )
+        assert await relay.relay_once() == 1
+        assert broker.values("good") == [{"n": 3}]
+        first, second, _ = _rows(engine)
+        assert first.attempts == 1
+        # Never tried: no attempt counted, lease handed back.
+        assert (
+            second.published_at is None
+            and second.attempts == 0
+            and second.next_attempt_at is None
+        )
+
+        broker.fail_topics.clear()
+        with Session(engine) as session:
+            session.execute(update(OutboxEvent).values(next_attempt_at=None))
+            session.commit()
+        assert await relay.relay_once() == 2
+        assert broker.values("good") == [{"n": 3}, {"n": 2}]
+
+    @pytest.mark.asyncio
+    async def test_rows_waiting_on_retries_are_not_reselected(
+        self, engine, broker, relay
+    ):
+        relay.batch_size = 2
+        broker.fail_topics.add("alerts")
+        _stage(engine, [("alerts", f"u{i}", {"n": i}) for i in range(3)])
+        assert await relay.relay_once() == 0
+        assert (
+            await relay.relay_once() == 0
+        )  # reaches the third row instead of the first two again
+        assert [r.attempts for r in _rows(engine)] == [1, 1, 1]
+        assert await relay.relay_once() == 0
+        assert relay.stats()["failed_attempts"] == 3
+
+        _stage(engine, [("metrics", "u9", {"n": 9})])
+        assert await relay.relay_once() == 1
+        assert broker.values("metrics") == [{"n": 9}]
+
+
+class TestHelpers:
+    def test_backoff_grows_with_jitter(self):
+        delays = [backoff_delay(n, 1.0, 300.0) for n in (1, 4, 20)]
+        assert 0.5 <= delays[0] <= 1.5
+        assert 4.0 <= delays[1] <= 12.0
+        assert 150.0 <= delays[2] <= 450.0
+
+    def test_sendable_skips_keys_behind_a_pending_retry(self):
+        now = _utcnow()
+        rows = [
+            OutboxEvent(
+                id=1, partition_key="a", next_attempt_at=now + timedelta(seconds=30)
+            ),
+            OutboxEvent(id=2, partition_key="a"),
+            OutboxEvent(
+                id=3, partition_key="b", next_attempt_at=now - timedelta(seconds=1)
+            ),
+            OutboxEvent(id=4, partition_key=None),
+        ]
+        assert [r.id for r in sendable(rows, now)] == [3, 4]
@@ -0,0 +1,191 @@
+"""Tests for the streaming, paginated health-data export."""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import re
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import pytest
+
+from apps.mvp_api.api import export, export_stream
+from apps.mvp_api.api.export_stream import ExportTable, PagedExport, keyset_filter
+from apps.mvp_api.dependencies.usage_gate import SupabaseReadError
+
+USER = {"id": "u1"}
+
+
+def _sleep_rows(n: int) -> list:
+    # Newest first, as the export orders them.
+    return [
+        {
+            "id": f"s{i:04d}",
+            "date": f"2025-{1 + i // 28:02d}-{1 + i % 28:02d}",
+            "sleep_score": i,
+        }
+        for i in reversed(range(n))
+    ]
+
+
+def _fake_postgrest(tables: dict, calls: list, fail: str | None = None):
+    """Serve pages the way PostgREST would for the export's keyset queries."""
+
+    async def fake_get(table: str, params: str, timeout=None) -> list:
+        calls.append((table, params))
+        await asyncio.sleep(0)
+        if table == fail:
+            raise SupabaseReadError(f"{table} is down")
+        if table == "profiles":
+            return [{"date_of_birth": "1990-01-01", "biological_sex": "female"}]
+        rows = tables.get(table, [])
+        after = re.search(r"id\.lt\.([^,)&]+)", params)
+        if after:
+            last = unquote(after.group(1)).strip('"')
+            rows = rows[[r["id"] for r in rows].index(last) + 1 :]
+        limit = int(re.search(r"limit=(\d+)", params).group(1))
+        return [dict(r) for r in rows[:limit]]
+
+    return fake_get
+
+
+async def _body(response) -> bytes:
+    out = b""
+    async for chunk in response.body_iterator:
+        out += chunk if isinstance(chunk, bytes) else chunk.encode()
+    return out
+
+
+class TestKeyset:
+    def test_filter_quotes_values_and_handles_nulls(self):
+        assert keyset_filter("date", "2025-01-02", "a") == (
+            "or=(date.lt.%222025-01-02%22,date.is.null,"
+            "and(date.eq.%222025-01-02%22,id.lt.%22a%22))"
+        )
+        assert keyset_filter("date", None, "a") == "and=(date.is.null,id.lt.%22a%22)"
+        assert "%2B00%3A00" in keyset_filter("ts", "2025-01-01T00:00:00+00:00", "a")
+
+    @pytest.mark.asyncio
+    async def test_pages_through_every_row(self):
+        calls: list = []
+        rows = _sleep_rows(25)
+        spec = ExportTable(
+            "sleep", "oura_sleep", "date,sleep_score", "user_id=eq.{user_id}", "date"
+        )
+        fake = _fake_postgrest({"oura_sleep": rows}, calls)
+        with patch.object(export_stream, "_supabase_get_strict", fake):
+            async with PagedExport([spec], {"user_id": "u1"}, page_size=10) as paged:
+                got = [r async for page in paged.pages("sleep") for r in page]
+        assert [r["sleep_score"] for r in got] == [r["sleep_score"] for r in rows]
+        assert "id" not in got[0]
+        assert len(calls) == 3
+        assert paged.counts == {"sleep": 25}
+
+
+class TestHealthDataExport:
+    @pytest.mark.asyncio
+    async def test_csv_has_every_row_and_summary(self):
+        calls: list = []
+        fake = _fake_postgrest({"oura_sleep": _sleep_rows(250)}, calls)
+        with patch.object(export_stream, "_supabase_get_strict", fake), patch.object(
+            export, "_supabase_get_strict", fake
+        ), patch.object(export_stream, "PAGE_SIZE", 100):
+            response = await export.export_health_data(
+                format="csv", days=365, gzip=False, current_user=USER
+            )
+            text = (await _body(response)).decode()
+        assert response.media_type == "text/csv"
+        lines = list(csv.reader(io.StringIO(text)))
+        start = lines.index(["### Sleep (Oura) ###"]) + 2
+        end = lines.index(["### Activity (Oura) ###"]) - 1
+        assert len(lines[start:end]) == 250
+        assert ["sleep", "250"] in lines
+        # Every table was read, concurrently, with no hard cap.
+        assert {t for t, _ in calls} >= {"oura_sleep", "medications", "lab_results"}
+
+    @pytest.mark.asyncio
+    async def test_ndjson_gzip(self):
+        fake = _fake_postgrest({"oura_sleep": _sleep_rows(3)}, [])
+        with patch.object(export_stream, "_supabase_get_strict", fake), patch.object(
+            export, "_supabase_get_strict", fake
+        ):
+            response = await export.export_health_data(
+                format="ndjson", days=90, gzip=True, current_user=USER
+            )
+            raw = gzip.decompress(await _body(response)).decode()
+        records = [json.loads(line) for line in raw.splitlines()]
+        assert records[0]["type"] == "export"
+        assert [r["data"]["sleep_score"] for r in records if r["type"] == "sleep"] == [
+            2,
+            1,
+            0,
+        ]
+        assert records[-1] == {
+            "type": "export_complete",
+            "row_counts": {
+                **{t.section: 0 for t in export._HEALTH_DATA_TABLES},
+                "sleep": 3,
+            },
+        }
+
+    @pytest.mark.asyncio
+    async def test_json_is_valid(self):
+        fake = _fake_postgrest({"oura_sleep": _sleep_rows(3)}, [])
+        with patch.object(export_stream, "_supabase_get_strict", fake), patch.object(
+            export, "_supabase_get_strict", fake
+        ):
+            response = await export.export_health_data(
+                format="json", days=90, gzip=False, current_user=USER
+            )
+            payload = json.loads(await _body(response))
+        assert payload["profile"]["biological_sex"] == "female"
+        assert len(payload["sleep"]) == 3
+        assert payload["medications"] == []
+        assert payload["row_counts"]["sleep"] == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_table_aborts_instead_of_truncating(self):
+        fake = _fake_postgrest({}, [], fail="oura_activity")
+        with patch.object(export_stream, "_supabase_get_strict", fake), patch.object(
+            export, "_supabase_get_strict", fake
+        ):
+            response = await export.export_health_data(
+                format="csv", days=90, gzip=False, current_user=USER
+            )
+            with pytest.raises(SupabaseReadError):
+                await _body(response)
+
+
+class TestFhirExport:
+    @pytest.mark.asyncio
+    async def test_streams_a_valid_bundle(self):
+        labs = [
+            {
+                "id": f"lab{i}",
+                "test_date": f"2025-06-{10 - i:02d}",
+                "test_type": "CBC",
+                "biomarkers": [
+                    {"biomarker_name": "Glucose", "value": 90, "unit": "mg/dL"}
+                ],
+            }
+            for i in range(5)
+        ]
+        fake = _fake_postgrest({"lab_results": labs}, [])
+        with patch.object(export_stream, "_supabase_get_strict", fake), patch.object(
+            export, "_supabase_get_strict", fake
+        ), patch.object(export_stream, "PAGE_SIZE", 2):
+            response = await export.export_fhir(gzip=False, current_user=USER)
+            bundle = json.loads(await _body(response))
+        kinds = [e["resource"]["resourceType"] for e in bundle["entry"]]
+        assert bundle["resourceType"] == "Bundle"
+        assert kinds[0] == "Patient"
+        reports = [
+            e["resource"]
+            for e in bundle["entry"]
+            if e["resource"]["resourceType"] == "DiagnosticReport"
+        ]
+        assert [r["id"] for r in reports] == [f"lab{i}" for i in range(5)]
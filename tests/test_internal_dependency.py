@@ -0,0 +1,37 @@
+"""Tests for the internal-caller dependency guarding runtime metrics."""
+
+from __future__ import annotations
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from apps.mvp_api.dependencies.internal import require_cron_secret
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.get("/health/runtime", dependencies=[Depends(require_cron_secret)])
+    async def runtime():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_refuses_every_caller_when_unconfigured(client, monkeypatch):
+    monkeypatch.delenv("CRON_SECRET", raising=False)
+    resp = client.get("/health/runtime", headers={"X-Cron-Secret": ""})
+    assert resp.status_code == 503
+
+
+def test_requires_the_matching_secret(client, monkeypatch):
+    monkeypatch.setenv("CRON_SECRET", "s3cret")
+    assert client.get("/health/runtime").status_code == 401
+    assert (
+        client.get("/health/runtime", headers={"X-Cron-Secret": "nope"}).status_code
+        == 401
+    )
+    resp = client.get("/health/runtime", headers={"X-Cron-Secret": "s3cret"})
+    assert resp.status_code == 200
@@ -0,0 +1,192 @@
+"""Tests for the micro-batching Kafka consumer runtime."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from common.clients.kafka_consumer import (
+    BatchConsumer,
+    InMemoryConsumer,
+    dead_letter_handler,
+)
+from common.clients.kafka_publisher import AsyncKafkaPublisher, InMemoryProducer
+
+
+def _produce(broker, topic, events):
+    for key, payload in events:
+        broker.produce(topic, value=json.dumps(payload).encode(), key=key.encode())
+    broker.flush()
+
+
+@pytest.fixture
+def broker():
+    return InMemoryProducer(partitions=2)
+
+
+class TestBatchConsumer:
+    @pytest.mark.asyncio
+    async def test_groups_by_key_in_offset_order(self, broker):
+        _produce(broker, "raw", [(f"d{i % 3}", {"n": i}) for i in range(12)])
+        seen = {}
+
+        async def handler(topic, key, events):
+            seen[key] = [e["n"] for e in events]
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(consumer, handler, batch_size=100)
+        await runtime.process_batch(consumer.consume(100, 0))
+        assert seen == {"d0": [0, 3, 6, 9], "d1": [1, 4, 7, 10], "d2": [2, 5, 8, 11]}
+        assert sum(consumer.committed.values()) == 12
+        stats = runtime.stats()
+        assert stats["batches"] == 1 and stats["messages"] == 12
+        assert stats["total_lag"] == 0
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self, broker):
+        _produce(broker, "raw", [(f"d{i}", {"n": i}) for i in range(10)])
+        active, peak = 0, 0
+
+        async def handler(topic, key, events):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(consumer, handler, max_concurrency=3)
+        await runtime.process_batch(consumer.consume(100, 0))
+        assert peak == 3
+
+    @pytest.mark.asyncio
+    async def test_failing_group_is_retried_then_dead_lettered(self, broker):
+        _produce(broker, "raw", [("good", {"n": 1}), ("bad", {"n": 2})])
+        calls = {"good": 0, "bad": 0}
+        dead = []
+
+        async def handler(topic, key, events):
+            calls[key] += 1
+            if key == "bad":
+                raise RuntimeError("db down")
+
+        async def on_failure(topic, key, events, exc):
+            dead.append((key, events))
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(
+            consumer, handler, max_retries=2, retry_base_s=0.001, on_failure=on_failure
+        )
+        await runtime.process_batch(consumer.consume(100, 0))
+        assert calls == {"good": 1, "bad": 3}
+        assert dead == [("bad", [{"n": 2}])]
+        assert runtime.stats()["retries"] == 2
+        assert sum(consumer.committed.values()) == 2
+
+    @pytest.mark.asyncio
+    async def test_unhandled_group_is_redelivered_not_committed(self, broker):
+        _produce(broker, "raw", [("bad", {"n": 1}), ("bad", {"n": 2})])
+        healthy = False
+        seen = []
+
+        async def handler(topic, key, events):
+            if not healthy:
+                raise RuntimeError("db down")
+            seen.extend(e["n"] for e in events)
+
+        async def broken_dead_letter(topic, key, events, exc):
+            raise RuntimeError("dlq down")
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        for on_failure in (None, broken_dead_letter):
+            runtime = BatchConsumer(
+                consumer, handler, max_retries=0, on_failure=on_failure
+            )
+            await runtime.process_batch(consumer.consume(100, 0))
+            assert sum(consumer.committed.values()) == 0
+            assert runtime.stats()["redelivered"] == 2
+
+        healthy = True
+        await runtime.process_batch(consumer.consume(100, 0))
+        assert seen == [1, 2]
+        assert sum(consumer.committed.values()) == 2
+
+    @pytest.mark.asyncio
+    async def test_dead_letter_handler_republishes_group(self, broker):
+        _produce(broker, "raw", [("bad", {"n": 1}), ("bad", {"n": 2})])
+
+        async def handler(topic, key, events):
+            raise RuntimeError("db down")
+
+        publisher = AsyncKafkaPublisher(broker, poll_interval_s=0.001)
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(
+            consumer,
+            handler,
+            max_retries=0,
+            on_failure=dead_letter_handler(publisher),
+        )
+        try:
+            await runtime.process_batch(consumer.consume(100, 0))
+        finally:
+            publisher.close()
+        assert broker.values("raw-dlq") == [{"n": 1}, {"n": 2}]
+        assert dict(broker.topics["raw-dlq"][0].headers())["x-error"] == b"db down"
+        assert sum(consumer.committed.values()) == 2
+        assert runtime.stats()["dead_lettered"] == 2
+
+    @pytest.mark.asyncio
+    async def test_run_survives_a_failing_batch(self, broker, monkeypatch):
+        received = []
+
+        async def handler(topic, key, events):
+            received.extend(e["n"] for e in events)
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(consumer, handler, poll_timeout_s=0.01)
+        process_batch = runtime.process_batch
+
+        async def fail_once(messages):
+            if not runtime.stats()["batch_failures"]:
+                raise RuntimeError("coordinator gone")
+            await process_batch(messages)
+
+        monkeypatch.setattr(runtime, "process_batch", fail_once)
+        task = asyncio.create_task(runtime.run())
+        _produce(broker, "raw", [("d", {"n": 1})])
+        for _ in range(100):
+            if runtime.stats()["batch_failures"]:
+                break
+            await asyncio.sleep(0.01)
+        _produce(broker, "raw", [("d", {"n": 2})])
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        runtime.stop()
+        await task
+        assert runtime.stats()["batch_failures"] == 1
+        assert received == [2]
+
+    @pytest.mark.asyncio
+    async def test_run_consumes_until_stopped(self, broker):
+        _produce(broker, "raw", [("d", {"n": i}) for i in range(5)])
+        received = []
+
+        async def handler(topic, key, events):
+            received.extend(e["n"] for e in events)
+
+        consumer = InMemoryConsumer(broker, ["raw"])
+        runtime = BatchConsumer(consumer, handler, batch_size=2, poll_timeout_s=0.01)
+        task = asyncio.create_task(runtime.run())
+        for _ in range(100):
+            if len(received) == 5:
+                break
+            await asyncio.sleep(0.01)
+        runtime.stop()
+        await task
+        assert received == [0, 1, 2, 3, 4]
+        assert runtime.stats()["batches"] == 3
+        assert consumer.closed
@@ -0,0 +1,103 @@
+"""Tests for the asynchronous batched Kafka publisher."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from apps.medical_records.utils.event_streaming import MedicalRecordsEventProducer
+from common.clients.kafka_publisher import (
+    AsyncKafkaPublisher,
+    InMemoryProducer,
+    PublishError,
+    PublishQueueFull,
+)
+
+
+@pytest.fixture
+def broker():
+    return InMemoryProducer()
+
+
+@pytest.fixture
+def publisher(broker):
+    pub = AsyncKafkaPublisher(broker, poll_interval_s=0.005)
+    yield pub
+    pub.close()
+
+
+class TestAsyncKafkaPublisher:
+    @pytest.mark.asyncio
+    async def test_delivery_future_resolves_with_report(self, broker, publisher):
+        report = await publisher.send_and_wait("labs", {"patient_id": "p1"}, key="p1")
+        assert report.topic == "labs" and report.offset == 0
+        assert broker.values("labs") == [{"patient_id": "p1"}]
+        assert publisher.stats()["delivered"] == 1
+
+    @pytest.mark.asyncio
+    async def test_same_key_keeps_order(self, broker, publisher):
+        futures = [await publisher.send("labs", {"n": i}, key="p1") for i in range(50)]
+        reports = await asyncio.gather(*futures)
+        assert len({r.partition for r in reports}) == 1
+        assert [v["n"] for v in broker.values("labs")] == list(range(50))
+
+    @pytest.mark.asyncio
+    async def test_fire_and_forget_failures_are_counted(self, broker, publisher):
+        broker.fail_topics.add("alerts")
+        future = await publisher.send("alerts", {"x": 1})
+        with pytest.raises(PublishError):
+            await future
+        await publisher.send("alerts", {"x": 2})  # never awaited
+        for _ in range(100):
+            if publisher.stats()["failed"] == 2:
+                break
+            await asyncio.sleep(0.005)
+        assert publisher.stats()["failed"] == 2
+        assert publisher.stats()["in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_full_outbox_applies_backpressure(self, broker):
+        broker.poll = lambda timeout=0: time.sleep(0.005) or 0  # broker stops acking
+        pub = AsyncKafkaPublisher(broker, outbox_max=2, enqueue_timeout_s=0.05)
+        await pub.send("t", {"n": 1})
+        await pub.send("t", {"n": 2})
+        with pytest.raises(PublishQueueFull):
+            await pub.send("t", {"n": 3})
+        assert pub.stats()["rejected_full"] == 1
+        del broker.poll
+        assert pub.close() == 0
+        await asyncio.sleep(0)
+        assert broker.values("t") == [{"n": 1}, {"n": 2}]
+
+    @pytest.mark.asyncio
+    async def test_thousands_of_events_without_per_event_flush(self, broker, publisher):
+        futures = [
+            await publisher.send("bulk", {"n": i}, key=str(i % 7)) for i in range(5000)
+        ]
+        await asyncio.gather(*futures)
+        assert len(broker.topics["bulk"]) == 5000
+        assert publisher.stats()["in_flight"] == 0
+
+
+class TestMedicalRecordsEventProducer:
+    @pytest.mark.asyncio
+    async def test_publish_returns_once_queued(self, broker, publisher):
+        producer = MedicalRecordsEventProducer(publisher=publisher)
+        event = {"event_type": "lab_result_created", "patient_id": "p1"}
+        assert await producer.publish_lab_result_event(event, wait_for_delivery=True)
+        assert broker.values("medical-records-lab-results")[0]["patient_id"] == "p1"
+        metrics = producer.get_metrics()
+        assert metrics["total_events_published"] == 1
+        assert metrics["events_by_topic"]["medical-records-lab-results"] == 1
+
+    @pytest.mark.asyncio
+    async def test_batch_reports_partial_failure(self, broker, publisher):
+        producer = MedicalRecordsEventProducer(publisher=publisher)
+        broker.fail_topics.add("medical-records-critical-alerts")
+        events = [{"patient_id": f"p{i}"} for i in range(3)]
+        assert not await producer.publish_batch_events(
+            events, "medical-records-critical-alerts"
+        )
+        assert producer.get_metrics()["failed_events"] == 3
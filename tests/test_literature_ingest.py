@@ -0,0 +1,160 @@
+"""Tests for batched literature caching and embedding."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import sys
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from apps.mvp_api.api import literature_ingest
+from apps.mvp_api.api.literature_ingest import LiteratureIngestor
+
+
+def _article(pmid: str) -> dict:
+    return {"pubmed_id": pmid, "title": f"Study {pmid}", "abstract": "Findings."}
+
+
+class _FakeStore:
+    """research_articles / article_embeddings as PostgREST would serve them."""
+
+    def __init__(self, articles=(), embedded=()):
+        self.articles = {p: f"id-{p}" for p in articles}
+        self.embedded = set(embedded)
+        self.gets: list = []
+        self.upserts: list = []
+
+    async def get(self, table, params):
+        self.gets.append((table, params))
+        await asyncio.sleep(0.01)
+        values = re.search(r"=in\.\(([^)]*)\)", params).group(1).split(",")
+        if table == "research_articles":
+            return [
+                {"id": self.articles[p], "pubmed_id": p}
+                for p in values
+                if p in self.articles
+            ]
+        return [{"article_id": a} for a in values if a in self.embedded]
+
+    async def upsert_many(self, table, rows, on_conflict=None):
+        self.upserts.append((table, rows, on_conflict))
+        await asyncio.sleep(0.01)
+        if table == "research_articles":
+            for row in rows:
+                self.articles[row["pubmed_id"]] = f"id-{row['pubmed_id']}"
+            return [{"id": self.articles[r["pubmed_id"]], **r} for r in rows]
+        self.embedded |= {r["article_id"] for r in rows}
+        return rows
+
+
+@pytest.fixture
+def store():
+    fake = _FakeStore(articles=["1"], embedded=["id-1"])
+    with patch.object(literature_ingest, "_supabase_get", fake.get), patch.object(
+        literature_ingest, "_supabase_upsert_many", fake.upsert_many
+    ):
+        yield fake
+
+
+class TestCacheArticles:
+    @pytest.mark.asyncio
+    async def test_one_lookup_and_one_insert_per_batch(self, store):
+        ingestor = LiteratureIngestor()
+        ids = await ingestor.cache_articles([_article(p) for p in ("1", "2", "3")])
+        assert ids == ["id-1", "id-2", "id-3"]
+        assert len(store.gets) == 1
+        [(table, rows, conflict)] = store.upserts
+        assert table == "research_articles" and conflict == "pubmed_id"
+        assert [r["pubmed_id"] for r in rows] == ["2", "3"]
+
+    @pytest.mark.asyncio
+    async def test_overlapping_searches_share_the_write(self, store):
+        ingestor = LiteratureIngestor()
+        first, second = await asyncio.gather(
+            ingestor.cache_articles([_article(p) for p in ("2", "3")]),
+            ingestor.cache_articles([_article(p) for p in ("3", "4")]),
+        )
+        assert first == ["id-2", "id-3"] and second == ["id-3", "id-4"]
+        inserted = [r["pubmed_id"] for _, rows, _ in store.upserts for r in rows]
+        assert sorted(inserted) == ["2", "3", "4"]
+        assert ingestor.stats()["coalesced"] == 1
+        assert ingestor.stats()["articles_in_flight"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cancelled_write_releases_waiters(self, store):
+        ingestor = LiteratureIngestor()
+        owner = asyncio.create_task(ingestor.cache_articles([_article("2")]))
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(ingestor.cache_articles([_article("2")]))
+        await asyncio.sleep(0)
+        owner.cancel()
+        assert await asyncio.wait_for(waiter, 1) == [None]
+        assert ingestor.stats()["articles_in_flight"] == 0
+        # A later search writes the article again instead of waiting forever.
+        assert await ingestor.cache_articles([_article("2")]) == ["id-2"]
+
+
+class TestOnDemandResearch:
+    @pytest.mark.asyncio
+    async def test_correlated_insights_cache_fetched_articles(self, store, monkeypatch):
+        from apps.mvp_api.api import insights
+
+        async def fake_search(query, max_results=10):
+            return ["2", "3", "4"]
+
+        async def fake_fetch(pmids):
+            return [_article(p) for p in pmids]
+
+        ingestor = LiteratureIngestor()
+        monkeypatch.setitem(
+            sys.modules,
+            "apps.mvp_api.api.medical_literature",
+            SimpleNamespace(
+                _pubmed_search=fake_search, _pubmed_fetch_articles=fake_fetch
+            ),
+        )
+        monkeypatch.setattr(
+            literature_ingest, "get_literature_ingestor", lambda: ingestor
+        )
+        summary = await insights._on_demand_research({"medications": ["metformin"]})
+        assert summary.startswith(
+            "On-demand research (PubMed) for 'metformin': [Study 2]"
+        )
+        [(table, rows, _)] = store.upserts
+        assert table == "research_articles"
+        assert [r["pubmed_id"] for r in rows] == ["2", "3"]
+
+
+class TestEmbedArticles:
+    @pytest.mark.asyncio
+    async def test_batches_missing_abstracts(self, store, monkeypatch):
+        monkeypatch.setattr(literature_ingest, "OPENAI_API_KEY", "test-key")
+        batches = []
+
+        async def fake_embeddings(texts):
+            batches.append(list(texts))
+            return [[1.0, float(i)] for i in range(len(texts))]
+
+        added = []
+        monkeypatch.setattr(literature_ingest, "generate_embeddings", fake_embeddings)
+        monkeypatch.setattr(
+            literature_ingest,
+            "get_literature_index",
+            lambda: SimpleNamespace(add=lambda aid, emb: added.append(aid)),
+        )
+        ingestor = LiteratureIngestor()
+        items = [("id-1", "old"), ("id-2", "two"), ("id-3", "three")]
+        await asyncio.gather(
+            ingestor.embed_articles(items), ingestor.embed_articles(items)
+        )
+        assert batches == [
+            ["two", "three"]
+        ]  # id-1 already embedded; duplicate run skipped
+        [(table, rows, _)] = store.upserts
+        assert table == "article_embeddings"
+        assert sorted(added) == ["id-2", "id-3"]
+        assert ingestor.stats()["embedded"] == 2
+        assert ingestor.stats()["embeddings_in_flight"] == 0
@@ -0,0 +1,236 @@
+"""Tests for common.ai.llm_gateway."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import anthropic
+import pytest
+
+from common.ai.llm_gateway import LLMGateway, json_reply, memo_key, system_blocks
+
+
+def _result(text: str = "ok", **usage):
+    return SimpleNamespace(
+        content=[SimpleNamespace(text=text)],
+        usage=SimpleNamespace(
+            input_tokens=usage.get("input_tokens", 10),
+            output_tokens=usage.get("output_tokens", 5),
+            cache_read_input_tokens=usage.get("cache_read", 0),
+            cache_creation_input_tokens=usage.get("cache_write", 0),
+        ),
+    )
+
+
+class _FakeClient:
+    """AsyncAnthropic stand-in that records calls and peak concurrency."""
+
+    def __init__(self, delay: float = 0.01, **usage):
+        self.calls: list = []
+        self.active = 0
+        self.peak = 0
+        self.delay = delay
+        self.usage = usage
+        self.messages = self
+
+    async def create(self, **params):
+        self.calls.append(params)
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+        return _result(**self.usage)
+
+    def stream(self, **params):
+        self.calls.append(params)
+        client = self
+
+        class _Stream:
+            current_message_snapshot = _result(**client.usage)
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return _Stream()
+
+
+@pytest.fixture
+def fake(monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    client = _FakeClient(cache_read=100)
+    monkeypatch.setattr(anthropic, "AsyncAnthropic", lambda **_kw: client)
+    return client
+
+
+PARAMS = dict(
+    model="claude-sonnet-4-6",
+    max_tokens=100,
+    messages=[{"role": "user", "content": "Summarise"}],
+)
+
+
+class TestLLMGateway:
+    @pytest.mark.asyncio
+    async def test_memoized_calls_share_one_request(self, fake):
+        gateway = LLMGateway()
+        first, second = await asyncio.gather(
+            gateway.create("correlations", memoize=True, **PARAMS),
+            gateway.create("correlations", memoize=True, **PARAMS),
+        )
+        third = await gateway.create("correlations", memoize=True, **PARAMS)
+        assert len(fake.calls) == 1
+        assert first is second is third
+        assert gateway.stats()["features"]["correlations"]["memo_hits"] == 2
+
+        # A different prompt is a different key; unmemoized calls always go out.
+        await gateway.create(
+            "correlations", memoize=True, **{**PARAMS, "max_tokens": 50}
+        )
+        await gateway.create("correlations", **PARAMS)
+        assert len(fake.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_call_is_not_memoized(self, fake):
+        gateway = LLMGateway()
+        succeed = fake.create
+
+        async def fail_once(**params):
+            fake.create = succeed
+            raise RuntimeError("overloaded")
+
+        fake.create = fail_once
+        with pytest.raises(RuntimeError):
+            await gateway.create("correlations", memoize=True, **PARAMS)
+        await gateway.create("correlations", memoize=True, **PARAMS)
+        assert len(fake.calls) == 1
+        assert gateway.stats()["features"]["correlations"]["errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_unusable_replies_are_not_memoized(self, fake):
+        gateway = LLMGateway()
+        replies = iter(["Sure! Here is", '```json\n{"summary": "ok"}\n```'])
+
+        async def create(**params):
+            fake.calls.append(params)
+            return _result(next(replies))
+
+        fake.create = create
+        for _ in range(3):
+            await gateway.create(
+                "correlations", memoize=True, memo_if=json_reply, **PARAMS
+            )
+        # The unparseable first reply was asked for again; the JSON one was kept.
+        assert len(fake.calls) == 2
+
+        truncated = _result('{"summary": "o')
+        truncated.stop_reason = "max_tokens"
+
+        async def create_truncated(**params):
+            fake.calls.append(params)
+            return truncated
+
+        fake.create = create_truncated
+        other = {**PARAMS, "max_tokens": 10}
+        await gateway.create("correlations", memoize=True, **other)
+        await gateway.create("correlations", memoize=True, **other)
+        assert len(fake.calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_concurrency_budget_is_per_feature(self, fake, monkeypatch):
+        monkeypatch.setenv("LLM_CONCURRENCY_FOOD_RECOGNITION", "2")
+        gateway = LLMGateway(default_concurrency=8)
+        await asyncio.gather(
+            *(gateway.create("food_recognition", **PARAMS) for _ in range(6))
+        )
+        assert fake.peak == 2
+        assert gateway.concurrency_limit("ai_chat") == 8
+
+    @pytest.mark.asyncio
+    async def test_cache_system_marks_static_prompt(self, fake):
+        gateway = LLMGateway()
+        await gateway.create(
+            "ai_consult", cache_system=True, system="Be brief.", **PARAMS
+        )
+        assert fake.calls[0]["system"] == [
+            {
+                "type": "text",
+                "text": "Be brief.",
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_records_tokens_for_calls_and_streams(self, fake):
+        gateway = LLMGateway()
+        await gateway.create("ai_chat", **PARAMS)
+        async with gateway.stream("ai_chat", **PARAMS) as stream:
+            assert stream is not None
+        stats = gateway.stats()["features"]["ai_chat"]
+        assert stats["calls"] == 2
+        assert stats["in_flight"] == 0
+        assert stats["input_tokens"] == 20
+        assert stats["output_tokens"] == 10
+        assert stats["cache_read_tokens"] == 200
+
+    @pytest.mark.asyncio
+    async def test_client_is_pooled_until_key_changes(self, fake, monkeypatch):
+        gateway = LLMGateway()
+        built = []
+
+        def factory(**kwargs):
+            built.append(kwargs["api_key"])
+            return fake
+
+        monkeypatch.setattr(anthropic, "AsyncAnthropic", factory)
+        gateway.client()
+        gateway.client()
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "rotated")
+        gateway.client()
+        assert built == ["test-key", "rotated"]
+
+    @pytest.mark.asyncio
+    async def test_replaced_client_is_closed_and_attempts_are_bounded(
+        self, monkeypatch
+    ):
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+        built = []
+
+        class Client(_FakeClient):
+            def __init__(self, **kwargs):
+                super().__init__()
+                self.kwargs = kwargs
+                self.closed = False
+                built.append(self)
+
+            async def close(self):
+                self.closed = True
+
+        monkeypatch.setattr(anthropic, "AsyncAnthropic", Client)
+        gateway = LLMGateway()
+        first = gateway.client()
+        monkeypatch.setenv("ANTHROPIC_API_KEY", "rotated")
+        second = gateway.client()
+        await asyncio.sleep(0)
+        assert first.kwargs["max_retries"] == 2
+        assert first.kwargs["timeout"] == 60.0
+        assert first.closed and not second.closed
+        await gateway.close()
+        assert second.closed
+
+
+class TestHelpers:
+    def test_system_blocks_puts_breakpoint_on_static_part(self):
+        blocks = system_blocks("persona", "user profile")
+        assert blocks[0]["cache_control"] == {"type": "ephemeral"}
+        assert "cache_control" not in blocks[1]
+        assert len(system_blocks("persona", "")) == 1
+
+    def test_memo_key_ignores_dict_order(self):
+        assert memo_key({"a": 1, "b": [1, 2]}) == memo_key({"b": [1, 2], "a": 1})
+        assert memo_key({"a": 1}) != memo_key({"a": 2})
@@ -0,0 +1,153 @@
+"""
+Tests for common.metrics.correlation_matrix — vectorised pairwise correlations.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from common.metrics.correlation_matrix import (
+    average_ranks,
+    complete_rows,
+    daily_matrix,
+    lagged_pair_stats,
+    t_test_p_values,
+)
+
+
+# ---------------------------------------------------------------------------
+# daily_matrix
+# ---------------------------------------------------------------------------
+
+
+class TestDailyMatrix:
+    def test_missing_values_are_nan(self):
+        daily = {"2026-03-01": {"a": 1.0}, "2026-03-03": {"a": 3.0, "b": 2.0}}
+        dates = ["2026-03-01", "2026-03-02", "2026-03-03"]
+        m = daily_matrix(daily, dates, ["a", "b"])
+        assert m.shape == (3, 2)
+        assert m[0, 0] == 1.0
+        assert np.isnan(m[0, 1])
+        assert np.isnan(m[1]).all()
+        assert m[2, 1] == 2.0
+
+    def test_zero_is_missing_respects_keep_zero(self):
+        daily = {"d1": {"carbs": 0, "last_meal_hour": 0}}
+        m = daily_matrix(
+            daily,
+            ["d1"],
+            ["carbs", "last_meal_hour"],
+            zero_is_missing=True,
+            keep_zero=("last_meal_hour",),
+        )
+        assert np.isnan(m[0, 0])
+        assert m[0, 1] == 0.0
+
+    def test_non_numeric_skipped(self):
+        m = daily_matrix({"d1": {"a": "n/a"}}, ["d1"], ["a"])
+        assert np.isnan(m[0, 0])
+
+
+# ---------------------------------------------------------------------------
+# Ranks and p-values
+# ---------------------------------------------------------------------------
+
+
+class TestAverageRanks:
+    def test_ties_share_mean_rank(self):
+        values = np.array([[10.0], [20.0], [20.0], [5.0]])
+        valid = np.ones_like(values, dtype=bool)
+        ranks = average_ranks(values, valid)
+        assert ranks[:, 0].tolist() == [2.0, 3.5, 3.5, 1.0]
+
+    def test_invalid_entries_excluded_per_column(self):
+        values = np.array([[3.0, 1.0], [1.0, 2.0], [2.0, 3.0]])
+        valid = np.array([[True, True], [False, True], [True, True]])
+        ranks = average_ranks(values, valid)
+        assert ranks[0, 0] == 2.0
+        assert np.isnan(ranks[1, 0])
+        assert ranks[2, 0] == 1.0
+        assert ranks[:, 1].tolist() == [1.0, 2.0, 3.0]
+
+
+class TestTTestPValues:
+    def test_matches_t_distribution(self):
+        # r = 0.5, n = 10  →  t ≈ 1.633, df = 8  →  two-tailed p ≈ 0.1411
+        p = t_test_p_values(np.array([0.5]), np.array([10]))
+        assert p[0] == pytest.approx(0.1411132811661715, abs=1e-9)
+
+    def test_perfect_and_zero_correlation(self):
+        p = t_test_p_values(np.array([1.0, -1.0, 0.0]), np.array([8, 8, 8]))
+        assert p.tolist() == [0.0, 0.0, 1.0]
+
+
+# ---------------------------------------------------------------------------
+# lagged_pair_stats
+# ---------------------------------------------------------------------------
+
+
+def _col(values):
+    return np.array(values, dtype=np.float64).reshape(-1, 1)
+
+
+class TestLaggedPairStats:
+    def test_pearson_and_spearman_match_scalar_reference(self):
+        x = _col([1, 2, 3, 4, 5, 6, 7, 8])
+        y = _col([2, 1, 4, 3, 6, 5, 8, 7])
+        stats = lagged_pair_stats(x, y, [0], [0], [0], ("pearson", "spearman"))
+        assert round(stats["pearson"].r[0], 4) == 0.9048
+        assert round(stats["pearson"].p[0], 6) == 0.002008
+        assert round(stats["spearman"].r[0], 4) == 0.9048
+        assert stats["pearson"].n[0] == 8
+
+    def test_spearman_with_ties(self):
+        x = _col([1, 1, 2, 2, 3, 5, 5, 9])
+        y = _col([3, 1, 4, 1, 5, 9, 2, 6])
+        stats = lagged_pair_stats(x, y, [0], [0], [0], ("pearson", "spearman"))
+        assert round(stats["pearson"].r[0], 4) == 0.5626
+        assert round(stats["pearson"].p[0], 6) == 0.146586
+        assert round(stats["spearman"].r[0], 4) == 0.6464
+        assert round(stats["spearman"].p[0], 6) == 0.083296
+
+    def test_lag_aligns_a_row_with_later_b_row(self):
+        a = _col([1, 2, 3, 4, 5, 6, 7, np.nan])
+        b = _col([np.nan, 1, 2, 3, 4, 5, 6, 7])
+        same_day = lagged_pair_stats(a, b, [0], [0], [0])["pearson"]
+        lagged = lagged_pair_stats(a, b, [0], [0], [1])["pearson"]
+        assert lagged.r[0] == pytest.approx(1.0)
+        assert lagged.n[0] == 7
+        assert same_day.n[0] == 6
+        assert complete_rows(a, b, 0, 0, 1) == list(range(7))
+
+    def test_multiple_pairs_in_one_call(self):
+        rng = np.random.default_rng(7)
+        base = rng.normal(size=30)
+        a = np.column_stack([base, rng.normal(size=30)])
+        b = np.column_stack([base * 2 + 1, -base])
+        stats = lagged_pair_stats(a, b, [0, 0, 1], [0, 1, 0], [0, 0, 0])["pearson"]
+        assert stats.r[0] == pytest.approx(1.0)
+        assert stats.r[1] == pytest.approx(-1.0)
+        assert abs(stats.r[2]) < 0.6
+        assert stats.p[0] == 0.0
+
+    def test_too_few_points_is_not_significant(self):
+        a = _col([1, 2, 3, 4])
+        stats = lagged_pair_stats(a, a, [0], [0], [0])["pearson"]
+        assert stats.r[0] == 0.0
+        assert stats.p[0] == 1.0
+
+    def test_constant_series_is_not_significant(self):
+        a = _col([1, 2, 3, 4, 5, 6])
+        b = _col([0.1] * 6)
+        stats = lagged_pair_stats(a, b, [0], [0], [0], ("pearson", "spearman"))
+        for method in ("pearson", "spearman"):
+            assert stats[method].r[0] == 0.0
+            assert stats[method].p[0] == 1.0
+
+    def test_lag_longer_than_series(self):
+        a = _col([1, 2, 3])
+        stats = lagged_pair_stats(a, a, [0], [0], [5])["pearson"]
+        assert stats.n[0] == 0
+        assert not math.isnan(stats.p[0])
@@ -0,0 +1,162 @@
+"""Tests for common.metrics.daily_store (columnar per-user daily metrics)."""
+
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from common.metrics.correlation_matrix import daily_matrix
+from common.metrics.daily_store import DailyMetricStore, DailyStoreCache
+
+
+class TestFromRows:
+    def test_highest_priority_wins_then_earliest(self):
+        store = DailyMetricStore.from_rows(
+            ["d1", "d1", "d1", "d2"],
+            ["hrv_ms", "hrv_ms", "hrv_ms", "hrv_ms"],
+            [40.0, 55.0, 60.0, 50.0],
+            [60, 100, 100, 0],
+        )
+        assert store.dates == ["d1", "d2"]
+        assert store.column("hrv_ms").tolist() == [55.0, 50.0]
+
+    def test_nan_values_ignored(self):
+        store = DailyMetricStore.from_rows(["d1", "d2"], ["a", "a"], [math.nan, 1.0])
+        assert store.dates == ["d2"]
+
+    def test_empty(self):
+        store = DailyMetricStore.from_rows([], [], [])
+        assert store.dates == []
+        assert store.to_daily() == {}
+        assert len(store) == 0
+
+    def test_canonical_metrics_ordered_first(self):
+        store = DailyMetricStore.from_daily(
+            {"d1": {"symptom_count": 1.0, "steps": 10.0, "hrv_ms": 40.0}}
+        )
+        assert store.metrics[-1] == "symptom_count"
+        assert set(store.metrics[:2]) == {"steps", "hrv_ms"}
+
+
+class TestDailyRoundTrip:
+    def test_from_daily_to_daily(self):
+        daily = {"d1": {"a": 1.0, "b": 2.0}, "d3": {"a": 3.0}}
+        store = DailyMetricStore.from_daily(daily)
+        assert store.to_daily() == daily
+        assert store.present("b").tolist() == [True, False]
+
+    def test_non_numeric_values_skipped(self):
+        store = DailyMetricStore.from_daily({"d1": {"a": "n/a", "b": 2}})
+        assert store.to_daily() == {"d1": {"b": 2.0}}
+
+
+class TestMerge:
+    def test_fill_only_missing_cells(self):
+        base = DailyMetricStore.from_daily({"d1": {"a": 1.0}})
+        base.merge(
+            DailyMetricStore.from_daily({"d1": {"a": 9.0, "b": 2.0}, "d2": {"a": 3.0}})
+        )
+        assert base.to_daily() == {"d1": {"a": 1.0, "b": 2.0}, "d2": {"a": 3.0}}
+
+    def test_overwrite(self):
+        base = DailyMetricStore.from_daily({"d1": {"a": 1.0}})
+        base.merge(DailyMetricStore.from_daily({"d1": {"a": 9.0}}), overwrite=True)
+        assert base.to_daily() == {"d1": {"a": 9.0}}
+
+    def test_skip_dates(self):
+        base = DailyMetricStore.from_daily({"d1": {"a": 1.0}})
+        base.merge(
+            DailyMetricStore.from_daily({"d1": {"b": 2.0}, "d0": {"b": 5.0}}),
+            skip_dates=["d1"],
+        )
+        assert base.dates == ["d0", "d1"]
+        assert base.to_daily() == {"d0": {"b": 5.0}, "d1": {"a": 1.0}}
+
+    def test_merge_does_not_touch_source(self):
+        other = DailyMetricStore.from_daily({"d1": {"a": 1.0}})
+        DailyMetricStore.from_daily({"d0": {"a": 0.5}}).merge(other)
+        assert other.dates == ["d1"]
+
+
+class TestWindow:
+    def test_half_open_range(self):
+        store = DailyMetricStore.from_daily(
+            {"d1": {"a": 1.0}, "d2": {"b": 2.0}, "d3": {"a": 3.0}}
+        )
+        assert store.window("d2", "d3").to_daily() == {"d2": {"b": 2.0}}
+        assert store.window("d2").dates == ["d2", "d3"]
+        assert store.window("d2", "d3").metrics_with_data() == ["b"]
+
+    def test_window_is_a_copy(self):
+        store = DailyMetricStore.from_daily({"d1": {"a": 1.0}})
+        store.window("d1").merge(
+            DailyMetricStore.from_daily({"d1": {"a": 9.0}}), overwrite=True
+        )
+        assert store.to_daily() == {"d1": {"a": 1.0}}
+
+
+class TestMatrix:
+    @pytest.mark.parametrize("zero_is_missing", [False, True])
+    def test_matches_daily_matrix(self, zero_is_missing):
+        rng = np.random.default_rng(3)
+        daily = {}
+        for i in range(40):
+            day = {}
+            for metric in ("a", "b", "c"):
+                if rng.random() < 0.7:
+                    day[metric] = float(rng.choice([0.0, rng.normal()]))
+            if day:
+                daily[f"2026-01-{i % 28 + 1:02d}-{i}"] = day
+        dates = sorted(daily) + ["missing-date"]
+        variables = ["c", "a", "zzz", "b"]
+        expected = daily_matrix(
+            daily, dates, variables, zero_is_missing=zero_is_missing, keep_zero=["b"]
+        )
+        got = DailyMetricStore.from_daily(daily).matrix(
+            dates, variables, zero_is_missing=zero_is_missing, keep_zero=["b"]
+        )
+        np.testing.assert_array_equal(got, expected)
+
+
+class TestDailyStoreCache:
+    def _store(self, n: int = 10) -> DailyMetricStore:
+        return DailyMetricStore.from_daily(
+            {f"d{i:03d}": {"a": float(i)} for i in range(n)}
+        )
+
+    def test_get_returns_independent_copy(self):
+        cache = DailyStoreCache(max_bytes=1 << 20, ttl_s=60)
+        cache.put(("u1", 30), self._store(), ("Oura",))
+        store, extra = cache.get(("u1", 30))
+        store.merge(DailyMetricStore.from_daily({"d000": {"a": 99.0}}), overwrite=True)
+        again, _ = cache.get(("u1", 30))
+        assert again.column("a")[0] == 0.0
+        assert extra == ("Oura",)
+        assert cache.hits == 2
+
+    def test_ttl_expiry(self):
+        cache = DailyStoreCache(max_bytes=1 << 20, ttl_s=0)
+        cache.put(("u1", 30), self._store())
+        assert cache.get(("u1", 30)) is None
+        assert cache.stats()["entries"] == 0
+
+    def test_bounded_by_bytes(self):
+        size = self._store().nbytes
+        cache = DailyStoreCache(max_bytes=size * 2, ttl_s=60)
+        for user in ("u1", "u2", "u3"):
+            cache.put((user, 30), self._store())
+        assert cache.get(("u1", 30)) is None
+        assert cache.get(("u3", 30)) is not None
+        assert cache.stats()["bytes"] <= size * 2
+
+    def test_invalidate_user(self):
+        cache = DailyStoreCache(max_bytes=1 << 20, ttl_s=60)
+        cache.put(("u1", 30), self._store())
+        cache.put(("u1", 90), self._store())
+        cache.put(("u2", 30), self._store())
+        cache.invalidate("u1")
+        assert cache.get(("u1", 30)) is None
+        assert cache.get(("u1", 90)) is None
+        assert cache.get(("u2", 30)) is not None
@@ -0,0 +1,100 @@
+"""
+Tests for common.metrics.granger — Granger causality on NumPy least squares.
+"""
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+
+from common.metrics.granger import (
+    ar_rss,
+    arx_rss,
+    f_dist_p_value,
+    granger_batch,
+    granger_causality_test,
+    ols_rss,
+)
+
+
+def _driven_pair(n: int = 60, seed: int = 1):
+    """Y follows X with a one-day delay plus a little noise."""
+    rng = np.random.default_rng(seed)
+    x = rng.normal(size=n)
+    y = np.concatenate([[0.0], x[:-1]]) + 0.1 * rng.normal(size=n)
+    return x, y
+
+
+class TestOlsRss:
+    def test_exact_fit_has_zero_rss(self):
+        X = np.column_stack([np.ones(6), np.arange(6.0)])
+        y = 2.0 + 3.0 * np.arange(6.0)
+        assert ols_rss(X, y) == pytest.approx(0.0, abs=1e-18)
+
+    def test_too_few_rows(self):
+        assert ols_rss(np.ones((3, 2)), np.ones(3)) is None
+
+    def test_rank_deficient(self):
+        X = np.column_stack([np.ones(8), np.ones(8)])
+        assert ols_rss(X, np.arange(8.0)) is None
+
+    def test_ar_models_nest(self):
+        x, y = _driven_pair()
+        restricted = ar_rss(y, 2)
+        unrestricted = arx_rss(y, x, 2)
+        assert unrestricted < restricted
+
+
+class TestFDistPValue:
+    @pytest.mark.parametrize(
+        "f_stat, df1, df2, expected",
+        [
+            (3.0, 1, 10, 0.113937),
+            (2.5, 3, 30, 0.078474),
+            (1.0, 5, 5, 0.5),
+        ],
+    )
+    def test_known_values(self, f_stat, df1, df2, expected):
+        assert f_dist_p_value(f_stat, df1, df2) == pytest.approx(expected, abs=1e-5)
+
+    def test_large_statistic_is_tiny(self):
+        # The upper tail must stay accurate far out, not collapse to 0 or 1.
+        p = f_dist_p_value(101.77, 2, 105)
+        assert 0.0 < p < 1e-20
+
+    def test_degenerate_inputs(self):
+        assert f_dist_p_value(0.0, 2, 10) == 1.0
+        assert f_dist_p_value(2.0, 0, 10) == 1.0
+
+
+class TestGrangerCausality:
+    def test_detects_lagged_driver(self):
+        x, y = _driven_pair()
+        lag, p = granger_causality_test(x, y)
+        assert lag is not None
+        assert p < 0.01
+
+    def test_independent_series_not_significant(self):
+        rng = np.random.default_rng(3)
+        lag, p = granger_causality_test(rng.normal(size=60), rng.normal(size=60))
+        assert (lag, p) == (None, None)
+
+    def test_short_series(self):
+        assert granger_causality_test([1.0, 2.0, 3.0], [3.0, 2.0, 1.0]) == (None, None)
+
+    def test_batch_marks_unevaluated_pairs(self):
+        x, y = _driven_pair()
+        results = granger_batch(
+            [(x.tolist(), y.tolist())] * 3, deadline=time.time() - 1
+        )
+        assert results == [None, None, None]
+
+    def test_batch_matches_single_calls(self):
+        x, y = _driven_pair()
+        rng = np.random.default_rng(5)
+        pairs = [
+            (x.tolist(), y.tolist()),
+            (rng.normal(size=40).tolist(), rng.normal(size=40).tolist()),
+        ]
+        assert granger_batch(pairs) == [granger_causality_test(a, b) for a, b in pairs]
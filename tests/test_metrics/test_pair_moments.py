@@ -0,0 +1,89 @@
+"""
+Tests for common.metrics.pair_moments — incrementally maintained Pearson sums.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from common.metrics.correlation_matrix import lagged_pair_stats
+from common.metrics.pair_moments import PairMoments
+
+
+def _window(rng, rows: int = 40, cols: int = 3, missing: float = 0.2):
+    m = rng.normal(50.0, 10.0, size=(rows, cols))
+    m[rng.random(size=m.shape) < missing] = np.nan
+    return m
+
+
+def _built(a, b, cols_a, cols_b, lags):
+    moments = PairMoments()
+    moments.extend(a, b, cols_a, cols_b, lags)
+    return moments
+
+
+PAIRS = ([0, 1, 2, 0], [0, 2, 1, 1], [0, 1, 3, 7])
+
+
+class TestPairMoments:
+    def test_matches_batched_pearson(self):
+        rng = np.random.default_rng(11)
+        a, b = _window(rng), _window(rng)
+        stats = _built(a, b, *PAIRS).stats()
+        ref = lagged_pair_stats(a, b, *PAIRS)["pearson"]
+        np.testing.assert_allclose(stats.r, ref.r, atol=1e-12)
+        np.testing.assert_allclose(stats.p, ref.p, atol=1e-10)
+        assert stats.n.tolist() == ref.n.tolist()
+
+    def test_slide_equals_rebuild(self):
+        rng = np.random.default_rng(5)
+        full_a, full_b = _window(rng, rows=60), _window(rng, rows=60)
+        old_a, old_b = full_a[0:40], full_b[0:40]
+        moments = _built(old_a, old_b, *PAIRS)
+
+        # Window moves 3 days; the last 2 retained days are re-synced.
+        new_a, new_b = full_a[3:43].copy(), full_b[3:43].copy()
+        new_a[-5:-3] += 1.5
+        moments.slide(old_a, old_b, new_a, new_b, evicted=3, kept=40 - 3 - 2)
+
+        ref = lagged_pair_stats(new_a, new_b, *PAIRS)["pearson"]
+        stats = moments.stats()
+        np.testing.assert_allclose(stats.r, ref.r, atol=1e-12)
+        assert stats.n.tolist() == ref.n.tolist()
+
+    def test_slide_with_new_columns(self):
+        rng = np.random.default_rng(2)
+        old = _window(rng, rows=20, cols=2)
+        moments = _built(old, old, [0], [1], [1])
+        new = np.column_stack([old[1:], rng.normal(size=19)])
+        moments.slide(old, old, new, new, evicted=1, kept=19)
+        moments.extend(new, new, [2], [0], [0])
+        ref = lagged_pair_stats(new, new, [0, 2], [1, 0], [1, 0])["pearson"]
+        np.testing.assert_allclose(moments.stats().r, ref.r, atol=1e-12)
+
+    def test_nothing_kept_rebuilds(self):
+        rng = np.random.default_rng(8)
+        old, new = _window(rng), _window(rng)
+        moments = _built(old, old, [0], [1], [0])
+        moments.slide(old, old, new, new, evicted=0, kept=0)
+        ref = lagged_pair_stats(new, new, [0], [1], [0])["pearson"]
+        assert moments.stats().r[0] == pytest.approx(ref.r[0], abs=1e-12)
+
+    def test_constant_and_short_series_not_significant(self):
+        a = np.array([[1.0], [2.0], [3.0], [4.0], [5.0], [6.0]])
+        b = np.full((6, 1), 7.25)
+        stats = _built(a, b, [0], [0], [0]).stats()
+        assert (stats.r[0], stats.p[0]) == (0.0, 1.0)
+        stats = _built(a[:4], a[:4], [0], [0], [0]).stats()
+        assert (stats.r[0], stats.p[0]) == (0.0, 1.0)
+
+    def test_copy_is_independent(self):
+        rng = np.random.default_rng(3)
+        a = _window(rng)
+        moments = _built(a, a, [0], [1], [0])
+        clone = moments.copy()
+        moments.slide(a, a, a[5:], a[5:], evicted=5, kept=35)
+        assert (
+            clone.stats().n[0] != moments.stats().n[0]
+            or clone.stats().r[0] != moments.stats().r[0]
+        )
@@ -7,7 +7,11 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 from common.metrics.adapters.base import NormalizedMetric
 from common.metrics.registry import SourceType
-from common.metrics.persistence import _to_row, persist_normalized_metrics
+from common.metrics.persistence import (
+    _to_row,
+    persist_normalized_batch,
+    persist_normalized_metrics,
+)
 
 
 # ---------------------------------------------------------------------------
@@ -130,7 +134,7 @@ class TestPersistNormalizedMetricsMissingCreds:
 
 
 def _mock_session(status: int, response_body):
-    """Build a mock aiohttp.ClientSession that returns a fake response."""
+    """Build a mock pooled aiohttp session that returns a fake response."""
     mock_resp = AsyncMock()
     mock_resp.status = status
     mock_resp.json = AsyncMock(return_value=response_body)
@@ -140,11 +144,16 @@ def _mock_session(status: int, response_body):
 
     mock_session = MagicMock()
     mock_session.post = MagicMock(return_value=mock_resp)
-    mock_session.__aenter__ = AsyncMock(return_value=mock_session)
-    mock_session.__aexit__ = AsyncMock(return_value=False)
     return mock_session
 
 
+def _mock_pool(session=None, side_effect=None):
+    """Patch the shared PostgREST pool to hand out *session*."""
+    pool = MagicMock()
+    pool.session = AsyncMock(return_value=session, side_effect=side_effect)
+    return patch("common.metrics.persistence.get_postgrest_pool", return_value=pool)
+
+
 class TestPersistNormalizedMetricsHTTP:
     @pytest.mark.asyncio
     async def test_success_returns_row_count(self):
@@ -154,7 +163,7 @@ class TestPersistNormalizedMetricsHTTP:
         ]
         fake_rows = [{"id": "1"}, {"id": "2"}]
 
-        with patch("aiohttp.ClientSession", return_value=_mock_session(201, fake_rows)):
+        with _mock_pool(_mock_session(201, fake_rows)):
             result = await persist_normalized_metrics(
                 USER_ID,
                 DATE,
@@ -169,7 +178,7 @@ class TestPersistNormalizedMetricsHTTP:
         metrics = [_make_metric()]
         fake_rows = [{"id": "1"}]
 
-        with patch("aiohttp.ClientSession", return_value=_mock_session(200, fake_rows)):
+        with _mock_pool(_mock_session(200, fake_rows)):
             result = await persist_normalized_metrics(
                 USER_ID,
                 DATE,
@@ -183,7 +192,7 @@ class TestPersistNormalizedMetricsHTTP:
     async def test_http_error_returns_zero(self):
         metrics = [_make_metric()]
 
-        with patch("aiohttp.ClientSession", return_value=_mock_session(500, "error")):
+        with _mock_pool(_mock_session(500, "error")):
             result = await persist_normalized_metrics(
                 USER_ID,
                 DATE,
@@ -198,9 +207,7 @@ class TestPersistNormalizedMetricsHTTP:
         """When Supabase returns a dict (not list), use len(rows) as accepted count."""
         metrics = [_make_metric("steps"), _make_metric("resting_hr_bpm")]
         # Non-list response
-        with patch(
-            "aiohttp.ClientSession", return_value=_mock_session(201, {"count": 2})
-        ):
+        with _mock_pool(_mock_session(201, {"count": 2})):
             result = await persist_normalized_metrics(
                 USER_ID,
                 DATE,
@@ -214,7 +221,7 @@ class TestPersistNormalizedMetricsHTTP:
     async def test_exception_returns_zero(self):
         metrics = [_make_metric()]
 
-        with patch("aiohttp.ClientSession", side_effect=Exception("network down")):
+        with _mock_pool(side_effect=Exception("network down")):
             result = await persist_normalized_metrics(
                 USER_ID,
                 DATE,
@@ -225,6 +232,131 @@ class TestPersistNormalizedMetricsHTTP:
         assert result == 0
 
 
+# ---------------------------------------------------------------------------
+# persist_normalized_batch
+# ---------------------------------------------------------------------------
+
+
+def _days(n_days: int, metrics_per_day: int = 3):
+    names = ["steps", "sleep_duration_min", "resting_hr_bpm", "hrv_ms"]
+    return [
+        (
+            USER_ID,
+            f"2026-03-{d + 1:02d}",
+            [_make_metric(names[i], float(i)) for i in range(metrics_per_day)],
+        )
+        for d in range(n_days)
+    ]
+
+
+class TestPersistNormalizedBatch:
+    @pytest.mark.asyncio
+    async def test_chunks_rows_with_minimal_return(self):
+        session = _mock_session(201, None)
+        with _mock_pool(session):
+            result = await persist_normalized_batch(
+                _days(10),
+                chunk_rows=8,
+                supabase_url="https://example.supabase.co",
+                supabase_service_key="test-key",
+            )
+        assert session.post.call_count == 4  # 30 rows / 8
+        assert [c.rows for c in result.chunks] == [8, 8, 8, 6]
+        assert result.accepted == 30
+        assert result.failed == 0
+        headers = session.post.call_args.kwargs["headers"]
+        assert "return=minimal" in headers["Prefer"]
+        url = session.post.call_args.args[0]
+        assert url.endswith("on_conflict=user_id,date,canonical_metric,source")
+
+    @pytest.mark.asyncio
+    async def test_duplicate_conflict_keys_collapsed(self):
+        session = _mock_session(201, None)
+        days = [
+            (USER_ID, DATE, [_make_metric("steps", 1.0)]),
+            (USER_ID, DATE, [_make_metric("steps", 2.0)]),
+        ]
+        with _mock_pool(session):
+            result = await persist_normalized_batch(
+                days,
+                supabase_url="https://example.supabase.co",
+                supabase_service_key="test-key",
+            )
+        rows = session.post.call_args.kwargs["json"]
+        assert len(rows) == 1
+        assert rows[0]["value"] == 2.0
+        assert result.accepted == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_reported_others_accepted(self):
+        ok = AsyncMock(status=201)
+        bad = AsyncMock(status=400, text=AsyncMock(return_value="bad row"))
+        for resp in (ok, bad):
+            resp.__aenter__ = AsyncMock(return_value=resp)
+            resp.__aexit__ = AsyncMock(return_value=False)
+        session = MagicMock()
+        session.post = MagicMock(side_effect=[ok, bad, ok])
+
+        with _mock_pool(session):
+            result = await persist_normalized_batch(
+                _days(3),
+                chunk_rows=3,
+                max_concurrency=1,
+                supabase_url="https://example.supabase.co",
+                supabase_service_key="test-key",
+            )
+        assert result.accepted == 6
+        assert result.failed == 3
+        assert result.chunks[1].status == 400
+        assert result.chunks[1].error == "bad row"
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        import asyncio
+
+        in_flight = 0
+        peak = 0
+
+        class _Resp:
+            status = 201
+
+            async def __aenter__(self):
+                nonlocal in_flight, peak
+                in_flight += 1
+                peak = max(peak, in_flight)
+                await asyncio.sleep(0.01)
+                return self
+
+            async def __aexit__(self, *exc):
+                nonlocal in_flight
+                in_flight -= 1
+                return False
+
+        session = MagicMock()
+        session.post = MagicMock(side_effect=lambda *a, **k: _Resp())
+        with _mock_pool(session):
+            result = await persist_normalized_batch(
+                _days(20),
+                chunk_rows=5,
+                max_concurrency=2,
+                supabase_url="https://example.supabase.co",
+                supabase_service_key="test-key",
+            )
+        assert len(result.chunks) == 12
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_nothing_to_write(self):
+        with _mock_pool(_mock_session(201, None)) as pool:
+            result = await persist_normalized_batch(
+                [(USER_ID, DATE, [])],
+                supabase_url="https://example.supabase.co",
+                supabase_service_key="test-key",
+            )
+        assert result.chunks == []
+        pool.assert_not_called()
+
+
 # ---------------------------------------------------------------------------
 # _build_raw_day (imported from health_data ingest module)
 # ---------------------------------------------------------------------------
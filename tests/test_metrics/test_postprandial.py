@@ -9,6 +9,7 @@ import pytest
 
 from common.metrics.postprandial import (
     GlucoseReading,
+    GlucoseSeries,
     MealEntry,
     PostprandialAnalyzer,
     _time_of_day_bucket,
@@ -212,6 +213,80 @@ class TestAnalyzeHappyPath:
         assert hi.total_carbs_g > lo.total_carbs_g
 
 
+# ---------------------------------------------------------------------------
+# GlucoseSeries / multi-window and multi-user analysis
+# ---------------------------------------------------------------------------
+
+
+class TestGlucoseSeries:
+    def test_sorted_once_and_window_inclusive(self):
+        readings = [
+            GlucoseReading(_ts(12, 10), 120.0),
+            GlucoseReading(_ts(12, 0), 100.0),
+            GlucoseReading(_ts(12, 5).replace(tzinfo=None), 110.0),  # naive = UTC
+        ]
+        series = GlucoseSeries(readings)
+        assert series.values == [100.0, 110.0, 120.0]
+        start = series.epochs_us[0]
+        assert series.window(start, start + 5 * 60 * 10**6) == (0, 2)
+        assert series.window(start + 1, start + 10 * 60 * 10**6) == (1, 3)
+
+    def test_prebuilt_series_matches_list_input(self):
+        readings = _cgm_day(day=1) + _cgm_day(day=2)
+        meals = [_meal(day=1), _meal(day=2)]
+        analyzer = PostprandialAnalyzer()
+        assert analyzer.analyze(GlucoseSeries(readings), meals) == analyzer.analyze(
+            readings, meals
+        )
+
+
+class TestAnalyzeWindows:
+    def test_each_window_matches_single_window_analyzer(self):
+        readings = _cgm_day(day=1) + _cgm_day(day=2)
+        meals = [_meal(day=1), _meal(day=2), _meal(hour=7, day=1)]
+        by_window = PostprandialAnalyzer().analyze_windows(
+            readings, meals, (180, 60, 120)
+        )
+        assert sorted(by_window) == [60, 120, 180]
+        for w, metrics in by_window.items():
+            expected = PostprandialAnalyzer(post_window_min=w).analyze(readings, meals)
+            assert metrics == expected
+
+    def test_longer_window_uses_more_readings(self):
+        by_window = PostprandialAnalyzer().analyze_windows(
+            _cgm_day(), [_meal()], (60, 120)
+        )
+        assert by_window[60][0].readings_used < by_window[120][0].readings_used
+
+    def test_empty_inputs_return_every_window(self):
+        assert PostprandialAnalyzer().analyze_windows([], [_meal()], (60, 120)) == {
+            60: [],
+            120: [],
+        }
+
+
+class TestAnalyzeMany:
+    def test_per_user_results(self):
+        analyzer = PostprandialAnalyzer()
+        out = analyzer.analyze_many(
+            {
+                "u1": (_cgm_day(day=1), [_meal(day=1)]),
+                "u2": (GlucoseSeries(_cgm_day(day=2)), [_meal(day=2), _meal(day=5)]),
+            },
+            (60, 120),
+        )
+        assert set(out) == {"u1", "u2"}
+        assert len(out["u1"][120]) == 1
+        assert len(out["u2"][120]) == 1  # day-5 meal has no CGM coverage
+        assert out["u2"][60][0].meal_id == "meal_2_12"
+
+    def test_defaults_to_analyzer_window(self):
+        out = PostprandialAnalyzer(post_window_min=90).analyze_many(
+            {"u1": (_cgm_day(), [_meal()])}
+        )
+        assert list(out["u1"]) == [90]
+
+
 # ---------------------------------------------------------------------------
 # PostprandialAnalyzer.to_meal_series()
 # ---------------------------------------------------------------------------
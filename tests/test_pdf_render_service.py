@@ -0,0 +1,139 @@
+"""Tests for common.pdf: the render service and the report layouts."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+from common.pdf.doctor_report import render_doctor_report
+from common.pdf.health_export import render_health_export
+from common.pdf.render_service import PDFRenderService
+from common.utils.process_pool import CPUProcessPool
+
+
+class _InlinePool:
+    """CPUProcessPool stand-in that runs in-process and counts calls."""
+
+    workers = 1
+
+    def __init__(self, delay: float = 0.01):
+        self.calls = 0
+        self.delay = delay
+
+    async def run(self, func, *args):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return func(*args)
+
+    def shutdown(self) -> None:
+        pass
+
+
+def _fake_renderer(payload: dict) -> bytes:
+    if payload.get("fail"):
+        raise ValueError("bad layout")
+    return f"%PDF {payload['n']}".encode()
+
+
+HEALTH_DATA = {
+    "user": {"email": "a@example.com"},
+    "profile": {"date_of_birth": "1990-01-01", "biological_sex": "female"},
+    "meds": [{"medication_name": "Metformin", "dosage": "500mg", "frequency": "daily"}],
+    "supplements": [],
+    "lab_results": [{"test_date": "2025-06-01", "test_type": "CBC", "biomarkers": []}],
+    "symptoms": [],
+    "insights": [],
+    "health_scores": [{"date": "2025-06-01", "sleep": {"sleep_score": 80}}],
+    "adherence_stats": {
+        "total_scheduled": 10,
+        "total_taken": 9,
+        "adherence_rate": 90.0,
+    },
+}
+
+
+class TestPDFRenderService:
+    @pytest.mark.asyncio
+    async def test_cached_and_coalesced_by_digest(self):
+        pool = _InlinePool()
+        service = PDFRenderService(pool=pool, ttl_s=60)
+        first, second = await asyncio.gather(
+            service.render(_fake_renderer, {"n": 1}),
+            service.render(_fake_renderer, {"n": 1}),
+        )
+        third = await service.render(_fake_renderer, {"n": 1})
+        assert first == second == third == b"%PDF 1"
+        assert pool.calls == 1
+
+        await service.render(_fake_renderer, {"n": 2})
+        stats = service.stats()
+        assert pool.calls == 2
+        assert stats["renders"] == 2
+        assert stats["coalesced"] == 1
+        assert stats["cache_hits"] == 1
+        assert stats["cache_entries"] == 2
+        assert stats["pending"] == 0
+
+    @pytest.mark.asyncio
+    async def test_cache_key_overrides_payload(self):
+        pool = _InlinePool(delay=0)
+        service = PDFRenderService(pool=pool, ttl_s=60)
+        await service.render(_fake_renderer, {"n": 1, "at": "09:00"}, {"n": 1})
+        await service.render(_fake_renderer, {"n": 1, "at": "09:05"}, {"n": 1})
+        assert pool.calls == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_and_evictions(self):
+        pool = _InlinePool(delay=0)
+        service = PDFRenderService(pool=pool, ttl_s=60, max_bytes=12)
+        with pytest.raises(ValueError):
+            await service.render(_fake_renderer, {"n": 0, "fail": True})
+        assert service.stats()["failures"] == 1
+        assert service.stats()["cache_entries"] == 0
+
+        # Each PDF is 6 bytes; the third pushes out the least recently used.
+        for n in (1, 2, 3):
+            await service.render(_fake_renderer, {"n": n})
+        assert service.stats()["cache_bytes"] == 12
+        await service.render(_fake_renderer, {"n": 1})
+        assert pool.calls == 5
+
+    @pytest.mark.asyncio
+    async def test_renders_in_worker_process(self):
+        service = PDFRenderService(pool=CPUProcessPool(workers=1, max_pending=2))
+        try:
+            pdf = await service.render(render_health_export, HEALTH_DATA)
+        finally:
+            service.shutdown()
+        assert pdf.startswith(b"%PDF")
+        assert service.stats()["max_render_ms"] > 0
+
+
+class TestLayouts:
+    def test_doctor_report_renders_from_dump(self):
+        report = {
+            "generated_at": datetime(2025, 6, 1, tzinfo=timezone.utc),
+            "date_range": {"start": "2025-05-01", "end": "2025-06-01"},
+            "summary": {
+                "overall_health_score": 78,
+                "key_metrics": [
+                    {"name": "Sleep", "value": 80, "unit": None, "status": "good"}
+                ],
+                "trends": [
+                    {
+                        "metric": "HRV",
+                        "direction": "improving",
+                        "percentage_change": 4.0,
+                    }
+                ],
+                "concerns": ["Low vitamin D"],
+                "improvements": [],
+            },
+            "health_intelligence": None,
+            "nutrition_correlations": [],
+            "condition_specific_notes": ["Type 2 diabetes"],
+            "care_plan_progress": [],
+        }
+        assert render_doctor_report(report).startswith(b"%PDF")
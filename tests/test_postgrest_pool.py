@@ -0,0 +1,67 @@
+"""Tests for common.clients.postgrest_pool (shared PostgREST session)."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from common.clients.postgrest_pool import PostgRESTPool, shared_ssl_context
+
+
+def test_ssl_context_is_cached():
+    assert shared_ssl_context() is shared_ssl_context()
+
+
+class TestPostgRESTPool:
+    @pytest.mark.asyncio
+    async def test_session_is_reused(self):
+        pool = PostgRESTPool(limit=10, limit_per_host=5, keepalive_timeout=15)
+        try:
+            first = await pool.session()
+            second = await pool.session()
+            assert first is second
+            assert not first.closed
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_then_reopen(self):
+        pool = PostgRESTPool()
+        first = await pool.session()
+        await pool.close()
+        assert first.closed
+        second = await pool.session()
+        assert second is not first
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_stats_shape(self):
+        pool = PostgRESTPool(limit=10, limit_per_host=5)
+        await pool.session()
+        stats = pool.stats()
+        await pool.close()
+
+        assert stats["open"] == 0
+        assert stats["idle"] == 0
+        assert stats["in_use"] == 0
+        assert stats["limit"] == 10
+        assert stats["limit_per_host"] == 5
+        assert stats["requests_in_flight"] == 0
+        assert stats["wait_avg_ms"] == 0.0
+        assert stats["queued_total"] == 0
+
+    def test_connection_counts_are_none_without_connector_internals(self):
+        pool = PostgRESTPool()
+        # A connector from an aiohttp release without the private fields.
+        pool._connector = SimpleNamespace(closed=False)
+        stats = pool.stats()
+        assert stats["open"] is None
+        assert stats["idle"] is None and stats["in_use"] is None
+
+    def test_env_overrides(self, monkeypatch):
+        monkeypatch.setenv("SUPABASE_POOL_LIMIT", "7")
+        monkeypatch.setenv("SUPABASE_POOL_LIMIT_PER_HOST", "3")
+        pool = PostgRESTPool()
+        assert pool.limit == 7
+        assert pool.limit_per_host == 3
@@ -0,0 +1,63 @@
+"""Tests for common.utils.process_pool and common.utils.loop_lag."""
+
+from __future__ import annotations
+
+import asyncio
+import math
+
+import pytest
+
+from common.utils.loop_lag import EventLoopLagMonitor
+from common.utils.process_pool import CPUProcessPool
+
+
+class TestCPUProcessPool:
+    @pytest.mark.asyncio
+    async def test_runs_in_worker_and_counts(self):
+        pool = CPUProcessPool(workers=1, max_pending=2)
+        try:
+            results = await asyncio.gather(
+                *(pool.run(math.factorial, n) for n in (5, 6, 7))
+            )
+            assert results == [120, 720, 5040]
+            stats = pool.stats()
+            assert stats["started"] is True
+            assert stats["submitted"] == 3
+            assert stats["completed"] == 3
+            assert stats["in_flight"] == 0
+        finally:
+            pool.shutdown()
+        assert pool.stats()["started"] is False
+
+    @pytest.mark.asyncio
+    async def test_worker_exception_propagates(self):
+        pool = CPUProcessPool(workers=1)
+        try:
+            with pytest.raises(ValueError):
+                await pool.run(math.factorial, -1)
+            assert pool.stats()["failed"] == 1
+        finally:
+            pool.shutdown()
+
+
+class TestEventLoopLagMonitor:
+    def test_stats_empty(self):
+        assert EventLoopLagMonitor().stats()["samples"] == 0
+
+    def test_stats_from_samples(self):
+        monitor = EventLoopLagMonitor(window=10)
+        for lag in (0.001, 0.002, 0.050, -0.001):
+            monitor.record(lag)
+        stats = monitor.stats()
+        assert stats["samples"] == 4
+        assert stats["last_ms"] == 0.0
+        assert stats["max_ms"] == 50.0
+        assert stats["p95_ms"] == 50.0
+
+    @pytest.mark.asyncio
+    async def test_start_stop_samples_loop(self):
+        monitor = EventLoopLagMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        await monitor.stop()
+        assert monitor.stats()["samples"] >= 1
@@ -0,0 +1,126 @@
+"""Tests for the PubMed query/article cache and NCBI rate limiter."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from apps.mvp_api.api.pubmed_cache import PubMedCache, TokenBucket
+
+PARAMS = {"db": "pubmed", "term": "Vitamin D  deficiency", "retmax": 10}
+
+
+class _Loader:
+    def __init__(self, result=("1", "2"), delay=0.01):
+        self.calls = 0
+        self.result = result
+        self.delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return None if self.result is None else list(self.result)
+
+
+class TestQueries:
+    @pytest.mark.asyncio
+    async def test_normalised_queries_share_an_entry(self):
+        cache = PubMedCache(query_ttl_s=60)
+        load = _Loader()
+        results = await asyncio.gather(
+            cache.search(PARAMS, load),
+            cache.search({**PARAMS, "term": "vitamin d deficiency "}, load),
+        )
+        assert results == [["1", "2"], ["1", "2"]]
+        assert await cache.search({**PARAMS, "api_key": "k"}, load) == ["1", "2"]
+        assert load.calls == 1
+        assert await cache.search({**PARAMS, "retmax": 20}, load) == ["1", "2"]
+        assert load.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_served_while_refreshing(self):
+        cache = PubMedCache(query_ttl_s=60, stale_s=600)
+        await cache.search(PARAMS, _Loader(result=("old",)))
+        key = cache.query_key(PARAMS)
+        value, _ = cache._local[key]
+        cache._local[key] = (value, time.time() - 120)
+
+        refresh = _Loader(result=("new",))
+        assert await cache.search(PARAMS, refresh) == ["old"]
+        await asyncio.sleep(0.05)
+        assert refresh.calls == 1
+        assert await cache.search(PARAMS, refresh) == ["new"]
+        assert cache.stats()["stale_hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_failures_are_not_cached(self):
+        cache = PubMedCache()
+        failing = _Loader(result=None)
+        assert await cache.search(PARAMS, failing) == []
+        assert await cache.search(PARAMS, failing) == []
+        assert failing.calls == 2
+
+
+class TestArticles:
+    @pytest.mark.asyncio
+    async def test_fetches_only_missing_pmids(self):
+        cache = PubMedCache()
+        requested = []
+
+        async def efetch(pmids):
+            requested.append(list(pmids))
+            return [{"pubmed_id": p, "title": f"T{p}"} for p in pmids]
+
+        await cache.articles(["1", "2"], efetch)
+        got = await cache.articles(["3", "2", "1"], efetch)
+        assert [a["pubmed_id"] for a in got] == ["3", "2", "1"]
+        assert requested == [["1", "2"], ["3"]]
+
+
+class TestTokenBucket:
+    @pytest.mark.asyncio
+    async def test_waits_then_sheds(self):
+        bucket = TokenBucket(rate_per_s=20, burst=2, max_wait_s=0.06)
+        started = time.monotonic()
+        granted = [await bucket.acquire() for _ in range(3)]
+        assert granted == [True, True, True]
+        assert time.monotonic() - started >= 0.04  # third waited for a refill
+        # Queue ahead now exceeds the max wait: shed instead of piling up.
+        results = await asyncio.gather(*(bucket.acquire() for _ in range(5)))
+        assert results.count(False) >= 3
+        assert bucket.stats()["shed"] == results.count(False)
+
+    def test_local_rate_is_split_across_workers(self):
+        bucket = TokenBucket(rate_per_s=10, burst=1, local_share=4)
+        assert bucket._local_rate == 2.5
+
+    @pytest.mark.asyncio
+    async def test_redis_error_falls_back_then_retries(self):
+        class _FlakyRedis:
+            def __init__(self):
+                self.calls = 0
+                self.fail = True
+
+            async def eval(self, *args):
+                self.calls += 1
+                if self.fail:
+                    raise ConnectionError("down")
+                return "0"
+
+        redis = _FlakyRedis()
+        bucket = TokenBucket(rate_per_s=100, burst=5, redis=redis, redis_backoff_s=60)
+        assert await bucket.acquire() is True
+        assert await bucket.acquire() is True
+        # One failed call, then the local bucket for the backoff period.
+        assert redis.calls == 1
+        assert bucket.stats()["shared"] is False
+        assert bucket.stats()["redis_errors"] == 1
+
+        redis.fail = False
+        bucket._redis_retry_at = time.monotonic()
+        assert await bucket.acquire() is True
+        assert redis.calls == 2
+        assert bucket.redis is redis
+        assert bucket.stats()["shared"] is True
@@ -0,0 +1,259 @@
+"""Tests for common.clients.response_cache (gateway per-user GET cache)."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from common.clients.response_cache import (
+    CachedResponse,
+    PassThrough,
+    ResponseCache,
+    etag_matches,
+    response_ttl,
+)
+
+PARTITION = ResponseCache.partition("Bearer token-1")
+
+
+async def _body(*chunks: bytes):
+    for chunk in chunks:
+        yield chunk
+
+
+def _loader(calls: list, status: int = 200, headers=None, chunks=(b'{"v": 1}',)):
+    async def load(upstream_etag):
+        calls.append(upstream_etag)
+        await asyncio.sleep(0)
+        return httpx.Response(
+            status,
+            headers=headers or {"content-type": "application/json"},
+            content=_body(*chunks),
+        )
+
+    return load
+
+
+class FakeRedis:
+    """Just the hash and counter commands the cache uses."""
+
+    def __init__(self):
+        self.hashes: dict = {}
+        self.counters: dict = {}
+
+    async def hget(self, key, field):
+        return self.hashes.get(key, {}).get(field)
+
+    async def get(self, key):
+        value = self.counters.get(key)
+        return None if value is None else str(value).encode()
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.hashes.pop(key, None)
+
+    async def incr(self, key):
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+    async def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def expire(self, key, seconds):
+        return True
+
+    def pipeline(self):
+        redis = self
+
+        class Pipe:
+            def __init__(self):
+                self.ops = []
+
+            def __getattr__(self, name):
+                command = getattr(redis, name)
+                return lambda *args: self.ops.append((command, args))
+
+            async def execute(self):
+                return [await command(*args) for command, args in self.ops]
+
+        return Pipe()
+
+
+class TestFreshnessRules:
+    @pytest.mark.parametrize(
+        "headers, expected",
+        [
+            ({}, 30.0),
+            ({"cache-control": "private, max-age=10"}, 10.0),
+            ({"cache-control": "max-age=9999"}, 300.0),
+            ({"cache-control": "no-cache"}, 0.0),
+            ({"cache-control": "no-store"}, None),
+            ({"set-cookie": "a=1"}, None),
+            ({"vary": "*"}, None),
+        ],
+    )
+    def test_response_ttl(self, headers, expected):
+        assert response_ttl(httpx.Headers(headers), 30.0, 300.0) == expected
+
+    def test_etag_matches_weak_and_lists(self):
+        assert etag_matches('"a", W/"b"', 'W/"b"')
+        assert etag_matches('W/"a"', '"a"')
+        assert etag_matches("*", '"x"')
+        assert not etag_matches('"a"', '"b"')
+        assert not etag_matches(None, '"b"')
+
+    def test_partition_requires_credentials(self):
+        assert ResponseCache.partition(None) is None
+        assert ResponseCache.partition("Bearer a") != ResponseCache.partition(
+            "Bearer b"
+        )
+
+
+class TestLoad:
+    @pytest.mark.asyncio
+    async def test_miss_then_hit(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        calls: list = []
+        _, outcome = await cache.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        second, again = await cache.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        assert (outcome, again) == ("miss", "hit")
+        assert calls == [None]
+        assert second.body == b'{"v": 1}'
+        assert second.etag.startswith('W/"')
+
+    @pytest.mark.asyncio
+    async def test_client_etag_answered_with_304(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        entry, _ = await cache.load(PARTITION, "/graphql", "k", _loader([]), 30)
+        response = entry.render(if_none_match=entry.etag)
+        assert response.status_code == 304
+        assert response.body == b""
+        assert dict(response.headers)["etag"] == entry.etag
+        assert entry.render(if_none_match='"other"').status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_upstream_call(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        calls: list = []
+        results = await asyncio.gather(
+            *(
+                cache.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+                for _ in range(10)
+            )
+        )
+        assert len(calls) == 1
+        assert sorted(outcome for _, outcome in results).count("coalesced") == 9
+        assert {r.body for r, _ in results} == {b'{"v": 1}'}
+
+    @pytest.mark.asyncio
+    async def test_stale_entry_revalidated_with_upstream_etag(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        calls: list = []
+        headers = {"etag": '"v1"', "cache-control": "max-age=60"}
+        first = _loader(calls, headers=headers)
+        await cache.load(PARTITION, "/graphql", "k", first, 30)
+        entry = await cache.lookup(PARTITION, "/graphql", "k")
+        entry.expires_at = time.time() - 1
+
+        not_modified = _loader(calls, status=304, headers=headers)
+        refreshed, outcome = await cache.load(
+            PARTITION, "/graphql", "k", not_modified, 30
+        )
+        assert outcome == "revalidated"
+        assert calls == [None, '"v1"']
+        assert refreshed.body == b'{"v": 1}'
+        assert refreshed.is_fresh()
+
+    @pytest.mark.asyncio
+    async def test_no_store_and_errors_not_cached(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        calls: list = []
+        no_store = _loader(calls, headers={"cache-control": "no-store"})
+        await cache.load(PARTITION, "/graphql", "a", no_store, 30)
+        await cache.load(PARTITION, "/graphql", "a", no_store, 30)
+        error = _loader(calls, status=502)
+        await cache.load(PARTITION, "/graphql", "b", error, 30)
+        await cache.load(PARTITION, "/graphql", "b", error, 30)
+        assert len(calls) == 4
+
+    @pytest.mark.asyncio
+    async def test_large_body_passes_through_uncached(self):
+        cache = ResponseCache(max_bytes=1 << 20, max_entry_bytes=8)
+        chunks = (b"0123", b"4567", b"89ab", b"cdef")
+        result, outcome = await cache.load(
+            PARTITION, "/graphql", "k", _loader([], chunks=chunks), 30
+        )
+        assert outcome == "miss"
+        assert isinstance(result, PassThrough)
+        rest = [chunk async for chunk in result.chunks]
+        assert result.head + b"".join(rest) == b"".join(chunks)
+        assert await cache.lookup(PARTITION, "/graphql", "k") is None
+
+    @pytest.mark.asyncio
+    async def test_invalidate_by_prefix(self):
+        cache = ResponseCache(max_bytes=1 << 20)
+        other = ResponseCache.partition("Bearer token-2")
+        slots = [
+            (PARTITION, "/graphql"),
+            (PARTITION, "/device-data"),
+            (other, "/graphql"),
+        ]
+        for partition, namespace in slots:
+            await cache.load(partition, namespace, "k", _loader([]), 30)
+        await cache.invalidate(PARTITION, ["/graphql"])
+        assert await cache.lookup(PARTITION, "/graphql", "k") is None
+        assert await cache.lookup(PARTITION, "/device-data", "k") is not None
+        assert await cache.lookup(other, "/graphql", "k") is not None
+
+
+class TestTiers:
+    @pytest.mark.asyncio
+    async def test_memory_bounded_by_bytes(self):
+        entry_size = CachedResponse(200, [], b"x" * 100, '"e"').nbytes
+        cache = ResponseCache(max_bytes=entry_size * 2 + 50)
+        for key in ("a", "b", "c"):
+            entry = CachedResponse(
+                200, [], b"x" * 100, '"e"', expires_at=time.time() + 30
+            )
+            await cache.store(PARTITION, "/graphql", key, entry)
+        assert cache.stats()["entries"] == 2
+        assert await cache.lookup(PARTITION, "/graphql", "a") is None
+
+    @pytest.mark.asyncio
+    async def test_redis_tier_shared_between_replicas(self):
+        redis = FakeRedis()
+        writer = ResponseCache(max_bytes=1 << 20, redis=redis)
+        reader = ResponseCache(max_bytes=1 << 20, redis=redis)
+        calls: list = []
+        await writer.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        entry, outcome = await reader.load(
+            PARTITION, "/graphql", "k", _loader(calls), 30
+        )
+        assert outcome == "hit"
+        assert entry.body == b'{"v": 1}'
+        assert calls == [None]
+
+        await writer.invalidate(PARTITION, ["/graphql"])
+        assert redis.hashes == {}
+
+    @pytest.mark.asyncio
+    async def test_invalidation_reaches_other_replicas_memory(self):
+        redis = FakeRedis()
+        writer = ResponseCache(max_bytes=1 << 20, redis=redis)
+        reader = ResponseCache(max_bytes=1 << 20, redis=redis)
+        calls: list = []
+        await reader.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        await reader.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        assert calls == [None]
+
+        await writer.invalidate(PARTITION, ["/graphql"])
+        _, outcome = await reader.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        assert outcome == "miss"
+        assert calls == [None, None]
+        # Re-remembered under the new generation, so memory serves it again.
+        _, outcome = await reader.load(PARTITION, "/graphql", "k", _loader(calls), 30)
+        assert outcome == "hit"
+        assert calls == [None, None]
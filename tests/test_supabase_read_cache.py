@@ -0,0 +1,74 @@
+"""Tests for the request-scoped Supabase read cache in usage_gate."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from apps.mvp_api.dependencies import usage_gate
+from apps.mvp_api.dependencies.usage_gate import _supabase_get, supabase_read_cache
+
+
+def _counting_fetch(calls: list):
+    async def fake_fetch(table: str, params: str) -> list:
+        calls.append((table, params))
+        await asyncio.sleep(0.01)
+        return [{"table": table, "params": params}]
+
+    return fake_fetch
+
+
+class TestSupabaseReadCache:
+    @pytest.mark.asyncio
+    async def test_no_scope_always_fetches(self):
+        calls: list = []
+        with patch.object(usage_gate, "_supabase_fetch", _counting_fetch(calls)):
+            await _supabase_get("subscriptions", "user_id=eq.1")
+            await _supabase_get("subscriptions", "user_id=eq.1")
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_identical_reads_share_one_request(self):
+        calls: list = []
+        with patch.object(usage_gate, "_supabase_fetch", _counting_fetch(calls)):
+            with supabase_read_cache() as cache:
+                results = await asyncio.gather(
+                    _supabase_get("subscriptions", "user_id=eq.1&select=tier"),
+                    _supabase_get("subscriptions", "select=tier&user_id=eq.1"),
+                    _supabase_get("subscriptions", "user_id=eq.1&select=tier"),
+                )
+        assert len(calls) == 1
+        assert cache.hits == 2
+        assert cache.misses == 1
+        assert results[0] == results[1] == results[2]
+
+    @pytest.mark.asyncio
+    async def test_returned_rows_are_independent_copies(self):
+        calls: list = []
+        with patch.object(usage_gate, "_supabase_fetch", _counting_fetch(calls)):
+            with supabase_read_cache():
+                first = await _supabase_get("profiles", "id=eq.1")
+                first[0]["table"] = "mutated"
+                second = await _supabase_get("profiles", "id=eq.1")
+        assert second[0]["table"] == "profiles"
+
+    @pytest.mark.asyncio
+    async def test_write_invalidates_table(self):
+        calls: list = []
+
+        async def fake_upsert(table, body, on_conflict=None):
+            return body
+
+        with patch.object(usage_gate, "_supabase_fetch", _counting_fetch(calls)):
+            with supabase_read_cache() as cache:
+                await _supabase_get("usage_tracking", "user_id=eq.1")
+                await _supabase_get("profiles", "id=eq.1")
+                cache_key_count = len(cache.entries)
+                wrapped = usage_gate._invalidates_reads(fake_upsert)
+                await wrapped("usage_tracking", {"usage_count": 1})
+                await _supabase_get("usage_tracking", "user_id=eq.1")
+                await _supabase_get("profiles", "id=eq.1")
+        assert cache_key_count == 2
+        assert [c[0] for c in calls] == ["usage_tracking", "profiles", "usage_tracking"]
@@ -0,0 +1,210 @@
+"""Tests for common.clients.upstream_proxy (pooled streaming gateway proxy)."""
+
+from __future__ import annotations
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.routing import Route
+
+from common.clients.upstream_proxy import (
+    ProxyRoute,
+    RouteTable,
+    UpstreamPool,
+    build_upstream_request,
+    filter_headers,
+    stream_response,
+)
+
+ROUTE = ProxyRoute("/nutrition", "nutrition")
+
+
+def _gateway(pool: UpstreamPool) -> Starlette:
+    async def handler(request: Request):
+        client = pool.client(ROUTE.service, "http://nutrition.internal", timeout=5.0)
+        upstream_request = build_upstream_request(
+            client,
+            request,
+            ROUTE.upstream_path(request.scope["raw_path"].decode("latin-1")),
+            extra_headers={"x-request-id": "req-1"},
+        )
+        upstream = await client.send(upstream_request, stream=True)
+        return stream_response(upstream)
+
+    return Starlette(
+        routes=[
+            Route(
+                "/nutrition/{path:path}",
+                handler,
+                methods=["GET", "POST", "PUT", "DELETE", "PATCH"],
+            )
+        ]
+    )
+
+
+async def _body(*chunks: bytes):
+    # Async body, as read off the network (byte bodies are pre-read by httpx).
+    for chunk in chunks:
+        yield chunk
+
+
+def _front(app: Starlette) -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://gateway"
+    )
+
+
+class TestRouteTable:
+    def test_longest_prefix_on_segment_boundary(self):
+        table = RouteTable(
+            [ProxyRoute("/health", "composite"), ProxyRoute("/health-tracking", "ht")]
+        )
+        assert table.match("/health-tracking/x").service == "ht"
+        assert table.match("/health/query").service == "composite"
+        assert table.match("/healthz") is None
+
+    def test_upstream_path(self):
+        assert ROUTE.upstream_path("/nutrition/meals/1") == "/meals/1"
+        assert ROUTE.upstream_path("/nutrition") == "/"
+        route = ProxyRoute("/graphql", "graphql_bff", upstream_prefix="/api/v1")
+        assert route.upstream_path("/graphql/query") == "/api/v1/query"
+
+
+def test_filter_headers_drops_hop_by_hop_and_connection_tokens():
+    headers = [
+        (b"Connection", b"keep-alive, X-Trace"),
+        (b"X-Trace", b"1"),
+        (b"Transfer-Encoding", b"chunked"),
+        (b"Set-Cookie", b"a=1"),
+        (b"Set-Cookie", b"b=2"),
+    ]
+    assert filter_headers(headers) == [(b"Set-Cookie", b"a=1"), (b"Set-Cookie", b"b=2")]
+
+
+class TestStreamingProxy:
+    @pytest.mark.asyncio
+    async def test_query_headers_and_body_pass_through(self):
+        seen = {}
+
+        async def upstream(request: httpx.Request) -> httpx.Response:
+            seen["url"] = str(request.url)
+            seen["headers"] = request.headers
+            seen["body"] = await request.aread()
+            return httpx.Response(
+                201,
+                headers=[
+                    ("content-type", "text/csv"),
+                    ("set-cookie", "a=1"),
+                    ("set-cookie", "b=2"),
+                    ("connection", "close"),
+                ],
+                content=_body(b"id,kcal\n", b"1,500\n"),
+            )
+
+        pool = UpstreamPool(transport=httpx.MockTransport(upstream))
+        payload = b"\x00\x01 not json \xff" * 1000
+        async with _front(_gateway(pool)) as front:
+            resp = await front.post(
+                "/nutrition/meals/upload?day=2026-01-01&tag=a&tag=b",
+                content=payload,
+                headers={"Authorization": "Bearer t", "X-Custom": "v"},
+            )
+        await pool.aclose()
+
+        assert resp.status_code == 201
+        assert resp.content == b"id,kcal\n1,500\n"
+        assert resp.headers["content-type"] == "text/csv"
+        assert resp.headers.get_list("set-cookie") == ["a=1", "b=2"]
+        assert seen["url"] == (
+            "http://nutrition.internal/meals/upload?day=2026-01-01&tag=a&tag=b"
+        )
+        assert seen["body"] == payload
+        assert seen["headers"]["authorization"] == "Bearer t"
+        assert seen["headers"]["x-custom"] == "v"
+        assert seen["headers"]["x-request-id"] == "req-1"
+        assert seen["headers"]["host"] == "nutrition.internal"
+
+    @pytest.mark.asyncio
+    async def test_forwarded_headers_are_replaced_not_duplicated(self):
+        seen = {}
+
+        async def upstream(request: httpx.Request) -> httpx.Response:
+            seen["headers"] = request.headers
+            return httpx.Response(200, content=_body(b"ok"))
+
+        pool = UpstreamPool(transport=httpx.MockTransport(upstream))
+        async with _front(_gateway(pool)) as front:
+            await front.get(
+                "/nutrition/meals",
+                headers=[
+                    ("X-Forwarded-For", "203.0.113.7, 10.0.0.2"),
+                    ("X-Forwarded-For", "10.0.0.3"),
+                    ("X-Forwarded-Proto", "gopher"),
+                    ("X-Forwarded-Host", "evil.example"),
+                ],
+            )
+        await pool.aclose()
+
+        headers = seen["headers"]
+        assert headers.get_list("x-forwarded-for") == [
+            "203.0.113.7, 10.0.0.2, 10.0.0.3, 127.0.0.1"
+        ]
+        assert headers.get_list("x-forwarded-proto") == ["http"]
+        assert headers.get_list("x-forwarded-host") == ["gateway"]
+
+    @pytest.mark.asyncio
+    async def test_get_sends_no_body(self):
+        seen = {}
+
+        async def upstream(request: httpx.Request) -> httpx.Response:
+            seen["headers"] = request.headers
+            return httpx.Response(
+                200,
+                headers={"content-type": "application/json"},
+                content=_body(b'{"ok": true}'),
+            )
+
+        pool = UpstreamPool(transport=httpx.MockTransport(upstream))
+        async with _front(_gateway(pool)) as front:
+            resp = await front.get("/nutrition/meals")
+        await pool.aclose()
+
+        assert resp.json() == {"ok": True}
+        assert "transfer-encoding" not in seen["headers"]
+
+    @pytest.mark.asyncio
+    async def test_response_relayed_chunk_by_chunk(self):
+        chunks = [b"data: %d\n\n" % i for i in range(50)]
+
+        async def upstream(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                content=_body(*chunks),
+            )
+
+        async with httpx.AsyncClient(transport=httpx.MockTransport(upstream)) as client:
+            upstream_response = await client.send(
+                client.build_request("GET", "http://sse.internal/events"), stream=True
+            )
+            response = stream_response(upstream_response)
+            received = [chunk async for chunk in response.body_iterator]
+
+        assert received == chunks
+        assert upstream_response.is_closed
+        assert dict(response.raw_headers)[b"content-type"] == b"text/event-stream"
+
+
+class TestUpstreamPool:
+    @pytest.mark.asyncio
+    async def test_one_client_per_service(self):
+        pool = UpstreamPool(http2=False)
+        first = pool.client("auth", "http://auth:8000")
+        assert pool.client("auth", "http://auth:8000") is first
+        assert pool.client("nutrition", "http://nutrition:8000") is not first
+        assert pool.stats()["requests"] == {"auth": 2, "nutrition": 1}
+        await pool.aclose()
+        assert first.is_closed
+        assert pool.client("auth", "http://auth:8000") is not first
+        await pool.aclose()
@@ -0,0 +1,184 @@
+"""Tests for atomic quota consumption and tier caching in usage_gate."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from fastapi import HTTPException
+
+from apps.mvp_api.dependencies import usage_gate
+from apps.mvp_api.dependencies.usage_gate import (
+    UsageGate,
+    consume_usage,
+    forget_user_tier,
+    get_usage_summary,
+    get_user_tier,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_state():
+    forget_user_tier()
+    usage_gate._missing_rpcs.clear()
+    yield
+    forget_user_tier()
+    usage_gate._missing_rpcs.clear()
+
+
+def _fake_rpc(calls: list, rows):
+    async def fake_rpc(function: str, body: dict):
+        calls.append((function, body))
+        return rows
+
+    return fake_rpc
+
+
+class TestConsumeUsage:
+    @pytest.mark.asyncio
+    async def test_single_rpc_round_trip(self):
+        calls: list = []
+        rows = [{"tier": "free", "usage_limit": 3, "used": 2, "allowed": True}]
+        with patch.object(
+            usage_gate, "_supabase_rpc", _fake_rpc(calls, rows)
+        ), patch.object(usage_gate, "_supabase_fetch") as fetch:
+            decision = await consume_usage("u1", "ai_insights")
+        assert decision == usage_gate.UsageDecision("free", 3, 2, True)
+        assert len(calls) == 1
+        assert calls[0][0] == "consume_usage"
+        assert calls[0][1]["p_limits"] == {"free": 3, "pro": -1, "pro_plus": -1}
+        fetch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_rpc_result_populates_tier_cache(self):
+        calls: list = []
+        rows = [{"tier": "pro_plus", "usage_limit": -1, "used": 0, "allowed": True}]
+        with patch.object(usage_gate, "_supabase_rpc", _fake_rpc(calls, rows)):
+            await consume_usage("u1", "ai_agents")
+            # Unlimited for the cached tier: answered without another round trip
+            decision = await consume_usage("u1", "ai_agents")
+            assert await get_user_tier("u1") == "pro_plus"
+        assert decision.allowed
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_cached_unavailable_feature_denied_in_process(self):
+        calls: list = []
+        usage_gate._remember_tier("u1", "free")
+        with patch.object(usage_gate, "_supabase_rpc", _fake_rpc(calls, [])):
+            decision = await consume_usage("u1", "doctor_prep")
+        assert not decision.allowed
+        assert decision.limit == 0
+        assert calls == []
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_rpc_missing(self):
+        usage_gate._missing_rpcs["consume_usage"] = usage_gate.time.monotonic()
+        upserts: list = []
+
+        async def fake_fetch(table: str, params: str) -> list:
+            if table == "subscriptions":
+                return [{"tier": "pro"}]
+            return [{"usage_count": 1}]
+
+        async def fake_upsert(table, body, on_conflict=None):
+            upserts.append((table, body, on_conflict))
+            return body
+
+        with patch.object(usage_gate, "_supabase_fetch", fake_fetch), patch.object(
+            usage_gate, "_supabase_upsert", fake_upsert
+        ), patch.object(usage_gate, "_supabase_rpc") as rpc:
+            decision = await consume_usage("u1", "correlations")
+        rpc.assert_not_called()
+        assert decision == usage_gate.UsageDecision("pro", 3, 2, True)
+        assert upserts[0][1]["usage_count"] == 2
+        assert upserts[0][2] == "user_id,feature,week_start"
+
+
+class TestTierCache:
+    @pytest.mark.asyncio
+    async def test_tier_read_once_within_ttl(self):
+        calls: list = []
+
+        async def fake_fetch(table: str, params: str) -> list:
+            calls.append(table)
+            return [{"tier": "pro"}]
+
+        with patch.object(usage_gate, "_supabase_fetch", fake_fetch):
+            assert await get_user_tier("u1") == "pro"
+            assert await get_user_tier("u1") == "pro"
+            forget_user_tier("u1")
+            assert await get_user_tier("u1") == "pro"
+        assert calls == ["subscriptions", "subscriptions"]
+
+    @pytest.mark.asyncio
+    async def test_expired_entry_refetched(self):
+        usage_gate._tier_cache["u1"] = ("pro", usage_gate.time.monotonic() - 1)
+
+        async def fake_fetch(table: str, params: str) -> list:
+            return []
+
+        with patch.object(usage_gate, "_supabase_fetch", fake_fetch):
+            assert await get_user_tier("u1") == "free"
+
+    def test_cache_is_bounded(self):
+        with patch.object(usage_gate, "TIER_CACHE_MAX_USERS", 2):
+            for uid in ("a", "b", "c"):
+                usage_gate._remember_tier(uid, "free")
+        assert list(usage_gate._tier_cache) == ["b", "c"]
+
+
+class TestUsageSummary:
+    @pytest.mark.asyncio
+    async def test_single_batched_read(self):
+        calls: list = []
+        usage_gate._remember_tier("u1", "pro")
+
+        async def fake_fetch(table: str, params: str) -> list:
+            calls.append((table, params))
+            return [
+                {"feature": "correlations", "usage_count": 2},
+                {"feature": "ai_agents", "usage_count": 7},
+            ]
+
+        with patch.object(usage_gate, "_supabase_fetch", fake_fetch):
+            summary = await get_usage_summary("u1")
+        assert len(calls) == 1
+        assert "feature=" not in calls[0][1]
+        assert summary["correlations"] == {"used": 2, "limit": 3, "period": "week"}
+        assert summary["ai_agents"]["used"] == 7
+        assert summary["predictions"]["used"] == 0
+        assert summary["ai_insights"]["used"] == 0  # unlimited
+
+
+class TestUsageGate:
+    @pytest.mark.asyncio
+    async def test_exhausted_quota_raises_403(self):
+        rows = [{"tier": "free", "usage_limit": 3, "used": 3, "allowed": False}]
+
+        async def fake_user(request):
+            return {"id": "u1"}
+
+        with patch.object(usage_gate, "USE_SANDBOX", False), patch.object(
+            usage_gate, "get_current_user", fake_user
+        ), patch.object(usage_gate, "_supabase_rpc", _fake_rpc([], rows)):
+            with pytest.raises(HTTPException) as exc_info:
+                await UsageGate("ai_insights")(request=None)
+        detail = exc_info.value.detail
+        assert exc_info.value.status_code == 403
+        assert detail["used"] == 3
+        assert detail["limit"] == 3
+        assert detail["tier"] == "free"
+
+    @pytest.mark.asyncio
+    async def test_allowed_returns_user(self):
+        rows = [{"tier": "free", "usage_limit": 3, "used": 1, "allowed": True}]
+
+        async def fake_user(request):
+            return {"id": "u1"}
+
+        with patch.object(usage_gate, "USE_SANDBOX", False), patch.object(
+            usage_gate, "get_current_user", fake_user
+        ), patch.object(usage_gate, "_supabase_rpc", _fake_rpc([], rows)):
+            user = await UsageGate("ai_insights")(request=None)
+        assert user == {"id": "u1"}
@@ -0,0 +1,143 @@
+"""Tests for common.ai.vector_index and the literature index built on it."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from unittest.mock import patch
+from urllib.parse import unquote
+
+import numpy as np
+import pytest
+
+from apps.mvp_api.api import export_stream
+from apps.mvp_api.api.literature_index import LiteratureIndex
+from common.ai.vector_index import VectorIndex
+
+DIM = 16
+
+
+def _corpus(n: int, seed: int = 1):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, DIM)).astype(np.float32)
+    return [f"a{i}" for i in range(n)], vectors
+
+
+def _brute_force(vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = unit @ (query / np.linalg.norm(query))
+    return [f"a{i}" for i in np.argsort(-scores)[:k]]
+
+
+class TestVectorIndex:
+    def test_flat_search_matches_brute_force(self):
+        ids, vectors = _corpus(300)
+        index = VectorIndex()
+        index.build(ids, vectors)
+        query = vectors[7] + 0.1
+        hits = index.search(query, 5)
+        assert [aid for aid, _ in hits] == _brute_force(vectors, query, 5)
+        assert hits[0][1] == pytest.approx(max(s for _, s in hits))
+        assert index.search(np.ones(DIM + 1), 5) == []
+
+    def test_delta_shadows_snapshot_rows(self):
+        ids, vectors = _corpus(50)
+        index = VectorIndex()
+        index.build(ids, vectors)
+        target = np.zeros(DIM, dtype=np.float32)
+        target[0] = 1.0
+        index.upsert("a3", target)  # replaces an existing row
+        index.upsert("new", -target)
+        assert len(index) == 51
+        assert index.search(target, 1) == [("a3", pytest.approx(1.0))]
+        assert index.search(-target, 1)[0][0] == "new"
+        assert [aid for aid, _ in index.search(target, 51)].count("a3") == 1
+
+    def test_snapshot_is_memory_mapped_and_shared(self, tmp_path):
+        ids, vectors = _corpus(100)
+        writer = VectorIndex(path=str(tmp_path))
+        writer.build(ids, vectors)
+        reader = VectorIndex(path=str(tmp_path))
+        assert reader.load() is True
+        assert reader.load() is False  # already on the current version
+        assert reader.stats()["mapped"] is True
+        query = vectors[42]
+        assert reader.search(query, 3) == writer.search(query, 3)
+
+    def test_updates_during_rebuild_survive_install(self):
+        ids, vectors = _corpus(20)
+        index = VectorIndex()
+        since = index.mark()
+        snapshot = index.prepare(ids, vectors)
+        late = np.full(DIM, 5.0, dtype=np.float32)
+        index.upsert("late", late)
+        index.install(snapshot, since)
+        assert len(index) == 21
+        assert index.search(late, 1)[0][0] == "late"
+
+    def test_ivf_scans_a_fraction_with_good_recall(self):
+        rng = np.random.default_rng(3)
+        centers = rng.normal(size=(8, DIM)) * 5
+        vectors = np.concatenate(
+            [c + rng.normal(size=(100, DIM)) for c in centers]
+        ).astype(np.float32)
+        ids = [f"a{i}" for i in range(len(vectors))]
+        index = VectorIndex(ivf_lists=8, nprobe=2)
+        index.build(ids, vectors)
+        assert index.stats()["mode"] == "ivf"
+        query = vectors[250]
+        expected = _brute_force(vectors, query, 10)
+        got = [aid for aid, _ in index.search(query, 10)]
+        assert len(set(got) & set(expected)) >= 8
+        assert index.stats()["avg_rows_scanned"] < len(vectors) / 2
+
+
+class TestLiteratureIndex:
+    @pytest.mark.asyncio
+    async def test_rebuild_pages_every_embedding(self):
+        ids, vectors = _corpus(25)
+        rows = [
+            {
+                "id": f"e{i:03d}",
+                "created_at": f"2025-01-{1 + i:02d}T00:00:00+00:00",
+                "article_id": aid,
+                "embedding": vec.tolist() if i % 2 else str(vec.tolist()),
+            }
+            for i, (aid, vec) in enumerate(zip(ids, vectors))
+        ][::-1]
+        calls = []
+
+        async def fake_get(table, params, timeout=None):
+            calls.append(params)
+            await asyncio.sleep(0)
+            page = rows
+            after = re.search(r"id\.lt\.([^,)&]+)", params)
+            if after:
+                last = unquote(after.group(1)).strip('"')
+                page = rows[[r["id"] for r in rows].index(last) + 1 :]
+            return page[: int(re.search(r"limit=(\d+)", params).group(1))]
+
+        literature = LiteratureIndex(path=None, refresh_s=3600)
+        prepared = []
+        prepare = literature.index.prepare
+
+        def spy(ids, vectors):
+            prepared.append(vectors)
+            return prepare(ids, vectors)
+
+        literature.index.prepare = spy
+        with patch.object(
+            export_stream, "_supabase_get_strict", fake_get
+        ), patch.object(export_stream, "PAGE_SIZE", 10):
+            index = await literature.ready()
+            # Pages are stacked as float32, never held as Python float lists.
+            assert prepared[0].dtype == np.float32
+            assert prepared[0].shape == (25, vectors.shape[1])
+            assert len(calls) == 3
+            await literature.ready()  # fresh: no second download
+        assert len(calls) == 3
+        assert len(index) == 25
+        assert index.search(vectors[4], 1)[0][0] == "a4"
+        literature.add("fresh", vectors[4] * 2)
+        assert {aid for aid, _ in index.search(vectors[4], 2)} == {"a4", "fresh"}
+        assert literature.stats()["rebuilds"] == 1